@@ -7,10 +7,11 @@ import re
 from System.Collections.Generic import List
 from Autodesk.Revit.DB import ElementId, BuiltInParameter
 from pyrevit import forms, script
-from manalib import revit_utils
+from manalib import revit_utils, profiling
 
 doc = __revit__.ActiveUIDocument.Document
 logger = script.get_logger()
+CMD_ID = "manatools_exportarpdfs"
 
 
 # --- HELPER: BUSCA DE DADOS ---
@@ -116,7 +117,7 @@ if not dest_folder:
     script.exit()
 
 # --- 4. Execução ---
-with forms.ProgressBar(title="Exportando...", cancellable=True) as pb:
+with profiling.run(CMD_ID), forms.ProgressBar(title="Exportando...", cancellable=True) as pb:
     if export_mode == "Arquivo Único":
         try:
             options = revit_utils.create_pdf_options(doc)
@@ -129,7 +130,8 @@ with forms.ProgressBar(title="Exportando...", cancellable=True) as pb:
             if name:
                 options.FileName = safe_filename(name)
                 ids = List[ElementId]([s.Id for s in valid_sheets])
-                doc.Export(dest_folder, ids, options)
+                with profiling.span("doc.Export", sheets=ids.Count):
+                    doc.Export(dest_folder, ids, options)
                 forms.toast("Arquivo único gerado!", click=dest_folder)
         except Exception as e:
             forms.alert(str(e))
@@ -158,12 +160,13 @@ with forms.ProgressBar(title="Exportando...", cancellable=True) as pb:
 
                 ids = List[ElementId]()
                 ids.Add(sheet.Id)
-                doc.Export(dest_folder, ids, options)
+                with profiling.span("doc.Export", sheet=filename):
+                    doc.Export(dest_folder, ids, options)
 
                 count_success += 1
 
             except Exception as e:
-                pass
+                profiling.failure("doc.Export", e)
             pb.update_progress(i + 1, len(valid_sheets))
 
         if count_success > 0:
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Exporta o snapshot colunar do modelo (manalib.snapshot) para quantitativos
+e checagens em lote fora do Revit.
+"""
+from pyrevit import forms, script
+from manalib import snapshot, text_utils, profiling
+
+doc = __revit__.ActiveUIDocument.Document
+logger = script.get_logger()
+CMD_ID = "manatools_exportarsnapshot"
+
+path = forms.save_file(file_ext=snapshot.EXTENSION.lstrip("."),
+                       default_name=text_utils.sanitize_filename(doc.Title))
+if not path:
+    script.exit()
+
+with profiling.run(CMD_ID):
+    try:
+        writer = snapshot.export(doc, path)
+    except Exception as e:
+        logger.error("Falha ao exportar snapshot: {}".format(e))
+        forms.alert("Falha ao exportar snapshot:\n{}".format(e), exitscript=True)
+
+forms.toast("{} ambientes | {} paredes | {} vãos".format(
+    writer.rows("rooms"), writer.rows("walls"), writer.rows("openings")), title="Snapshot exportado")
@@ -11,7 +11,7 @@ from Autodesk.Revit.DB import *
 from Autodesk.Revit.UI.Selection import ObjectType
 from Autodesk.Revit.Exceptions import OperationCanceledException
 from pyrevit import forms, script, revit
-from manalib import config_manager
+from manalib import config_manager, room_geometry, family_batch, doc_index, batch, stamps, finish_sync, finish_updater, profiling
 
 doc = __revit__.ActiveUIDocument.Document
 uidoc = __revit__.ActiveUIDocument
@@ -19,6 +19,9 @@ logger = script.get_logger()
 
 CMD_ID = "manatools_criarforro"
 
+# Limites dos ambientes são extraídos uma única vez por sessão
+geo_cache = room_geometry.get_cache(doc)
+
 # --- HELPER: SELEÇÃO ROBUSTA (Reutilizável) ---
 def get_selected_rooms():
     selection = revit.get_selection()
@@ -43,6 +46,10 @@ def get_selected_rooms():
 
     for s in selection: process(s)
     
+    # Sem seleção: ambientes alterados desde a última geração (sincronização opcional)
+    if not rooms:
+        rooms.extend(finish_updater.offer_pending(doc, CMD_ID))
+    
     if not rooms:
         try:
             with forms.WarningBar(title="Selecione Ambientes ou Tags (ESC para cancelar):"):
@@ -53,122 +60,16 @@ def get_selected_rooms():
             
     return rooms
 
-# --- HELPER: GEOMETRIA Z=0 ---
-def flatten_loop_to_z(curve_loop, z_val=0.0):
-    """Reconstrói um CurveLoop forçando todas as coordenadas Z para um valor fixo."""
-    curves = []
-    iterator = curve_loop
-    
-    if isinstance(curve_loop, CurveLoop):
-        iterator = curve_loop
-        
-    for curve in iterator:
-        p0 = curve.GetEndPoint(0)
-        p1 = curve.GetEndPoint(1)
-        new_p0 = XYZ(p0.X, p0.Y, z_val)
-        new_p1 = XYZ(p1.X, p1.Y, z_val)
-        
-        try:
-            if isinstance(curve, Line):
-                curves.append(Line.CreateBound(new_p0, new_p1))
-            else:
-                trans = XYZ(0, 0, z_val - p0.Z)
-                curves.append(curve.CreateTransformed(Transform.CreateTranslation(trans)))
-        except:
-            pass 
-            
-    try:
-        return CurveLoop.Create(curves)
-    except:
-        return None
-
-# --- HELPER: DADOS DO PROJETO ---
-def get_ceiling_types():
-    return FilteredElementCollector(doc).OfClass(CeilingType).ToElements()
-
-def get_line_based_families():
-    symbols = FilteredElementCollector(doc).OfClass(FamilySymbol).OfCategory(BuiltInCategory.OST_GenericModel).ToElements()
-    valid = []
-    for s in symbols:
-        try:
-            if s.Family.FamilyPlacementType == FamilyPlacementType.CurveDrivenStructural or \
-               s.Family.FamilyPlacementType == FamilyPlacementType.CurveBased:
-                valid.append(s)
-        except: pass
-    return valid
-
-def get_name(e):
-    return Element.Name.GetValue(e)
-
 # --- CORE LOGIC: TABICA (SIMPLIFICADO + VERTICAL FLIP) ---
-def create_tabica_instance(doc, curve, symbol, level, force_invert_h=False, force_invert_z=False):
+def tabica_curve(curve, force_invert_h=False):
     """
-    Cria a tabica e aplica inversões.
+    Curva final da tabica.
     force_invert_h: Inverte a linha (Horizontal Flip)
-    force_invert_z: Espelha a geometria (Vertical Flip)
     """
+    if not force_invert_h: return curve
     try:
-        p0 = curve.GetEndPoint(0)
-        p1 = curve.GetEndPoint(1)
-        
-        final_curve = curve
-        
-        # Inversão Horizontal (Linha)
-        if force_invert_h:
-            final_curve = Line.CreateBound(p1, p0)
-            
-        instance = doc.Create.NewFamilyInstance(final_curve, symbol, level, Structure.StructuralType.NonStructural)
-        
-        # Inversão Vertical (Mirror Z)
-        # O Revit não tem Flip Vertical nativo para genéricos.
-        # Usamos ElementTransformUtils.Mirror em torno de um plano horizontal.
-        if force_invert_z and instance:
-            doc.Regenerate()
-            
-            # Plano Horizontal passando pela linha (Z da linha)
-            # Normal do plano = Z
-            # Origem = qualquer ponto da linha (p0)
-            # Mas p0 pode ser relativo ao nível 0 se viermos de flatten_loop.
-            # O Mirror precisa ser no espaço 3D real.
-            
-            # Se a linha está em Z=0, e a instância no Nível, o plano deve ser no nível.
-            # Porém, queremos flipar "em torno de si mesma". 
-            # O eixo de espelhamento deve ser o plano XY local da instância.
-            
-            # Cria plano de espelho
-            # Plane.CreateByNormalAndOrigin(XYZ.BasisZ, p0) requer XYZ, XYZ
-            # Nota: p0 da curva flattened é Z=0. A instância está no nível.
-            
-            # Se espelharmos pelo plano Z=0, a tabica vai parar lá embaixo se o nível for alto.
-            # Precisamos espelhar e manter a altura? 
-            # O Mirror inverte a geometria mas também a posição Z se não for pelo centro.
-            
-            # ESTRATÉGIA SEGURA: Mirror e depois move de volta?
-            # Ou Mirror pelo plano que passa pelo Location Point Z da instância?
-            
-            # Vamos tentar pegar o Z real da instância (após colocação)
-            # Para LineBased, Location é LocationCurve.
-            
-            # Se espelharmos pelo plano horizontal que passa pelo nível da instância, ela fica de cabeça para baixo no mesmo nível.
-            # Plane Z = Level Elevation?
-            
-            plane_z = level.Elevation
-            mirror_plane = Plane.CreateByNormalAndOrigin(XYZ.BasisZ, XYZ(0,0, plane_z))
-            
-            # Mirror cria cópia e retorna IDs
-            new_ids = ElementTransformUtils.MirrorElement(doc, instance.Id, mirror_plane)
-            
-            # Deleta original
-            doc.Delete(instance.Id)
-            
-            # Retorna nova instância
-            if new_ids:
-                return doc.GetElement(new_ids[0])
-            else:
-                return None
-
-        return instance
-    except Exception as e:
+        return Line.CreateBound(curve.GetEndPoint(1), curve.GetEndPoint(0))
+    except:
         return None
 
 # --- CORE LOGIC: FORRO ---
@@ -176,38 +77,23 @@ def create_ceiling_geometry(room, offset_dist):
     """Gera o CurveLoop do forro com offset negativo."""
     loops = []
     
-    opt = SpatialElementBoundaryOptions()
-    opt.SpatialElementBoundaryLocation = SpatialElementBoundaryLocation.Finish
+    flat_loops = geo_cache.flat_loops(room)
+    if not flat_loops: return None
     
-    segments_list = room.GetBoundarySegments(opt)
-    
-    if not segments_list: return None
-    
-    for segments in segments_list:
-        curves = []
-        for seg in segments:
-            curves.append(seg.GetCurve())
-            
-        try:
-            original_loop = flatten_loop_to_z(curves, 0.0)
-            if not original_loop: continue
-            
-            if abs(offset_dist) > 0.001:
-                try:
-                    offset_loops = CurveLoop.CreateViaOffset(original_loop, -offset_dist, XYZ.BasisZ)
-                    
-                    if isinstance(offset_loops, CurveLoop):
-                        loops.append(offset_loops)
-                    else:
-                        for ol in offset_loops:
-                            loops.append(ol)
-                except Exception as offset_err:
-                    loops.append(original_loop)
-            else:
-                loops.append(original_loop)
+    for original_loop in flat_loops:
+        if abs(offset_dist) > 0.001:
+            try:
+                offset_loops = CurveLoop.CreateViaOffset(original_loop, -offset_dist, XYZ.BasisZ)
                 
-        except Exception as e:
-            pass
+                if isinstance(offset_loops, CurveLoop):
+                    loops.append(offset_loops)
+                else:
+                    for ol in offset_loops:
+                        loops.append(ol)
+            except Exception as offset_err:
+                loops.append(original_loop)
+        else:
+            loops.append(original_loop)
             
     return loops
 
@@ -215,32 +101,18 @@ def get_tabica_curves(room, offset_dist):
     """Retorna curvas para a tabica (com offset se necessário)."""
     tabica_curves = []
     
-    opt = SpatialElementBoundaryOptions()
-    opt.SpatialElementBoundaryLocation = SpatialElementBoundaryLocation.Finish
-    segments_list = room.GetBoundarySegments(opt)
-    
-    if not segments_list: return []
-    
     if abs(offset_dist) < 0.001:
-        for segments in segments_list:
-            for seg in segments:
-                elem = doc.GetElement(seg.ElementId)
+        for loop in geo_cache.boundary_loops(room):
+            for c, host_id in loop:
+                elem = geo_cache.get_element(host_id)
                 if isinstance(elem, Wall):
-                    c = seg.GetCurve()
                     p0 = c.GetEndPoint(0)
                     p1 = c.GetEndPoint(1)
                     line = Line.CreateBound(XYZ(p0.X, p0.Y, 0), XYZ(p1.X, p1.Y, 0))
                     tabica_curves.append(line)
         return tabica_curves
 
-    for segments in segments_list:
-        curves = []
-        for seg in segments:
-            curves.append(seg.GetCurve())
-            
-        original_loop = flatten_loop_to_z(curves, 0.0)
-        if not original_loop: continue
-        
+    for original_loop in geo_cache.flat_loops(room):
         try:
             offset_loops = CurveLoop.CreateViaOffset(original_loop, -offset_dist, XYZ.BasisZ)
             
@@ -262,17 +134,19 @@ def get_tabica_curves(room, offset_dist):
 rooms = get_selected_rooms()
 if not rooms: script.exit()
 
-all_ceilings = sorted(get_ceiling_types(), key=get_name)
-all_tabicas = sorted(get_line_based_families(), key=get_name)
+# Catálogos da sessão (nomes já resolvidos e ordenados)
+project_index = doc_index.get_index(doc)
+all_ceilings = project_index.ceiling_types()
+all_tabicas = project_index.line_based_symbols()
 
 class ForroWindow(forms.WPFWindow):
     def __init__(self):
         xaml_file = os.path.join(os.path.dirname(__file__), 'script.xaml')
         forms.WPFWindow.__init__(self, xaml_file)
         
-        self.cb_ceiling_type.ItemsSource = [get_name(c) for c in all_ceilings]
+        self.cb_ceiling_type.ItemsSource = all_ceilings.names()
         
-        tabica_names = ["(Nenhum)"] + [get_name(t) for t in all_tabicas]
+        tabica_names = ["(Nenhum)"] + all_tabicas.names()
         self.cb_tabica_type.ItemsSource = tabica_names
         
         # --- CARREGA CONFIGURAÇÕES ---
@@ -332,7 +206,7 @@ if not win.run_script: script.exit()
 if not win.cb_ceiling_type.SelectedItem: script.exit()
 
 sel_ceil_name = win.cb_ceiling_type.SelectedItem
-ceil_type = next((x for x in all_ceilings if get_name(x) == sel_ceil_name), None)
+ceil_type = all_ceilings.get(sel_ceil_name)
 
 sel_tab_name = win.cb_tabica_type.SelectedItem
 tab_symbol = None
@@ -345,7 +219,7 @@ if sel_tab_name == "(Nenhum)":
     do_invert_h = False
     do_invert_z = False
 else:
-    tab_symbol = next((x for x in all_tabicas if get_name(x) == sel_tab_name), None)
+    tab_symbol = all_tabicas.get(sel_tab_name)
     do_tabica = win.chk_create_tabica.IsChecked
     do_invert_h = win.chk_invert_tabica.IsChecked
     do_invert_z = win.chk_invert_z_tabica.IsChecked
@@ -368,72 +242,114 @@ try:
 except:
     forms.alert("Altura inválida.", exitscript=True)
 
-t = Transaction(doc, "Criar Forro e Tabica")
-t.Start()
-
-count_forros = 0
-count_tabicas = 0
+# Forros/tabicas já gerados (carimbo): ambientes sem alteração são pulados,
+# os alterados têm os elementos antigos substituídos
+stamp_index = stamps.StampIndex(doc, CMD_ID)
+settings = (ceil_type.Id, tab_symbol.Id if (do_tabica and tab_symbol) else None, height_ft,
+            gesso_gap_ft, tabica_gap_ft, tabica_z_offset_ft, do_invert_h, do_invert_z)
+
+tabica_symbol = tab_symbol if do_tabica else None
+
+def room_changed(room):
+    """Hash do ambiente; None se forro/tabicas não mudaram desde a última execução."""
+    digest = stamps.digest(geo_cache.outline(room), settings)
+    if stamp_index.is_current(stamps.room_source(room), digest): return None
+    return digest
+
+def create_ceiling(room):
+    """Forro do ambiente, ou None."""
+    loops = create_ceiling_geometry(room, gesso_gap_ft)
+    if not loops: return None
+    valid_loops = [l for l in loops if isinstance(l, CurveLoop) and not l.IsOpen()]
+    if not valid_loops: return None
+    try:
+        with profiling.span("Ceiling.Create"):
+            c = Ceiling.Create(doc, valid_loops, ceil_type.Id, room.LevelId)
+        p_off = c.get_Parameter(BuiltInParameter.CEILING_HEIGHTABOVELEVEL_PARAM)
+        if p_off: p_off.Set(height_ft)
+        return c
+    except Exception as ce:
+        profiling.failure("Ceiling.Create", ce)
+        return None
 
-try:
-    if do_tabica and tab_symbol and not tab_symbol.IsActive:
-        tab_symbol.Activate()
+def create_chunk(entries):
+    """Forros e tabicas de um bloco de ambientes (tabicas numa única criação)."""
+    if tabica_symbol is not None and not tabica_symbol.IsActive:
+        tabica_symbol.Activate()
         doc.Regenerate()
+    tabica_batch = family_batch.LineBasedBatch(doc, tabica_symbol) if tabica_symbol is not None else None
+    tabica_levels = []
+    tabica_keys = []
+
+    created_by_room = {}
+    for room, digest in entries:
+        key = batch.element_key(room)
+        stamp_index.delete_stale(stamps.room_source(room))
+        created_by_room[key] = []
+        ceiling = create_ceiling(room)
+        if ceiling is not None:
+            stamps.stamp(ceiling, stamps.room_source(room), CMD_ID, digest)
+            created_by_room[key].append(ceiling)
+
+        if tabica_batch is not None:
+            # Não precisamos mais do centro da sala para a lógica simplificada
+            for curve in get_tabica_curves(room, tabica_gap_ft):
+                final_curve = tabica_curve(curve, force_invert_h=do_invert_h)
+                if final_curve:
+                    tabica_batch.add(final_curve, room.Level)
+                    tabica_levels.append(room.Level)
+                    tabica_keys.append((key, stamps.room_source(room), digest))
 
-    for room in rooms:
-        level_id = room.LevelId
-        
-        loops = create_ceiling_geometry(room, gesso_gap_ft)
-        
-        if loops:
-            try:
-                valid_loops = []
-                for l in loops:
-                    if isinstance(l, CurveLoop):
-                        if not l.IsOpen():
-                            valid_loops.append(l)
-                
-                if valid_loops:
-                    c = Ceiling.Create(doc, valid_loops, ceil_type.Id, level_id)
-                    p_off = c.get_Parameter(BuiltInParameter.CEILING_HEIGHTABOVELEVEL_PARAM)
-                    if p_off: p_off.Set(height_ft)
-                    count_forros += 1
+    if tabica_batch is not None:
+        tabicas = tabica_batch.create()
+
+        # Inversão Vertical (Mirror Z)
+        # O Revit não tem Flip Vertical nativo para genéricos: espelhamos pelo
+        # plano horizontal do nível, um MirrorElements por nível, antes de gravar a elevação.
+        if do_invert_z:
+            family_batch.mirror_vertical(doc, tabicas, [lvl.Elevation for lvl in tabica_levels])
 
-            except Exception as ce:
-                pass
+        family_batch.set_offsets(tabicas, height_ft + tabica_z_offset_ft)
+        for tab, (key, source, digest) in zip(tabicas, tabica_keys):
+            if tab is None: continue
+            stamps.stamp(tab, source, CMD_ID, digest)
+            created_by_room[key].append(tab)
+    return created_by_room
 
-        if do_tabica and tab_symbol:
-            # Não precisamos mais do centro da sala para a lógica simplificada
-            curves_to_draw = get_tabica_curves(room, tabica_gap_ft)
-            
-            for curve in curves_to_draw:
-                # Passa os inverters
-                inst = create_tabica_instance(
-                    doc, curve, tab_symbol, room.Level, 
-                    force_invert_h=do_invert_h,
-                    force_invert_z=do_invert_z
-                )
-                
-                if inst:
-                  
-                    p_elev = inst.get_Parameter(BuiltInParameter.INSTANCE_ELEVATION_PARAM)
-                    if not p_elev or p_elev.IsReadOnly:
-                        p_elev = inst.get_Parameter(BuiltInParameter.INSTANCE_FREE_HOST_OFFSET_PARAM)
-                    
-                    final_z = height_ft + tabica_z_offset_ft
-                    
-                    if p_elev: 
-                        p_elev.Set(final_z)
+resume = batch.ask_resume(doc, CMD_ID, settings)
+
+try:
+    count_forros = 0
+    count_tabicas = 0
+    with profiling.run(CMD_ID), batch.BatchExecutor(doc, "Criar Forro e Tabica", CMD_ID, resume=resume, settings=settings) as executor:
+        pending = executor.pending(rooms)
+        entries = []
+        for room in pending:
+            digest = room_changed(room)
+            if digest is not None: entries.append((room, digest))
+
+        # Cada bloco de ambientes: forros + uma NewFamilyInstances2 numa Transaction própria
+        for chunk in batch.chunked(entries, executor.chunk_size):
+            created = executor.apply_block([batch.element_key(r) for r, _ in chunk], lambda: create_chunk(chunk))
+            for elements in (created or {}).values():
+                for e in elements:
+                    if isinstance(e, Ceiling):
+                        count_forros += 1
                     else:
-                        p_custom = inst.LookupParameter("Elevação") or inst.LookupParameter("Offset") or inst.LookupParameter("Altura")
-                        if p_custom: p_custom.Set(final_z)
-                    
-                    count_tabicas += 1
+                        count_tabicas += 1
 
-    t.Commit()
+    run = executor.report
+    failed = run.failed_keys()
+    finish_sync.mark_synced(doc, CMD_ID, [k for k in map(batch.element_key, rooms) if k not in failed])
     msg = "Sucesso: {} Forros".format(count_forros)
     if do_tabica: msg += " | {} Tabicas".format(count_tabicas)
-    forms.toast(msg)
+    if stamp_index.unchanged or stamp_index.replaced: msg += "\n" + stamp_index.summary()
+    if run.failures:
+        forms.alert("{}\n\n{}\n\nAmbientes com erro:\n{}".format(
+            msg, run.summary(), "\n".join(run.failure_lines())))
+    else:
+        if run.warnings.total(): msg += "\n" + run.warnings.summary()
+        forms.toast(msg)
 
 except Exception as e:
-    t.RollBack()
-    forms.alert("Erro Crítico: {}".format(e))
+    forms.alert("Erro Crítico: {}\n\nOs blocos já gravados foram mantidos; execute de novo para retomar.".format(e))
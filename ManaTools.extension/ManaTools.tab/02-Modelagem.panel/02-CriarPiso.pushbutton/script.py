@@ -6,34 +6,17 @@ FIX: Fluxo de seleção robusto e suporte a Portas.
 import os
 import clr
 clr.AddReference("RevitAPI")
-from Autodesk.Revit.DB import BuiltInCategory, BuiltInParameter, Transaction, SpatialElementTag
+from Autodesk.Revit.DB import BuiltInCategory, BuiltInParameter, SpatialElementTag
 from Autodesk.Revit.UI.Selection import ObjectType
 from Autodesk.Revit.Exceptions import OperationCanceledException
 from pyrevit import forms, script, revit
-from manalib import flooring, finishes, config_manager
+from manalib import flooring, config_manager, doc_index, batch, stamps, profiling
 
 doc = __revit__.ActiveUIDocument.Document
 uidoc = __revit__.ActiveUIDocument
 
 CMD_ID = "manatools_criarpiso"
 
-# --- HELPER: NOME SEGURO ---
-def get_name_safe(element):
-    """Leitura de nome à prova de falhas."""
-    for bip in [BuiltInParameter.ALL_MODEL_TYPE_NAME, BuiltInParameter.ROOM_NAME, BuiltInParameter.SYMBOL_NAME_PARAM]:
-        try:
-            p = element.get_Parameter(bip)
-            if p and p.HasValue:
-                return p.AsString()
-        except:
-            pass
-    try:
-        if hasattr(element, "Name") and element.Name:
-            return element.Name
-    except:
-        pass
-    return "Elemento <{}>".format(element.Id)
-
 # --- 1. LÓGICA DE SELEÇÃO ROBUSTA ---
 selection = revit.get_selection()
 final_elements = [] # Rooms + Doors
@@ -78,11 +61,13 @@ if not final_elements:
     forms.alert("Nada selecionado.", exitscript=True)
 
 # --- 2. Preparação de Dados UI ---
-all_floor_types = flooring.get_floor_types(doc)
-all_levels = finishes.get_levels(doc)
+# Catálogos da sessão (nomes já resolvidos e ordenados)
+project_index = doc_index.get_index(doc)
+floor_catalog = project_index.floor_types()
+level_catalog = project_index.levels()
 
-dict_floors = {get_name_safe(f): f for f in sorted(all_floor_types, key=lambda x: get_name_safe(x))}
-dict_levels = {l.Name: l for l in all_levels}
+dict_floors = floor_catalog.by_name
+dict_levels = level_catalog.by_name
 
 # --- 3. Janela de Configuração ---
 class FloorWindow(forms.WPFWindow):
@@ -90,8 +75,8 @@ class FloorWindow(forms.WPFWindow):
         xaml_file = os.path.join(os.path.dirname(__file__), 'script.xaml')
         forms.WPFWindow.__init__(self, xaml_file)
         
-        self.cb_floor_type.ItemsSource = dict_floors.keys()
-        self.cb_level.ItemsSource = dict_levels.keys()
+        self.cb_floor_type.ItemsSource = floor_catalog.names()
+        self.cb_level.ItemsSource = level_catalog.names()
         
         # Carrega Config
         cfg = config_manager.get_config(CMD_ID)
@@ -110,6 +95,7 @@ class FloorWindow(forms.WPFWindow):
         self.tb_offset.Text = getattr(cfg, "last_offset", "0")
         self.tb_overlap.Text = getattr(cfg, "last_overlap", "5")
         self.chk_merge.IsChecked = getattr(cfg, "last_merge", False)
+        self.chk_2d.IsChecked = getattr(cfg, "last_2d", False)
         
         self.run_script = False
 
@@ -120,7 +106,8 @@ class FloorWindow(forms.WPFWindow):
             "last_level": self.cb_level.SelectedItem,
             "last_offset": self.tb_offset.Text,
             "last_overlap": self.tb_overlap.Text,
-            "last_merge": self.chk_merge.IsChecked
+            "last_merge": self.chk_merge.IsChecked,
+            "last_2d": self.chk_2d.IsChecked
         })
         
         self.run_script = True
@@ -139,6 +126,7 @@ sel_level = dict_levels[win.cb_level.SelectedItem] if win.cb_level.SelectedItem
 if not sel_level: forms.alert("Nível inválido.", exitscript=True)
 
 is_merge = win.chk_merge.IsChecked
+is_2d = win.chk_2d.IsChecked
 
 try:
     val_offset = float(win.tb_offset.Text) / 30.48
@@ -147,20 +135,63 @@ except:
     forms.alert("Valores numéricos inválidos.", exitscript=True)
 
 # --- 5. Execução ---
+def selection_snapshot(elements):
+    """Dados puros da seleção para o hash: limites dos ambientes e pontes das portas."""
+    data = []
+    for e in elements:
+        if e.Category.Id.IntegerValue == int(BuiltInCategory.OST_Rooms):
+            data.append(flooring.snapshot_room_outline(doc, e))
+        else:
+            data.append(flooring.snapshot_door_bridge(doc, e))
+    return data
+
+# Pisos podem unir vários ambientes: o carimbo é do grupo selecionado.
+# Mesma seleção sem alteração: nada a fazer; alterada: os pisos antigos são substituídos.
+stamp_index = stamps.StampIndex(doc, CMD_ID)
+source = stamps.group_source(final_elements)
+digest = stamps.digest(selection_snapshot(final_elements),
+                       sel_floor.Id, sel_level.Id, val_offset, val_overlap, is_merge, is_2d)
+# Lote interrompido desta mesma seleção/opções: os pisos já gravados têm o hash atual
+interrupted = batch.get_checkpoint(doc, CMD_ID, digest) is not None
+if stamp_index.is_current(source, digest) and not interrupted:
+    forms.alert("Os pisos desta seleção já estão atualizados (nada mudou desde a última execução).", exitscript=True)
+
+def floor_key(index):
+    """Chave do piso no checkpoint: a mesma seleção/opções gera os mesmos planos na mesma ordem."""
+    return "{}:{}".format(digest, index)
+
+def create_floor(plan):
+    f = flooring.create_planned_floor(doc, plan, sel_floor, sel_level, val_offset)
+    if f: stamps.stamp(f, source, CMD_ID, digest)
+    return f
+
+resume = batch.ask_resume(doc, CMD_ID, digest)
+
+replaced = []
 count = 0
-with revit.Transaction("Criar Pisos Maná"):
-    new_floors = flooring.create_floors(
-        doc, 
-        final_elements, 
-        sel_floor, 
-        sel_level, 
-        val_offset, 
-        door_overlap=val_overlap,
-        merge_all=is_merge
-    )
-    count = len(new_floors)
-
-if count > 0:
-    forms.toast("{} Pisos criados!".format(count))
+with profiling.run(CMD_ID), batch.BatchExecutor(doc, "Criar Pisos Maná", CMD_ID, resume=resume, settings=digest) as executor:
+    # Planos calculados antes de qualquer Transaction (união 2D ou de sólidos)
+    plans = flooring.plan_floors(doc, final_elements, door_overlap=val_overlap,
+                                 merge_all=is_merge, use_2d=is_2d)
+    keyed = list(enumerate(plans))
+    pending = executor.pending(keyed, key=lambda kp: floor_key(kp[0]))
+    if pending and not executor.report.resumed:
+        # Pisos antigos da seleção saem no primeiro bloco (mesmo Desfazer).
+        # Retomando, os pisos existentes são os da execução interrompida.
+        executor.apply("{}:stale".format(digest), lambda: replaced.append(stamp_index.delete_stale(source)))
+    for index, plan in pending:
+        if executor.apply(floor_key(index), lambda: create_floor(plan)) is not None:
+            count += 1
+
+run = executor.report
+if run.failures:
+    forms.alert("{} Pisos criados.\n\n{}\n\nPisos com erro:\n{}".format(
+        count, run.summary(), "\n".join(run.failure_lines())))
+elif count > 0:
+    msg = "{} Pisos criados!".format(count)
+    if run.resumed: msg += "\n({} pisos já criados na execução interrompida)".format(run.resumed)
+    if sum(replaced): msg += "\n({} pisos antigos substituídos)".format(sum(replaced))
+    if run.warnings.total(): msg += "\n" + run.warnings.summary()
+    forms.toast(msg)
 else:
     forms.alert("Nenhum piso criado.")
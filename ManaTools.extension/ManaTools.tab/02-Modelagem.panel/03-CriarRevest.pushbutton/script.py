@@ -9,7 +9,7 @@ clr.AddReference("RevitAPI")
 from Autodesk.Revit.DB import *
 from Autodesk.Revit.UI.Selection import ObjectType
 from pyrevit import forms, script, revit
-from manalib import finishes, config_manager, bim_utils # Mantemos para utilitários se necessário
+from manalib import finishes, config_manager, bim_utils, room_geometry, pipeline, wall_trim, doc_index, batch, stamps, finish_sync, finish_updater, profiling # Mantemos para utilitários se necessário
 
 # --- SECURITY CHECK ---
 if not bim_utils.calculate_vector_matrix()[0]:
@@ -19,15 +19,7 @@ doc = __revit__.ActiveUIDocument.Document
 uidoc = __revit__.ActiveUIDocument
 CMD_ID = "manatools_criarrevest"
 
-# --- HELPER: NOME SEGURO ---
-def get_name_safe(element):
-    if not element: return ""
-    try:
-        p = element.get_Parameter(BuiltInParameter.ALL_MODEL_TYPE_NAME)
-        if p and p.HasValue: return p.AsString()
-    except: pass
-    try: return Element.Name.GetValue(element)
-    except: return "Elemento <{}>".format(element.Id)
+geo_cache = room_geometry.get_cache(doc)
 
 # --- HELPER: SELEÇÃO ---
 def get_selected_rooms():
@@ -49,6 +41,10 @@ def get_selected_rooms():
                 if hasattr(elem, "Room"): add(elem.Room)
                 elif hasattr(elem, "GetTaggedLocalElement"): add(elem.GetTaggedLocalElement())
             
+    # Sem seleção: ambientes alterados desde a última geração (sincronização opcional)
+    if not rooms:
+        rooms.extend(finish_updater.offer_pending(doc, CMD_ID))
+    
     if not rooms:
         try:
             with forms.WarningBar(title="Selecione Ambientes (ESC para sair):"):
@@ -62,38 +58,56 @@ def get_selected_rooms():
     return rooms
 
 # --- ENGINE V2: CRIAÇÃO COM AUTO-JOIN ---
-def create_finish_walls_v2(room, wall_type, base_level, top_level, height_val, offset_val, do_join):
+def snapshot_segment(curve):
+    """Converte a curva do limite em segmento puro (wall_trim)."""
+    p0 = curve.GetEndPoint(0)
+    p1 = curve.GetEndPoint(1)
+    if isinstance(curve, Line):
+        return wall_trim.line_segment((p0.X, p0.Y), (p1.X, p1.Y))
+    if isinstance(curve, Arc):
+        c = curve.Center
+        return wall_trim.arc_segment((p0.X, p0.Y), (p1.X, p1.Y), (c.X, c.Y),
+                                     curve.Radius, curve.Normal.Z > 0)
+    return wall_trim.other_segment((p0.X, p0.Y), (p1.X, p1.Y))
+
+def loop_points(segments):
+    """Vértices (x, y) do loop em ordem de percurso; arcos entram com o ponto médio."""
+    pts = []
+    for curve, _ in segments:
+        p = curve.GetEndPoint(0)
+        pts.append((p.X, p.Y))
+        if not isinstance(curve, Line):
+            m = curve.Evaluate(0.5, True)
+            pts.append((m.X, m.Y))
+    return pts
+
+def is_room_right_probe(room, curve):
+    """Fallback (loops degenerados): consulta espacial 10cm à direita da corda."""
+    t_norm = (curve.GetEndPoint(1) - curve.GetEndPoint(0)).Normalize()
+    normal_right = XYZ(t_norm.Y, -t_norm.X, 0)
+    mid_pt = (curve.GetEndPoint(0) + curve.GetEndPoint(1)) / 2.0
+    return room.IsPointInRoom(mid_pt + (normal_right * 0.1))
+
+def snapshot_room(room):
     """
-    Cria paredes de revestimento e une com a parede hospedeira.
+    Estágio 1 (API): segmentos com parede hospedeira válida e lado do ambiente.
+    O lado vem da orientação de cada loop (área com sinal), uma vez por loop.
+
+    Returns:
+        list: Um item por loop: [{"seg", "loop_idx", "seg_idx", "host", "z", "room_right"}, ...].
+              loop_idx/seg_idx apontam para geo_cache.boundary_loops(room) (loops sem
+              parede hospedeira são omitidos aqui).
     """
-    created_walls = []
-    
-    # Opções de Limite
-    opt = SpatialElementBoundaryOptions()
-    opt.SpatialElementBoundaryLocation = SpatialElementBoundaryLocation.Finish
-    
-    try:
-        segments_list = room.GetBoundarySegments(opt)
-    except:
-        return []
-    
-    if not segments_list: return []
-    
-    # Determina Nível Base ID
-    base_level_id = base_level.Id
-    
-    # Itera segmentos
-    for segments in segments_list:
-        
-        # --- ETAPA 1: CALCULAR CURVAS OFFSETADAS ---
-        raw_offset_curves = []
-        host_map = [] # Salva o host para usar depois
+    segments_list = geo_cache.boundary_loops(room)
+    if not segments_list: return None
 
-        valid_loop = True
-        
-        for seg in segments:
-            # Obtém Host
-            host_wall = doc.GetElement(seg.ElementId)
+    sides = wall_trim.room_left_sides([loop_points(segments) for segments in segments_list])
+
+    loops = []
+    for loop_idx, (segments, room_left) in enumerate(zip(segments_list, sides)):
+        loop = []
+        for seg_idx, (curve, host_id) in enumerate(segments):
+            host_wall = geo_cache.get_element(host_id)
             
             # Só cria revestimento se tiver uma parede atrás
             if not isinstance(host_wall, Wall): continue
@@ -101,204 +115,140 @@ def create_finish_walls_v2(room, wall_type, base_level, top_level, height_val, o
             # Se a parede hospedeira for Parede Cortina ou Stacked muito complexa, cuidado
             if host_wall.WallType.Kind == WallKind.Curtain: continue
 
-            # Geometria da curva
-            curve = seg.GetCurve()
-            
             try:
-                # --- CÁLCULO DE POSICIONAMENTO ---
-                wall_w = wall_type.Width
-                
-                # 1. Determina vetor "Para Dentro da Sala"
-                t = curve.GetEndPoint(1) - curve.GetEndPoint(0)
-                t_norm = t.Normalize()
-                normal_right = XYZ(t_norm.Y, -t_norm.X, 0)
-                mid_pt = (curve.GetEndPoint(0) + curve.GetEndPoint(1)) / 2.0
-                test_pt = mid_pt + (normal_right * 0.1) # 10cm para direita
-                
-                is_room_right = room.IsPointInRoom(test_pt)
-                
-                # Lógica de Offset e Flip
-                if is_room_right:
-                    offset_dist = wall_w / 2.0
-                    do_flip_wall = False
+                seg = snapshot_segment(curve)
+                if room_left is None:
+                    is_room_right = is_room_right_probe(room, curve)
                 else:
-                    offset_dist = -(wall_w / 2.0)
-                    do_flip_wall = True
-
-                # 2. Cria Curva Offsetada
-                try:
-                    new_curve = curve.CreateOffset(offset_dist, XYZ.BasisZ)
-                except:
-                    vec = normal_right * offset_dist 
-                    transform = Transform.CreateTranslation(vec)
-                    new_curve = curve.CreateTransformed(transform)
-                
-                # Armazena dados para etapa de trim
-                raw_offset_curves.append({
-                    "curve": new_curve,
-                    "host": host_wall,
-                    "flip": do_flip_wall
-                })
-
-            except Exception as e:
-                # Se falhar offset, ignora segmento
-                pass
-        
-        # Se o loop resultou em curvas vazias (ex: sala sem paredes válidas), pula
-        if not raw_offset_curves: continue
+                    is_room_right = not room_left
+            except:
+                continue
+            
+            loop.append({
+                "seg": seg,
+                "loop_idx": loop_idx,
+                "seg_idx": seg_idx,
+                "host": host_id,
+                "z": curve.GetEndPoint(0).Z,
+                "room_right": is_room_right
+            })
+        if loop: loops.append(loop)
+    return loops or None
 
-        # --- ETAPA 2: TRIM DOS CANTOS (INTERSECÇÃO) ---
-        # Tenta calcular intersecção entre i e i+1 para fechar o loop
-        # Se falhar (linhas paralelas ou colineares), mantem original.
-        
-        final_curves_data = []
-        n = len(raw_offset_curves)
+def compute_room(loops, wall_width):
+    """
+    Estágio 2 (puro): offset + trim dos cantos de cada loop.
+
+    Returns:
+        list: [(loop_idx, entrada, curva_final), ...] - curva_final no formato de wall_trim;
+              loop_idx é o índice em boundary_loops(room).
+    """
+    result = []
+    for loop in loops:
+        # --- ETAPA 1: CALCULAR CURVAS OFFSETADAS ---
+        entries = []
+        offset_segs = []
+        for entry in loop:
+            # Ambiente à direita: desloca para a direita; senão para a esquerda e vira a parede
+            offset_dist = wall_width / 2.0 if entry["room_right"] else -(wall_width / 2.0)
+            try:
+                moved = wall_trim.offset_segment(entry["seg"], offset_dist)
+            except ValueError:
+                moved = None
+            if moved is None: continue # Se falhar offset, ignora segmento
+            entries.append(entry)
+            offset_segs.append(moved)
         
-        # Se for só 1 parede (sala aberta?), não tem trim.
-        if n < 2:
-            final_curves_data = raw_offset_curves
-        else:
-            # Calcula vértices de interseção
-            vertices = []
+        # --- ETAPA 2: TRIM DOS CANTOS (INTERSECÇÃO) ---
+        for i, final in wall_trim.trim_loop(offset_segs):
+            result.append((entries[i]["loop_idx"], entries[i], final))
+    return result
+
+def build_curve(room, loop_idx, entry, final, wall_width):
+    """Cria a curva Revit final (única etapa que instancia geometria da API)."""
+    z = entry["z"]
+    kind = final[0]
+    if kind == wall_trim.LINE:
+        return Line.CreateBound(XYZ(final[1][0], final[1][1], z), XYZ(final[2][0], final[2][1], z))
+    if kind == wall_trim.ARC:
+        return Arc.Create(XYZ(final[1][0], final[1][1], z), XYZ(final[2][0], final[2][1], z),
+                          XYZ(final[3][0], final[3][1], z))
+    
+    # Elipses/Splines: offset da própria API, sem trim
+    curve = geo_cache.boundary_loops(room)[loop_idx][entry["seg_idx"]][0]
+    offset_dist = wall_width / 2.0 if entry["room_right"] else -(wall_width / 2.0)
+    try:
+        return curve.CreateOffset(offset_dist, XYZ.BasisZ)
+    except:
+        t_norm = (curve.GetEndPoint(1) - curve.GetEndPoint(0)).Normalize()
+        vec = XYZ(t_norm.Y, -t_norm.X, 0) * offset_dist
+        return curve.CreateTransformed(Transform.CreateTranslation(vec))
+
+def create_finish_walls_v2(room, curves, wall_type, base_level, top_level, height_val, offset_val, joins=None):
+    """
+    Estágio 3 (API): cria paredes de revestimento e pede a união com a parede hospedeira.
+    joins (JoinQueue): fila do lote; None = sem união.
+    """
+    created_walls = []
+    base_level_id = base_level.Id
+    wall_w = wall_type.Width
+    
+    # --- ETAPA 3: CRIAÇÃO FÍSICA ---
+    for loop_idx, entry, final in curves:
+        try:
+            new_curve = build_curve(room, loop_idx, entry, final, wall_w)
+            host_wall = geo_cache.get_element(entry["host"])
+            do_flip_wall = not entry["room_right"]
+
+            # ESTRATÉGIA SEGURA: Sempre criar por Altura desconectada primeiro.
+            safe_height = height_val if height_val > 0.1 else 10.0
             
-            for i in range(n):
-                c1_data = raw_offset_curves[i]
-                c2_data = raw_offset_curves[(i + 1) % n] # Próximo (cíclico)
-                
-                c1 = c1_data["curve"]
-                c2 = c2_data["curve"]
-                
-                # Intersecção matemática 2D (assumindo linhas retas na maioria)
-                # Fallback para GetEndPoint se não for linha ou falhar
-                
-                intersection_pt = None
-                
-                if isinstance(c1, Line) and isinstance(c2, Line):
-                    # Algoritmo Line-Line Intersection Infinite
-                    p1 = c1.GetEndPoint(0)
-                    v1 = c1.Direction
-                    p2 = c2.GetEndPoint(0)
-                    v2 = c2.Direction
-                    
-                    # p1 + v1*t1 = p2 + v2*t2
-                    # (v1.x  -v2.x) * (t1) = (p2.x - p1.x)
-                    # (v1.y  -v2.y) * (t2)   (p2.y - p1.y)
-                    
-                    det = v1.X * v2.Y - v1.Y * v2.X
+            with profiling.span("Wall.Create"):
+                new_wall = Wall.Create(doc, new_curve, wall_type.Id, base_level_id, safe_height, offset_val, do_flip_wall, False)
+            
+            # 4. Ajuste de Location Line -> Face Externa (2)
+            p_loc = new_wall.get_Parameter(BuiltInParameter.WALL_KEY_REF_PARAM)
+            if p_loc: p_loc.Set(2) # 2 = Finish Face: Exterior
+            
+            # 5. Ajuste de Restrições (Top Level)
+            if top_level:
+                p_top_constr = new_wall.get_Parameter(BuiltInParameter.WALL_HEIGHT_TYPE)
+                if p_top_constr: p_top_constr.Set(top_level.Id)
+                p_top_off = new_wall.get_Parameter(BuiltInParameter.WALL_TOP_OFFSET)
+                if p_top_off: p_top_off.Set(0.0)
+            
+            # 3. Ajuste de Base Offset
+            p_base_off = new_wall.get_Parameter(BuiltInParameter.WALL_BASE_OFFSET)
+            if p_base_off: p_base_off.Set(offset_val)
+            
+            # 4. Desativa Room Bounding
+            p_room_bound = new_wall.get_Parameter(BuiltInParameter.WALL_ATTR_ROOM_BOUNDING)
+            if p_room_bound: p_room_bound.Set(0)
+            
+            created_walls.append(new_wall)
+            
+            # --- O PULO DO GATO: JOIN GEOMETRY ---
+            # Enfileirada: roda no fim do bloco, após uma única regeneração
+            if joins is not None and isinstance(host_wall, Wall):
+                joins.add(new_wall, host_wall)
                     
-                    if abs(det) > 0.0001: # Não paralelas
-                        dx = p2.X - p1.X
-                        dy = p2.Y - p1.Y
-                        # t1 = (dx * v2.y - dy * v2.x) / (v1.x * v2.y - v1.y * v2.x) (Cramer) -> Nao, wait.
-                        # Cramer's Rule for:
-                        # t1 * v1.x - t2 * v2.x = p2.x - p1.x
-                        # t1 * v1.y - t2 * v2.y = p2.y - p1.y
-                        
-                        det_sys = v1.X * (-v2.Y) - v1.Y * (-v2.X) # v1x*-v2y - v1y*-v2x = -v1x*v2y + v1y*v2x = -(det)
-                        
-                        # Vamos usar IntersectionResultArray do Revit que é mais seguro para Z
-                        # Mas precisamos de curvas unbound.
-                        # Hack: Criar linhas gigantes
-                        try:
-                            l1_big = Line.CreateBound(p1 - v1*1000, p1 + v1*1000)
-                            l2_big = Line.CreateBound(p2 - v2*1000, p2 + v2*1000)
-                            
-                            results = clr.Reference[IntersectionResultArray]()
-                            result = l1_big.Intersect(l2_big, results)
-                            
-                            if result == SetComparisonResult.Overlap:
-                                intersection_pt = results.Value[0].XYZPoint
-                        except: pass
-                
-                if not intersection_pt:
-                    # Fallback: média dos pontos (vai ficar fresta ou sobreposição, mas não crasha)
-                    intersection_pt = (c1.GetEndPoint(1) + c2.GetEndPoint(0)) / 2.0
-                
-                vertices.append(intersection_pt)
+        except Exception as e:
+            # print("Erro na criacao: {}".format(e))
+            pass
             
-            # Reconstrói as curvas com os novos vértices
-            for i in range(n):
-                start_pt = vertices[(i - 1) % n] # Vértice anterior é o início desta
-                end_pt = vertices[i]             # Vértice atual é o fim desta
-                
-                # Se os pontos forem muito próximos, ignora (parede nula)
-                if start_pt.DistanceTo(end_pt) < 0.01: continue
-                
-                orig_data = raw_offset_curves[i]
-                orig_curve = orig_data["curve"]
-                
-                # Recria geometria
-                if isinstance(orig_curve, Line):
-                    new_c = Line.CreateBound(start_pt, end_pt)
-                else:
-                    # Arcos: Mantemos original pois trim de arco é complexo sem mudar raio
-                    # Idealmente deveria ajustar, mas por segurança mantemos o offset simples para arcos
-                    new_c = orig_curve
-                
-                final_curves_data.append({
-                    "curve": new_c,
-                    "host": orig_data["host"],
-                    "flip": orig_data["flip"]
-                })
-
-        # --- ETAPA 3: CRIAÇÃO FÍSICA ---
-        for data in final_curves_data:
-            try:
-                new_curve = data["curve"]
-                host_wall = data["host"]
-                do_flip_wall = data["flip"]
-
-                # ESTRATÉGIA SEGURA: Sempre criar por Altura desconectada primeiro.
-                safe_height = height_val if height_val > 0.1 else 10.0
-                
-                new_wall = Wall.Create(doc, new_curve, wall_type.Id, base_level_id, safe_height, offset_val, do_flip_wall, False)
-                
-                # 4. Ajuste de Location Line -> Face Externa (2)
-                p_loc = new_wall.get_Parameter(BuiltInParameter.WALL_KEY_REF_PARAM)
-                if p_loc: p_loc.Set(2) # 2 = Finish Face: Exterior
-                
-                # 5. Ajuste de Restrições (Top Level)
-                if top_level:
-                    p_top_constr = new_wall.get_Parameter(BuiltInParameter.WALL_HEIGHT_TYPE)
-                    if p_top_constr: p_top_constr.Set(top_level.Id)
-                    p_top_off = new_wall.get_Parameter(BuiltInParameter.WALL_TOP_OFFSET)
-                    if p_top_off: p_top_off.Set(0.0)
-                
-                # 3. Ajuste de Base Offset
-                p_base_off = new_wall.get_Parameter(BuiltInParameter.WALL_BASE_OFFSET)
-                if p_base_off: p_base_off.Set(offset_val)
-                
-                # 4. Desativa Room Bounding
-                p_room_bound = new_wall.get_Parameter(BuiltInParameter.WALL_ATTR_ROOM_BOUNDING)
-                if p_room_bound: p_room_bound.Set(0)
-                
-                created_walls.append(new_wall)
-                
-                # --- O PULO DO GATO: JOIN GEOMETRY ---
-                if do_join:
-                    try:
-                        JoinGeometryUtils.JoinGeometry(doc, new_wall, host_wall)
-                    except: pass
-                        
-            except Exception as e:
-                # print("Erro na criacao: {}".format(e))
-                pass
-                
     return created_walls
 
 # --- PREP DADOS ---
 rooms = get_selected_rooms()
 if not rooms: script.exit()
 
-all_wall_types = FilteredElementCollector(doc).OfClass(WallType).ToElements()
-# Filtra apenas paredes básicas para limpar a lista
-basic_walls = [w for w in all_wall_types if w.Kind == WallKind.Basic]
-sorted_walls = sorted(basic_walls, key=get_name_safe)
-
-all_levels = sorted(FilteredElementCollector(doc).OfClass(Level).ToElements(), key=lambda l: l.Elevation)
+# Catálogos da sessão: só paredes básicas, nomes já ordenados; níveis por elevação
+project_index = doc_index.get_index(doc)
+wall_catalog = project_index.wall_types()
+level_catalog = project_index.levels()
 
-dict_walls = {get_name_safe(w): w for w in sorted_walls}
-dict_levels = {l.Name: l for l in all_levels}
+dict_walls = wall_catalog.by_name
+dict_levels = level_catalog.by_name
 
 # --- GUI ---
 class RevestWindow(forms.WPFWindow):
@@ -308,10 +258,10 @@ class RevestWindow(forms.WPFWindow):
         
         self.run_script = False # Flag de controle
         
-        self.cb_wall_type.ItemsSource = dict_walls.keys()
-        self.cb_base_level.ItemsSource = dict_levels.keys()
+        self.cb_wall_type.ItemsSource = wall_catalog.names()
+        self.cb_base_level.ItemsSource = level_catalog.names()
         
-        top_opts = list(dict_levels.keys())
+        top_opts = level_catalog.names()
         top_opts.insert(0, "(Desconectado)")
         self.cb_top_level.ItemsSource = top_opts
         
@@ -373,21 +323,58 @@ except:
     forms.alert("Valores inválidos.", exitscript=True)
 
 # --- EXECUÇÃO ---
-t = Transaction(doc, "Criar Revestimentos V2")
-t.Start()
+# Revestimentos já gerados (carimbo): ambientes sem alteração são pulados,
+# os alterados têm as paredes antigas substituídas
+stamp_index = stamps.StampIndex(doc, CMD_ID)
+settings = (sel_wall.Id, sel_base.Id, sel_top.Id if sel_top else None, val_height, val_offset, do_join)
+
+def snapshot_changed(room):
+    """Estágio 1: snapshot + hash; None se o ambiente não mudou desde a última execução."""
+    loops = snapshot_room(room)
+    if loops is None: return None
+    digest = stamps.digest(loops, settings)
+    if stamp_index.is_current(stamps.room_source(room), digest): return None
+    return loops, digest
+
+def commit_room(room, result, joins):
+    """Estágio 3: substitui os revestimentos antigos do ambiente e carimba os novos."""
+    curves, digest = result
+    source = stamps.room_source(room)
+    stamp_index.delete_stale(source)
+    walls = create_finish_walls_v2(room, curves, sel_wall, sel_base, sel_top, val_height, val_offset, joins)
+    stamps.stamp_all(walls, source, CMD_ID, digest)
+    return walls
+
+# Blocos de Transactions num único Desfazer; ambientes com erro são pulados
+resume = batch.ask_resume(doc, CMD_ID, settings)
 
 try:
-    total_walls = 0
-    for room in rooms:
-        walls = create_finish_walls_v2(room, sel_wall, sel_base, sel_top, val_height, val_offset, do_join)
-        total_walls += len(walls)
-        
-    t.Commit()
+    wall_width = sel_wall.Width
+    with profiling.run(CMD_ID), batch.BatchExecutor(doc, "Criar Revestimentos V2", CMD_ID, resume=resume, settings=settings) as executor:
+        pending = executor.pending(rooms)
+        report = pipeline.run(
+            pending,
+            snapshot_changed,
+            lambda snap: (compute_room(snap[0], wall_width), snap[1]),
+            lambda room, result: executor.apply(
+                batch.element_key(room),
+                lambda: commit_room(room, result, executor.joins if do_join else None))
+        )
+        executor.report.absorb(report)
+    
+    run = executor.report
+    failed = run.failed_keys()
+    finish_sync.mark_synced(doc, CMD_ID, [k for k in map(batch.element_key, rooms) if k not in failed])
+    total_walls = sum(len(walls) for walls in report.results if walls)
     
     msg = "Sucesso: {} paredes criadas.".format(total_walls)
     if do_join: msg += "\n(Com recorte automático de vãos)"
-    forms.toast(msg)
+    if stamp_index.unchanged or stamp_index.replaced: msg += "\n" + stamp_index.summary()
+    if run.failures:
+        forms.alert("{}\n\n{}\n\nAmbientes com erro:\n{}".format(
+            msg, run.summary(), "\n".join(run.failure_lines())))
+    else:
+        forms.toast(msg)
     
 except Exception as e:
-    t.RollBack()
-    forms.alert("Erro Crítico: {}".format(e))
\ No newline at end of file
+    forms.alert("Erro Crítico: {}\n\nOs blocos já gravados foram mantidos; execute de novo para retomar.".format(e))
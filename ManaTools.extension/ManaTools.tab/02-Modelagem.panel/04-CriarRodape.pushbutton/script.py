@@ -10,7 +10,7 @@ clr.AddReference("RevitAPI")
 from Autodesk.Revit.DB import *
 from Autodesk.Revit.UI.Selection import ObjectType
 from pyrevit import forms, script, revit
-from manalib import config_manager, bim_utils
+from manalib import config_manager, bim_utils, room_geometry, geometry2d, pipeline, openings, family_batch, spatial_index, doc_index, batch, stamps, finish_sync, finish_updater, profiling
 
 # --- SECURITY CHECK ---
 if not bim_utils.calculate_vector_matrix()[0]:
@@ -22,6 +22,9 @@ logger = script.get_logger()
 
 CMD_ID = "manatools_criarrodape_line"
 
+geo_cache = room_geometry.get_cache(doc)
+opening_index = openings.OpeningIndex(doc)
+
 # --- 1. SELEÇÃO ---
 def get_selected_rooms():
     selection = revit.get_selection()
@@ -42,6 +45,9 @@ def get_selected_rooms():
             seen_ids.add(r.Id)
 
     for s in selection: process(s)
+    # Sem seleção: ambientes alterados desde a última geração (sincronização opcional)
+    if not rooms:
+        rooms.extend(finish_updater.offer_pending(doc, CMD_ID))
     if not rooms:
         try:
             with forms.WarningBar(title="Selecione Ambientes (ESC para sair):"):
@@ -50,223 +56,84 @@ def get_selected_rooms():
         except: pass
     return rooms
 
-# --- 2. FILTRO DE FAMÍLIAS ---
-def get_line_based_families():
-    symbols = FilteredElementCollector(doc).OfClass(FamilySymbol).OfCategory(BuiltInCategory.OST_GenericModel).ToElements()
-    valid = []
-    for s in symbols:
-        try:
-            if s.Family.FamilyPlacementType == FamilyPlacementType.CurveDrivenStructural or \
-               s.Family.FamilyPlacementType == FamilyPlacementType.CurveBased:
-                valid.append(s)
-        except: pass
-    return valid
-
-def get_name(e):
-    try: return Element.Name.GetValue(e)
-    except: return e.Name
-
-# --- 3. HELPER: LARGURA ---
-def get_element_width(element):
-    for param_id in [BuiltInParameter.DOOR_WIDTH, BuiltInParameter.WINDOW_WIDTH, BuiltInParameter.FAMILY_WIDTH_PARAM]:
-        p = element.get_Parameter(param_id)
-        if not p: p = element.Symbol.get_Parameter(param_id)
-        if p and p.HasValue: return p.AsDouble()
-    
-    for name in ["Width", "Largura", "Largura Aproximada", "Vão Luz", "Rough Width"]:
-        p = element.LookupParameter(name)
-        if not p: p = element.Symbol.LookupParameter(name)
-        if p and p.HasValue: return p.AsDouble()
-    return 0.9
-
-# --- 4. MATH ENGINE: CORTE INTELIGENTE (V4) ---
-def get_wall_orientation(wall):
-    """Retorna o vetor de direção da parede."""
-    try:
-        lc = wall.Location
-        if isinstance(lc, LocationCurve):
-            curve = lc.Curve
-            if isinstance(curve, Line):
-                return (curve.GetEndPoint(1) - curve.GetEndPoint(0)).Normalize()
-    except: pass
-    return None
-
-def is_parallel(vec1, vec2):
-    """Verifica se dois vetores são paralelos (mesma direção ou opostos)."""
-    if not vec1 or not vec2: return False
-    cross_prod = vec1.CrossProduct(vec2)
-    # Se produto vetorial é zero (ou quase), são paralelos
-    return cross_prod.GetLength() < 0.1
-
-def get_wall_segments_minus_openings(room, gap_margin):
-    final_curves = []
-    
-    opt = SpatialElementBoundaryOptions()
-    opt.SpatialElementBoundaryLocation = SpatialElementBoundaryLocation.Finish 
-    
-    segments_list = room.GetBoundarySegments(opt)
-    if not segments_list: return []
-
+# --- 2. FILTRO DE VÃOS ---
+def cuts_skirting(opening):
+    """Portas sempre cortam; janelas só se o peitoril estiver no chão (<= 15cm)."""
+    if opening.kind == openings.DOOR: return True
+    return opening.sill is None or opening.sill <= 0.5
+
+# --- 3. MATH ENGINE: CORTE INTELIGENTE (V4) ---
+def snapshot_room(room, gap_margin):
+    """
+    Estágio 1 (API): segmentos do limite + vãos de cada parede hospedeira.
+    Os vãos vêm do índice por parede (paredes compartilhadas são lidas uma vez).
+    Retorna [((x, y, z), (x, y, z), vãos), ...] ou None se o ambiente não tem limite.
+    """
+    segments_list = geo_cache.boundary_loops(room)
+    if not segments_list: return None
+
+    snapshot = []
     for segments in segments_list:
-        for seg in segments:
-            curve = seg.GetCurve()
+        for curve, host_id in segments:
             p_start = curve.GetEndPoint(0)
             p_end = curve.GetEndPoint(1)
             
-            p_start_2d = XYZ(p_start.X, p_start.Y, 0)
-            p_end_2d = XYZ(p_end.X, p_end.Y, 0)
-            
-            try: line_vec = (p_end_2d - p_start_2d).Normalize()
-            except: continue
-            
-            seg_length = p_start_2d.DistanceTo(p_end_2d)
-            wall = doc.GetElement(seg.ElementId)
-            cuts = [] 
+            p0 = (p_start.X, p_start.Y, p_start.Z)
+            p1 = (p_end.X, p_end.Y, p_end.Z)
             
+            wall = geo_cache.get_element(host_id)
+            found = []
             if isinstance(wall, Wall):
-                inserts_ids = list(wall.FindInserts(True, False, False, False))
-                
-                # --- FIX V4: FILTRO DE PAREDES UNIDAS ---
-                try:
-                    joined_ids = JoinGeometryUtils.GetJoinedElements(doc, wall)
-                    for j_id in joined_ids:
-                        j_wall = doc.GetElement(j_id)
-                        if isinstance(j_wall, Wall):
-                            # VERIFICA PARALELISMO
-                            # Se a parede unida for perpendicular (canto), ignoramos os inserts dela
-                            # Se for paralela (parede cebola), aceitamos.
-                            j_vec = get_wall_orientation(j_wall)
-                            
-                            if is_parallel(line_vec, j_vec):
-                                j_inserts = j_wall.FindInserts(True, False, False, False)
-                                for ji in j_inserts:
-                                    if ji not in inserts_ids: inserts_ids.append(ji)
-                            # else: print("Ignorando parede perpendicular ID: {}".format(j_id))
-                except: pass
-
-                for ins_id in inserts_ids:
-                    elem = doc.GetElement(ins_id)
-                    if not elem: continue
-                    cat_id = elem.Category.Id.IntegerValue
-                    
-                    is_door = (cat_id == int(BuiltInCategory.OST_Doors))
-                    is_window = (cat_id == int(BuiltInCategory.OST_Windows))
-                    
-                    if not (is_door or is_window): continue
-                    
-                    if is_window:
-                        sill_p = elem.get_Parameter(BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM)
-                        if sill_p and sill_p.HasValue:
-                            if sill_p.AsDouble() > 0.5: continue 
-                    
-                    pt_elem = elem.Location.Point
-                    pt_elem_2d = XYZ(pt_elem.X, pt_elem.Y, 0)
-                    
-                    vec_to_elem = pt_elem_2d - p_start_2d
-                    dot = vec_to_elem.DotProduct(line_vec)
-                    
-                    # Distância lateral (validação extra)
-                    # Se a porta projetada está muito longe do eixo da parede atual, é fantasma
-                    perp_dist = abs((p_end_2d.X - p_start_2d.X) * (p_start_2d.Y - pt_elem_2d.Y) - (p_start_2d.X - pt_elem_2d.X) * (p_end_2d.Y - p_start_2d.Y)) / seg_length
-                    if perp_dist > 1.0: # Se projetado a mais de 30cm, ignora
-                        continue
-
-                    width = get_element_width(elem)
-                    
-                    current_gap = gap_margin 
-                    
-                    start_dist = dot - (width / 2.0) - current_gap
-                    end_dist = dot + (width / 2.0) + current_gap
-                    
-                    cut_s = max(0, start_dist)
-                    cut_e = min(seg_length, end_dist)
-                    
-                    if cut_s < cut_e:
-                        cuts.append((cut_s, cut_e))
-
-            # Merge Cuts
-            cuts.sort(key=lambda x: x[0])
-            merged_cuts = []
-            if cuts:
-                curr_s, curr_e = cuts[0]
-                for i in range(1, len(cuts)):
-                    next_s, next_e = cuts[i]
-                    if next_s < curr_e: 
-                        curr_e = max(curr_e, next_e)
-                    else:
-                        merged_cuts.append((curr_s, curr_e))
-                        curr_s, curr_e = next_s, next_e
-                merged_cuts.append((curr_s, curr_e))
-            
-            # Gera Linhas
-            current_pos = 0.0
-            for c_start, c_end in merged_cuts:
-                if c_start - current_pos > 0.02: 
-                    p1 = p_start + (line_vec * current_pos)
-                    p2 = p_start + (line_vec * c_start)
-                    final_curves.append(Line.CreateBound(p1, p2))
-                current_pos = max(current_pos, c_end)
-            
-            if seg_length - current_pos > 0.02:
-                p1 = p_start + (line_vec * current_pos)
-                p2 = p_start + (line_vec * seg_length)
-                final_curves.append(Line.CreateBound(p1, p2))
-                
-    return final_curves
-
-# --- 5. ENGINE: INSTANCIAÇÃO ---
-def create_skirting(doc, curve, symbol, level, offset, do_flip=False):
+                # Margem: folga do batente + tolerância lateral do corte (30cm)
+                found = opening_index.query(wall, p0, p1, gap_margin + 1.0, predicate=cuts_skirting)
+            snapshot.append((p0, p1, found))
+    return snapshot
+
+def compute_room(snapshot, gap_margin):
+    """Estágio 2 (puro): recorta cada segmento nos vãos. Retorna trechos (p0, p1)."""
+    pieces = []
+    for p_start, p_end, found in snapshot:
+        pieces.extend(geometry2d.segment_minus_openings(p_start, p_end, found, gap_margin))
+    return pieces
+
+# --- 4. ENGINE: INSTANCIAÇÃO ---
+def skirting_line(piece, do_flip=False):
+    """Linha do rodapé em Z=0 (a elevação é gravada depois, em lote)."""
     try:
-        p0 = curve.GetEndPoint(0)
-        p1 = curve.GetEndPoint(1)
+        p0, p1 = piece
         z_level = 0 
         
         if do_flip:
-            line = Line.CreateBound(XYZ(p1.X, p1.Y, z_level), XYZ(p0.X, p0.Y, z_level))
-        else:
-            line = Line.CreateBound(XYZ(p0.X, p0.Y, z_level), XYZ(p1.X, p1.Y, z_level))
-            
-        inst = doc.Create.NewFamilyInstance(line, symbol, level, Structure.StructuralType.NonStructural)
-        
-        params = [BuiltInParameter.INSTANCE_ELEVATION_PARAM, BuiltInParameter.INSTANCE_FREE_HOST_OFFSET_PARAM]
-        done = False
-        for bp in params:
-            p = inst.get_Parameter(bp)
-            if p and not p.IsReadOnly:
-                p.Set(offset)
-                done = True
-                break
-        
-        if not done:
-            for n in ["Elevação", "Offset", "Deslocamento", "Altura"]:
-                p = inst.LookupParameter(n)
-                if p: 
-                    p.Set(offset)
-                    break
-        return inst
+            return Line.CreateBound(XYZ(p1[0], p1[1], z_level), XYZ(p0[0], p0[1], z_level))
+        return Line.CreateBound(XYZ(p0[0], p0[1], z_level), XYZ(p1[0], p1[1], z_level))
     except: return None
 
-# --- 6. AUTO-JOIN ---
-def auto_join_elements(doc, elements):
+# --- 5. AUTO-JOIN ---
+# Distância máxima (pés) entre extremidades para considerar peças encostadas
+JOIN_TOLERANCE = 0.01
+
+def auto_join_elements(joins, elements, pieces):
+    """
+    Enfileira a união apenas de peças vizinhas (extremidade/canto em comum).
+    
+    Args:
+        joins (JoinQueue): Fila do lote (executada ao gravar o bloco).
+        elements (list): Instâncias criadas.
+        pieces (list): Trechos (p0, p1) de cada instância, na mesma ordem.
+    """
+    segments = [(i, p[0], p[1]) for i, p in enumerate(pieces)]
     count = 0
-    for i in range(len(elements)):
-        for j in range(i + 1, len(elements)):
-            try:
-                e1 = elements[i]
-                e2 = elements[j]
-                bb1 = e1.get_BoundingBox(None)
-                bb2 = e2.get_BoundingBox(None)
-                JoinGeometryUtils.JoinGeometry(doc, e1, e2)
-                count += 1
-            except: 
-                pass 
+    for i, j in spatial_index.endpoint_pairs(segments, JOIN_TOLERANCE):
+        joins.add(elements[i], elements[j])
+        count += 1
     return count
 
 # --- GUI ---
 rooms = get_selected_rooms()
 if not rooms: script.exit()
 
-all_families = sorted(get_line_based_families(), key=get_name)
+# Catálogo da sessão (nomes já resolvidos e ordenados)
+all_families = doc_index.get_index(doc).line_based_symbols()
 if not all_families:
     forms.alert("Nenhuma família Line Based encontrada.", exitscript=True)
 
@@ -277,7 +144,7 @@ class RodapeLineWindow(forms.WPFWindow):
         
         self.run_script = False
         
-        self.cb_sweep_type.ItemsSource = [get_name(t) for t in all_families]
+        self.cb_sweep_type.ItemsSource = all_families.names()
         self.cb_sweep_type.SelectedIndex = 0
         
         cfg = config_manager.get_config(CMD_ID)
@@ -311,7 +178,7 @@ if not win.run_script: script.exit()
 if not win.cb_sweep_type.SelectedItem: script.exit()
 
 sel_name = win.cb_sweep_type.SelectedItem
-family_symbol = next((f for f in all_families if get_name(f) == sel_name), None)
+family_symbol = all_families.get(sel_name)
 do_flip = win.chk_invert_flip.IsChecked 
 
 try:
@@ -334,30 +201,79 @@ except:
     gap_margin_ft = 0.03 / 30.48
 
 # --- EXECUÇÃO ---
-t = Transaction(doc, "Criar Rodapés V4")
-t.Start()
-
-try:
+# Rodapés já gerados (carimbo): ambientes sem alteração são pulados,
+# os alterados têm os rodapés antigos substituídos
+stamp_index = stamps.StampIndex(doc, CMD_ID)
+settings = (family_symbol.Id, offset_ft, do_flip, gap_margin_ft)
+
+def snapshot_changed(room):
+    """Estágio 1: snapshot + hash; None se o ambiente não mudou desde a última execução."""
+    snap = snapshot_room(room, gap_margin_ft)
+    if snap is None: return None
+    digest = stamps.digest(snap, settings)
+    if stamp_index.is_current(stamps.room_source(room), digest): return None
+    return snap, digest
+
+def commit_room(room, result):
+    """Estágio 3: linhas dos rodapés do ambiente (criadas depois, em lote por bloco)."""
+    pieces, digest = result
+    scheduled = []
+    for piece in pieces:
+        line = skirting_line(piece, do_flip)
+        if line:
+            scheduled.append((line, piece))
+    return (batch.element_key(room), room.Level, scheduled, digest)
+
+def create_chunk(entries, joins):
+    """Cria os rodapés de um bloco de ambientes numa única chamada e enfileira as uniões."""
     if not family_symbol.IsActive: family_symbol.Activate()
+    line_batch = family_batch.LineBasedBatch(doc, family_symbol)
+    indexed = []
+    for key, level, scheduled, digest in entries:
+        stamp_index.delete_stale(key)
+        indexed.append((key, digest, [(line_batch.add(line, level), piece) for line, piece in scheduled]))
     
-    total_created = 0
+    instances = line_batch.create()
+    family_batch.set_offsets(instances, offset_ft, resolved_offsets)
     
-    for room in rooms:
-        curves = get_wall_segments_minus_openings(room, gap_margin_ft)
-        
-        room_instances = []
-        for c in curves:
-            inst = create_skirting(doc, c, family_symbol, room.Level, offset_ft, do_flip)
-            if inst:
-                room_instances.append(inst)
-                total_created += 1
+    created_by_room = {}
+    for key, digest, scheduled in indexed:
+        created = [(instances[i], piece) for i, piece in scheduled if instances[i]]
+        auto_join_elements(joins, [c[0] for c in created], [c[1] for c in created])
+        created_by_room[key] = [c[0] for c in created]
+        stamps.stamp_all(created_by_room[key], key, CMD_ID, digest)
+    return created_by_room
+
+resume = batch.ask_resume(doc, CMD_ID, settings)
+
+try:
+    resolved_offsets = {}
+    total_created = 0
+    with profiling.run(CMD_ID), batch.BatchExecutor(doc, "Criar Rodapés V4", CMD_ID, resume=resume, settings=settings) as executor:
+        report = pipeline.run(
+            executor.pending(rooms),
+            snapshot_changed,
+            lambda snap: (compute_room(snap[0], gap_margin_ft), snap[1]),
+            commit_room
+        )
+        executor.report.absorb(report)
         
-        doc.Regenerate()
-        auto_join_elements(doc, room_instances)
-                
-    t.Commit()
-    forms.toast("Sucesso: {} rodapés criados com união automática!".format(total_created))
+        # Cada bloco de ambientes: uma NewFamilyInstances2 numa Transaction própria
+        for entries in batch.chunked(report.results, executor.chunk_size):
+            created = executor.apply_block([e[0] for e in entries], lambda: create_chunk(entries, executor.joins))
+            if created:
+                total_created += sum(len(v) for v in created.values())
+    
+    run = executor.report
+    failed = run.failed_keys()
+    finish_sync.mark_synced(doc, CMD_ID, [k for k in map(batch.element_key, rooms) if k not in failed])
+    msg = "Sucesso: {} rodapés criados com união automática!".format(total_created)
+    if stamp_index.unchanged or stamp_index.replaced: msg += "\n" + stamp_index.summary()
+    if run.failures:
+        forms.alert("{}\n\n{}\n\nAmbientes com erro:\n{}".format(
+            msg, run.summary(), "\n".join(run.failure_lines())))
+    else:
+        forms.toast(msg)
 
 except Exception as e:
-    t.RollBack()
-    forms.alert("Erro: {}".format(e))
+    forms.alert("Erro: {}\n\nOs blocos já gravados foram mantidos; execute de novo para retomar.".format(e))
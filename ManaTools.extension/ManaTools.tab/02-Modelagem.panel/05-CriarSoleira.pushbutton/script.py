@@ -12,7 +12,7 @@ clr.AddReference("RevitAPI")
 from Autodesk.Revit.DB import *
 from Autodesk.Revit.UI.Selection import ObjectType
 from pyrevit import forms, script, revit
-from manalib import config_manager, bim_utils
+from manalib import config_manager, bim_utils, geometry2d, pipeline, param_resolver, doc_index, batch, profiling
 
 # --- SECURITY CHECK ---
 if not bim_utils.calculate_vector_matrix()[0]:
@@ -22,37 +22,13 @@ doc = __revit__.ActiveUIDocument.Document
 uidoc = __revit__.ActiveUIDocument
 CMD_ID = "manatools_criarsoleira"
 
-# --- 1. FUNÇÃO DE NOME INFALÍVEL ---
-def get_name_hardcore(element):
-    if not element: return "Nulo"
-    try:
-        p = element.get_Parameter(BuiltInParameter.ALL_MODEL_TYPE_NAME)
-        if p and p.HasValue:
-            val = p.AsString()
-            if val: return val
-    except: pass
-    try:
-        p = element.get_Parameter(BuiltInParameter.SYMBOL_NAME_PARAM)
-        if p and p.HasValue:
-            val = p.AsString()
-            if val: return val
-    except: pass
-    try:
-        return Element.Name.GetValue(element)
-    except: pass
-    return "Elemento ID:{}".format(element.Id)
-
-# --- 2. PREPARAÇÃO DE DADOS (SAFE SORT) ---
-raw_floors = FilteredElementCollector(doc).OfClass(FloorType).ToElements()
-floor_data = []
-for f in raw_floors:
-    safe_name = get_name_hardcore(f)
-    floor_data.append((safe_name, f))
-floor_data.sort(key=lambda x: x[0])
-sorted_names = [x[0] for x in floor_data]
-sorted_elements = [x[1] for x in floor_data]
-
-# --- 3. SELEÇÃO DE PORTAS (DIRETA) ---
+# --- 1. PREPARAÇÃO DE DADOS (SAFE SORT) ---
+# Catálogo da sessão (nomes já resolvidos e ordenados)
+floor_catalog = doc_index.get_index(doc).floor_types()
+sorted_names = floor_catalog.names()
+sorted_elements = floor_catalog.elements()
+
+# --- 2. SELEÇÃO DE PORTAS (DIRETA) ---
 def get_selected_doors():
     selection = revit.get_selection()
     doors = []
@@ -79,70 +55,51 @@ def get_selected_doors():
         except: pass
     return doors
 
-# --- 4. GEOMETRIA ---
+# --- 3. GEOMETRIA ---
 def get_door_width(door):
     # Tenta ler largura real, priorizando FURNITURE_WIDTH (Inspector Maná)
-    # Lista de prioridade baseada no HTML do usuário
-    params_to_check = [
-        BuiltInParameter.FURNITURE_WIDTH, # Largura (0.92) - Mais preciso
-        BuiltInParameter.DOOR_WIDTH,      # Largura Padrão
-        BuiltInParameter.FAMILY_WIDTH_PARAM
-    ]
-    
-    # 1. Instância
-    for pid in params_to_check:
-        p = door.get_Parameter(pid)
-        if p and p.HasValue:
-            val = p.AsDouble()
-            if val > 0: return val
-            
-    # 2. Tipo (Symbol)
-    for pid in params_to_check:
-        p = door.Symbol.get_Parameter(pid)
-        if p and p.HasValue:
-            val = p.AsDouble()
-            if val > 0: return val
-            
-    return 0.8 # Fallback 
+    # Cadeia em param_resolver.DOOR_WIDTH, aprendida uma vez por tipo
+    return param_resolver.read(door, param_resolver.DOOR_WIDTH, doc)
 
 def get_wall_width(wall):
     return wall.Width
 
-def create_threshold_geometry(door, wall, side_offset, width_offset):
-    pt_center = door.Location.Point
+def snapshot_door(door):
+    """Estágio 1 (API): dados da porta e da parede hospedeira em tuplas."""
+    wall = door.Host
+    if not wall or not isinstance(wall, Wall): return None
     
     lc = wall.Location
     if not isinstance(lc, LocationCurve): return None
     line = lc.Curve
     
-    vec_wall = (line.GetEndPoint(1) - line.GetEndPoint(0)).Normalize()
-    vec_thick = XYZ(-vec_wall.Y, vec_wall.X, 0)
-    
-    d_width = get_door_width(door)
-    w_thick = get_wall_width(wall)
-    
-    length = d_width + (side_offset * 2)
-    thickness = w_thick + (width_offset * 2)
-    
-    v_long = vec_wall * (length / 2.0)
-    v_trans = vec_thick * (thickness / 2.0)
+    p0 = line.GetEndPoint(0)
+    p1 = line.GetEndPoint(1)
+    pt_center = door.Location.Point
     
-    center_flat = XYZ(pt_center.X, pt_center.Y, 0)
+    return {
+        "center": (pt_center.X, pt_center.Y),
+        "wall_dir": geometry2d.normalize((p1.X - p0.X, p1.Y - p0.Y)),
+        "door_width": get_door_width(door),
+        "wall_thick": get_wall_width(wall),
+    }
+
+def compute_threshold(snap, side_offset, width_offset):
+    """Estágio 2 (puro): cantos do retângulo da soleira em Z=0."""
+    vec_wall = snap["wall_dir"]
+    vec_thick = geometry2d.perpendicular(vec_wall)
     
-    p1 = center_flat + v_long + v_trans
-    p2 = center_flat - v_long + v_trans
-    p3 = center_flat - v_long - v_trans
-    p4 = center_flat + v_long - v_trans
+    half_len = (snap["door_width"] + (side_offset * 2)) / 2.0
+    half_thk = (snap["wall_thick"] + (width_offset * 2)) / 2.0
     
-    loops = []
-    lines = [
-        Line.CreateBound(p1, p2),
-        Line.CreateBound(p2, p3),
-        Line.CreateBound(p3, p4),
-        Line.CreateBound(p4, p1)
-    ]
-    loops.append(CurveLoop.Create(lines))
-    return loops
+    return geometry2d.rectangle(snap["center"], vec_wall, vec_thick,
+                                half_len, -half_len, half_thk, -half_thk)
+
+def create_threshold_geometry(points):
+    """Converte os cantos calculados em CurveLoop."""
+    pts = [XYZ(x, y, 0) for x, y in points]
+    lines = [Line.CreateBound(pts[i], pts[(i + 1) % 4]) for i in range(4)]
+    return [CurveLoop.Create(lines)]
 
 # --- GUI ---
 doors = get_selected_doors()
@@ -199,41 +156,45 @@ except:
     forms.alert("Valores inválidos.", exitscript=True)
 
 # --- EXECUÇÃO ---
-t = Transaction(doc, "Criar Soleiras")
-t.Start()
+def commit_door(door, points, joins):
+    """Estágio 3 (API): cria a soleira e enfileira a união com a parede. Erros sobem para o lote."""
+    wall = door.Host
+    with profiling.span("Floor.Create"):
+        soleira = Floor.Create(doc, create_threshold_geometry(points), floor_type.Id, door.LevelId)
+    
+    sill_p = door.get_Parameter(BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM)
+    if sill_p and sill_p.HasValue:
+        z_val = sill_p.AsDouble()
+        p_off = soleira.get_Parameter(BuiltInParameter.FLOOR_HEIGHTABOVELEVEL_PARAM)
+        if p_off: p_off.Set(z_val)
+    
+    if do_join:
+        joins.add(soleira, wall)
+        
+    return soleira
+
+# Opções do diálogo: outras opções não retomam um lote interrompido
+settings = (floor_type.Id, side_off, width_off, do_join)
+resume = batch.ask_resume(doc, CMD_ID, settings)
 
 try:
-    created_count = 0
+    with profiling.run(CMD_ID), batch.BatchExecutor(doc, "Criar Soleiras", CMD_ID, resume=resume, settings=settings) as executor:
+        report = pipeline.run(
+            executor.pending(doors),
+            snapshot_door,
+            lambda snap: compute_threshold(snap, side_off, width_off),
+            lambda door, points: executor.apply(batch.element_key(door), lambda: commit_door(door, points, executor.joins))
+        )
+        executor.report.absorb(report)
     
-    for door in doors:
-        # Pega a parede hospedeira
-        wall = door.Host
-        if not wall or not isinstance(wall, Wall):
-            continue
-            
-        loops = create_threshold_geometry(door, wall, side_off, width_off)
-        if loops:
-            try:
-                soleira = Floor.Create(doc, loops, floor_type.Id, door.LevelId)
-                
-                sill_p = door.get_Parameter(BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM)
-                if sill_p and sill_p.HasValue:
-                    z_val = sill_p.AsDouble()
-                    p_off = soleira.get_Parameter(BuiltInParameter.FLOOR_HEIGHTABOVELEVEL_PARAM)
-                    if p_off: p_off.Set(z_val)
-                
-                if do_join:
-                    try:
-                        JoinGeometryUtils.JoinGeometry(doc, soleira, wall)
-                    except: pass 
-                    
-                created_count += 1
-            except Exception as ex:
-                pass
-
-    t.Commit()
-    forms.toast("Sucesso: {} soleiras criadas.".format(created_count))
+    run = executor.report
+    created_count = len([r for r in report.results if r])
+    msg = "Sucesso: {} soleiras criadas.".format(created_count)
+    if run.failures:
+        forms.alert("{}\n\n{}\n\nPortas com erro:\n{}".format(
+            msg, run.summary(), "\n".join(run.failure_lines())))
+    else:
+        forms.toast(msg)
 
 except Exception as e:
-    t.RollBack()
-    forms.alert("Erro Crítico: {}".format(e))
+    forms.alert("Erro Crítico: {}\n\nOs blocos já gravados foram mantidos; execute de novo para retomar.".format(e))
@@ -12,7 +12,7 @@ clr.AddReference("RevitAPI")
 from Autodesk.Revit.DB import *
 from Autodesk.Revit.UI.Selection import ObjectType
 from pyrevit import forms, script, revit
-from manalib import config_manager, bim_utils
+from manalib import config_manager, bim_utils, geometry2d, pipeline, room_locator, param_resolver, doc_index, batch, profiling
 
 # --- SECURITY CHECK ---
 if not bim_utils.calculate_vector_matrix()[0]:
@@ -22,17 +22,7 @@ doc = __revit__.ActiveUIDocument.Document
 uidoc = __revit__.ActiveUIDocument
 CMD_ID = "manatools_criarpingadeira"
 
-# --- 1. HELPERS ---
-def get_name_hardcore(element):
-    if not element: return "Nulo"
-    try:
-        p = element.get_Parameter(BuiltInParameter.ALL_MODEL_TYPE_NAME)
-        if p and p.HasValue: return p.AsString()
-    except: pass
-    try: return Element.Name.GetValue(element)
-    except: return "Elemento ID:{}".format(element.Id)
-
-# --- 2. SELEÇÃO ---
+# --- 1. SELEÇÃO ---
 def get_selected_windows():
     selection = revit.get_selection()
     windows = []
@@ -59,169 +49,114 @@ def get_selected_windows():
         except: pass
     return windows
 
-# --- 3. GEOMETRIA ---
+# --- 2. GEOMETRIA ---
 def get_window_width(window):
-    params = [BuiltInParameter.WINDOW_WIDTH, BuiltInParameter.FAMILY_WIDTH_PARAM, BuiltInParameter.FURNITURE_WIDTH]
-    for pid in params:
-        p = window.get_Parameter(pid)
-        if not p: p = window.Symbol.get_Parameter(pid)
-        if p and p.HasValue: return p.AsDouble()
-    for pid in params:
-        p = window.Symbol.get_Parameter(pid)
-        if p and p.HasValue: return p.AsDouble()
-    return 1.0
+    return param_resolver.read(window, param_resolver.WINDOW_WIDTH, doc)
 
 def get_wall_thickness(wall):
     return wall.Width
 
-def is_external_room(room):
-    """
-    Verifica se um ambiente parece ser externo baseado no nome.
-    """
-    if not room: return True
-    
-    try:
-        room_name = room.get_Parameter(BuiltInParameter.ROOM_NAME).AsString()
-        room_number = room.get_Parameter(BuiltInParameter.ROOM_NUMBER).AsString()
-        
-        # Lista de termos que indicam área externa
-        external_terms = [
-            "calcada", "calçada", "rua", "exterior", "externo", "externa",
-            "varanda", "sacada", "area externa", "área externa", 
-            "passeio", "logradouro", "jardim externo"
-        ]
-        
-        name_lower = (room_name or "").lower()
-        number_lower = (room_number or "").lower()
-        
-        for term in external_terms:
-            if term in name_lower or term in number_lower:
-                return True
-                
-    except: pass
-    
-    return False
-
-def get_room_area(room):
-    """Retorna a área do ambiente em pés quadrados."""
-    if not room: return 0
-    try:
-        p_area = room.get_Parameter(BuiltInParameter.ROOM_AREA)
-        if p_area and p_area.HasValue:
-            return p_area.AsDouble()
-    except: pass
-    return 0
-
-def detect_external_face(window, wall):
+def resolve_external_face(snap, room_index):
     """
-    Detecta qual lado da parede é externo, baseado na presença de ambientes.
+    Estágio 2 (puro): qual lado da parede é externo, pela presença de ambientes.
     Considera múltiplos critérios para decidir o lado correto.
     """
     # Vetor base: usa a orientação da família já considerando flips
-    vec_base = window.FacingOrientation
-    if vec_base.GetLength() == 0:
-        vec_base = wall.Orientation  # fallback
-
-    pt_center = window.Location.Point
-    wall_thick = get_wall_thickness(wall)
+    vec_base = snap["facing"]
+    cx, cy, cz = snap["center"]
     
     # Offset para testar (metade da espessura + um pouco mais)
-    test_distance = (wall_thick / 2.0) + 0.5  # +0.5 pés (~15cm) para ter certeza
+    test_distance = (snap["wall_thick"] / 2.0) + 0.5  # +0.5 pés (~15cm) para ter certeza
     
     # Testa os dois lados
-    pt_side_A = pt_center + (vec_base * test_distance)   # lado do vec_base
-    pt_side_B = pt_center - (vec_base * test_distance)   # lado oposto
+    dx, dy = vec_base[0] * test_distance, vec_base[1] * test_distance
+    room_side_A = room_index.room_at((cx + dx, cy + dy, cz), snap["level_id"])   # lado do vec_base
+    room_side_B = room_index.room_at((cx - dx, cy - dy, cz), snap["level_id"])   # lado oposto
     
-    # Verifica se existe Room em cada lado
-    room_side_A = doc.GetRoomAtPoint(pt_side_A)
-    room_side_B = doc.GetRoomAtPoint(pt_side_B)
+    inverse = (-vec_base[0], -vec_base[1])
     
     # CASO 1: Só tem Room em um lado -> Pingadeira vai para o lado sem Room
     if room_side_A and not room_side_B:
-        return -vec_base  # Room no lado A, pingadeira vai para o lado B (externo)
+        return inverse  # Room no lado A, pingadeira vai para o lado B (externo)
     
     if room_side_B and not room_side_A:
         return vec_base  # Room no lado B, pingadeira vai para o lado A (externo)
     
     # CASO 2: Tem Room nos dois lados (janela interna)
     if room_side_A and room_side_B:
-        # 2.1: Verifica se algum tem nome indicando área externa
-        is_A_external = is_external_room(room_side_A)
-        is_B_external = is_external_room(room_side_B)
-        
-        if is_A_external and not is_B_external:
+        # 2.1: Verifica se algum tem nome indicando área externa (classificado uma vez por ambiente)
+        if room_side_A.external and not room_side_B.external:
             return vec_base  # A é externo, pingadeira vai para A
         
-        if is_B_external and not is_A_external:
-            return -vec_base  # B é externo, pingadeira vai para B
+        if room_side_B.external and not room_side_A.external:
+            return inverse  # B é externo, pingadeira vai para B
         
         # 2.2: Se ambos parecem internos, compara áreas
         # Área muito grande pode indicar área externa mal configurada
-        area_A = get_room_area(room_side_A)
-        area_B = get_room_area(room_side_B)
+        area_A = room_side_A.area
+        area_B = room_side_B.area
         
         # Se um ambiente é significativamente maior (>3x), provavelmente é externo
         if area_A > 0 and area_B > 0:
             if area_A > area_B * 3:
                 return vec_base  # A é muito maior, provavelmente externo
             if area_B > area_A * 3:
-                return -vec_base  # B é muito maior, provavelmente externo
+                return inverse  # B é muito maior, provavelmente externo
     
     # CASO 3: Sem Room em nenhum lado, ou casos indeterminados
     # Usa orientação padrão da parede (geralmente aponta para fora)
     return vec_base
 
-def create_sill_geometry(window, wall, side_offset, overhang, internal_depth):
-    # Geometria base
-    pt_center = window.Location.Point
+def snapshot_window(window):
+    """Estágio 1 (API): dados da janela e da parede em tuplas."""
+    wall = window.Host
+    if not wall or not isinstance(wall, Wall): return None
     
     lc = wall.Location
     if not isinstance(lc, LocationCurve): return None
     line = lc.Curve
     
-    vec_wall = (line.GetEndPoint(1) - line.GetEndPoint(0)).Normalize()
-    vec_out = detect_external_face(window, wall)  # Usa detecção inteligente
-    
-    w_width = get_window_width(window)
-    wall_thick = get_wall_thickness(wall)
-    
-    length = w_width + (side_offset * 2)
-    # total_depth = internal_depth + overhang # Não usado no retorno, apenas para cálculo interno
-    
-    dist_axis_to_ext_face = wall_thick / 2.0
-    pt_ext_face_center = pt_center + (vec_out * dist_axis_to_ext_face)
-    
-    pt_start_center = pt_ext_face_center - (vec_out * internal_depth) 
-    pt_end_center = pt_ext_face_center + (vec_out * overhang)         
-    
-    v_long = vec_wall * (length / 2.0)
+    p0 = line.GetEndPoint(0)
+    p1 = line.GetEndPoint(1)
+    pt_center = window.Location.Point
     
-    def flat(pt): return XYZ(pt.X, pt.Y, 0)
+    vec_base = window.FacingOrientation
+    if vec_base.GetLength() == 0:
+        vec_base = wall.Orientation  # fallback
     
-    p1 = flat(pt_start_center - v_long)
-    p2 = flat(pt_start_center + v_long)
-    p3 = flat(pt_end_center + v_long)
-    p4 = flat(pt_end_center - v_long)
+    return {
+        "center": (pt_center.X, pt_center.Y, pt_center.Z),
+        "level_id": window.LevelId.IntegerValue,
+        "wall_dir": geometry2d.normalize((p1.X - p0.X, p1.Y - p0.Y)),
+        "facing": (vec_base.X, vec_base.Y),
+        "window_width": get_window_width(window),
+        "wall_thick": get_wall_thickness(wall),
+    }
+
+def compute_sill(snap, room_index, side_offset, overhang, internal_depth):
+    """Estágio 2 (puro): cantos do retângulo da pingadeira em Z=0."""
+    out_dir = resolve_external_face(snap, room_index)  # Usa detecção inteligente
+    half_len = (snap["window_width"] + (side_offset * 2)) / 2.0
     
-    loops = []
-    lines = [
-        Line.CreateBound(p1, p2),
-        Line.CreateBound(p2, p3),
-        Line.CreateBound(p3, p4),
-        Line.CreateBound(p4, p1)
-    ]
-    loops.append(CurveLoop.Create(lines))
+    # Distâncias medidas a partir do eixo da parede, na direção externa
+    dist_axis_to_ext_face = snap["wall_thick"] / 2.0
+    d_start = dist_axis_to_ext_face - internal_depth
+    d_end = dist_axis_to_ext_face + overhang
     
-    return loops
+    return geometry2d.rectangle(snap["center"], snap["wall_dir"], out_dir,
+                                -half_len, half_len, d_start, d_end)
+
+def create_sill_geometry(points):
+    """Converte os cantos calculados em CurveLoop."""
+    pts = [XYZ(x, y, 0) for x, y in points]
+    lines = [Line.CreateBound(pts[i], pts[(i + 1) % 4]) for i in range(4)]
+    return [CurveLoop.Create(lines)]
 
 # --- PREP DADOS ---
-raw_floors = FilteredElementCollector(doc).OfClass(FloorType).ToElements()
-floor_data = []
-for f in raw_floors:
-    floor_data.append((get_name_hardcore(f), f))
-floor_data.sort(key=lambda x: x[0])
-sorted_names = [x[0] for x in floor_data]
-sorted_elements = [x[1] for x in floor_data]
+# Catálogo da sessão (nomes já resolvidos e ordenados)
+floor_catalog = doc_index.get_index(doc).floor_types()
+sorted_names = floor_catalog.names()
+sorted_elements = floor_catalog.elements()
 
 # --- GUI ---
 windows = get_selected_windows()
@@ -280,43 +215,52 @@ except:
     forms.alert("Valores inválidos.", exitscript=True)
 
 # --- EXECUÇÃO ---
-t = Transaction(doc, "Criar Pingadeiras")
-t.Start()
+def commit_window(win_elem, points, joins):
+    """Estágio 3 (API): cria a pingadeira e enfileira a união com a parede. Erros sobem para o lote."""
+    wall = win_elem.Host
+    # 1. Cria Piso
+    level_id = win_elem.LevelId
+    with profiling.span("Floor.Create"):
+        sill = Floor.Create(doc, create_sill_geometry(points), floor_type.Id, level_id)
+    
+    # Ajuste de Altura (Peitoril)
+    p_sill_win = win_elem.get_Parameter(BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM)
+    if p_sill_win:
+        h_val = p_sill_win.AsDouble()
+        p_off_floor = sill.get_Parameter(BuiltInParameter.FLOOR_HEIGHTABOVELEVEL_PARAM)
+        if p_off_floor: p_off_floor.Set(h_val)
+    
+    # 2. Join
+    if do_join:
+        joins.add(sill, wall)
+        
+    return sill
+
+# Opções do diálogo: outras opções não retomam um lote interrompido
+settings = (floor_type.Id, side_off, overhang, internal_depth, do_join)
+resume = batch.ask_resume(doc, CMD_ID, settings)
 
 try:
-    count = 0
-    for win_elem in windows:
-        wall = win_elem.Host
-        if not wall or not isinstance(wall, Wall):
-            continue
-            
-        loops = create_sill_geometry(win_elem, wall, side_off, overhang, internal_depth)
-        
-        if loops:
-            try:
-                # 1. Cria Piso
-                level_id = win_elem.LevelId
-                sill = Floor.Create(doc, loops, floor_type.Id, level_id)
-                
-                # Ajuste de Altura (Peitoril)
-                p_sill_win = win_elem.get_Parameter(BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM)
-                if p_sill_win:
-                    h_val = p_sill_win.AsDouble()
-                    p_off_floor = sill.get_Parameter(BuiltInParameter.FLOOR_HEIGHTABOVELEVEL_PARAM)
-                    if p_off_floor: p_off_floor.Set(h_val)
-                
-                # 2. Join
-                if do_join:
-                    try: JoinGeometryUtils.JoinGeometry(doc, sill, wall)
-                    except: pass
-                    
-                count += 1
-            except Exception as ex:
-                pass
-                
-    t.Commit()
-    forms.toast("Sucesso: {} pingadeiras criadas (Flat).".format(count))
+    # Ambientes dos níveis das janelas: lidos uma vez, consultas em Python puro
+    room_index = room_locator.build_index(doc, set(w.LevelId.IntegerValue for w in windows))
+    
+    with profiling.run(CMD_ID), batch.BatchExecutor(doc, "Criar Pingadeiras", CMD_ID, resume=resume, settings=settings) as executor:
+        report = pipeline.run(
+            executor.pending(windows),
+            snapshot_window,
+            lambda snap: compute_sill(snap, room_index, side_off, overhang, internal_depth),
+            lambda win_elem, points: executor.apply(batch.element_key(win_elem), lambda: commit_window(win_elem, points, executor.joins))
+        )
+        executor.report.absorb(report)
+    
+    run = executor.report
+    count = len([r for r in report.results if r])
+    msg = "Sucesso: {} pingadeiras criadas (Flat).".format(count)
+    if run.failures:
+        forms.alert("{}\n\n{}\n\nJanelas com erro:\n{}".format(
+            msg, run.summary(), "\n".join(run.failure_lines())))
+    else:
+        forms.toast(msg)
 
 except Exception as e:
-    t.RollBack()
-    forms.alert("Erro Crítico: {}".format(e))
\ No newline at end of file
+    forms.alert("Erro Crítico: {}\n\nOs blocos já gravados foram mantidos; execute de novo para retomar.".format(e))
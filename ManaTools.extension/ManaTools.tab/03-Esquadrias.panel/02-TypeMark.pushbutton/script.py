@@ -6,9 +6,11 @@ O Tipo com mais cópias no projeto vira o número 1.
 from collections import defaultdict
 from Autodesk.Revit.DB import FilteredElementCollector, BuiltInCategory, BuiltInParameter, Transaction
 from pyrevit import forms, script, revit
+from manalib import profiling, api_audit
 
 doc = __revit__.ActiveUIDocument.Document
 logger = script.get_logger()
+CMD_ID = "manatools_typemark"
 
 def get_types_sorted_by_count(category_id):
     """
@@ -38,7 +40,7 @@ def get_types_sorted_by_count(category_id):
                 
                 # Guarda o objeto do tipo se ainda não guardou
                 if tid not in type_map:
-                    type_map[tid] = doc.GetElement(tid)
+                    type_map[tid] = api_audit.counted(doc).GetElement(tid)
         except: pass
 
     # 3. Ordenar (Do maior para o menor)
@@ -75,7 +77,7 @@ res = forms.CommandSwitchWindow.show(options, message="Renomear Marcas de Tipo p
 if not res: script.exit()
 
 # --- EXECUÇÃO ---
-with revit.Transaction("Renomear Marcas de Tipo"):
+with profiling.run(CMD_ID), revit.Transaction("Renomear Marcas de Tipo"):
     
     # >> PORTAS
     if res in ["Portas (P1, P2...)", "Ambas"]:
@@ -11,7 +11,7 @@ clr.AddReference("RevitAPI")
 from Autodesk.Revit.DB import *
 from Autodesk.Revit.UI.Selection import ObjectType
 from pyrevit import forms, script, revit
-from manalib import config_manager, bim_utils
+from manalib import config_manager, bim_utils, spatial_index, failures, join_queue, profiling, api_audit
 
 # --- SECURITY CHECK ---
 if not bim_utils.calculate_vector_matrix()[0]:
@@ -21,6 +21,9 @@ doc = __revit__.ActiveUIDocument.Document
 uidoc = __revit__.ActiveUIDocument
 CMD_ID = "manatools_unirelementos"
 
+# Folga (pés) para considerar dois BoundingBoxes em contato
+BBOX_TOLERANCE = 0.0
+
 # --- HELPERS ---
 def get_elements_by_scope(scope_view, category_builtins):
     """
@@ -47,90 +50,53 @@ def get_elements_by_scope(scope_view, category_builtins):
                 
     return elements
 
+def snapshot_boxes(elements):
+    """
+    Lê o BoundingBox de cada elemento UMA vez.
+    Retorna (lista de (id_int, caixa), mapa id_int -> elemento).
+    """
+    items = []
+    by_id = {}
+    for e in elements:
+        key = e.Id.IntegerValue
+        if key in by_id: continue
+        by_id[key] = e
+        items.append((key, spatial_index.box_from_bounding_box(api_audit.counted(e).get_BoundingBox(None))))
+    return items, by_id
+
 def join_elements_matrix(list_a, list_b, switch_order=False):
     """
-    Tenta unir cada elemento da lista A com elementos da lista B que interceptam o BoundingBox.
+    Une cada elemento da lista A com elementos da lista B que interceptam o BoundingBox.
+    Pares candidatos vêm do índice espacial (grade), não de uma varredura N*M.
+    Com switch_order, garante que A corta B.
     """
-    count = 0
+    items_a, map_a = snapshot_boxes(list_a)
+    items_b, map_b = snapshot_boxes(list_b)
+    pairs = spatial_index.candidate_pairs(items_a, items_b, tolerance=BBOX_TOLERANCE)
     
-    # Barra de Progresso porque isso pode demorar (O(N*M))
-    total_ops = len(list_a)
-    
-    with forms.ProgressBar(title="Processando Uniões... ({value}/{max_value})", cancellable=True) as pb:
-        for i, elem_a in enumerate(list_a):
-            if pb.cancelled: break
-            pb.update_progress(i, total_ops)
-            
-            bb_a = elem_a.get_BoundingBox(None)
-            if not bb_a: continue
-            
-            # Outline para filtro rápido
-            outline = Outline(bb_a.Min, bb_a.Max)
-            
-            # Filtra BBox na lista B (Otimização)
-            # Para scripts pesados, usar FilteredElementCollector com BoundingBoxIntersectsFilter seria melhor,
-            # mas aqui já temos a lista B em memória. Vamos iterar e checar BBox.
-            
-            for elem_b in list_b:
-                # Não unir consigo mesmo
-                if elem_a.Id == elem_b.Id: continue
-                
-                # Check rápido de BBox
-                bb_b = elem_b.get_BoundingBox(None)
-                if not bb_b: continue
-                
-                # Intersecção simples de caixas
-                if (bb_a.Min.X <= bb_b.Max.X and bb_a.Max.X >= bb_b.Min.X and
-                    bb_a.Min.Y <= bb_b.Max.Y and bb_a.Max.Y >= bb_b.Min.Y and
-                    bb_a.Min.Z <= bb_b.Max.Z and bb_a.Max.Z >= bb_b.Min.Z):
-                    
-                    try:
-                        # Verifica se já estão unidos
-                        if not JoinGeometryUtils.AreElementsJoined(doc, elem_a, elem_b):
-                            JoinGeometryUtils.JoinGeometry(doc, elem_a, elem_b)
-                            count += 1
-                            
-                            if switch_order:
-                                JoinGeometryUtils.SwitchJoinOrder(doc, elem_a, elem_b)
-                        else:
-                            # Se já unidos e pediu pra inverter
-                            if switch_order:
-                                # Verifica quem corta quem
-                                if JoinGeometryUtils.IsCuttingElementInJoin(doc, elem_b, elem_a):
-                                    # Se B corta A, mas queremos inverter (depende da definição de switch)
-                                    # SwitchJoinOrder apenas troca.
-                                    JoinGeometryUtils.SwitchJoinOrder(doc, elem_a, elem_b)
-                                    count += 1
-                    except:
-                        pass
-                        
-    return count
+    joins = join_queue.JoinQueue(doc)
+    for id_a, id_b in pairs:
+        joins.add(map_a[id_a], map_b[id_b], True if switch_order else None)
+    return run_queue(joins, "Processando Uniões... ({value}/{max_value})")
 
 def join_all_in_list(elements):
     """
     Une tudo contra tudo numa única lista (Modo Seleção Livre).
+    O BBox é testado antes de qualquer chamada à API (índice espacial).
     """
-    count = 0
-    with forms.ProgressBar(title="Unindo Seleção... ({value}/{max_value})") as pb:
-        for i in range(len(elements)):
-            pb.update_progress(i, len(elements))
-            for j in range(i + 1, len(elements)):
-                e1 = elements[i]
-                e2 = elements[j]
-                
-                try:
-                    if not JoinGeometryUtils.AreElementsJoined(doc, e1, e2):
-                        # BBox Check rápido
-                        bb1 = e1.get_BoundingBox(None)
-                        bb2 = e2.get_BoundingBox(None)
-                        if bb1 and bb2:
-                             if (bb1.Min.X <= bb2.Max.X and bb1.Max.X >= bb2.Min.X and
-                                 bb1.Min.Y <= bb2.Max.Y and bb1.Max.Y >= bb2.Min.Y and
-                                 bb1.Min.Z <= bb2.Max.Z and bb1.Max.Z >= bb2.Min.Z):
-                                    JoinGeometryUtils.JoinGeometry(doc, e1, e2)
-                                    count += 1
-                except: pass
-    return count
+    items, by_id = snapshot_boxes(elements)
+    pairs = spatial_index.self_candidate_pairs(items, tolerance=BBOX_TOLERANCE)
+    
+    joins = join_queue.JoinQueue(doc)
+    for id_1, id_2 in pairs:
+        joins.add(by_id[id_1], by_id[id_2])
+    return run_queue(joins, "Unindo Seleção... ({value}/{max_value})")
+
+def run_queue(joins, title):
+    """Executa a fila (grafo de uniões em memória) com barra de progresso cancelável."""
+    with forms.ProgressBar(title=title, cancellable=True) as pb:
+        report = joins.flush(progress=pb.update_progress, cancelled=lambda: pb.cancelled)
+    return report
 
 # --- GUI ---
 class JoinWindow(forms.WPFWindow):
@@ -173,56 +139,68 @@ elif win.rb_selection_all.IsChecked: mode = "ALL"
 if not mode: script.exit()
 
 # --- EXECUÇÃO ---
-t = Transaction(doc, "Unir Elementos")
-t.Start()
-
-try:
-    joined_count = 0
-    
-    if mode == "WF": # Parede x Piso
-        walls = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Walls])
-        floors = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Floors])
-        if not walls or not floors:
-            forms.alert("Elementos insuficientes encontrados.")
-            script.exit()
-        joined_count = join_elements_matrix(walls, floors, switch_order)
+with profiling.run(CMD_ID):
+    t = Transaction(doc, "Unir Elementos")
+    warnings = failures.attach(t)  # "Unidos sem contato" etc. sem diálogo por aviso
+    t.Start()
+
+    try:
+        if mode == "WF": # Parede x Piso
+            walls = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Walls])
+            floors = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Floors])
+            if not walls or not floors:
+                forms.alert("Elementos insuficientes encontrados.")
+                script.exit()
+            join_report = join_elements_matrix(walls, floors, switch_order)
         
-    elif mode == "WC": # Parede x Pilar
-        walls = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Walls])
-        cols = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Columns, BuiltInCategory.OST_StructuralColumns])
-        if not walls or not cols:
-            forms.alert("Elementos insuficientes encontrados.")
-            script.exit()
-        joined_count = join_elements_matrix(walls, cols, switch_order)
+        elif mode == "WC": # Parede x Pilar
+            walls = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Walls])
+            cols = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Columns, BuiltInCategory.OST_StructuralColumns])
+            if not walls or not cols:
+                forms.alert("Elementos insuficientes encontrados.")
+                script.exit()
+            join_report = join_elements_matrix(walls, cols, switch_order)
         
-    elif mode == "WV": # Parede x Viga
-        walls = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Walls])
-        framing = get_elements_by_scope(scope_view, [BuiltInCategory.OST_StructuralFraming])
-        if not walls or not framing:
-            forms.alert("Elementos insuficientes encontrados.")
-            script.exit()
-        joined_count = join_elements_matrix(walls, framing, switch_order)
+        elif mode == "WV": # Parede x Viga
+            walls = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Walls])
+            framing = get_elements_by_scope(scope_view, [BuiltInCategory.OST_StructuralFraming])
+            if not walls or not framing:
+                forms.alert("Elementos insuficientes encontrados.")
+                script.exit()
+            join_report = join_elements_matrix(walls, framing, switch_order)
         
-    elif mode == "WW": # Parede x Parede
-        walls = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Walls])
-        if len(walls) < 2:
-            forms.alert("Menos de 2 paredes encontradas.")
-            script.exit()
-        # Usa a lógica de lista única
-        joined_count = join_all_in_list(walls)
+        elif mode == "WW": # Parede x Parede
+            walls = get_elements_by_scope(scope_view, [BuiltInCategory.OST_Walls])
+            if len(walls) < 2:
+                forms.alert("Menos de 2 paredes encontradas.")
+                script.exit()
+            # Usa a lógica de lista única
+            join_report = join_all_in_list(walls)
         
-    elif mode == "ALL": # Tudo x Tudo (Seleção)
-        # Pega toda a seleção
-        selection = revit.get_selection()
-        elements = [e for e in selection] # Converte para lista Python
-        if len(elements) < 2:
-            forms.alert("Selecione pelo menos 2 elementos.")
-            script.exit()
-        joined_count = join_all_in_list(elements)
-
-    t.Commit()
-    forms.toast("Concluído: {} uniões processadas.".format(joined_count))
-
-except Exception as e:
-    t.RollBack()
-    forms.alert("Erro: {}".format(e))
+        elif mode == "ALL": # Tudo x Tudo (Seleção)
+            # Pega toda a seleção
+            selection = revit.get_selection()
+            elements = [e for e in selection] # Converte para lista Python
+            if len(elements) < 2:
+                forms.alert("Selecione pelo menos 2 elementos.")
+                script.exit()
+            join_report = join_all_in_list(elements)
+
+        with profiling.span("Transaction.Commit"):
+            status = t.Commit()
+        if status != TransactionStatus.Committed:
+            # Desfeita pelo Revit (erro não resolvido): as uniões não existem
+            join_queue.get_graph(doc).discard()
+            msg = "Uniões desfeitas pelo Revit ({}).".format(status)
+            if warnings.total(): msg += "\n" + warnings.summary()
+            forms.alert(msg)
+        else:
+            join_queue.get_graph(doc).confirm()
+            msg = "Concluído: {}".format(join_report.summary())
+            if warnings.total(): msg += "\n" + warnings.summary()
+            forms.toast(msg)
+
+    except Exception as e:
+        if t.GetStatus() == TransactionStatus.Started: t.RollBack()
+        join_queue.get_graph(doc).discard()
+        forms.alert("Erro: {}".format(e))
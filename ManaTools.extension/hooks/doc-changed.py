@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""Registra alterações do documento para invalidar os caches de sessão da ManaTools."""
+from pyrevit import EXEC_PARAMS
+from manalib import session
+
+try:
+    args = EXEC_PARAMS.event_args
+    doc = args.GetDocument()
+    # Sem cache da ManaTools neste documento: nada a invalidar (sem ler os IDs)
+    if session.is_tracked(doc):
+        session.notify_document_changed(
+            doc,
+            args.GetAddedElementIds(),
+            args.GetModifiedElementIds(),
+            args.GetDeletedElementIds(),
+        )
+except Exception as e:
+    # Falha silenciosa: caches serão reconstruídos na próxima revisão
+    print("Aviso: falha ao registrar alteração do documento: {}".format(e))
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Libera os caches de sessão da ManaTools do documento que está sendo fechado."""
+from pyrevit import EXEC_PARAMS
+from manalib import session
+
+try:
+    session.forget_document(EXEC_PARAMS.event_args.Document)
+except Exception as e:
+    print("Aviso: falha ao liberar caches do documento: {}".format(e))
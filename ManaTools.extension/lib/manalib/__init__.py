@@ -2,4 +2,4 @@
 """Pacote de bibliotecas core da Maná Tools."""
 
 __version__ = "1.0.0"
-__all__ = ['utils', 'text_utils', 'revit_utils', 'bim_manager', 'sicro_integration', 'joinery', 'finishes', 'flooring', 'config_manager']
+__all__ = ['utils', 'text_utils', 'revit_utils', 'bim_manager', 'sicro_integration', 'joinery', 'finishes', 'flooring', 'config_manager', 'spatial_index', 'session', 'room_geometry', 'geometry2d', 'pipeline', 'openings', 'family_batch', 'polygon2d', 'wall_trim', 'room_locator', 'param_resolver', 'doc_index', 'batch', 'failures', 'join_queue', 'stamps', 'finish_sync', 'finish_updater', 'profiling', 'api_audit', 'replay', 'snapshot']
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Contagem de chamadas à API do Revit (modo de depuração), para achar padrões N+1.
+
+    reader = api_audit.counted(doc)              # proxy quando a auditoria está ativa
+    elem = reader.GetElement(eid)                # contado; elem é o objeto real
+    box = api_audit.counted(elem).get_BoundingBox(None)
+
+    dados = api_audit.wrap(doc)                  # proxy "profundo": os elementos
+    tipo = dados.GetElement(tid)                 # devolvidos também são contados
+    tipo.get_Parameter(...)
+
+Para cada execução de comando são registrados:
+    - chamadas por método (Document.GetElement, Wall.get_BoundingBox...);
+    - chamadas por local de chamada: a linha que chamou a API e, se ela está
+      na manalib, a primeira linha fora da manalib que levou até ela
+      ("manalib/openings.py:79 < 04-CriarRodape.pushbutton/script.py:140"),
+      para separar os laços de cada comando que usam o mesmo helper;
+    - chamadas repetidas com argumentos idênticos (mesmo alvo, mesmo método,
+      mesmos argumentos) -> candidatas a cache ou leitura em lote.
+
+Ativação (desligado por padrão), no pyRevit_config.ini:
+    [manatools_api_audit]
+    enabled = true
+
+Com a opção ligada, profiling.run() também abre a auditoria: o relatório vai
+para a janela de saída e para um JSON ao lado do trace. Desligada, counted() e
+wrap() devolvem o próprio objeto (nenhum custo).
+
+Proxies não podem ser passados para métodos estáticos da API (Wall.Create,
+JoinGeometryUtils...): use real(obj) ou counted(), que devolve objetos reais.
+"""
+import os
+import sys
+import json
+import time
+
+CONFIG_ID = "manatools_api_audit"
+
+# Linhas de cada tabela do relatório
+REPORT_LIMIT = 15
+
+# Auditoria da execução atual. Variável de módulo (não session store): o
+# teste "está ativa?" roda em todo GetElement dos laços quentes.
+_ACTIVE = None
+
+_THIS_FILE = os.path.splitext(os.path.abspath(__file__))[0]
+_LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def enabled():
+    """True se o modo de depuração está ligado na configuração."""
+    try:
+        from pyrevit import script
+        return bool(getattr(script.get_config(CONFIG_ID), "enabled", False))
+    except Exception:
+        return False
+
+
+def active():
+    """Auditoria em andamento, ou None."""
+    return _ACTIVE
+
+
+def _frame_label(frame):
+    # pasta/arquivo: distingue os script.py dos botões
+    folder, name = os.path.split(frame.f_code.co_filename)
+    return "{}/{}:{}".format(os.path.basename(folder), name, frame.f_lineno)
+
+
+def _call_site():
+    """
+    Local da chamada: 'arquivo:linha' do primeiro quadro fora deste módulo.
+    Se ele está na manalib (helper), acrescenta o primeiro quadro fora dela
+    (o laço do comando): 'helper < script'. '?' sem frames.
+    """
+    try:
+        frame = sys._getframe(1)
+    except (AttributeError, ValueError):
+        return "?"
+    while frame is not None and \
+            os.path.splitext(os.path.abspath(frame.f_code.co_filename))[0] == _THIS_FILE:
+        frame = frame.f_back
+    if frame is None: return "?"
+
+    site = _frame_label(frame)
+    caller = frame
+    while caller is not None and os.path.dirname(os.path.abspath(caller.f_code.co_filename)) == _LIB_DIR:
+        caller = caller.f_back
+    if caller is not None and caller is not frame:
+        site += " < " + _frame_label(caller)
+    return site
+
+
+def _arg_key(value):
+    """Texto estável de um argumento (IDs no lugar de objetos)."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_arg_key(v) for v in value) + "]"
+    try:
+        return "#{}".format(value.IntegerValue)
+    except AttributeError:
+        pass
+    try:
+        return "#{}".format(value.Id.IntegerValue)
+    except AttributeError:
+        pass
+    try:
+        return "{}({})".format(type(value).__name__, value)
+    except Exception:
+        return type(value).__name__
+
+
+def _target_key(obj):
+    try:
+        return "#{}".format(obj.Id.IntegerValue)
+    except Exception:
+        return type(obj).__name__
+
+
+class Audit(object):
+    """
+    Contagens de UMA execução.
+
+    Args:
+        name (str): Nome da execução (ex: CMD_ID).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.by_method = {}
+        self.by_site = {}
+        self.by_args = {}
+        self.total = 0
+
+    def record(self, target, method, args=()):
+        label = "{}.{}".format(type(target).__name__, method)
+        self.total += 1
+        self.by_method[label] = self.by_method.get(label, 0) + 1
+        site = (label, _call_site())
+        self.by_site[site] = self.by_site.get(site, 0) + 1
+        key = (label, _target_key(target), ",".join(_arg_key(a) for a in args))
+        self.by_args[key] = self.by_args.get(key, 0) + 1
+
+    def repeated(self):
+        """[(método, alvo, argumentos, vezes)] das chamadas idênticas, mais repetidas primeiro."""
+        rows = [(k[0], k[1], k[2], n) for k, n in self.by_args.items() if n > 1]
+        rows.sort(key=lambda r: -r[3])
+        return rows
+
+    def redundant_calls(self):
+        """Chamadas que repetiram exatamente uma anterior."""
+        return sum(n - 1 for n in self.by_args.values() if n > 1)
+
+    def method_rows(self):
+        """[método, chamadas, distintas] (distintas = pares alvo/argumentos únicos)."""
+        unique = {}
+        for key in self.by_args:
+            unique[key[0]] = unique.get(key[0], 0) + 1
+        rows = [[m, n, unique.get(m, 0)] for m, n in self.by_method.items()]
+        rows.sort(key=lambda r: -r[1])
+        return rows
+
+    def site_rows(self):
+        rows = [[site, method, n] for (method, site), n in self.by_site.items()]
+        rows.sort(key=lambda r: -r[2])
+        return rows
+
+    def summary(self):
+        return "{} chamadas à API | {} repetidas com argumentos idênticos".format(
+            self.total, self.redundant_calls())
+
+    def to_dict(self):
+        return {"run": self.name, "total": self.total, "redundant": self.redundant_calls(),
+                "methods": self.method_rows(), "sites": self.site_rows(),
+                "repeated": [list(r) for r in self.repeated()]}
+
+
+def real(obj):
+    """Objeto real por trás de um proxy (listas/tuplas são desembrulhadas item a item)."""
+    if isinstance(obj, _Proxy):
+        return object.__getattribute__(obj, "_target")
+    if isinstance(obj, list):
+        return [real(o) for o in obj]
+    if isinstance(obj, tuple):
+        return tuple(real(o) for o in obj)
+    return obj
+
+
+def _is_element(value):
+    try:
+        return value is not None and hasattr(value, "Id") and hasattr(value, "Document")
+    except Exception:
+        return False
+
+
+class _Proxy(object):
+    """Encaminha atributos ao objeto real contando cada acesso/chamada."""
+    __slots__ = ("_target", "_audit", "_deep")
+
+    def __init__(self, target, audit, deep):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_audit", audit)
+        object.__setattr__(self, "_deep", deep)
+
+    def _result(self, value):
+        if object.__getattribute__(self, "_deep") and _is_element(value):
+            return _Proxy(value, object.__getattribute__(self, "_audit"), True)
+        return value
+
+    def __getattr__(self, name):
+        target = object.__getattribute__(self, "_target")
+        audit = object.__getattribute__(self, "_audit")
+        attr = getattr(target, name)
+        if not callable(attr):
+            audit.record(target, name)
+            return self._result(attr)
+
+        proxy = self
+
+        def call(*args, **kwargs):
+            audit.record(target, name, args)
+            return proxy._result(attr(*real(args), **dict((k, real(v)) for k, v in kwargs.items())))
+        return call
+
+    def __setattr__(self, name, value):
+        target = object.__getattribute__(self, "_target")
+        object.__getattribute__(self, "_audit").record(target, "set_" + name, (value,))
+        setattr(target, name, real(value))
+
+    def __eq__(self, other):
+        return object.__getattribute__(self, "_target") == real(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, "_target"))
+
+    def __nonzero__(self):
+        return bool(object.__getattribute__(self, "_target"))
+    __bool__ = __nonzero__
+
+    def __iter__(self):
+        return iter(object.__getattribute__(self, "_target"))
+
+    def __len__(self):
+        return len(object.__getattribute__(self, "_target"))
+
+    def __repr__(self):
+        return "<auditado {!r}>".format(object.__getattribute__(self, "_target"))
+
+
+def counted(obj):
+    """Proxy que conta as chamadas feitas nele; os retornos são objetos reais."""
+    if _ACTIVE is None or obj is None: return obj
+    return _Proxy(obj, _ACTIVE, False)
+
+
+def wrap(obj):
+    """Proxy que também embrulha os elementos devolvidos (use só em código de leitura)."""
+    if _ACTIVE is None or obj is None: return obj
+    return _Proxy(obj, _ACTIVE, True)
+
+
+def write_report(audit, folder):
+    """Grava o relatório em JSON na pasta (a mesma dos traces). Retorna o caminho."""
+    name = "".join(c if c.isalnum() or c in "-_" else "_" for c in audit.name)
+    path = os.path.join(folder, "{}_{}_api.json".format(name, time.strftime("%Y%m%d-%H%M%S")))
+    with open(path, "w") as f:
+        json.dump(audit.to_dict(), f, indent=1)
+    return path
+
+
+def print_report(audit, path=None):
+    """Tabelas do relatório na janela de saída do pyRevit."""
+    from pyrevit import script
+    output = script.get_output()
+    output.print_md("### Chamadas à API - {}\n{}".format(audit.name, audit.summary()))
+    output.print_table(table_data=audit.method_rows()[:REPORT_LIMIT],
+                       columns=["Método", "Chamadas", "Distintas"], title="Por método")
+    output.print_table(table_data=audit.site_rows()[:REPORT_LIMIT],
+                       columns=["Local", "Método", "Chamadas"], title="Por local de chamada")
+    repeated = audit.repeated()
+    if repeated:
+        output.print_table(table_data=[list(r) for r in repeated[:REPORT_LIMIT]],
+                           columns=["Método", "Alvo", "Argumentos", "Vezes"],
+                           title="Chamadas idênticas repetidas (candidatas a cache)")
+    if path: print("Relatório: {}".format(path))
+
+
+class run(object):
+    """
+    Auditoria de uma execução (context manager). Não faz nada se o modo de
+    depuração está desligado ou se já existe uma auditoria aberta.
+    """
+
+    def __init__(self, name, folder=None):
+        self.name = name
+        self.folder = folder
+        self.audit = None
+
+    def __enter__(self):
+        global _ACTIVE
+        if _ACTIVE is None and enabled():
+            self.audit = _ACTIVE = Audit(self.name)
+        return self.audit
+
+    def __exit__(self, exc_type, exc, tb):
+        global _ACTIVE
+        if self.audit is None: return False
+        _ACTIVE = None
+        try:
+            path = write_report(self.audit, self.folder) if self.folder else None
+            print_report(self.audit, path)
+        except Exception as e:
+            print("Aviso: falha ao gravar o relatório de chamadas: {}".format(e))
+        return False
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+Execução de lotes longos em blocos, com checkpoint e retomada.
+
+Em vez de uma Transaction gigante (tudo ou nada), o lote roda dentro de um
+TransactionGroup e grava uma Transaction a cada 'chunk_size' itens. No fim o
+grupo é assimilado: para o usuário continua sendo UM passo de Desfazer.
+
+    - Cada item roda numa SubTransaction: se falhar, só ele é desfeito e o
+      erro vai para o relatório; o resto do bloco segue.
+    - Os itens de cada bloco gravado entram no checkpoint da sessão
+      (chave do item -> IDs dos elementos criados).
+    - As uniões pedidas em executor.joins (JoinQueue) rodam no fim de cada
+      bloco, depois de uma única regeneração.
+    - Se o lote for interrompido, a próxima execução do mesmo comando COM AS
+      MESMAS OPÇÕES pode pular os itens do checkpoint cujos elementos ainda
+      existem (um Desfazer invalida o checkpoint sozinho). Lote que chega ao
+      fim descarta o checkpoint, mesmo com itens em falha.
+
+Uso:
+    resume = batch.ask_resume(doc, CMD_ID, settings)
+    with batch.BatchExecutor(doc, "Criar Revestimentos", CMD_ID, settings=settings, resume=resume) as executor:
+        rooms = executor.pending(rooms, batch.element_key)
+        for room in rooms:
+            executor.apply(batch.element_key(room), lambda: criar(room))
+    print(executor.report.summary())
+"""
+from Autodesk.Revit.DB import Transaction, TransactionGroup, SubTransaction, TransactionStatus, ElementId
+from manalib import session, pipeline, failures, join_queue, finish_sync, profiling, stamps
+
+STORE_NAME = "batch_checkpoints"
+
+# Itens por Transaction: grande o bastante para diluir a regeneração,
+# pequeno o bastante para um erro no commit custar pouco
+DEFAULT_CHUNK_SIZE = 50
+
+
+def element_key(element):
+    """Chave padrão de um item: o ID inteiro do elemento (ex: Ambiente)."""
+    return element.Id.IntegerValue
+
+
+def element_ids(result):
+    """
+    IDs (int) dos elementos criados por um item, para validar o checkpoint.
+    Aceita um elemento, um ElementId, um int ou listas/tuplas deles.
+    """
+    if result is None: return []
+    if isinstance(result, (list, tuple, set)):
+        ids = []
+        for r in result:
+            ids.extend(element_ids(r))
+        return ids
+    if isinstance(result, int): return [result]
+    try:
+        return [result.IntegerValue]
+    except AttributeError:
+        pass
+    try:
+        return [result.Id.IntegerValue]
+    except AttributeError:
+        return []
+
+
+def settings_key(settings):
+    """Digest das opções do diálogo (dados puros), ou None sem opções."""
+    if settings is None: return None
+    return stamps.digest(settings)
+
+
+class Checkpoint(object):
+    """Itens já gravados de um lote (chave -> IDs criados), com as opções usadas."""
+
+    def __init__(self, command_id, settings=None):
+        self.command_id = command_id
+        self.settings = settings
+        self.done = {}
+        self.total = 0
+
+    def is_done(self, doc, key):
+        """True se o item foi gravado e seus elementos ainda existem."""
+        ids = self.done.get(key)
+        if ids is None: return False
+        for i in ids:
+            if doc.GetElement(ElementId(i)) is None:
+                return False
+        return True
+
+    def __len__(self):
+        return len(self.done)
+
+
+def _checkpoints(doc):
+    return session.get_store(STORE_NAME).setdefault(session.document_key(doc), {})
+
+
+def get_checkpoint(doc, command_id, settings=None):
+    """Checkpoint de um lote interrompido deste comando com estas opções, ou None."""
+    cp = _checkpoints(doc).get(command_id)
+    if cp is None or not cp.done: return None
+    if cp.settings != settings_key(settings): return None
+    return cp
+
+
+def clear_checkpoint(doc, command_id):
+    _checkpoints(doc).pop(command_id, None)
+
+
+class BatchReport(object):
+    """Resumo de uma execução em blocos."""
+
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.resumed = 0
+        self.chunks = 0
+        self.failures = []
+        self.interrupted = False
+        # Avisos/erros do Revit de todos os blocos (failures.FailureReport)
+        self.warnings = failures.FailureReport()
+        # Uniões de geometria de todos os blocos (join_queue.JoinReport)
+        self.joins = join_queue.JoinReport()
+
+    def add_failure(self, key, failure):
+        self.failures.append((key, failure))
+
+    def absorb(self, pipeline_report, key=element_key):
+        """Inclui as falhas de snapshot/cálculo de um PipelineReport."""
+        for item, failure in pipeline_report.failures:
+            try:
+                self.add_failure(key(item), failure)
+            except Exception:
+                self.add_failure(item, failure)
+
+    def failed_keys(self):
+        return set(k for k, _ in self.failures)
+
+    def summary(self):
+        text = "{} itens | {} gravados | {} retomados | {} falhas | {} blocos".format(
+            self.total, self.done, self.resumed, len(self.failures), self.chunks)
+        if self.interrupted: text += " | INTERROMPIDO"
+        return "\n".join([text, self.joins.summary(), self.warnings.summary()])
+
+    def failure_lines(self, limit=10):
+        """Linhas 'chave: erro' das primeiras falhas (para alertas)."""
+        lines = ["{}: {}".format(k, f.error) for k, f in self.failures[:limit]]
+        if len(self.failures) > limit:
+            lines.append("... e mais {}".format(len(self.failures) - limit))
+        return lines + self.warnings.detail_lines(limit)
+
+
+class BatchExecutor(object):
+    """
+    Lote em blocos de Transactions dentro de um TransactionGroup.
+
+    Args:
+        doc: Documento do Revit.
+        name (str): Nome do passo de Desfazer.
+        command_id (str): Identifica o checkpoint (ex: CMD_ID do botão).
+        chunk_size (int): Itens por Transaction.
+        resume (bool): Pula itens do checkpoint anterior. False descarta o checkpoint.
+        settings: Opções do diálogo (dados puros). Checkpoint de outras opções é descartado.
+    """
+
+    def __init__(self, doc, name, command_id=None, chunk_size=DEFAULT_CHUNK_SIZE, resume=True,
+                 settings=None):
+        self.doc = doc
+        self.name = name
+        self.command_id = command_id or name
+        self.chunk_size = max(1, int(chunk_size))
+        self.report = BatchReport()
+
+        key = settings_key(settings)
+        store = _checkpoints(doc)
+        self.checkpoint = store.get(self.command_id)
+        if not resume or self.checkpoint is None or self.checkpoint.settings != key:
+            self.checkpoint = Checkpoint(self.command_id, key)
+            store[self.command_id] = self.checkpoint
+
+        # Uniões pedidas pelos itens; executadas antes de gravar cada bloco
+        self.joins = join_queue.JoinQueue(doc, self.report.joins)
+
+        self._group = None
+        self._chunk = None
+        self._chunk_done = {}
+
+    # --- Ciclo de vida ---
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(interrupted=exc_type is not None)
+        return False
+
+    def start(self):
+        # O lote é da própria ManaTools: não enfileira sincronização de acabamentos
+        finish_sync.suspend(self.doc)
+        self._group = TransactionGroup(self.doc, self.name)
+        self._group.Start()
+
+    def finish(self, interrupted=False):
+        """
+        Grava o bloco aberto e assimila o grupo num único Desfazer.
+        Interrompido: o bloco aberto é descartado, os gravados ficam.
+        """
+        try:
+            if interrupted:
+                self._discard_chunk()
+            else:
+                self._commit_chunk()
+        finally:
+            self.report.interrupted = interrupted
+            self._close_group()
+
+        # Lote completo: o checkpoint não serve mais (itens em falha nunca
+        # entram em 'done'; a próxima execução os tenta de novo de qualquer jeito)
+        if not interrupted:
+            clear_checkpoint(self.doc, self.command_id)
+        return self.report
+
+    def _close_group(self):
+        if self._group is None: return
+        group, self._group = self._group, None
+        try:
+            if self.report.chunks:
+                group.Assimilate()
+            else:
+                group.RollBack()
+        finally:
+            # Mesmo com o grupo quebrado, a sincronização não pode ficar suspensa
+            finish_sync.resume(self.doc)
+
+    # --- Checkpoint ---
+    def pending(self, items, key=element_key):
+        """Itens que ainda não constam (válidos) no checkpoint."""
+        items = list(items)
+        result = []
+        for item in items:
+            if self.checkpoint.is_done(self.doc, key(item)):
+                self.report.resumed += 1
+            else:
+                result.append(item)
+        self.report.total += len(items)
+        self.checkpoint.total = max(self.checkpoint.total, len(items))
+        return result
+
+    # --- Blocos ---
+    def _open_chunk(self):
+        if self._chunk is not None: return
+        self._chunk = Transaction(self.doc, "{} ({})".format(self.name, self.report.chunks + 1))
+        # Avisos esperados apagados/erros conhecidos resolvidos no commit, sem diálogo por aviso
+        failures.attach(self._chunk, self.report.warnings)
+        self._chunk.Start()
+        self._chunk_done = {}
+
+    def _commit_chunk(self):
+        if self._chunk is None: return True
+        t, done = self._chunk, self._chunk_done
+        self._chunk, self._chunk_done = None, {}
+
+        try:
+            self.joins.flush()
+        except Exception:
+            self.joins.truncate(0)
+        with profiling.span("Transaction.Commit", items=len(done)):
+            try:
+                status = t.Commit()
+            except Exception as e:
+                # Commit com exceção: o bloco conta como não gravado
+                status = e
+                try:
+                    if t.GetStatus() == TransactionStatus.Started: t.RollBack()
+                except Exception:
+                    pass
+        if status != TransactionStatus.Committed:
+            profiling.failure("Transaction.Commit", status)
+            # Uniões registradas no grafo foram desfeitas junto
+            self.joins.graph.discard()
+            error = Exception("Bloco desfeito pelo Revit ({})".format(status))
+            for key in done:
+                self.report.add_failure(key, pipeline.Failure("commit", error))
+            return False
+
+        self.joins.graph.confirm()
+        self.report.chunks += 1
+        self.report.done += len(done)
+        self.checkpoint.done.update(done)
+        return True
+
+    def _discard_chunk(self):
+        if self._chunk is None: return
+        self.joins.truncate(0)
+        try:
+            self._chunk.RollBack()
+        except Exception:
+            pass
+        self.joins.graph.discard()
+        self._chunk, self._chunk_done = None, {}
+
+    def apply(self, key, func):
+        """
+        Executa func() como um item do bloco atual (SubTransaction).
+        Falhas desfazem só o item e vão para o relatório.
+
+        Returns:
+            O retorno de func(), ou None se falhou.
+        """
+        self._open_chunk()
+        mark = self.joins.mark()
+        sub = SubTransaction(self.doc)
+        sub.Start()
+        try:
+            result = func()
+            sub.Commit()
+        except Exception:
+            try: sub.RollBack()
+            except Exception: pass
+            self.joins.truncate(mark)
+            self.report.add_failure(key, pipeline._capture("commit"))
+            return None
+
+        self._chunk_done[key] = element_ids(result)
+        if len(self._chunk_done) >= self.chunk_size:
+            self._commit_chunk()
+        return result
+
+    def apply_block(self, keys, func):
+        """
+        Executa func() numa Transaction própria para um bloco inteiro de itens
+        (criação em lote, ex: NewFamilyInstances2). Falha desfaz o bloco todo.
+
+        Args:
+            keys (list): Chaves dos itens do bloco.
+            func: Sem argumentos. Pode retornar {chave: elementos criados}.
+
+        Returns:
+            O retorno de func(), ou None se falhou.
+        """
+        self._commit_chunk()
+        self._open_chunk()
+        try:
+            result = func()
+        except Exception:
+            failure = pipeline._capture("commit")
+            self._discard_chunk()
+            for key in keys:
+                self.report.add_failure(key, failure)
+            return None
+
+        created = result if isinstance(result, dict) else {}
+        for key in keys:
+            self._chunk_done[key] = element_ids(created.get(key))
+        self._commit_chunk()
+        return result
+
+
+def chunked(items, size=DEFAULT_CHUNK_SIZE):
+    """Divide a lista em blocos de 'size' itens."""
+    items = list(items)
+    size = max(1, int(size))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def ask_resume(doc, command_id, settings=None):
+    """
+    Pergunta se o lote interrompido (com as mesmas opções) deve ser retomado.
+
+    Returns:
+        bool: True para retomar (também quando não há checkpoint).
+    """
+    cp = get_checkpoint(doc, command_id, settings)
+    if cp is None: return True
+    from pyrevit import forms
+    return bool(forms.alert(
+        "Há um lote interrompido deste comando ({} de {} itens gravados).\n\n"
+        "Retomar pulando os itens já criados?".format(len(cp), cp.total or len(cp)),
+        yes=True, no=True))
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Catálogos do documento (tipos, níveis) para as listas dos diálogos.
+
+Cada catálogo é coletado uma vez por documento, com os nomes já resolvidos
+e ordenados, e fica guardado na sessão. O hook doc-changed invalida só os
+catálogos que contêm elementos alterados/excluídos; tipos ou níveis novos
+descartam todos (não dá para saber a qual catálogo pertencem sem lê-los).
+"""
+from Autodesk.Revit.DB import (FilteredElementCollector, BuiltInCategory, BuiltInParameter, Element,
+                               FloorType, WallType, WallKind, CeilingType, FamilySymbol,
+                               FamilyPlacementType, Level)
+from manalib import session
+
+STORE_NAME = "doc_index"
+
+LINE_BASED_PLACEMENTS = [FamilyPlacementType.CurveDrivenStructural, FamilyPlacementType.CurveBased]
+
+
+def type_name(element):
+    """Nome do tipo à prova de falhas (BuiltIns de nome, depois Element.Name)."""
+    if not element: return "Nulo"
+    for bip in [BuiltInParameter.ALL_MODEL_TYPE_NAME, BuiltInParameter.SYMBOL_NAME_PARAM]:
+        try:
+            p = element.get_Parameter(bip)
+            if p and p.HasValue:
+                val = p.AsString()
+                if val: return val
+        except: pass
+    try:
+        return Element.Name.GetValue(element)
+    except: pass
+    return "Elemento ID:{}".format(element.Id)
+
+
+class Catalog(object):
+    """Lista de (nome, elemento) já ordenada, com busca por nome."""
+
+    def __init__(self, items, sort_by_name=True):
+        if sort_by_name:
+            items = sorted(items, key=lambda x: x[0])
+        self.items = items
+        self.ids = set(e.Id.IntegerValue for _, e in items)
+        # Nomes repetidos: vale o primeiro da lista
+        self.by_name = dict(reversed(items))
+
+    def names(self):
+        return [n for n, _ in self.items]
+
+    def elements(self):
+        return [e for _, e in self.items]
+
+    def get(self, name, default=None):
+        return self.by_name.get(name, default)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class DocumentIndex(object):
+    """
+    Catálogos de UM documento.
+    Use get_index(doc) para obter a instância compartilhada da sessão.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._revision = session.get_revision(doc)
+        self._catalogs = {}
+
+    def _sync(self):
+        current = session.get_revision(self.doc)
+        if current == self._revision: return
+
+        changes = session.changes_since(self.doc, self._revision, "catalog_added")
+        self._revision = current
+        if changes is None or changes[1]:
+            self._catalogs.clear()
+            return
+
+        changed_ids = changes[0]
+        for key in list(self._catalogs.keys()):
+            if not self._catalogs[key].ids.isdisjoint(changed_ids):
+                del self._catalogs[key]
+
+    def clear(self):
+        self._catalogs.clear()
+
+    def _catalog(self, key, build, sort_by_name=True):
+        self._sync()
+        cat = self._catalogs.get(key)
+        if cat is None:
+            cat = Catalog(build(), sort_by_name)
+            self._catalogs[key] = cat
+        return cat
+
+    def _named(self, elements):
+        return [(type_name(e), e) for e in elements]
+
+    # --- Catálogos ---
+    def floor_types(self):
+        return self._catalog("floor_types", lambda: self._named(
+            FilteredElementCollector(self.doc).OfClass(FloorType).WhereElementIsElementType().ToElements()))
+
+    def wall_types(self):
+        """Apenas paredes básicas (sem cortina/empilhada)."""
+        def build():
+            types = FilteredElementCollector(self.doc).OfClass(WallType).ToElements()
+            return self._named([w for w in types if w.Kind == WallKind.Basic])
+        return self._catalog("wall_types", build)
+
+    def ceiling_types(self):
+        return self._catalog("ceiling_types", lambda: self._named(
+            FilteredElementCollector(self.doc).OfClass(CeilingType).ToElements()))
+
+    def line_based_symbols(self):
+        """Famílias Line Based (Modelo Genérico) para rodapés e tabicas."""
+        def build():
+            symbols = FilteredElementCollector(self.doc).OfClass(FamilySymbol)\
+                      .OfCategory(BuiltInCategory.OST_GenericModel).ToElements()
+            valid = []
+            for s in symbols:
+                try:
+                    if s.Family.FamilyPlacementType in LINE_BASED_PLACEMENTS:
+                        valid.append(s)
+                except: pass
+            return self._named(valid)
+        return self._catalog("line_based_symbols", build)
+
+    def levels(self):
+        """Níveis ordenados por elevação (nome = Level.Name)."""
+        def build():
+            levels = FilteredElementCollector(self.doc).OfClass(Level)\
+                     .WhereElementIsNotElementType().ToElements()
+            return [(l.Name, l) for l in sorted(levels, key=lambda l: l.Elevation)]
+        return self._catalog("levels", build, sort_by_name=False)
+
+
+def get_index(doc):
+    """Retorna o índice de catálogos da sessão para o documento."""
+    store = session.get_store(STORE_NAME)
+    key = session.document_key(doc)
+    index = store.get(key)
+    if index is None:
+        index = DocumentIndex(doc)
+        store[key] = index
+    return index
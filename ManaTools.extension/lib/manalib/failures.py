@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Tratamento silencioso de avisos/erros do Revit nos comandos em lote.
+
+Wall.Create, Floor.Create, Ceiling.Create e os JoinGeometry geram avisos
+(paredes sobrepostas, "elementos não se cruzam", unidos sem contato...).
+Sem um preprocessador cada aviso passa pela interface de falhas no commit,
+o que domina o tempo de gravação em lotes grandes.
+
+O BatchFailuresPreprocessor:
+    - apaga só os avisos conhecidos como inofensivos (BENIGN_WARNING_NAMES);
+      os demais ficam no modelo e são contados no relatório;
+    - resolve só os erros da lista RESOLVABLE_ERROR_NAMES, cuja resolução
+      padrão não apaga o elemento recém-criado (ex: desfazer a união);
+    - qualquer outro erro desfaz a Transaction (o lote conta os itens do
+      bloco como falha, em vez de gravar IDs de elementos apagados).
+Tudo é contado num FailureReport compartilhado pela execução.
+
+Uso:
+    t = Transaction(doc, "Criar Pisos")
+    warnings = failures.attach(t)   # antes de t.Start()
+    t.Start(); ...; t.Commit()
+    print(warnings.summary())
+"""
+from Autodesk.Revit.DB import (IFailuresPreprocessor, FailureProcessingResult, FailureSeverity,
+                               BuiltInFailures)
+
+# Avisos esperados na criação de acabamentos (nomes em BuiltInFailures).
+# Nomes ausentes nesta versão do Revit são ignorados.
+BENIGN_WARNING_NAMES = [
+    "OverlapFailures.WallsOverlap",
+    "OverlapFailures.WallRoomSeparationOverlap",
+    "OverlapFailures.FloorsOverlap",
+    "OverlapFailures.DuplicateInstances",
+    "JoinElementsFailures.JoiningDisjointWarn",
+    "JoinElementsFailures.JoiningDisjoint",
+    "InaccurateFailures.InaccurateLine",
+    "InaccurateFailures.InaccurateWall",
+]
+
+# Erros resolvidos sem desfazer a Transaction: a resolução padrão só
+# desfaz a união, o elemento criado continua no modelo.
+RESOLVABLE_ERROR_NAMES = [
+    "JoinElementsFailures.CannotJoinElementsError",
+    "JoinElementsFailures.CannotKeepJoined",
+]
+
+
+def _resolve_definitions(names):
+    ids = set()
+    for name in names:
+        target = BuiltInFailures
+        try:
+            for part in name.split("."):
+                target = getattr(target, part)
+        except AttributeError:
+            continue
+        ids.add(target.Guid)
+    return ids
+
+
+_BENIGN_IDS = None
+_RESOLVABLE_IDS = None
+
+
+def benign_ids():
+    """GUIDs das FailureDefinitions inofensivas (resolvidos uma vez)."""
+    global _BENIGN_IDS
+    if _BENIGN_IDS is None:
+        _BENIGN_IDS = _resolve_definitions(BENIGN_WARNING_NAMES)
+    return _BENIGN_IDS
+
+
+def resolvable_ids():
+    """GUIDs dos erros que podem ser resolvidos no lote (resolvidos uma vez)."""
+    global _RESOLVABLE_IDS
+    if _RESOLVABLE_IDS is None:
+        _RESOLVABLE_IDS = _resolve_definitions(RESOLVABLE_ERROR_NAMES)
+    return _RESOLVABLE_IDS
+
+
+class FailureReport(object):
+    """Contagem de avisos/erros por descrição ao longo de uma execução."""
+
+    def __init__(self):
+        self.benign = {}
+        self.other_warnings = {}
+        self.resolved = {}
+        self.unresolved = {}
+
+    def add(self, bucket, text):
+        """Conta uma mensagem em 'benign', 'other_warnings', 'resolved' ou 'unresolved'."""
+        counts = getattr(self, bucket)
+        counts[text] = counts.get(text, 0) + 1
+
+    def total(self):
+        return sum(sum(b.values()) for b in (self.benign, self.other_warnings, self.resolved, self.unresolved))
+
+    def summary(self):
+        return "{} avisos esperados apagados | {} avisos mantidos | {} erros resolvidos | {} sem resolução".format(
+            sum(self.benign.values()),
+            sum(self.other_warnings.values()),
+            sum(self.resolved.values()),
+            sum(self.unresolved.values()))
+
+    def detail_lines(self, limit=10):
+        """Avisos inesperados e erros, os mais frequentes primeiro."""
+        lines = []
+        for label, bucket in (("Erro sem resolução", self.unresolved),
+                              ("Erro resolvido", self.resolved),
+                              ("Aviso mantido", self.other_warnings)):
+            for text, n in sorted(bucket.items(), key=lambda kv: -kv[1]):
+                lines.append("{} ({}x): {}".format(label, n, text))
+        if len(lines) > limit:
+            lines = lines[:limit] + ["... e mais {}".format(len(lines) - limit)]
+        return lines
+
+
+class BatchFailuresPreprocessor(IFailuresPreprocessor):
+    """IFailuresPreprocessor dos comandos em lote. Ver o cabeçalho do módulo."""
+
+    def __init__(self, report=None):
+        self.report = report if report is not None else FailureReport()
+
+    def PreprocessFailures(self, accessor):
+        benign = benign_ids()
+        resolvable = resolvable_ids()
+        resolved_any = False
+        unresolved = False
+
+        for msg in accessor.GetFailureMessages():
+            try:
+                text = msg.GetDescriptionText()
+            except Exception:
+                text = "?"
+            severity = msg.GetSeverity()
+
+            definition = msg.GetFailureDefinitionId().Guid
+            if severity == FailureSeverity.Warning:
+                if definition in benign:
+                    self.report.add("benign", text)
+                    accessor.DeleteWarning(msg)
+                else:
+                    # Fica no modelo (e na lista de avisos do Revit) para conferência
+                    self.report.add("other_warnings", text)
+
+            elif definition in resolvable and msg.HasResolutions():
+                self.report.add("resolved", text)
+                accessor.ResolveFailure(msg)
+                resolved_any = True
+
+            else:
+                self.report.add("unresolved", text)
+                unresolved = True
+
+        if unresolved:
+            return FailureProcessingResult.ProceedWithRollBack
+        if resolved_any:
+            return FailureProcessingResult.ProceedWithCommit
+        return FailureProcessingResult.Continue
+
+
+def attach(transaction, report=None):
+    """
+    Instala o preprocessador numa Transaction (antes do Start).
+
+    Args:
+        report (FailureReport): Relatório compartilhado; None cria um novo.
+
+    Returns:
+        FailureReport: O relatório que será preenchido no commit.
+    """
+    preprocessor = BatchFailuresPreprocessor(report)
+    options = transaction.GetFailureHandlingOptions()
+    options.SetFailuresPreprocessor(preprocessor)
+    options.SetClearAfterRollback(True)
+    transaction.SetFailureHandlingOptions(options)
+    return preprocessor.report
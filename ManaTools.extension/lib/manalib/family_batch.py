@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Criação em lote de famílias Line Based (rodapés, tabicas).
+
+As curvas de um lote inteiro são criadas numa única chamada NewFamilyInstances2
+(uma regeneração). O parâmetro de elevação é descoberto uma vez por FamilySymbol
+e gravado numa única passada depois da criação. Inversões verticais são feitas
+com um MirrorElements por plano.
+"""
+from System.Collections.Generic import List
+from Autodesk.Revit.DB import (BuiltInParameter, Structure, ElementId, ElementTransformUtils,
+                               Plane, XYZ, SubTransaction)
+from Autodesk.Revit.Creation import FamilyInstanceCreationData
+from manalib import profiling
+
+# Ordem de preferência do parâmetro de elevação em famílias Line Based
+OFFSET_BUILTINS = [BuiltInParameter.INSTANCE_ELEVATION_PARAM,
+                   BuiltInParameter.INSTANCE_FREE_HOST_OFFSET_PARAM]
+OFFSET_NAMES = ["Elevação", "Offset", "Deslocamento", "Altura"]
+
+
+class LineBasedBatch(object):
+    """
+    Acumula curvas de um mesmo FamilySymbol e cria tudo de uma vez.
+
+    Uso:
+        batch = LineBasedBatch(doc, symbol)
+        idx = batch.add(curve, level)
+        instances = batch.create()   # instances[idx] corresponde à curva
+    """
+
+    def __init__(self, doc, symbol):
+        self.doc = doc
+        self.symbol = symbol
+        self._reset()
+
+    def _reset(self):
+        self._curves = []
+        self._levels = []
+        self._data = List[FamilyInstanceCreationData]()
+
+    def add(self, curve, level):
+        """Agenda uma instância. Retorna o índice dela no resultado de create()."""
+        self._data.Add(FamilyInstanceCreationData(
+            curve, self.symbol, level, Structure.StructuralType.NonStructural))
+        self._curves.append(curve)
+        self._levels.append(level)
+        return len(self._curves) - 1
+
+    def __len__(self):
+        return len(self._curves)
+
+    def create(self):
+        """
+        Cria todas as instâncias agendadas (uma chamada + uma regeneração).
+        Uma curva inválida faz a chamada em lote falhar inteira: nesse caso o
+        lote é desfeito e as instâncias são criadas uma a uma, perdendo só as
+        que falharem.
+
+        Returns:
+            list: Instâncias na ordem de add(); None onde a criação falhou.
+        """
+        if not self._curves: return []
+        curves, levels, data = self._curves, self._levels, self._data
+        self._reset()
+
+        sub = SubTransaction(self.doc)
+        sub.Start()
+        try:
+            with profiling.span("NewFamilyInstances2", count=len(curves)):
+                new_ids = list(self.doc.Create.NewFamilyInstances2(data))
+            sub.Commit()
+        except Exception as e:
+            try: sub.RollBack()
+            except Exception: pass
+            profiling.failure("NewFamilyInstances2", e)
+            return self._create_each(curves, levels)
+        # Sem exceção, todas foram criadas e os IDs vêm na ordem dos dados
+        return [self.doc.GetElement(eid) for eid in new_ids]
+
+    def _create_each(self, curves, levels):
+        result = []
+        with profiling.span("NewFamilyInstance", count=len(curves)):
+            for curve, level in zip(curves, levels):
+                try:
+                    result.append(self.doc.Create.NewFamilyInstance(
+                        curve, self.symbol, level, Structure.StructuralType.NonStructural))
+                except Exception as e:
+                    profiling.failure("NewFamilyInstance", e)
+                    result.append(None)
+        return result
+
+
+def resolve_offset_param(instance):
+    """
+    Descobre qual parâmetro controla a elevação desta família.
+
+    Returns:
+        tuple: ('bip', BuiltInParameter) | ('name', str) | None
+    """
+    for bp in OFFSET_BUILTINS:
+        p = instance.get_Parameter(bp)
+        if p and not p.IsReadOnly:
+            return ("bip", bp)
+    for n in OFFSET_NAMES:
+        p = instance.LookupParameter(n)
+        if p and not p.IsReadOnly:
+            return ("name", n)
+    return None
+
+
+def set_offsets(instances, offsets, resolved=None):
+    """
+    Grava a elevação de várias instâncias numa única passada.
+
+    Args:
+        instances (list): Instâncias (None é ignorado).
+        offsets: Valor único (pés) ou lista paralela a instances.
+        resolved (dict): Cache opcional {symbol_id: chave} reaproveitado entre lotes.
+
+    Returns:
+        int: Quantidade de parâmetros gravados.
+    """
+    if resolved is None: resolved = {}
+    per_item = isinstance(offsets, (list, tuple))
+    count = 0
+
+    for i, inst in enumerate(instances):
+        if inst is None: continue
+        sym_id = inst.Symbol.Id.IntegerValue
+        if sym_id not in resolved:
+            resolved[sym_id] = resolve_offset_param(inst)
+        key = resolved[sym_id]
+        if not key: continue
+
+        if key[0] == "bip":
+            p = inst.get_Parameter(key[1])
+        else:
+            p = inst.LookupParameter(key[1])
+        if p:
+            p.Set(offsets[i] if per_item else offsets)
+            count += 1
+    return count
+
+
+def mirror_vertical(doc, instances, elevations):
+    """
+    Espelha instâncias em torno de planos horizontais (Vertical Flip), em lote.
+    Uma chamada MirrorElements por plano, sem cópias: os IDs continuam válidos.
+
+    Deve rodar ANTES de gravar a elevação (o plano passa pelo nível).
+
+    Args:
+        instances (list): Instâncias (None é ignorado).
+        elevations: Z do plano (pés) - valor único ou lista paralela a instances.
+
+    Returns:
+        int: Quantidade de instâncias espelhadas.
+    """
+    per_item = isinstance(elevations, (list, tuple))
+    groups = {}
+    for i, inst in enumerate(instances):
+        if inst is None: continue
+        z = elevations[i] if per_item else elevations
+        groups.setdefault(round(z, 6), []).append(inst.Id)
+
+    if not groups: return 0
+
+    with profiling.span("Regenerate"):
+        doc.Regenerate()
+    count = 0
+    for z, ids in groups.items():
+        plane = Plane.CreateByNormalAndOrigin(XYZ.BasisZ, XYZ(0, 0, z))
+        try:
+            ElementTransformUtils.MirrorElements(doc, List[ElementId](ids), plane, False)
+            count += len(ids)
+        except Exception as e:
+            print("Aviso: falha ao espelhar {} instâncias em Z={}: {}".format(len(ids), z, e))
+    return count
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Dependências entre ambientes e o modelo, para a sincronização dos acabamentos.
+
+Python puro (sem API do Revit): o IUpdater (finish_updater) converte os
+ElementIds de cada alteração num ChangeSet e este módulo decide quais
+ambientes ficaram desatualizados. Os ambientes são enfileirados por comando
+(revestimento, rodapé, forro...) e o próprio comando oferece regenerá-los
+na próxima execução; o carimbo (stamps) garante que só eles sejam refeitos.
+
+Regras:
+    - ambiente alterado/excluído -> ele mesmo;
+    - parede alterada/excluída -> ambientes que a têm no limite;
+    - vão (porta/janela) alterado/excluído -> ambientes da parede hospedeira;
+    - parede/separador NOVO -> ambientes cuja caixa toca a caixa do elemento.
+
+Teste fora do Revit alimentando o DependencyTracker com ChangeSets falsos.
+"""
+from manalib import session, spatial_index
+
+STORE_NAME = "finish_sync"
+
+WALL = "wall"
+ROOM = "room"
+OPENING = "opening"
+SEPARATOR = "separator"
+
+
+class ChangeSet(object):
+    """
+    Uma alteração do documento, já classificada.
+
+    Args:
+        modified (dict): id -> tipo (WALL, ROOM, OPENING, SEPARATOR).
+        deleted (iterable): ids excluídos (o tipo vem do que o tracker conhece).
+        added (dict): id -> (tipo, caixa) dos elementos novos.
+        opening_hosts (dict): id do vão -> id da parede hospedeira (atual).
+    """
+
+    def __init__(self, modified=None, deleted=None, added=None, opening_hosts=None):
+        self.modified = modified or {}
+        self.deleted = set(deleted or [])
+        self.added = added or {}
+        self.opening_hosts = opening_hosts or {}
+
+    def is_empty(self):
+        return not (self.modified or self.deleted or self.added)
+
+
+class DependencyTracker(object):
+    """Quem depende de quem: ambiente -> paredes do limite, vão -> parede."""
+
+    def __init__(self):
+        self._room_hosts = {}
+        self._room_boxes = {}
+        self._wall_rooms = {}
+        self._opening_host = {}
+        self._grid = None
+
+    def __len__(self):
+        return len(self._room_hosts)
+
+    def set_room(self, room_id, host_ids, box=None):
+        """Registra (ou atualiza) as paredes do limite e a caixa do ambiente."""
+        self.remove_room(room_id)
+        hosts = set(host_ids)
+        self._room_hosts[room_id] = hosts
+        for h in hosts:
+            self._wall_rooms.setdefault(h, set()).add(room_id)
+        if box is not None:
+            self._room_boxes[room_id] = box
+            self._grid = None
+
+    def remove_room(self, room_id):
+        for h in self._room_hosts.pop(room_id, ()):
+            rooms = self._wall_rooms.get(h)
+            if rooms:
+                rooms.discard(room_id)
+                if not rooms: del self._wall_rooms[h]
+        if self._room_boxes.pop(room_id, None) is not None:
+            self._grid = None
+
+    def set_opening(self, opening_id, host_id):
+        self._opening_host[opening_id] = host_id
+
+    def rooms_of_wall(self, wall_id):
+        return set(self._wall_rooms.get(wall_id, ()))
+
+    def _rooms_touching(self, box):
+        if not self._room_boxes: return set()
+        if self._grid is None:
+            cell = spatial_index.estimate_cell_size(self._room_boxes.values())
+            self._grid = spatial_index.GridIndex(cell)
+            for room_id, b in self._room_boxes.items():
+                self._grid.insert(room_id, b)
+        return set(self._grid.query(box))
+
+    def affected(self, change):
+        """
+        Ambientes desatualizados pela alteração.
+
+        Returns:
+            set: IDs (int) dos ambientes rastreados afetados.
+        """
+        affected = set()
+        for eid, kind in change.modified.items():
+            if kind == ROOM:
+                if eid in self._room_hosts: affected.add(eid)
+            elif kind in (WALL, SEPARATOR):
+                affected |= self.rooms_of_wall(eid)
+            elif kind == OPENING:
+                old_host = self._opening_host.get(eid)
+                new_host = change.opening_hosts.get(eid, old_host)
+                for host in (old_host, new_host):
+                    if host is not None: affected |= self.rooms_of_wall(host)
+                if new_host is not None: self._opening_host[eid] = new_host
+
+        for eid in change.deleted:
+            if eid in self._room_hosts:
+                affected.add(eid)
+            affected |= self.rooms_of_wall(eid)
+            host = self._opening_host.pop(eid, None)
+            if host is not None: affected |= self.rooms_of_wall(host)
+
+        for eid, (kind, box) in change.added.items():
+            if kind == OPENING:
+                host = change.opening_hosts.get(eid)
+                if host is not None:
+                    self._opening_host[eid] = host
+                    affected |= self.rooms_of_wall(host)
+            elif kind in (WALL, SEPARATOR) and box is not None:
+                affected |= self._rooms_touching(box)
+
+        # Ambientes excluídos não voltam a ser regenerados
+        for eid in change.deleted:
+            if eid in self._room_hosts: self.remove_room(eid)
+        return affected
+
+
+# --- Fila de ambientes desatualizados (sessão) ---
+def _state(doc):
+    store = session.get_store(STORE_NAME)
+    key = session.document_key(doc)
+    state = store.get(key)
+    if state is None:
+        state = {"tracker": None, "generation": None, "room_commands": {}, "pending": {}, "suspended": 0,
+                 "errors": 0, "last_error": None}
+        store[key] = state
+    return state
+
+
+def get_state(doc):
+    """Estado da sincronização do documento (tracker, comandos por ambiente, fila)."""
+    return _state(doc)
+
+
+def queue_rooms(doc, room_ids):
+    """
+    Enfileira ambientes para cada comando que gerou acabamentos neles.
+
+    Returns:
+        int: Quantidade de pares (comando, ambiente) novos na fila.
+    """
+    state = _state(doc)
+    added = 0
+    for room_id in room_ids:
+        for command_id in state["room_commands"].get(room_id, ()):
+            pending = state["pending"].setdefault(command_id, set())
+            if room_id not in pending:
+                pending.add(room_id)
+                added += 1
+    return added
+
+
+def pending_rooms(doc, command_id):
+    """IDs (int) dos ambientes na fila deste comando."""
+    return set(_state(doc)["pending"].get(command_id, ()))
+
+
+def mark_synced(doc, command_id, room_ids):
+    """Retira da fila do comando os ambientes que acabaram de ser (re)gerados."""
+    pending = _state(doc)["pending"].get(command_id)
+    if pending: pending.difference_update(room_ids)
+
+
+def suspend(doc):
+    """Ignora alterações (lotes da própria ManaTools). Chamadas aninhadas são contadas."""
+    _state(doc)["suspended"] += 1
+
+
+def resume(doc):
+    state = _state(doc)
+    state["suspended"] = max(0, state["suspended"] - 1)
+
+
+def is_suspended(doc):
+    return _state(doc)["suspended"] > 0
+
+
+# --- Falhas do updater (sem execução de profiling ativa para registrá-las) ---
+def note_error(doc, error):
+    """Conta uma falha do updater; o tracker é refeito na próxima alteração."""
+    state = _state(doc)
+    state["errors"] += 1
+    state["last_error"] = str(error)
+    state["tracker"] = None
+
+
+def take_errors(doc):
+    """
+    Falhas do updater desde a última consulta (e zera a contagem).
+
+    Returns:
+        tuple: (quantidade, texto da última falha ou None).
+    """
+    state = _state(doc)
+    result = (state["errors"], state["last_error"])
+    state["errors"], state["last_error"] = 0, None
+    return result
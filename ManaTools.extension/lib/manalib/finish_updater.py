@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+IUpdater opcional que mantém a fila de acabamentos desatualizados.
+
+Observa paredes, ambientes, separadores e vãos (portas/janelas). A cada
+alteração monta um finish_sync.ChangeSet, calcula só os ambientes afetados
+e os enfileira para os comandos que geraram acabamentos neles. Nada é
+criado ou apagado aqui: o comando oferece a fila na próxima execução e o
+carimbo (stamps) refaz apenas o que mudou.
+
+Ativação (desligado por padrão), no pyRevit_config.ini:
+    [manatools_finish_sync]
+    enabled = true
+"""
+from System import Guid
+from System.Collections.Generic import List
+from Autodesk.Revit.DB import (IUpdater, UpdaterId, UpdaterRegistry, ChangePriority, Element,
+                               ElementMulticategoryFilter, BuiltInCategory, FamilyInstance,
+                               SpatialElementBoundaryOptions, FilteredElementCollector, ElementId)
+from manalib import session, spatial_index, stamps, finish_sync, profiling
+
+UPDATER_GUID = Guid("2d8e5b71-3c4a-4f9e-a6b0-91c7e4d2f358")
+STORE_NAME = "finish_updater"
+CONFIG_ID = "manatools_finish_sync"
+
+_KINDS = {
+    int(BuiltInCategory.OST_Walls): finish_sync.WALL,
+    int(BuiltInCategory.OST_Rooms): finish_sync.ROOM,
+    int(BuiltInCategory.OST_RoomSeparationLines): finish_sync.SEPARATOR,
+    int(BuiltInCategory.OST_Doors): finish_sync.OPENING,
+    int(BuiltInCategory.OST_Windows): finish_sync.OPENING,
+}
+_WATCHED = [BuiltInCategory.OST_Walls, BuiltInCategory.OST_Rooms, BuiltInCategory.OST_RoomSeparationLines,
+            BuiltInCategory.OST_Doors, BuiltInCategory.OST_Windows]
+
+
+def _kind(elem):
+    if elem is None or elem.Category is None: return None
+    return _KINDS.get(elem.Category.Id.IntegerValue)
+
+
+def _is_generated(elem):
+    """Elementos carimbados são acabamentos nossos: não disparam regeneração."""
+    try:
+        return stamps.read(elem) is not None
+    except Exception:
+        return False
+
+
+def _host_id(elem):
+    if isinstance(elem, FamilyInstance) and elem.Host is not None:
+        return elem.Host.Id.IntegerValue
+    return None
+
+
+def _room_hosts(room):
+    """IDs das paredes do limite do ambiente (leitura direta, sem cache)."""
+    hosts = set()
+    try:
+        for loop in room.GetBoundarySegments(SpatialElementBoundaryOptions()):
+            for seg in loop:
+                hid = seg.ElementId.IntegerValue
+                if hid > 0: hosts.add(hid)
+    except Exception:
+        pass
+    return hosts
+
+
+def _room_box(room):
+    bb = room.get_BoundingBox(None)
+    return spatial_index.box_from_bounding_box(bb) if bb else None
+
+
+def build_tracker(doc, state):
+    """Monta o tracker a partir dos carimbos: ambientes de origem e vãos das suas paredes."""
+    tracker = finish_sync.DependencyTracker()
+    room_commands = {}
+    for command_id, sources in stamps.sources_by_command(doc).items():
+        for source in sources:
+            for eid in stamps.source_ids(source):
+                room_commands.setdefault(eid, set()).add(command_id)
+
+    walls = set()
+    for eid in list(room_commands.keys()):
+        room = doc.GetElement(ElementId(eid))
+        if _kind(room) != finish_sync.ROOM:
+            # Portas de um piso unificado etc.: não são ambientes
+            del room_commands[eid]
+            continue
+        hosts = _room_hosts(room)
+        walls |= hosts
+        tracker.set_room(eid, hosts, _room_box(room))
+
+    if walls:
+        for cat in (BuiltInCategory.OST_Doors, BuiltInCategory.OST_Windows):
+            for op in FilteredElementCollector(doc).OfCategory(cat).WhereElementIsNotElementType():
+                host = _host_id(op)
+                if host in walls: tracker.set_opening(op.Id.IntegerValue, host)
+
+    state["tracker"] = tracker
+    state["room_commands"] = room_commands
+    state["generation"] = stamps.generation(doc)
+    return tracker
+
+
+def change_set(doc, added_ids, modified_ids, deleted_ids):
+    """Converte os ElementIds de uma alteração num ChangeSet (ignora acabamentos gerados)."""
+    modified, added, hosts = {}, {}, {}
+    for eid in modified_ids:
+        elem = doc.GetElement(eid)
+        kind = _kind(elem)
+        if kind is None or _is_generated(elem): continue
+        modified[eid.IntegerValue] = kind
+        if kind == finish_sync.OPENING:
+            host = _host_id(elem)
+            if host is not None: hosts[eid.IntegerValue] = host
+
+    for eid in added_ids:
+        elem = doc.GetElement(eid)
+        kind = _kind(elem)
+        if kind is None or _is_generated(elem): continue
+        if kind == finish_sync.OPENING:
+            host = _host_id(elem)
+            if host is not None: hosts[eid.IntegerValue] = host
+            added[eid.IntegerValue] = (kind, None)
+        elif kind in (finish_sync.WALL, finish_sync.SEPARATOR):
+            bb = elem.get_BoundingBox(None)
+            added[eid.IntegerValue] = (kind, spatial_index.box_from_bounding_box(bb) if bb else None)
+
+    deleted = [eid.IntegerValue for eid in deleted_ids]
+    return finish_sync.ChangeSet(modified, deleted, added, hosts)
+
+
+class FinishSyncUpdater(IUpdater):
+    """Enfileira ambientes com acabamentos desatualizados (ver cabeçalho)."""
+
+    def __init__(self, addin_id):
+        self._id = UpdaterId(addin_id, UPDATER_GUID)
+
+    def GetUpdaterId(self):
+        return self._id
+
+    def GetUpdaterName(self):
+        return "ManaTools - Sincronização de Acabamentos"
+
+    def GetAdditionalInformation(self):
+        return "Marca revestimentos, rodapés e forros de ambientes alterados para regeneração."
+
+    def GetChangePriority(self):
+        return ChangePriority.RoomsSpacesZones
+
+    def Execute(self, data):
+        doc = None
+        try:
+            doc = data.GetDocument()
+            if finish_sync.is_suspended(doc): return
+
+            change = change_set(doc, data.GetAddedElementIds(), data.GetModifiedElementIds(),
+                                data.GetDeletedElementIds())
+            if change.is_empty(): return
+
+            state = finish_sync.get_state(doc)
+            tracker = state["tracker"]
+            if tracker is None or state["generation"] != stamps.generation(doc):
+                tracker = build_tracker(doc, state)
+            if not len(tracker): return
+
+            affected = tracker.affected(change)
+            if not affected: return
+            finish_sync.queue_rooms(doc, affected)
+
+            # Limites mudaram: relê as paredes dos ambientes afetados
+            for room_id in affected:
+                room = doc.GetElement(ElementId(room_id))
+                if room is not None:
+                    tracker.set_room(room_id, _room_hosts(room), _room_box(room))
+        except Exception as e:
+            # O updater nunca pode derrubar a transação do usuário (nem escrever na saída):
+            # a falha fica no estado e o próximo comando de acabamento avisa
+            profiling.failure("finish_sync.updater", e)
+            if doc is not None:
+                try:
+                    finish_sync.note_error(doc, e)
+                except Exception:
+                    pass
+
+
+def register(addin_id):
+    """Registra o updater e os gatilhos (uma vez por sessão). Retorna o updater."""
+    store = session.get_store(STORE_NAME)
+    updater = store.get("updater")
+    if updater is not None: return updater
+
+    updater = FinishSyncUpdater(addin_id)
+    uid = updater.GetUpdaterId()
+    if not UpdaterRegistry.IsUpdaterRegistered(uid):
+        UpdaterRegistry.RegisterUpdater(updater, True)
+        watched = ElementMulticategoryFilter(List[BuiltInCategory](_WATCHED))
+        UpdaterRegistry.AddTrigger(uid, watched, Element.GetChangeTypeGeometry())
+        UpdaterRegistry.AddTrigger(uid, watched, Element.GetChangeTypeElementAddition())
+        UpdaterRegistry.AddTrigger(uid, watched, Element.GetChangeTypeElementDeletion())
+    # Referência viva enquanto o Revit estiver aberto
+    store["updater"] = updater
+    return updater
+
+
+def unregister():
+    store = session.get_store(STORE_NAME)
+    updater = store.pop("updater", None)
+    if updater is None: return
+    uid = updater.GetUpdaterId()
+    if UpdaterRegistry.IsUpdaterRegistered(uid):
+        UpdaterRegistry.UnregisterUpdater(uid)
+
+
+def pending_room_elements(doc, command_id):
+    """
+    Ambientes na fila deste comando (elementos válidos).
+    Não esvazia a fila: use finish_sync.mark_synced depois de regenerar.
+    """
+    rooms = []
+    for room_id in sorted(finish_sync.pending_rooms(doc, command_id)):
+        room = doc.GetElement(ElementId(room_id))
+        if room is not None and _kind(room) == finish_sync.ROOM:
+            rooms.append(room)
+    return rooms
+
+
+def offer_pending(doc, command_id, label="ambientes"):
+    """
+    Sem seleção: oferece regenerar os ambientes da fila deste comando.
+    Antes, avisa se o updater falhou desde a última consulta (a fila pode
+    estar incompleta).
+
+    Returns:
+        list: Ambientes escolhidos (vazio se não há fila ou o usuário recusou).
+    """
+    from pyrevit import forms
+    count, last_error = finish_sync.take_errors(doc)
+    if count:
+        forms.alert("A sincronização automática falhou {} vez(es) desde a última execução; "
+                    "a lista de ambientes alterados pode estar incompleta.\n\n"
+                    "Última falha: {}".format(count, last_error))
+
+    rooms = pending_room_elements(doc, command_id)
+    if not rooms: return []
+    if forms.alert("{} {} mudaram desde a última geração.\n\nRegenerar só eles?".format(len(rooms), label),
+                   yes=True, no=True):
+        return rooms
+    return []
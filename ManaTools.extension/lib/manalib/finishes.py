@@ -2,9 +2,9 @@
 """Lógica de criação de Revestimentos (Paredes Cebola)."""
 from System.Collections.Generic import List
 from Autodesk.Revit.DB import (FilteredElementCollector, BuiltInCategory, BuiltInParameter,
-                              Wall, WallType, Level, JoinGeometryUtils,
-                              SpatialElementBoundaryOptions, SpatialElementBoundaryLocation,
+                              Wall, WallType, Level,
                               CurveLoop, XYZ)
+from manalib import room_geometry, doc_index, join_queue
 
 
 def get_wall_types(doc):
@@ -16,26 +16,25 @@ def get_wall_types(doc):
 
 
 def get_levels(doc):
-    """Retorna lista de Níveis ordenados por elevação."""
-    levels = FilteredElementCollector(doc)\
-             .OfClass(Level)\
-             .WhereElementIsNotElementType()\
-             .ToElements()
-    return sorted(levels, key=lambda l: l.Elevation)
+    """Retorna lista de Níveis ordenados por elevação (catálogo da sessão)."""
+    return doc_index.get_index(doc).levels().elements()
 
 
-def create_finishes_in_room(doc, room, wall_type, base_level, top_level, height, offset_base_z=0.0):
+def create_finishes_in_room(doc, room, wall_type, base_level, top_level, height, offset_base_z=0.0, joins=None):
     """
     Cria paredes offsetadas para dentro do perímetro de acabamento do ambiente.
+
+    Args:
+        joins (JoinQueue): Fila de uniões do lote. None = fila própria,
+                           executada no fim desta chamada.
     """
     created_walls = []
+    own_queue = joins is None
+    if own_queue: joins = join_queue.JoinQueue(doc)
     
-    # 1. Configurações de Fronteira
-    opt = SpatialElementBoundaryOptions()
-    # Usa a face de acabamento como referência
-    opt.SpatialElementBoundaryLocation = SpatialElementBoundaryLocation.Finish
-    
-    boundary_loops = room.GetBoundarySegments(opt)
+    # 1. Fronteira (Face de Acabamento) vinda do cache da sessão
+    geo_cache = room_geometry.get_cache(doc)
+    boundary_loops = geo_cache.boundary_loops(room)
     
     if not boundary_loops: 
         return []
@@ -52,9 +51,9 @@ def create_finishes_in_room(doc, room, wall_type, base_level, top_level, height,
         original_curve_loop = CurveLoop()
         host_map = [] 
         
-        for seg in loop_segments:
-            original_curve_loop.Append(seg.GetCurve())
-            host_map.append(seg.ElementId)
+        for curve, host_id in loop_segments:
+            original_curve_loop.Append(curve)
+            host_map.append(host_id)
 
         try:
             # 2. Gera o Loop Deslocado (Agora com sinal invertido)
@@ -108,13 +107,10 @@ def create_finishes_in_room(doc, room, wall_type, base_level, top_level, height,
                 # 6. União Inteligente
                 if i < len(host_map):
                     host_id = host_map[i]
-                    if host_id.IntegerValue > 0:
-                        host_wall = doc.GetElement(host_id)
+                    if host_id > 0:
+                        host_wall = geo_cache.get_element(host_id)
                         if isinstance(host_wall, Wall):
-                            try:
-                                JoinGeometryUtils.JoinGeometry(doc, new_wall, host_wall)
-                            except: 
-                                pass
+                            joins.add(new_wall, host_wall)
                 
                 created_walls.append(new_wall)
 
@@ -122,4 +118,5 @@ def create_finishes_in_room(doc, room, wall_type, base_level, top_level, height,
             # Se der erro no CreateViaOffset (geometria inválida com negativo), avisamos
             print("Erro loop offset: {}".format(e))
 
+    if own_queue: joins.flush()
     return created_walls
@@ -2,111 +2,100 @@
 """
 Lógica de criação de Pisos com Geometria Sólida (CSG).
 Agora suporta seleção explícita de Ambientes e Portas.
+Modo 2D: união de polígonos em Python puro (polygon2d), sem sólidos.
 """
 from System.Collections.Generic import List
 from Autodesk.Revit.DB import (FilteredElementCollector, BuiltInCategory, BuiltInParameter,
                               Floor, FloorType, Level, CurveLoop, GeometryCreationUtilities,
                               BooleanOperationsUtils, BooleanOperationsType,
-                              SpatialElementBoundaryOptions, SpatialElementBoundaryLocation,
-                              XYZ, UV, Line, Solid, PlanarFace, SpatialElementGeometryCalculator,
+                              XYZ, UV, Line, Solid, PlanarFace,
                               Wall, LocationCurve)
+from manalib import room_geometry, spatial_index, geometry2d, polygon2d, pipeline, param_resolver, doc_index, profiling
+
+# Folga (pés) para considerar dois sólidos candidatos a união
+SOLID_TOUCH_TOLERANCE = 0.01
 
 def get_floor_types(doc):
-    """Retorna lista de Tipos de Piso disponíveis."""
-    return FilteredElementCollector(doc)\
-           .OfClass(FloorType)\
-           .WhereElementIsElementType()\
-           .ToElements()
+    """Retorna lista de Tipos de Piso disponíveis (catálogo da sessão, ordenado por nome)."""
+    return doc_index.get_index(doc).floor_types().elements()
 
 def get_room_solid(doc, room):
     """
     Usa SpatialElementGeometryCalculator para extrair o sólido exato da sala.
+    O calculador e o resultado ficam no cache de geometria da sessão.
     """
-    options = SpatialElementBoundaryOptions()
-    options.SpatialElementBoundaryLocation = SpatialElementBoundaryLocation.Finish
-    
-    try:
-        calc = SpatialElementGeometryCalculator(doc, options)
-        results = calc.CalculateSpatialElementGeometry(room)
-        room_solid = results.GetGeometry() 
-        return room_solid
-    except Exception as e:
-        print("Aviso: Falha no GeometryCalculator para sala {}: {}".format(room.Id, e))
-        return None
+    return room_geometry.get_cache(doc).room_solid(room)
 
-def create_door_bridge_solid(doc, door, height=1.0, overlap_width=0.16):
+def get_door_bridge_width(doc, door):
+    """Largura da porta (prioriza parâmetro de instância, depois tipo)."""
+    return param_resolver.read(door, param_resolver.BRIDGE_DOOR_WIDTH, doc)
+
+def snapshot_door_bridge(doc, door):
     """
-    Cria um sólido (caixa) para a porta selecionada.
+    Lê da API os dados da "ponte" da porta (dados puros).
     Usa o EIXO da parede para centralizar a geometria e evitar deslocamentos.
-    
-    Args:
-        overlap_width (float): Valor em pés para expandir a largura da soleira para dentro das salas.
+
+    Returns:
+        dict: center (x, y), tangent (x, y), width, thickness (pés) | None
     """
     wall = door.Host
     if not wall: return None
-    
-    # 1. Dados Geométricos da Parede
-    wall_thickness = wall.Width
+
     wall_loc = wall.Location
-    
     if not isinstance(wall_loc, LocationCurve):
         return None
-        
     wall_curve = wall_loc.Curve
-    
-    # 2. Dados da Porta
-    # Largura (Prioriza parâmetro de instância, depois tipo)
-    width = 0.80
-    p_w = door.get_Parameter(BuiltInParameter.DOOR_WIDTH)
-    if p_w and p_w.HasValue:
-        width = p_w.AsDouble()
-    else:
-        type_elem = doc.GetElement(door.GetTypeId())
-        if type_elem:
-            p_w_type = type_elem.get_Parameter(BuiltInParameter.DOOR_WIDTH)
-            if p_w_type and p_w_type.HasValue:
-                width = p_w_type.AsDouble()
-
-    # 3. Ponto Central Real (No Eixo da Parede)
-    door_pt = door.Location.Point
+
     # Projeta o ponto da porta na linha da parede para garantir centralização na espessura
-    proj_result = wall_curve.Project(door_pt)
+    proj_result = wall_curve.Project(door.Location.Point)
     center_pt = proj_result.XYZPoint
-    # Força Z=0
-    center_pt = XYZ(center_pt.X, center_pt.Y, 0.0)
-    
-    # 4. Vetores Direcionais (Baseados na Curva da Parede)
+
     # Tangente da parede no ponto (Direção da Largura/Hand)
-    param = proj_result.Parameter
-    tangent = wall_curve.ComputeDerivatives(param, False).BasisX.Normalize()
-    tangent = XYZ(tangent.X, tangent.Y, 0.0).Normalize()
-    
+    tangent = wall_curve.ComputeDerivatives(proj_result.Parameter, False).BasisX
+    try:
+        tangent = geometry2d.normalize((tangent.X, tangent.Y))
+    except ValueError:
+        return None
+
+    return {
+        "center": (center_pt.X, center_pt.Y),
+        "tangent": tangent,
+        "width": get_door_bridge_width(doc, door),
+        "thickness": wall.Width,
+    }
+
+def door_bridge_rectangle(snap, overlap_width=0.16, overlap_thick=0.0):
+    """
+    Retângulo (4 pontos) da ponte da porta. Cálculo puro.
+
+    Args:
+        overlap_width (float): Avanço (pés) da soleira para dentro das salas.
+        overlap_thick (float): Folga na espessura (0 = respeita a face da parede).
+    """
     # Normal da parede (Direção da Espessura/Facing)
-    # Rotaciona tangente 90 graus em Z
-    normal = XYZ(-tangent.Y, tangent.X, 0.0).Normalize()
-    
-    # 5. Dimensões com Overlap Dinâmico
-    # Sem overlap na espessura (para respeitar face da parede)
-    overlap_thick = 0.00 
-    
-    half_w = (width / 2.0) + overlap_width
-    half_thk = (wall_thickness / 2.0) + overlap_thick
-    
-    # 6. Vértices do Retângulo
-    v_width = tangent * half_w
-    v_thick = normal * half_thk
+    normal = geometry2d.perpendicular(snap["tangent"])
+    half_w = (snap["width"] / 2.0) + overlap_width
+    half_thk = (snap["thickness"] / 2.0) + overlap_thick
+    return geometry2d.rectangle(snap["center"], snap["tangent"], normal,
+                                -half_w, half_w, -half_thk, half_thk)
+
+def create_door_bridge_solid(doc, door, height=1.0, overlap_width=0.16):
+    """
+    Cria um sólido (caixa) para a porta selecionada.
     
-    p1 = center_pt - v_width - v_thick
-    p2 = center_pt + v_width - v_thick
-    p3 = center_pt + v_width + v_thick
-    p4 = center_pt - v_width + v_thick
+    Args:
+        overlap_width (float): Valor em pés para expandir a largura da soleira para dentro das salas.
+    """
+    snap = snapshot_door_bridge(doc, door)
+    if not snap: return None
+
+    # Sem overlap na espessura (para respeitar face da parede); Z=0
+    pts = [XYZ(x, y, 0.0) for x, y in door_bridge_rectangle(snap, overlap_width)]
     
     try:
         cl = CurveLoop()
-        cl.Append(Line.CreateBound(p1, p2))
-        cl.Append(Line.CreateBound(p2, p3))
-        cl.Append(Line.CreateBound(p3, p4))
-        cl.Append(Line.CreateBound(p4, p1))
+        for i in range(4):
+            cl.Append(Line.CreateBound(pts[i], pts[(i + 1) % 4]))
         
         bridge_solid = GeometryCreationUtilities.CreateExtrusionGeometry(
             List[CurveLoop]([cl]), XYZ.BasisZ, height
@@ -115,38 +104,89 @@ def create_door_bridge_solid(doc, door, height=1.0, overlap_width=0.16):
     except:
         return None
 
-def unify_solids(solids_list):
+def get_solid_box(solid):
+    """Caixa (tupla) do sólido em coordenadas do modelo."""
+    try:
+        bb = solid.GetBoundingBox()
+        tf = bb.Transform
+        p0 = tf.OfPoint(bb.Min)
+        p1 = tf.OfPoint(bb.Max)
+        return (min(p0.X, p1.X), min(p0.Y, p1.Y), min(p0.Z, p1.Z),
+                max(p0.X, p1.X), max(p0.Y, p1.Y), max(p0.Z, p1.Z))
+    except:
+        return None
+
+def _union_pair(a, b):
+    """União booleana de dois sólidos. Retorna None se falhar."""
+    try:
+        union = BooleanOperationsUtils.ExecuteBooleanOperation(a, b, BooleanOperationsType.Union)
+        if union and union.Volume > 0:
+            return union
+    except Exception as e:
+        profiling.failure("BooleanUnion", e)
+    return None
+
+def _merge_balanced(solids):
+    """
+    Une um grupo como árvore binária balanceada (pares vizinhos a cada rodada).
+    Os dois sólidos de um par que falha saem da árvore e são tentados depois,
+    um a um, contra os resultados acumulados; só fica separado o que não
+    une com nada.
+    """
+    current = list(solids)
+    failed = []
+    while len(current) > 1:
+        next_round = []
+        for i in range(0, len(current) - 1, 2):
+            union = _union_pair(current[i], current[i + 1])
+            if union:
+                next_round.append(union)
+            else:
+                failed.extend([current[i], current[i + 1]])
+        if len(current) % 2:
+            next_round.append(current[-1])
+        current = next_round
+
+    results = current
+    while failed:
+        if not results:
+            results.append(failed.pop(0))
+            continue
+        remaining = []
+        for solid in failed:
+            for idx, acc in enumerate(results):
+                union = _union_pair(acc, solid)
+                if union:
+                    results[idx] = union
+                    break
+            else:
+                remaining.append(solid)
+        if len(remaining) == len(failed):
+            # Nenhum progresso: o primeiro que sobrou vira um resultado separado
+            # (os demais ainda podem unir com ele)
+            results.append(remaining.pop(0))
+        failed = remaining
+    return results
+
+def unify_solids(solids_list, tolerance=SOLID_TOUCH_TOLERANCE):
     """
     Tenta unir uma lista de sólidos.
     Retorna lista de sólidos resultantes (ilhas).
+    
+    1. Pares candidatos por sobreposição de BoundingBox (índice espacial)
+    2. Componentes conexos via union-find
+    3. União de cada componente como árvore balanceada
     """
     if not solids_list: return []
     
-    pool = list(solids_list)
-    results = []
+    solids = list(solids_list)
+    items = [(i, get_solid_box(s)) for i, s in enumerate(solids)]
+    pairs = spatial_index.self_candidate_pairs(items, tolerance=tolerance)
+    groups = spatial_index.connected_components(range(len(solids)), pairs)
     
-    while pool:
-        base = pool.pop(0)
-        merged_any = True
-        while merged_any:
-            merged_any = False
-            i = 0
-            while i < len(pool):
-                candidate = pool[i]
-                try:
-                    union = BooleanOperationsUtils.ExecuteBooleanOperation(
-                        base, candidate, BooleanOperationsType.Union
-                    )
-                    if union and union.Volume > 0:
-                        base = union
-                        pool.pop(i)
-                        merged_any = True
-                    else:
-                        i += 1
-                except:
-                    i += 1
-        results.append(base)
-            
+    results = []
+    for group in groups:
+        results.extend(_merge_balanced([solids[i] for i in group]))
     return results
 
 def generate_floor_from_solid(doc, solid, floor_type, level, offset):
@@ -168,9 +208,13 @@ def generate_floor_from_solid(doc, solid, floor_type, level, offset):
     if not bottom_face: return None
     
     loops = bottom_face.GetEdgesAsCurveLoops()
-    
+    return _create_floor(doc, loops, floor_type, level, offset)
+
+def _create_floor(doc, loops, floor_type, level, offset):
+    """Floor.Create + deslocamento da altura."""
     try:
-        f = Floor.Create(doc, loops, floor_type.Id, level.Id)
+        with profiling.span("Floor.Create"):
+            f = Floor.Create(doc, loops, floor_type.Id, level.Id)
         p = f.get_Parameter(BuiltInParameter.FLOOR_HEIGHTABOVELEVEL_PARAM)
         if p: p.Set(offset)
         return f
@@ -178,18 +222,101 @@ def generate_floor_from_solid(doc, solid, floor_type, level, offset):
         print("Erro Floor.Create: {}".format(e))
         return None
 
-def create_floors(doc, selection_list, floor_type, level, offset_z, door_overlap=0.16, merge_all=False):
+# --- MODO 2D (União de polígonos em Python puro) ---
+
+# Folga na espessura da ponte ao unir: um passo da grade, para a ponte
+# sobrepor (e não apenas encostar) o limite dos ambientes
+BRIDGE_SNAP_OVERLAP = polygon2d.SNAP
+
+def snapshot_room_outline(doc, room):
+    """Loops do limite (face de acabamento) como listas de (x, y)."""
+    return room_geometry.get_cache(doc).outline(room) or None
+
+def union_outlines(regions, merge_all=True, workers=None):
     """
-    Cria pisos baseados na seleção explícita de Ambientes e Portas.
+    Une regiões (listas de loops em pés) e devolve ilhas [(contorno, [furos])].
+    Cálculo puro: grupos independentes são unidos em paralelo.
+
     Args:
-        door_overlap (float): Avanço do piso da porta para dentro das salas (em pés).
+        merge_all (bool): False = cada região vira suas próprias ilhas.
+    """
+    snapped = pipeline.parallel_map(polygon2d.snap_region, regions, workers)
+    snapped = [r if not isinstance(r, pipeline.Failure) else [] for r in snapped]
+
+    if merge_all:
+        groups = polygon2d.group_overlapping(snapped)
+    else:
+        groups = [[i] for i, r in enumerate(snapped) if r]
+
+    def compute(group):
+        islands = polygon2d.union_regions([snapped[i] for i in group])
+        return polygon2d.to_float(islands)
+
+    islands = []
+    for result in pipeline.parallel_map(compute, groups, workers):
+        if isinstance(result, pipeline.Failure):
+            print("Aviso: falha na união 2D: {}".format(result.error))
+            continue
+        islands.extend(result)
+    return islands
+
+def create_floor_from_outline(doc, outer, holes, floor_type, level, offset):
+    """Cria um piso a partir de loops (x, y) em pés (Z=0)."""
+    loops = List[CurveLoop]()
+    for pts in [outer] + list(holes):
+        cl = CurveLoop()
+        n = len(pts)
+        for i in range(n):
+            a, b = pts[i], pts[(i + 1) % n]
+            cl.Append(Line.CreateBound(XYZ(a[0], a[1], 0.0), XYZ(b[0], b[1], 0.0)))
+        loops.Add(cl)
+    return _create_floor(doc, loops, floor_type, level, offset)
+
+# --- Planejamento + criação (usados em lote pelo CriarPiso) ---
+
+# Tipos de plano de piso
+OUTLINE = "outline"
+SOLID = "solid"
+
+def plan_floors_2d(doc, rooms, doors, door_overlap=0.16, merge_all=False, workers=None):
+    """
+    Snapshot + união 2D (sem Transaction). Limites e pontes das portas são
+    unidos como polígonos.
+
+    Returns:
+        list: Planos [(OUTLINE, (contorno, [furos])), ...] para create_planned_floor.
+    """
+    # 1. Snapshot (API)
+    regions = []
+    for r in rooms:
+        loops = snapshot_room_outline(doc, r)
+        if loops: regions.append(loops)
+
+    thick = BRIDGE_SNAP_OVERLAP if merge_all else 0.0
+    for d in doors:
+        snap = snapshot_door_bridge(doc, d)
+        if snap: regions.append([door_bridge_rectangle(snap, door_overlap, thick)])
+
+    if not regions: return []
+
+    # 2. União (Python puro)
+    return [(OUTLINE, island) for island in union_outlines(regions, merge_all, workers)]
+
+def create_floors_2d(doc, rooms, doors, floor_type, level, offset_z, door_overlap=0.16, merge_all=False, workers=None):
+    """
+    Mesmo resultado de create_floors, sem sólidos: limites e pontes das portas
+    são unidos como polígonos 2D e vão direto para o Floor.Create.
     """
     created_floors = []
-    
-    # 1. Separação por Categoria
+    for plan in plan_floors_2d(doc, rooms, doors, door_overlap, merge_all, workers):
+        f = create_planned_floor(doc, plan, floor_type, level, offset_z)
+        if f: created_floors.append(f)
+    return created_floors
+
+def split_selection(selection_list):
+    """Separa Ambientes e Portas da seleção."""
     rooms = []
     doors = []
-    
     for elem in selection_list:
         if not elem: continue
         cat_id = elem.Category.Id.IntegerValue
@@ -197,10 +324,23 @@ def create_floors(doc, selection_list, floor_type, level, offset_z, door_overlap
             rooms.append(elem)
         elif cat_id == int(BuiltInCategory.OST_Doors):
             doors.append(elem)
-            
+    return rooms, doors
+
+def plan_floors(doc, selection_list, door_overlap=0.16, merge_all=False, use_2d=False):
+    """
+    Calcula os pisos da seleção sem criar nada (não exige Transaction): um
+    plano por piso, na mesma ordem para a mesma seleção.
+
+    Returns:
+        list: [(OUTLINE, (contorno, [furos])) | (SOLID, Solid), ...]
+    """
+    rooms, doors = split_selection(selection_list)
     if not rooms: return []
 
-    # 2. Gera Sólidos
+    if use_2d:
+        return plan_floors_2d(doc, rooms, doors, door_overlap=door_overlap, merge_all=merge_all)
+
+    # Gera Sólidos
     solids = []
     
     # Sólidos de Sala
@@ -217,18 +357,29 @@ def create_floors(doc, selection_list, floor_type, level, offset_z, door_overlap
         
     if not solids: return []
 
-    # 3. Processamento
     if merge_all:
         # Une tudo que foi selecionado num bolo só
-        final_solids = unify_solids(solids)
-        for sol in final_solids:
-            f = generate_floor_from_solid(doc, sol, floor_type, level, offset_z)
-            if f: created_floors.append(f)
-            
-    else:
-        # Modo Individual: Cria pisos isolados para cada sólido gerado
-        for s in solids:
-            f = generate_floor_from_solid(doc, s, floor_type, level, offset_z)
-            if f: created_floors.append(f)
+        solids = unify_solids(solids)
+    # Modo Individual: um piso isolado para cada sólido gerado
+    return [(SOLID, s) for s in solids]
+
+def create_planned_floor(doc, plan, floor_type, level, offset):
+    """Cria o piso de um plano de plan_floors (dentro de uma Transaction)."""
+    kind, data = plan
+    if kind == OUTLINE:
+        outer, holes = data
+        return create_floor_from_outline(doc, outer, holes, floor_type, level, offset)
+    return generate_floor_from_solid(doc, data, floor_type, level, offset)
 
+def create_floors(doc, selection_list, floor_type, level, offset_z, door_overlap=0.16, merge_all=False, use_2d=False):
+    """
+    Cria pisos baseados na seleção explícita de Ambientes e Portas.
+    Args:
+        door_overlap (float): Avanço do piso da porta para dentro das salas (em pés).
+        use_2d (bool): União de polígonos 2D em vez de sólidos (arcos viram polilinhas).
+    """
+    created_floors = []
+    for plan in plan_floors(doc, selection_list, door_overlap, merge_all, use_2d):
+        f = create_planned_floor(doc, plan, floor_type, level, offset_z)
+        if f: created_floors.append(f)
     return created_floors
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Matemática 2D pura (tuplas) para o estágio de cálculo dos comandos de modelagem.
+Nada aqui importa a API do Revit: roda em threads e fora do Revit.
+
+Pontos/vetores são tuplas (x, y) ou (x, y, z); só X e Y entram nos cálculos.
+"""
+import math
+
+
+def sub(a, b):
+    return (a[0] - b[0], a[1] - b[1])
+
+
+def add(a, b):
+    return (a[0] + b[0], a[1] + b[1])
+
+
+def scale(v, k):
+    return (v[0] * k, v[1] * k)
+
+
+def dot(a, b):
+    return a[0] * b[0] + a[1] * b[1]
+
+
+def cross(a, b):
+    return a[0] * b[1] - a[1] * b[0]
+
+
+def length(v):
+    return math.sqrt(v[0] * v[0] + v[1] * v[1])
+
+
+def normalize(v):
+    """Vetor unitário. Lança ValueError para vetor nulo (igual ao XYZ.Normalize)."""
+    n = length(v)
+    if n < 1e-9:
+        raise ValueError("Vetor nulo")
+    return (v[0] / n, v[1] / n)
+
+
+def perpendicular(v):
+    """Rotaciona 90 graus no sentido anti-horário."""
+    return (-v[1], v[0])
+
+
+def signed_area(points):
+    """Área com sinal de um polígono fechado (positiva = anti-horário)."""
+    total = 0.0
+    n = len(points)
+    for i in range(n):
+        x0, y0 = points[i][0], points[i][1]
+        x1, y1 = points[(i + 1) % n][0], points[(i + 1) % n][1]
+        total += x0 * y1 - x1 * y0
+    return total / 2.0
+
+
+def point_in_loops(pt, loops):
+    """Ponto dentro de uma região (paridade sobre todos os loops, furos inclusos)."""
+    x, y = pt[0], pt[1]
+    inside = False
+    for loop in loops:
+        n = len(loop)
+        for i in range(n):
+            ax, ay = loop[i - 1][0], loop[i - 1][1]
+            bx, by = loop[i][0], loop[i][1]
+            if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+                inside = not inside
+    return inside
+
+
+def merge_intervals(intervals):
+    """Une intervalos (inicio, fim) sobrepostos. Retorna lista ordenada."""
+    if not intervals: return []
+    ordered = sorted(intervals, key=lambda x: x[0])
+    merged = []
+    curr_s, curr_e = ordered[0]
+    for next_s, next_e in ordered[1:]:
+        if next_s < curr_e:
+            curr_e = max(curr_e, next_e)
+        else:
+            merged.append((curr_s, curr_e))
+            curr_s, curr_e = next_s, next_e
+    merged.append((curr_s, curr_e))
+    return merged
+
+
+def subtract_intervals(total_length, cuts, min_piece=0.02):
+    """
+    Complemento dos cortes em [0, total_length].
+    Trechos menores que min_piece são descartados.
+    """
+    pieces = []
+    current_pos = 0.0
+    for c_start, c_end in merge_intervals(cuts):
+        if c_start - current_pos > min_piece:
+            pieces.append((current_pos, c_start))
+        current_pos = max(current_pos, c_end)
+    if total_length - current_pos > min_piece:
+        pieces.append((current_pos, total_length))
+    return pieces
+
+
+def segment_minus_openings(p_start, p_end, openings, gap_margin, max_perp=1.0, min_piece=0.02):
+    """
+    Recorta um segmento de parede nos vãos (portas/janelas).
+
+    Args:
+        p_start / p_end (tuple): Extremidades (x, y, z). O Z de p_start é mantido.
+        openings (list): [(x, y, largura), ...] pontos de inserção dos vãos.
+        gap_margin (float): Folga extra descontada de cada lado do vão.
+        max_perp (float): Vãos mais distantes que isso do eixo são ignorados.
+
+    Returns:
+        list: [((x, y, z), (x, y, z)), ...] trechos restantes.
+    """
+    try:
+        line_vec = normalize(sub(p_end, p_start))
+    except ValueError:
+        return []
+    seg_length = length(sub(p_end, p_start))
+
+    cuts = []
+    for ox, oy, width in openings:
+        vec_to_elem = (ox - p_start[0], oy - p_start[1])
+        along = dot(vec_to_elem, line_vec)
+
+        # Distância lateral: vão projetado longe do eixo é "fantasma"
+        perp_dist = abs(cross(line_vec, vec_to_elem))
+        if perp_dist > max_perp:
+            continue
+
+        cut_s = max(0, along - (width / 2.0) - gap_margin)
+        cut_e = min(seg_length, along + (width / 2.0) + gap_margin)
+        if cut_s < cut_e:
+            cuts.append((cut_s, cut_e))
+
+    z = p_start[2] if len(p_start) > 2 else 0.0
+    pieces = []
+    for s, e in subtract_intervals(seg_length, cuts, min_piece):
+        pieces.append(((p_start[0] + line_vec[0] * s, p_start[1] + line_vec[1] * s, z),
+                       (p_start[0] + line_vec[0] * e, p_start[1] + line_vec[1] * e, z)))
+    return pieces
+
+
+def rectangle(center, u, v, u0, u1, v0, v1):
+    """
+    Quatro cantos de um retângulo no sistema local (u, v) centrado em 'center'.
+    Ordem: (u0,v0) -> (u1,v0) -> (u1,v1) -> (u0,v1).
+    """
+    def at(a, b):
+        return (center[0] + u[0] * a + v[0] * b, center[1] + u[1] * a + v[1] * b)
+    return [at(u0, v0), at(u1, v0), at(u1, v1), at(u0, v1)]
+
+
+def distance(a, b):
+    return length(sub(a, b))
+
+
+def line_intersection(p1, v1, p2, v2, min_det=1e-4):
+    """
+    Interseção das retas infinitas p1 + v1*t e p2 + v2*s (v1, v2 unitários).
+    Retorna None para retas paralelas (|det| <= min_det).
+    """
+    det = cross(v1, v2)
+    if abs(det) <= min_det:
+        return None
+    t = cross(sub(p2, p1), v2) / det
+    return (p1[0] + v1[0] * t, p1[1] + v1[1] * t)
+
+
+def line_circle_intersections(p, v, center, radius):
+    """Pontos onde a reta infinita p + v*t (v unitário) corta o círculo."""
+    d = sub(p, center)
+    b = dot(v, d)
+    disc = b * b - (dot(d, d) - radius * radius)
+    if disc < 0:
+        return []
+    root = math.sqrt(disc)
+    return [(p[0] + v[0] * t, p[1] + v[1] * t) for t in (-b - root, -b + root)]
+
+
+def circle_intersections(c1, r1, c2, r2):
+    """Pontos de interseção entre dois círculos (vazio se não se cortam ou são concêntricos)."""
+    d = distance(c1, c2)
+    if d < 1e-9 or d > r1 + r2 or d < abs(r1 - r2):
+        return []
+    a = (r1 * r1 - r2 * r2 + d * d) / (2.0 * d)
+    h = math.sqrt(max(r1 * r1 - a * a, 0.0))
+    u = scale(sub(c2, c1), 1.0 / d)
+    base = add(c1, scale(u, a))
+    n = perpendicular(u)
+    return [add(base, scale(n, h)), add(base, scale(n, -h))]
+
+
+def nearest(points, ref):
+    """Ponto da lista mais próximo de ref (None se vazia)."""
+    best = None
+    best_d = None
+    for pt in points:
+        d = distance(pt, ref)
+        if best is None or d < best_d:
+            best, best_d = pt, d
+    return best
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Uniões de geometria (JoinGeometry) adiadas, sem duplicatas.
+
+Os comandos enfileiram pedidos (a, b, ordem) durante a criação e a fila é
+executada de uma vez no fim do bloco, depois de UMA regeneração:
+
+    - pares simétricos (a, b) / (b, a) viram um único pedido;
+    - "já estão unidos?" é respondido por um grafo de uniões em memória
+      (um GetJoinedElements por elemento, não um AreElementsJoined por par);
+    - a ordem de corte só é consultada/trocada quando foi pedida.
+
+O grafo fica na sessão e descarta os elementos alterados (hook doc-changed).
+Uniões feitas por flush() são provisórias até o chamador confirmar o commit
+(graph.confirm()); um RollBack não dispara o doc-changed, então o chamador
+descarta as provisórias (graph.discard()). Provisórias não confirmadas são
+descartadas sozinhas na primeira consulta feita fora de uma Transaction.
+"""
+from Autodesk.Revit.DB import JoinGeometryUtils
+from manalib import session, profiling
+
+STORE_NAME = "join_graph"
+
+
+def _id(element):
+    return element.Id.IntegerValue
+
+
+def _valid(element):
+    try:
+        return element is not None and element.IsValidObject
+    except Exception:
+        return False
+
+
+class JoinGraph(object):
+    """
+    Quem está unido com quem, para UM documento.
+    Use get_graph(doc) para obter a instância compartilhada da sessão.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._revision = session.get_revision(doc)
+        self._joined = {}
+        # IDs cujas entradas dependem de uma Transaction ainda não gravada
+        self._provisional = set()
+        self.reads = 0
+
+    def _sync(self):
+        if self._provisional and not self._modifiable():
+            # Transaction encerrada sem confirm(): não dá para saber se gravou
+            self.discard()
+        current = session.get_revision(self.doc)
+        if current == self._revision: return
+        changes = session.changes_since(self.doc, self._revision)
+        self._revision = current
+        if changes is None:
+            self._joined.clear()
+            return
+        # Uma união altera os dois elementos: basta descartar os alterados
+        for eid in changes[0]:
+            self._joined.pop(eid, None)
+
+    def _modifiable(self):
+        try:
+            return self.doc.IsModifiable
+        except Exception:
+            return False
+
+    def clear(self):
+        self._joined.clear()
+        self._provisional.clear()
+
+    def confirm(self):
+        """A Transaction com as uniões registradas foi gravada (Committed)."""
+        self._provisional.clear()
+
+    def discard(self):
+        """A Transaction foi desfeita: esquece as entradas provisórias."""
+        for eid in self._provisional:
+            self._joined.pop(eid, None)
+        self._provisional.clear()
+
+    def joined_ids(self, element):
+        """IDs (int) dos elementos unidos a este (lido uma vez)."""
+        key = _id(element)
+        ids = self._joined.get(key)
+        if ids is None:
+            self.reads += 1
+            try:
+                ids = set(e.IntegerValue for e in JoinGeometryUtils.GetJoinedElements(self.doc, element))
+            except Exception:
+                ids = set()
+            self._joined[key] = ids
+        return ids
+
+    def are_joined(self, a, b):
+        self._sync()
+        return _id(b) in self.joined_ids(a)
+
+    def record(self, a, b):
+        """Registra uma união feita agora (sem reler a API), provisória até confirm()."""
+        self.joined_ids(a).add(_id(b))
+        self.joined_ids(b).add(_id(a))
+        self._provisional.add(_id(a))
+        self._provisional.add(_id(b))
+
+
+def get_graph(doc):
+    """Retorna o grafo de uniões da sessão para o documento."""
+    store = session.get_store(STORE_NAME)
+    key = session.document_key(doc)
+    graph = store.get(key)
+    if graph is None:
+        graph = JoinGraph(doc)
+        store[key] = graph
+    return graph
+
+
+class JoinReport(object):
+    """Contagem das uniões de uma ou mais execuções da fila."""
+
+    def __init__(self):
+        self.requested = 0
+        self.duplicates = 0
+        self.joined = 0
+        self.already = 0
+        self.switched = 0
+        self.invalid = 0
+        self.failed = 0
+
+    def summary(self):
+        return "{} uniões | {} já existiam | {} ordens trocadas | {} recusadas | {} duplicadas".format(
+            self.joined, self.already, self.switched, self.failed, self.duplicates)
+
+
+class JoinQueue(object):
+    """
+    Fila de pedidos de união.
+
+    Args:
+        doc: Documento do Revit.
+        report (JoinReport): Relatório compartilhado; None cria um novo.
+    """
+
+    def __init__(self, doc, report=None):
+        self.doc = doc
+        self.graph = get_graph(doc)
+        self.report = report if report is not None else JoinReport()
+        # (menor id, maior id) -> [a, b, a_corta_b]
+        self._pending = {}
+        self._order = []
+
+    def __len__(self):
+        return len(self._order)
+
+    def add(self, a, b, a_cuts=None):
+        """
+        Pede a união de a com b.
+
+        Args:
+            a_cuts (bool): None mantém a ordem padrão do Revit; True garante que
+                           'a' corta 'b'; False garante que 'b' corta 'a'.
+                           Pedidos repetidos: vale a última ordem informada.
+        """
+        if a is None or b is None: return
+        ia, ib = _id(a), _id(b)
+        if ia == ib: return
+        self.report.requested += 1
+
+        key = (ia, ib) if ia < ib else (ib, ia)
+        entry = self._pending.get(key)
+        if entry is not None:
+            self.report.duplicates += 1
+            if a_cuts is not None:
+                entry[:] = [a, b, a_cuts]
+            return
+        self._pending[key] = [a, b, a_cuts]
+        self._order.append(key)
+
+    def mark(self):
+        """Posição atual da fila (para descartar pedidos de um item desfeito)."""
+        return len(self._order)
+
+    def truncate(self, mark):
+        """Descarta os pedidos feitos depois de mark()."""
+        for key in self._order[mark:]:
+            self._pending.pop(key, None)
+        del self._order[mark:]
+
+    def flush(self, progress=None, cancelled=None):
+        """
+        Regenera uma vez e executa todos os pedidos. Deve rodar dentro da Transaction;
+        depois do commit chame graph.confirm() (ou graph.discard() se foi desfeita).
+
+        Args:
+            progress (func): Opcional, chamado como progress(i, total).
+            cancelled (func): Opcional, retorna True para interromper.
+
+        Returns:
+            JoinReport
+        """
+        if not self._order: return self.report
+        order, pending = self._order, self._pending
+        self._order, self._pending = [], {}
+
+        with profiling.span("Regenerate"):
+            self.doc.Regenerate()
+        graph = self.graph
+        total = len(order)
+        for i, key in enumerate(order):
+            if cancelled and cancelled(): break
+            if progress: progress(i, total)
+            a, b, a_cuts = pending[key]
+            if not (_valid(a) and _valid(b)):
+                self.report.invalid += 1
+                continue
+
+            if graph.are_joined(a, b):
+                self.report.already += 1
+            else:
+                try:
+                    with profiling.span("JoinGeometry"):
+                        JoinGeometryUtils.JoinGeometry(self.doc, a, b)
+                except Exception:
+                    self.report.failed += 1
+                    continue
+                graph.record(a, b)
+                self.report.joined += 1
+
+            if a_cuts is not None:
+                try:
+                    if JoinGeometryUtils.IsCuttingElementInJoin(self.doc, a, b) != a_cuts:
+                        JoinGeometryUtils.SwitchJoinOrder(self.doc, a, b)
+                        self.report.switched += 1
+                except Exception as e:
+                    profiling.failure("SwitchJoinOrder", e)
+        return self.report
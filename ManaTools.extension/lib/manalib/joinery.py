@@ -2,6 +2,7 @@
 """Lógica de manipulação de Esquadrias (Portas e Janelas)."""
 import re
 from Autodesk.Revit.DB import BuiltInParameter
+from manalib import param_resolver
 
 
 def sanitize_name(text):
@@ -25,24 +26,10 @@ def get_dimensions(element_type):
     """
     Busca Largura e Altura em cm.
     Inclui suporte a FURNITURE_WIDTH (identificado no seu Inspector).
+    Cadeias em param_resolver.TYPE_WIDTH / TYPE_HEIGHT (BuiltIns, depois nomes).
     """
-    # 1. Parâmetros BuiltIn
-    w = element_type.get_Parameter(BuiltInParameter.FAMILY_WIDTH_PARAM)
-    h = element_type.get_Parameter(BuiltInParameter.FAMILY_HEIGHT_PARAM)
-    
-    # Fallbacks (Janelas / Mobiliário)
-    if not w: w = element_type.get_Parameter(BuiltInParameter.WINDOW_WIDTH)
-    if not h: h = element_type.get_Parameter(BuiltInParameter.WINDOW_HEIGHT)
-    if not w: w = element_type.get_Parameter(BuiltInParameter.FURNITURE_WIDTH)  # <--- O segredo da sua porta
-    
-    # 2. Busca por Nome
-    if not w: w = element_type.LookupParameter("Largura") or element_type.LookupParameter("Width")
-    if not h: h = element_type.LookupParameter("Altura") or element_type.LookupParameter("Height")
-
-    val_w = to_cm(w.AsDouble()) if w and w.HasValue else 0
-    val_h = to_cm(h.AsDouble()) if h and h.HasValue else 0
-    
-    return val_w, val_h
+    return (to_cm(param_resolver.read(element_type, param_resolver.TYPE_WIDTH)),
+            to_cm(param_resolver.read(element_type, param_resolver.TYPE_HEIGHT)))
 
 
 def generate_new_name(element_type):
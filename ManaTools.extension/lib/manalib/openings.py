@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de vãos (portas/janelas) por parede hospedeira.
+
+Para cada parede guarda os vãos ordenados pela posição ao longo do eixo,
+incluindo os das paredes cebola (unidas e paralelas). Cada parede e cada
+inserto são lidos da API uma única vez; recortes por segmento viram uma
+consulta por intervalo.
+"""
+from bisect import bisect_left, bisect_right
+from Autodesk.Revit.DB import (BuiltInCategory, BuiltInParameter, JoinGeometryUtils,
+                               LocationCurve, Line, Wall)
+from manalib import geometry2d, param_resolver, api_audit
+
+DOOR = "door"
+WINDOW = "window"
+
+# Tolerância do produto vetorial para considerar duas paredes paralelas
+PARALLEL_TOLERANCE = 0.1
+
+
+def get_opening_width(element):
+    """Largura do vão: instância, depois tipo; BuiltIns e nomes localizados (cache por tipo)."""
+    return param_resolver.read(element, param_resolver.OPENING_WIDTH)
+
+
+def get_wall_axis(wall):
+    """
+    Eixo 2D da parede: (origem, direção unitária, é_reta).
+    Para arcos usa a corda. Retorna None se a parede não tem LocationCurve.
+    """
+    lc = wall.Location
+    if not isinstance(lc, LocationCurve): return None
+    curve = lc.Curve
+    p0 = curve.GetEndPoint(0)
+    p1 = curve.GetEndPoint(1)
+    try:
+        direction = geometry2d.normalize((p1.X - p0.X, p1.Y - p0.Y))
+    except ValueError:
+        return None
+    return (p0.X, p0.Y), direction, isinstance(curve, Line)
+
+
+class Opening(object):
+    """Vão já lido da API (dados puros)."""
+    __slots__ = ("id", "kind", "x", "y", "width", "sill")
+
+    def __init__(self, id, kind, x, y, width, sill):
+        self.id = id
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.width = width
+        self.sill = sill
+
+
+class OpeningIndex(object):
+    """
+    Vãos por parede, construído sob demanda e reaproveitado durante o comando.
+
+    Args:
+        doc: Documento do Revit
+        width_getter (func): element -> largura (pés). Padrão: get_opening_width.
+    """
+
+    def __init__(self, doc, width_getter=None):
+        self.doc = doc
+        self.width_getter = width_getter or get_opening_width
+        self._openings = {}
+        self._walls = {}
+        self._door_cat = int(BuiltInCategory.OST_Doors)
+        self._window_cat = int(BuiltInCategory.OST_Windows)
+
+    def _opening(self, ins_id):
+        key = ins_id.IntegerValue
+        if key in self._openings: return self._openings[key]
+
+        record = None
+        elem = api_audit.counted(self.doc).GetElement(ins_id)
+        if elem and elem.Category:
+            cat_id = elem.Category.Id.IntegerValue
+            kind = DOOR if cat_id == self._door_cat else WINDOW if cat_id == self._window_cat else None
+            if kind:
+                sill = None
+                sill_p = elem.get_Parameter(BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM)
+                if sill_p and sill_p.HasValue: sill = sill_p.AsDouble()
+                pt = elem.Location.Point
+                record = Opening(key, kind, pt.X, pt.Y, self.width_getter(elem), sill)
+
+        self._openings[key] = record
+        return record
+
+    def _collect_insert_ids(self, wall, direction):
+        """Inserts da parede + das paredes cebola (unidas e paralelas)."""
+        ids = list(wall.FindInserts(True, False, False, False))
+        seen = set(i.IntegerValue for i in ids)
+        try:
+            for j_id in JoinGeometryUtils.GetJoinedElements(self.doc, wall):
+                j_wall = api_audit.counted(self.doc).GetElement(j_id)
+                if not isinstance(j_wall, Wall): continue
+                j_axis = get_wall_axis(j_wall)
+                # Parede perpendicular (canto) não contribui; só paralelas (cebola)
+                if not j_axis or not j_axis[2]: continue
+                if abs(geometry2d.cross(direction, j_axis[1])) >= PARALLEL_TOLERANCE: continue
+                for ji in j_wall.FindInserts(True, False, False, False):
+                    if ji.IntegerValue not in seen:
+                        seen.add(ji.IntegerValue)
+                        ids.append(ji)
+        except: pass
+        return ids
+
+    def _entry(self, wall):
+        key = wall.Id.IntegerValue
+        entry = self._walls.get(key)
+        if entry is not None: return entry
+
+        axis = get_wall_axis(wall)
+        if not axis:
+            entry = {"axis": None, "along": [], "openings": [], "max_half": 0.0}
+        else:
+            origin, direction, _ = axis
+            rows = []
+            for ins_id in self._collect_insert_ids(wall, direction):
+                op = self._opening(ins_id)
+                if op is None: continue
+                rows.append((geometry2d.dot((op.x - origin[0], op.y - origin[1]), direction), op))
+            rows.sort(key=lambda r: r[0])
+            entry = {
+                "axis": axis,
+                "along": [r[0] for r in rows],
+                "openings": [r[1] for r in rows],
+                "max_half": max([r[1].width for r in rows] or [0.0]) / 2.0,
+            }
+        self._walls[key] = entry
+        return entry
+
+    def wall_openings(self, wall):
+        """Todos os vãos da parede, ordenados ao longo do eixo."""
+        return list(self._entry(wall)["openings"])
+
+    def query(self, wall, p_start, p_end, margin=0.0, predicate=None):
+        """
+        Vãos da parede cujo intervalo alcança o trecho [p_start, p_end].
+
+        Args:
+            wall: Parede hospedeira.
+            p_start / p_end (tuple): Extremidades (x, y[, z]) do trecho.
+            margin (float): Folga extra ao longo do eixo (pés).
+            predicate (func): Filtro opcional Opening -> bool.
+
+        Returns:
+            list: [(x, y, largura), ...] no formato de geometry2d.segment_minus_openings.
+        """
+        entry = self._entry(wall)
+        if not entry["openings"]: return []
+
+        origin, direction, _ = entry["axis"]
+        a0 = geometry2d.dot((p_start[0] - origin[0], p_start[1] - origin[1]), direction)
+        a1 = geometry2d.dot((p_end[0] - origin[0], p_end[1] - origin[1]), direction)
+        reach = entry["max_half"] + margin
+
+        lo = bisect_left(entry["along"], min(a0, a1) - reach)
+        hi = bisect_right(entry["along"], max(a0, a1) + reach)
+
+        found = []
+        for op in entry["openings"][lo:hi]:
+            if predicate and not predicate(op): continue
+            found.append((op.x, op.y, op.width))
+        return found
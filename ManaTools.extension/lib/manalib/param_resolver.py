@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura de dimensões (largura/altura) com cache por Tipo (FamilySymbol).
+
+Cada cadeia de busca (Probe) lista onde procurar: instância ou tipo,
+BuiltInParameter ou nome localizado. Na primeira leitura de um tipo a cadeia
+inteira é percorrida e o passo vencedor é memorizado; as demais instâncias
+do mesmo tipo fazem uma leitura direta. Se o passo vencedor está no tipo,
+o próprio valor fica no cache. Só o que é do tipo fica no cache: os passos
+de instância anteriores ao vencedor (ou todos, se nenhum passo do tipo
+responde) continuam sendo lidos em cada elemento, pois variam por instância.
+
+O cache vive na sessão e descarta os tipos alterados (hook doc-changed).
+"""
+from Autodesk.Revit.DB import BuiltInParameter, ElementType
+from manalib import session, api_audit, replay
+
+STORE_NAME = "param_resolver"
+
+INSTANCE = "instance"
+TYPE = "type"
+
+_NOT_FOUND = -1
+
+
+def _bip(source, bip):
+    return (source, "bip", bip)
+
+
+def _name(source, name):
+    return (source, "name", name)
+
+
+def _both(*keys):
+    """Passos instância -> tipo para cada chave, nesta ordem."""
+    steps = []
+    for key in keys:
+        make = _name if isinstance(key, str) else _bip
+        steps.extend([make(INSTANCE, key), make(TYPE, key)])
+    return steps
+
+
+class Probe(object):
+    """
+    Cadeia de busca de um valor numérico.
+
+    Args:
+        name (str): Identificador (chave do cache).
+        steps (list): Passos (origem, "bip"|"name", chave), em ordem de prioridade.
+        default: Valor quando nenhum passo responde.
+        positive (bool): Ignora valores <= 0 (segue para o próximo passo).
+    """
+
+    def __init__(self, name, steps, default=None, positive=False):
+        self.name = name
+        self.steps = steps
+        self.default = default
+        self.positive = positive
+
+
+# --- Cadeias usadas pelos comandos ---
+
+# Vãos em geral (CriarRodape / índice de vãos)
+OPENING_WIDTH = Probe("opening_width", _both(
+    BuiltInParameter.DOOR_WIDTH, BuiltInParameter.WINDOW_WIDTH, BuiltInParameter.FAMILY_WIDTH_PARAM,
+    "Width", "Largura", "Largura Aproximada", "Vão Luz", "Rough Width"), default=0.9)
+
+# Portas (CriarSoleira): toda a instância primeiro, depois o tipo; só valores > 0
+_DOOR_BIPS = [BuiltInParameter.FURNITURE_WIDTH, BuiltInParameter.DOOR_WIDTH,
+              BuiltInParameter.FAMILY_WIDTH_PARAM]
+DOOR_WIDTH = Probe("door_width",
+                   [_bip(INSTANCE, b) for b in _DOOR_BIPS] + [_bip(TYPE, b) for b in _DOOR_BIPS],
+                   default=0.8, positive=True)
+
+# Janelas (CriarPingadeira)
+WINDOW_WIDTH = Probe("window_width", _both(
+    BuiltInParameter.WINDOW_WIDTH, BuiltInParameter.FAMILY_WIDTH_PARAM,
+    BuiltInParameter.FURNITURE_WIDTH), default=1.0)
+
+# Ponte de porta (CriarPiso)
+BRIDGE_DOOR_WIDTH = Probe("bridge_door_width", _both(BuiltInParameter.DOOR_WIDTH), default=0.8)
+
+# Tipos de esquadria (Renomear por dimensões)
+TYPE_WIDTH = Probe("type_width", [
+    _bip(TYPE, BuiltInParameter.FAMILY_WIDTH_PARAM), _bip(TYPE, BuiltInParameter.WINDOW_WIDTH),
+    _bip(TYPE, BuiltInParameter.FURNITURE_WIDTH), _name(TYPE, "Largura"), _name(TYPE, "Width")])
+TYPE_HEIGHT = Probe("type_height", [
+    _bip(TYPE, BuiltInParameter.FAMILY_HEIGHT_PARAM), _bip(TYPE, BuiltInParameter.WINDOW_HEIGHT),
+    _name(TYPE, "Altura"), _name(TYPE, "Height")])
+
+
+class ParameterResolver(object):
+    """
+    Resolve Probes com cache por tipo para UM documento.
+    Use get_resolver(doc) para obter a instância compartilhada da sessão.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._revision = session.get_revision(doc)
+        # (probe, type_id) -> [índice do passo (ou _NOT_FOUND), valor do tipo ou None]
+        self._learned = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _sync(self):
+        current = session.get_revision(self.doc)
+        if current == self._revision: return
+        changes = session.changes_since(self.doc, self._revision)
+        self._revision = current
+        if changes is None:
+            self._learned.clear()
+            return
+        changed_ids = changes[0]
+        for key in list(self._learned.keys()):
+            if key[1] in changed_ids:
+                del self._learned[key]
+
+    def clear(self):
+        self._learned.clear()
+
+    def _type_of(self, element):
+        if isinstance(element, ElementType): return element
+        try:
+            return api_audit.counted(self.doc).GetElement(element.GetTypeId())
+        except:
+            return None
+
+    def _read_step(self, element, elem_type, step, probe):
+        source, kind, key = step
+        target = element if source == INSTANCE else elem_type
+        if target is None: return None
+        if source == INSTANCE and isinstance(target, ElementType): return None
+        try:
+            p = target.get_Parameter(key) if kind == "bip" else target.LookupParameter(key)
+        except:
+            return None
+        if not p or not p.HasValue: return None
+        value = p.AsDouble()
+        if probe.positive and value <= 0: return None
+        replay.note_param(target, step, value)
+        return value
+
+    def read(self, element, probe):
+        """Valor da cadeia para o elemento (ou probe.default)."""
+        self._sync()
+        elem_type = self._type_of(element)
+        type_id = elem_type.Id.IntegerValue if elem_type else None
+        key = (probe.name, type_id)
+
+        learned = self._learned.get(key) if type_id is not None else None
+        if learned is not None:
+            step_idx, type_value = learned
+            # Passos de instância com prioridade maior que o aprendido
+            stop = len(probe.steps) if step_idx == _NOT_FOUND else step_idx
+            for step in probe.steps[:stop]:
+                if step[0] != INSTANCE: continue
+                value = self._read_step(element, elem_type, step, probe)
+                if value is not None:
+                    self.hits += 1
+                    return value
+            if step_idx == _NOT_FOUND:
+                self.hits += 1
+                return probe.default
+            if type_value is not None:
+                self.hits += 1
+                replay.note_param(elem_type, probe.steps[step_idx], type_value)
+                return type_value
+            value = self._read_step(element, elem_type, probe.steps[step_idx], probe)
+            if value is not None:
+                self.hits += 1
+                return value
+            # Esta instância não tem o valor no passo aprendido: busca completa
+
+        self.misses += 1
+        for idx, step in enumerate(probe.steps):
+            value = self._read_step(element, elem_type, step, probe)
+            if value is None: continue
+            if type_id is not None:
+                self._learned[key] = [idx, value if step[0] == TYPE else None]
+            return value
+
+        # Nenhum passo do tipo responde; os de instância são relidos por elemento
+        if type_id is not None:
+            self._learned[key] = [_NOT_FOUND, None]
+        return probe.default
+
+
+def get_resolver(doc):
+    """Retorna o resolvedor de parâmetros da sessão para o documento."""
+    store = session.get_store(STORE_NAME)
+    key = session.document_key(doc)
+    resolver = store.get(key)
+    if resolver is None:
+        resolver = ParameterResolver(doc)
+        store[key] = resolver
+    return resolver
+
+
+def read(element, probe, doc=None):
+    """Atalho: get_resolver(doc ou element.Document).read(element, probe)."""
+    return get_resolver(doc or element.Document).read(element, probe)
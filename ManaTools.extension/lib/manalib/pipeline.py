@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline em três estágios para os comandos de modelagem:
+
+    1. snapshot  (thread da API)  -> lê o Revit e devolve dados Python puros
+    2. compute   (pool de threads) -> matemática pura, sem tocar na API
+    3. commit    (thread da API)  -> cria os elementos no documento
+
+O IronPython não tem GIL, então o estágio 2 usa todos os núcleos.
+Os estágios são funções simples, o que permite rodar o 'compute' fora do Revit.
+"""
+import sys
+import threading
+import traceback
+
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
+
+from manalib import profiling
+
+
+def default_workers():
+    """Número de núcleos lógicos disponíveis."""
+    try:
+        import System
+        return max(1, System.Environment.ProcessorCount)
+    except ImportError:
+        pass
+    try:
+        import multiprocessing
+        return max(1, multiprocessing.cpu_count())
+    except (ImportError, NotImplementedError):
+        return 1
+
+
+class Failure(object):
+    """Resultado de um item que lançou exceção em algum estágio."""
+    __slots__ = ("stage", "error", "details")
+
+    def __init__(self, stage, error, details=""):
+        self.stage = stage
+        self.error = error
+        self.details = details
+
+    def __repr__(self):
+        return "<Failure {}: {}>".format(self.stage, self.error)
+
+
+def _capture(stage):
+    exc = sys.exc_info()[1]
+    return Failure(stage, exc, traceback.format_exc())
+
+
+def parallel_map(func, items, workers=None):
+    """
+    Aplica func a cada item usando um pool de threads. Mantém a ordem.
+    Exceções não interrompem o lote: o item recebe um Failure('compute').
+
+    Args:
+        func: Função pura (não pode chamar a API do Revit).
+        items (list): Entradas.
+        workers (int): Threads. None = núcleos da máquina; 1 = sem threads.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    if not items: return results
+
+    if workers is None: workers = default_workers()
+    workers = max(1, min(workers, len(items)))
+
+    if workers == 1:
+        for i, item in enumerate(items):
+            try:
+                results[i] = func(item)
+            except Exception:
+                results[i] = _capture("compute")
+        return results
+
+    jobs = Queue()
+    for i in range(len(items)):
+        jobs.put(i)
+
+    def worker():
+        while True:
+            try:
+                i = jobs.get_nowait()
+            except Empty:
+                return
+            try:
+                results[i] = func(items[i])
+            except Exception:
+                results[i] = _capture("compute")
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class PipelineReport(object):
+    """Resumo de uma execução do pipeline."""
+
+    def __init__(self):
+        self.total = 0
+        self.committed = 0
+        self.skipped = 0
+        self.results = []
+        self.failures = []
+
+    def add_failure(self, item, failure):
+        self.failures.append((item, failure))
+
+    def raise_first_failure(self):
+        """Relança o primeiro erro (comandos 'tudo ou nada' fazem RollBack)."""
+        if self.failures:
+            raise self.failures[0][1].error
+
+    def summary(self):
+        return "{} itens | {} gravados | {} ignorados | {} falhas".format(
+            self.total, self.committed, self.skipped, len(self.failures))
+
+
+def run(items, snapshot, compute, commit, workers=None, progress=None):
+    """
+    Executa snapshot -> compute -> commit sobre uma lista de itens.
+
+    Args:
+        items (list): Elementos de entrada (ex: Ambientes).
+        snapshot (func): item -> dados puros. Retornar None ignora o item.
+        compute (func): dados puros -> resultado puro. Roda em paralelo.
+        commit (func): (item, resultado) -> valor. Roda na thread da API.
+        workers (int): Threads do estágio de cálculo (None = todos os núcleos).
+        progress (func): Opcional, chamado como progress(i, total) no commit.
+
+    Returns:
+        PipelineReport: results contém o retorno de commit, na ordem dos itens.
+    """
+    report = PipelineReport()
+    items = list(items)
+    report.total = len(items)
+
+    # 1. Snapshot (API)
+    staged = []
+    for item in items:
+        try:
+            with profiling.span("snapshot"):
+                data = snapshot(item)
+        except Exception:
+            report.add_failure(item, _capture("snapshot"))
+            continue
+        if data is None:
+            report.skipped += 1
+            continue
+        staged.append((item, data))
+
+    # 2. Compute (Paralelo)
+    computed = parallel_map(profiling.traced("compute")(compute), [data for _, data in staged], workers)
+
+    # 3. Commit (API)
+    total = len(staged)
+    for i, ((item, _), result) in enumerate(zip(staged, computed)):
+        if progress: progress(i, total)
+        if isinstance(result, Failure):
+            report.add_failure(item, result)
+            continue
+        try:
+            with profiling.span("commit"):
+                report.results.append(commit(item, result))
+            report.committed += 1
+        except Exception:
+            report.add_failure(item, _capture("commit"))
+
+    return report
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+União de polígonos 2D em Python puro (coordenadas inteiras).
+
+Os pontos são "encaixados" numa grade de SNAP pés e convertidos para inteiros,
+o que torna exatos os testes de orientação e de coincidência de arestas.
+
+Algoritmo (recorte + classificação + costura):
+    1. Arestas de todas as regiões são divididas nos cruzamentos/sobreposições
+       (pares candidatos via spatial_index).
+    2. Cada sub-aresta sobrevive se o lado de fora dela não pertence a
+       nenhuma outra região (teste de ponto no ponto médio).
+    3. As sobreviventes são costuradas em loops (virada mais à esquerda).
+
+Região = lista de loops [(x, y), ...]: o maior loop é o contorno, os demais são furos.
+Nada aqui importa a API do Revit.
+"""
+import math
+from manalib import spatial_index
+
+# Grade de encaixe (pés). 1/256 pé ~ 1,2 mm
+SNAP = 1.0 / 256.0
+
+# Loops resultantes menores que isso (pés²) são descartados
+MIN_AREA = 0.01
+
+
+# --- Conversão ---
+def snap_loop(points, snap=SNAP):
+    """Converte pontos (x, y[, z]) em inteiros na grade, sem repetições consecutivas."""
+    loop = []
+    for p in points:
+        q = (int(round(p[0] / snap)), int(round(p[1] / snap)))
+        if not loop or loop[-1] != q:
+            loop.append(q)
+    while len(loop) > 1 and loop[0] == loop[-1]:
+        loop.pop()
+    return loop
+
+
+def signed_area2(loop):
+    """Dobro da área com sinal (positivo = anti-horário)."""
+    total = 0
+    n = len(loop)
+    for i in range(n):
+        x0, y0 = loop[i]
+        x1, y1 = loop[(i + 1) % n]
+        total += x0 * y1 - x1 * y0
+    return total
+
+
+def _simplify(loop):
+    """Remove vértices colineares e espinhos de largura zero."""
+    changed = True
+    while changed and len(loop) >= 3:
+        changed = False
+        out = []
+        n = len(loop)
+        for i in range(n):
+            a = out[-1] if out else loop[i - 1]
+            b = loop[i]
+            c = loop[(i + 1) % n]
+            if (b[0] - a[0]) * (c[1] - b[1]) - (b[1] - a[1]) * (c[0] - b[0]) == 0:
+                changed = True
+                continue
+            out.append(b)
+        loop = out
+    return loop if len(loop) >= 3 else []
+
+
+def snap_region(loops, snap=SNAP):
+    """
+    Prepara uma região: encaixa na grade e orienta o contorno (maior loop)
+    no sentido anti-horário e os furos no horário.
+
+    Returns:
+        list: Loops inteiros (vazia se a região degenerou).
+    """
+    snapped = []
+    for pts in loops:
+        loop = _simplify(snap_loop(pts, snap))
+        if loop: snapped.append(loop)
+    if not snapped: return []
+
+    areas = [signed_area2(l) for l in snapped]
+    outer = max(range(len(snapped)), key=lambda i: abs(areas[i]))
+    region = []
+    for i, loop in enumerate(snapped):
+        want_ccw = (i == outer)
+        if (areas[i] > 0) != want_ccw:
+            loop = loop[::-1]
+        region.append(loop)
+    return region
+
+
+# --- Predicados exatos ---
+def _orient(a, b, c):
+    v = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (v > 0) - (v < 0)
+
+
+def _on_segment(a, b, p):
+    """p (colinear) está dentro da caixa de a-b."""
+    return (min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and
+            min(a[1], b[1]) <= p[1] <= max(a[1], b[1]))
+
+
+OUTSIDE = 0
+INSIDE = 1
+BOUNDARY = 2
+
+
+def _locate_doubled(p2, loops):
+    """
+    Posição de um ponto com coordenadas DOBRADAS (permite pontos médios exatos)
+    em relação a uma região (paridade sobre todos os loops).
+    """
+    px, py = p2
+    inside = False
+    for loop in loops:
+        n = len(loop)
+        for i in range(n):
+            ax, ay = loop[i - 1]
+            bx, by = loop[i]
+            ax, ay, bx, by = ax * 2, ay * 2, bx * 2, by * 2
+            cr = (bx - ax) * (py - ay) - (px - ax) * (by - ay)
+            if cr == 0 and min(ax, bx) <= px <= max(ax, bx) and min(ay, by) <= py <= max(ay, by):
+                return BOUNDARY
+            if ay <= py < by and cr > 0:
+                inside = not inside
+            elif by <= py < ay and cr < 0:
+                inside = not inside
+    return INSIDE if inside else OUTSIDE
+
+
+def locate(point, loops):
+    """Posição de um ponto inteiro em relação a uma região: OUTSIDE, INSIDE ou BOUNDARY."""
+    return _locate_doubled((point[0] * 2, point[1] * 2), loops)
+
+
+def _loop_box(loop):
+    xs = [p[0] for p in loop]
+    ys = [p[1] for p in loop]
+    return (min(xs), min(ys), 0, max(xs), max(ys), 0)
+
+
+# --- Recorte das arestas ---
+def _split_points(edges):
+    """Pontos de corte de cada aresta (cruzamentos, toques em T e sobreposições)."""
+    items = [(i, (min(a[0], b[0]), min(a[1], b[1]), 0, max(a[0], b[0]), max(a[1], b[1]), 0))
+             for i, (a, b, _) in enumerate(edges)]
+    splits = {}
+
+    def add(i, p):
+        a, b = edges[i][0], edges[i][1]
+        if p != a and p != b:
+            splits.setdefault(i, set()).add(p)
+
+    for i, j in spatial_index.self_candidate_pairs(items):
+        a, b = edges[i][0], edges[i][1]
+        c, d = edges[j][0], edges[j][1]
+        o1 = _orient(c, d, a)
+        o2 = _orient(c, d, b)
+        o3 = _orient(a, b, c)
+        o4 = _orient(a, b, d)
+
+        if o1 == 0 and o2 == 0:
+            # Colineares: cada extremidade interna à outra aresta vira corte
+            for p, k in ((c, i), (d, i), (a, j), (b, j)):
+                seg = edges[k]
+                if _on_segment(seg[0], seg[1], p):
+                    add(k, p)
+            continue
+
+        if o1 * o2 > 0 or o3 * o4 > 0:
+            continue
+
+        if o1 == 0:
+            add(j, a)
+        elif o2 == 0:
+            add(j, b)
+        elif o3 == 0:
+            add(i, c)
+        elif o4 == 0:
+            add(i, d)
+        else:
+            # Cruzamento próprio: ponto arredondado para a grade
+            d1 = float((d[0] - c[0]) * (a[1] - c[1]) - (d[1] - c[1]) * (a[0] - c[0]))
+            d2 = float((d[0] - c[0]) * (b[1] - c[1]) - (d[1] - c[1]) * (b[0] - c[0]))
+            t = d1 / (d1 - d2)
+            p = (int(round(a[0] + (b[0] - a[0]) * t)), int(round(a[1] + (b[1] - a[1]) * t)))
+            add(i, p)
+            add(j, p)
+    return splits
+
+
+def _sub_edges(edges, splits):
+    """Divide as arestas nos pontos de corte, ordenados ao longo de cada uma."""
+    result = []
+    for i, (a, b, region) in enumerate(edges):
+        pts = splits.get(i)
+        if not pts:
+            result.append((a, b, region))
+            continue
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        chain = [a] + sorted(pts, key=lambda p: (p[0] - a[0]) * dx + (p[1] - a[1]) * dy) + [b]
+        for k in range(len(chain) - 1):
+            if chain[k] != chain[k + 1]:
+                result.append((chain[k], chain[k + 1], region))
+    return result
+
+
+# --- Costura ---
+def _stitch(edges):
+    """Encadeia arestas dirigidas em loops, sempre virando o máximo à esquerda."""
+    outgoing = {}
+    for idx, (a, b) in enumerate(edges):
+        outgoing.setdefault(a, []).append(idx)
+
+    used = [False] * len(edges)
+    loops = []
+    for first in range(len(edges)):
+        if used[first]: continue
+        used[first] = True
+        start, current = edges[first]
+        loop = [start]
+        prev_dir = (current[0] - start[0], current[1] - start[1])
+        while current != start:
+            loop.append(current)
+            best = None
+            best_angle = None
+            for idx in outgoing.get(current, []):
+                if used[idx]: continue
+                nxt = edges[idx][1]
+                d = (nxt[0] - current[0], nxt[1] - current[1])
+                angle = math.atan2(prev_dir[0] * d[1] - prev_dir[1] * d[0],
+                                   prev_dir[0] * d[0] + prev_dir[1] * d[1])
+                if best is None or angle > best_angle:
+                    best, best_angle = idx, angle
+            if best is None:
+                loop = None  # Contorno aberto (entrada degenerada)
+                break
+            used[best] = True
+            nxt = edges[best][1]
+            prev_dir = (nxt[0] - current[0], nxt[1] - current[1])
+            current = nxt
+        if loop:
+            loops.append(loop)
+    return loops
+
+
+def _group_islands(loops):
+    """Associa cada furo (horário) ao menor contorno (anti-horário) que o contém."""
+    outers = []
+    holes = []
+    for loop in loops:
+        area = signed_area2(loop)
+        if area > 0: outers.append((area, loop))
+        else: holes.append(loop)
+    outers.sort(key=lambda x: x[0])
+
+    islands = [(loop, []) for _, loop in outers]
+    for hole in holes:
+        for k, (_, outer) in enumerate(outers):
+            status = BOUNDARY
+            # Pontos médios das arestas do furo: o primeiro não ambíguo decide
+            for i in range(len(hole)):
+                a, b = hole[i - 1], hole[i]
+                status = _locate_doubled((a[0] + b[0], a[1] + b[1]), [outer])
+                if status != BOUNDARY: break
+            if status == INSIDE:
+                islands[k][1].append(hole)
+                break
+    return islands
+
+
+# --- API pública ---
+def union_regions(regions, snap=SNAP, min_area=MIN_AREA):
+    """
+    União de regiões já preparadas por snap_region (coordenadas inteiras).
+
+    Returns:
+        list: Ilhas [(contorno, [furos]), ...] em coordenadas inteiras.
+              Contorno anti-horário, furos horários.
+    """
+    regions = [r for r in regions if r]
+    if not regions: return []
+
+    edges = []
+    for r_idx, region in enumerate(regions):
+        for loop in region:
+            n = len(loop)
+            for i in range(n):
+                edges.append((loop[i], loop[(i + 1) % n], r_idx))
+
+    if len(regions) > 1:
+        edges = _sub_edges(edges, _split_points(edges))
+
+    # Agrupa sub-arestas idênticas (sem direção)
+    groups = {}
+    order = []
+    for a, b, r_idx in edges:
+        key = (a, b) if a < b else (b, a)
+        entry = groups.get(key)
+        if entry is None:
+            entry = groups[key] = [set(), set()]
+            order.append(key)
+        entry[0 if key[0] == a else 1].add(r_idx)
+
+    region_grid = None
+    if len(regions) > 1:
+        region_grid = spatial_index.GridIndex(
+            spatial_index.estimate_cell_size(_loop_box(r[0]) for r in regions))
+        for r_idx, region in enumerate(regions):
+            region_grid.insert(r_idx, _loop_box(region[0]))
+
+    kept = []
+    for key in order:
+        forward, backward = groups[key]
+        if forward and backward:
+            continue  # Região dos dois lados: aresta interna
+        contributors = forward or backward
+        a, b = key if forward else (key[1], key[0])
+
+        if region_grid is not None:
+            mid2 = (a[0] + b[0], a[1] + b[1])
+            probe = (mid2[0] / 2.0, mid2[1] / 2.0, 0, mid2[0] / 2.0, mid2[1] / 2.0, 0)
+            covered = False
+            for r_idx in region_grid.query(probe):
+                if r_idx in contributors: continue
+                if _locate_doubled(mid2, regions[r_idx]) == INSIDE:
+                    covered = True
+                    break
+            if covered: continue
+        kept.append((a, b))
+
+    min_area2 = 2.0 * min_area / (snap * snap)
+    loops = []
+    for loop in _stitch(kept):
+        loop = _simplify(loop)
+        if loop and abs(signed_area2(loop)) >= min_area2:
+            loops.append(loop)
+    return _group_islands(loops)
+
+
+def group_overlapping(regions):
+    """
+    Agrupa regiões cujas caixas se tocam (componentes conexos).
+    Cada grupo pode ser unido independentemente (em paralelo).
+
+    Returns:
+        list: Listas de índices em 'regions'.
+    """
+    items = [(i, _loop_box(r[0])) for i, r in enumerate(regions) if r]
+    pairs = spatial_index.self_candidate_pairs(items)
+    return spatial_index.connected_components([i for i, _ in items], pairs)
+
+
+def to_float(islands, snap=SNAP):
+    """Converte ilhas inteiras de volta para pés: [(contorno, [furos])] de tuplas (x, y)."""
+    def conv(loop):
+        return [(x * snap, y * snap) for x, y in loop]
+    return [(conv(outer), [conv(h) for h in holes]) for outer, holes in islands]
+
+
+def union(polygons, snap=SNAP, min_area=MIN_AREA):
+    """
+    Atalho: une polígonos em pés e devolve as ilhas em pés.
+
+    Args:
+        polygons (list): Regiões; cada uma é uma lista de loops [(x, y), ...].
+    """
+    regions = [snap_region(p, snap) for p in polygons]
+    return to_float(union_regions(regions, snap, min_area), snap)
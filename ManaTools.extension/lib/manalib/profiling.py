@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Medição de tempo por etapa (spans) dos comandos da Maná Tools.
+
+    with profiling.run(CMD_ID):                 # um arquivo de trace por execução
+        with profiling.span("Wall.Create"):     # spans aninháveis
+            ...
+        profiling.failure("JoinGeometry")       # falhas engolidas por 'except: pass'
+
+Cada span conta chamadas, falhas (exceção dentro do span) e tempo total.
+No fim da execução:
+    - um JSON no formato Chrome Trace (abrir em chrome://tracing ou
+      ui.perfetto.dev) é gravado em %TEMP%/ManaTools/traces;
+    - a tabela-resumo vai para a janela de saída do pyRevit quando a execução
+      é lenta ou quando [manatools_profiling] show_summary = true.
+
+Sem uma execução ativa, span() e failure() não fazem nada (custo ~zero).
+Com [manatools_api_audit] enabled = true, a execução também conta as
+chamadas à API (ver api_audit); com [manatools_replay] record = true, grava
+as leituras para reprodução fora do Revit (ver replay).
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+
+from manalib import session, api_audit, replay
+
+STORE_NAME = "profiling"
+CONFIG_ID = "manatools_profiling"
+
+# Execuções mais longas que isso (s) mostram a tabela-resumo automaticamente
+SLOW_RUN_SECONDS = 10.0
+
+# Arquivos de trace mantidos por comando (os mais antigos são apagados)
+KEEP_TRACES = 20
+
+try:
+    from System.Diagnostics import Stopwatch
+
+    def _now_us():
+        return Stopwatch.GetTimestamp() * 1e6 / Stopwatch.Frequency
+except ImportError:
+    def _now_us():
+        return time.time() * 1e6
+
+
+class SpanStats(object):
+    """Totais de um nome de span."""
+    __slots__ = ("name", "calls", "failures", "total_us", "max_us")
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.failures = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+
+class Tracer(object):
+    """
+    Coleta os spans de UMA execução.
+
+    Args:
+        name (str): Nome da execução (ex: CMD_ID).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start_us = _now_us()
+        self.events = []
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, name):
+        st = self.stats.get(name)
+        if st is None:
+            st = SpanStats(name)
+            self.stats[name] = st
+        return st
+
+    def record(self, name, start_us, end_us, failed=False, args=None):
+        dur = end_us - start_us
+        event = {
+            "name": name, "cat": "manatools", "ph": "X",
+            "ts": start_us - self.start_us, "dur": dur,
+            "pid": 1, "tid": threading.current_thread().ident or 0,
+        }
+        if args or failed:
+            event["args"] = dict(args or {})
+            if failed: event["args"]["failed"] = True
+        with self._lock:
+            self.events.append(event)
+            st = self._stats(name)
+            st.calls += 1
+            st.total_us += dur
+            if dur > st.max_us: st.max_us = dur
+            if failed: st.failures += 1
+
+    def failure(self, name, error=None):
+        """Conta uma falha sem span (ex: exceção engolida)."""
+        now = _now_us()
+        self.record(name, now, now, failed=True, args={"error": str(error)} if error is not None else None)
+
+    def elapsed_seconds(self):
+        return (_now_us() - self.start_us) / 1e6
+
+    # --- Saída ---
+    def chrome_trace(self):
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms",
+                "otherData": {"run": self.name}}
+
+    def summary_rows(self):
+        """Linhas [nome, chamadas, falhas, total ms, média ms, máx ms], mais lentas primeiro."""
+        rows = []
+        for st in sorted(self.stats.values(), key=lambda s: -s.total_us):
+            avg = st.total_us / st.calls if st.calls else 0.0
+            rows.append([st.name, st.calls, st.failures,
+                         round(st.total_us / 1000.0, 1), round(avg / 1000.0, 2), round(st.max_us / 1000.0, 1)])
+        return rows
+
+
+class _Span(object):
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _now_us()
+        self.tracer.record(self.name, self.start, end, exc_type is not None, self.args)
+        return False
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def active():
+    """Tracer da execução em andamento, ou None."""
+    return session.get_store(STORE_NAME).get("active")
+
+
+def span(name, **args):
+    """Context manager que mede o bloco (no-op sem execução ativa)."""
+    tracer = active()
+    if tracer is None: return _NULL
+    return _Span(tracer, name, args or None)
+
+
+def failure(name, error=None):
+    """Conta uma falha engolida (no-op sem execução ativa)."""
+    tracer = active()
+    if tracer is not None: tracer.failure(name, error)
+
+
+def traced(name=None):
+    """Decorator: mede cada chamada da função como um span."""
+    def wrap(func):
+        span_name = name or func.__name__
+
+        def inner(*a, **kw):
+            tracer = active()
+            if tracer is None: return func(*a, **kw)
+            with _Span(tracer, span_name, None):
+                return func(*a, **kw)
+        inner.__name__ = func.__name__
+        inner.__doc__ = func.__doc__
+        return inner
+    return wrap
+
+
+def trace_dir():
+    folder = os.path.join(tempfile.gettempdir(), "ManaTools", "traces")
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    return folder
+
+
+def _safe_name(text):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in text)
+
+
+def write_trace(tracer, folder=None):
+    """Grava o JSON (Chrome Trace) e apaga os mais antigos do comando. Retorna o caminho."""
+    folder = folder or trace_dir()
+    prefix = _safe_name(tracer.name) + "_"
+    path = os.path.join(folder, "{}{}.json".format(prefix, time.strftime("%Y%m%d-%H%M%S")))
+    with open(path, "w") as f:
+        json.dump(tracer.chrome_trace(), f)
+
+    old = sorted(n for n in os.listdir(folder) if n.startswith(prefix) and n.endswith(".json"))
+    for n in old[:-KEEP_TRACES]:
+        try: os.remove(os.path.join(folder, n))
+        except OSError: pass
+    return path
+
+
+def print_summary(tracer, path=None):
+    """Tabela-resumo na janela de saída do pyRevit."""
+    from pyrevit import script
+    output = script.get_output()
+    output.print_table(
+        table_data=tracer.summary_rows(),
+        columns=["Etapa", "Chamadas", "Falhas", "Total (ms)", "Média (ms)", "Máx (ms)"],
+        title="{} - {:.1f} s".format(tracer.name, tracer.elapsed_seconds()))
+    if path: print("Trace: {}".format(path))
+
+
+def _show_summary_configured():
+    try:
+        from pyrevit import script
+        return bool(getattr(script.get_config(CONFIG_ID), "show_summary", False))
+    except Exception:
+        return False
+
+
+class run(object):
+    """
+    Execução medida de um comando (context manager).
+    Execuções aninhadas reaproveitam o tracer de fora.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.tracer = None
+        self._owner = False
+
+    def __enter__(self):
+        store = session.get_store(STORE_NAME)
+        self.tracer = store.get("active")
+        if self.tracer is None:
+            self.tracer = Tracer(self.name)
+            store["active"] = self.tracer
+            self._owner = True
+            self._audit = api_audit.run(self.name, trace_dir())
+            self._audit.__enter__()
+            self._recording = replay.run(self.name, trace_dir())
+            self._recording.__enter__()
+        self._span = _Span(self.tracer, self.name, None)
+        self._span.__enter__()
+        return self.tracer
+
+    def __exit__(self, exc_type, exc, tb):
+        self._span.__exit__(exc_type, exc, tb)
+        if not self._owner: return False
+        session.get_store(STORE_NAME).pop("active", None)
+        self._audit.__exit__(exc_type, exc, tb)
+        self._recording.__exit__(exc_type, exc, tb)
+        try:
+            path = write_trace(self.tracer)
+            if self.tracer.elapsed_seconds() >= SLOW_RUN_SECONDS or _show_summary_configured():
+                print_summary(self.tracer, path)
+        except Exception as e:
+            print("Aviso: falha ao gravar o trace: {}".format(e))
+        return False
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Gravação das leituras de um comando de modelagem, para reproduzir fora do Revit.
+
+Com a gravação ligada, profiling.run() abre um Recording. Quando o cache de
+geometria lê um ambiente, o ambiente e sua vizinhança são lidos na hora (antes
+de o comando alterar o modelo); os parâmetros resolvidos pelo param_resolver
+também são anotados. No fim, tudo vai para um arquivo compacto (JSON + gzip)
+ao lado dos traces:
+
+    - ambientes: nível, número, nome, loops do limite (curva + hospedeiro);
+    - paredes hospedeiras e as unidas a elas: curva, tipo, largura, tipo
+      de parede, Flipped, nível, altura;
+    - vãos (portas/janelas) dessas paredes: ponto, hospedeiro, símbolo, peitoril;
+    - tipos, níveis, uniões e os passos vencedores do param_resolver.
+
+O driver dev/replay.py monta o mesmo modelo no Revit falso (com os mesmos
+IDs) e roda os motores da manalib sobre ele.
+
+Ativação (desligado por padrão), no pyRevit_config.ini:
+    [manatools_replay]
+    record = true
+
+Arcos são gravados por 3 pontos; outras curvas (elipses/splines) viram a
+polilinha da tesselação do Revit. As leituras extras entram no tempo do
+comando: não compare traces gravados com traces normais.
+"""
+import os
+import json
+import gzip
+import time
+
+CONFIG_ID = "manatools_replay"
+
+FORMAT_VERSION = 1
+
+# Gravações mantidas por comando
+KEEP_RECORDINGS = 10
+
+# Casas decimais das coordenadas (pés): abaixo da tolerância do Revit
+DIGITS = 9
+
+EXTENSION = ".replay.json.gz"
+
+# Gravação da execução atual (variável de módulo, como em api_audit: o teste
+# "está ligada?" roda a cada leitura de parâmetro)
+_ACTIVE = None
+
+
+def enabled():
+    """True se a gravação está ligada na configuração."""
+    try:
+        from pyrevit import script
+        return bool(getattr(script.get_config(CONFIG_ID), "record", False))
+    except Exception:
+        return False
+
+
+def active():
+    """Gravação em andamento, ou None."""
+    return _ACTIVE
+
+
+def note_room(room, loops):
+    """Grava um ambiente lido pelo cache de geometria (no-op sem gravação)."""
+    if _ACTIVE is not None: _ACTIVE.add_room(room, loops)
+
+
+def note_param(target, step, value):
+    """Anota o passo do param_resolver que respondeu (no-op sem gravação)."""
+    if _ACTIVE is not None: _ACTIVE.note_param(target, step, value)
+
+
+# --- Codificação ---
+def _r(value):
+    return round(value, DIGITS)
+
+
+def _xyz(p):
+    return [_r(p.X), _r(p.Y), _r(p.Z)]
+
+
+def encode_curve(curve):
+    """["L", p0, p1] | ["A", p0, p1, meio] | ["P", [pontos]] (coordenadas [x, y, z])."""
+    from Autodesk.Revit.DB import Line, Arc
+    if isinstance(curve, Line):
+        return ["L", _xyz(curve.GetEndPoint(0)), _xyz(curve.GetEndPoint(1))]
+    if isinstance(curve, Arc):
+        return ["A", _xyz(curve.GetEndPoint(0)), _xyz(curve.GetEndPoint(1)),
+                _xyz(curve.Evaluate(0.5, True))]
+    return ["P", [_xyz(p) for p in curve.Tessellate()]]
+
+
+def _double(elem, bip):
+    try:
+        p = elem.get_Parameter(bip)
+        if p and p.HasValue: return _r(p.AsDouble())
+    except Exception:
+        pass
+    return None
+
+
+def _string(elem, bip):
+    try:
+        p = elem.get_Parameter(bip)
+        if p and p.HasValue: return p.AsString()
+    except Exception:
+        pass
+    return None
+
+
+class Recording(object):
+    """
+    Leituras de UMA execução. Cada ambiente e sua vizinhança são lidos no
+    momento em que o comando lê o ambiente (antes de ele mesmo alterar o
+    modelo); to_dict() só monta o arquivo.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.document = ""
+        self.rooms = {}
+        self.levels = {}
+        self.types = {}
+        self.walls = {}
+        self.inserts = {}
+        self.joins = set()
+        # (id, origem, "bip"|"name", chave) -> valor
+        self.params = {}
+
+    def note_param(self, target, step, value):
+        """target: a instância ou o tipo lido no passo (source, kind, key)."""
+        source, kind, key = step
+        self.params[(target.Id.IntegerValue, source, kind, str(key))] = value
+
+    # --- Leituras ---
+    def _level(self, doc, level_id):
+        key = level_id.IntegerValue
+        if key > 0 and key not in self.levels:
+            lvl = doc.GetElement(level_id)
+            if lvl is not None:
+                self.levels[key] = [key, lvl.Name, _r(lvl.Elevation)]
+        return key
+
+    def _wall_type(self, wt):
+        from manalib import doc_index
+        key = wt.Id.IntegerValue
+        if key not in self.types:
+            self.types[key] = {"id": key, "class": "WallType", "name": doc_index.type_name(wt),
+                               "width": _r(wt.Width), "kind": str(wt.Kind)}
+        return key
+
+    def _symbol(self, sym, kind):
+        from Autodesk.Revit.DB import BuiltInParameter
+        from manalib import doc_index
+        key = sym.Id.IntegerValue
+        if key not in self.types:
+            fam = sym.Family
+            self.types[key] = {"id": key, "class": "FamilySymbol", "name": doc_index.type_name(sym),
+                               "family": fam.Name, "kind": kind, "placement": str(fam.FamilyPlacementType),
+                               "mark": _string(sym, BuiltInParameter.ALL_MODEL_TYPE_MARK)}
+        return key
+
+    def _add_wall(self, doc, wall):
+        from Autodesk.Revit.DB import BuiltInCategory, BuiltInParameter, LocationCurve
+        key = wall.Id.IntegerValue
+        if key in self.walls: return
+        loc = wall.Location
+        if not isinstance(loc, LocationCurve): return
+        self.walls[key] = [key, self._wall_type(wall.WallType), self._level(doc, wall.LevelId),
+                           encode_curve(loc.Curve), bool(wall.Flipped),
+                           _double(wall, BuiltInParameter.WALL_USER_HEIGHT_PARAM),
+                           _double(wall, BuiltInParameter.WALL_BASE_OFFSET)]
+        door_cat = int(BuiltInCategory.OST_Doors)
+        window_cat = int(BuiltInCategory.OST_Windows)
+        for ins_id in wall.FindInserts(True, False, False, False):
+            if ins_id.IntegerValue in self.inserts: continue
+            ins = doc.GetElement(ins_id)
+            if ins is None or ins.Category is None: continue
+            cat = ins.Category.Id.IntegerValue
+            if cat not in (door_cat, window_cat): continue
+            try:
+                point = _xyz(ins.Location.Point)
+            except AttributeError:
+                continue
+            kind = "door" if cat == door_cat else "window"
+            self.inserts[ins_id.IntegerValue] = [
+                ins_id.IntegerValue, self._symbol(ins.Symbol, kind), key, self._level(doc, ins.LevelId),
+                kind, point, _double(ins, BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM)]
+
+    def add_room(self, room, loops):
+        """Ambiente (loops já lidos pelo cache: [[(Curve, host_id), ...], ...]) e vizinhança."""
+        from Autodesk.Revit.DB import BuiltInParameter, ElementId, JoinGeometryUtils, Wall
+        room_id = room.Id.IntegerValue
+        if room_id in self.rooms: return
+        doc = room.Document
+        self.document = doc.Title
+
+        encoded = []
+        for loop in loops:
+            encoded.append([[encode_curve(c), host_id] for c, host_id in loop])
+            for _, host_id in loop:
+                host = doc.GetElement(ElementId(host_id)) if host_id > 0 else None
+                if not isinstance(host, Wall): continue
+                self._add_wall(doc, host)
+                # Paredes unidas (cebola) entram junto: o índice de vãos as consulta
+                for j_id in JoinGeometryUtils.GetJoinedElements(doc, host):
+                    j_wall = doc.GetElement(j_id)
+                    if isinstance(j_wall, Wall):
+                        self._add_wall(doc, j_wall)
+                        self.joins.add(tuple(sorted((host_id, j_id.IntegerValue))))
+        try:
+            height = _r(room.UnboundedHeight)
+        except Exception:
+            height = None
+        self.rooms[room_id] = [room_id, self._level(doc, room.LevelId),
+                               _string(room, BuiltInParameter.ROOM_NUMBER),
+                               _string(room, BuiltInParameter.ROOM_NAME), height, encoded]
+
+    def to_dict(self):
+        return {
+            "version": FORMAT_VERSION, "command": self.name, "document": self.document,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"), "units": "ft",
+            "levels": sorted(self.levels.values()),
+            "types": sorted(self.types.values(), key=lambda t: t["id"]),
+            "walls": sorted(self.walls.values()),
+            "inserts": sorted(self.inserts.values()),
+            "rooms": sorted(self.rooms.values()),
+            "joins": sorted(list(j) for j in self.joins),
+            "params": sorted([list(k) + [v] for k, v in self.params.items()], key=str),
+        }
+
+    def summary(self):
+        return "{} ambientes | {} paredes | {} vãos | {} parâmetros".format(
+            len(self.rooms), len(self.walls), len(self.inserts), len(self.params))
+
+
+def recordings_dir():
+    from manalib import profiling
+    return profiling.trace_dir()
+
+
+def write(recording, folder=None):
+    """Grava o arquivo (gzip) e apaga os mais antigos do comando. Retorna o caminho."""
+    folder = folder or recordings_dir()
+    prefix = "".join(c if c.isalnum() or c in "-_" else "_" for c in recording.name) + "_"
+    now = time.time()
+    stamp = "{}-{:03d}".format(time.strftime("%Y%m%d-%H%M%S", time.localtime(now)), int(now * 1000) % 1000)
+    path = os.path.join(folder, "{}{}{}".format(prefix, stamp, EXTENSION))
+    # Duas execuções no mesmo milissegundo não se sobrescrevem
+    n = 1
+    while os.path.exists(path):
+        path = os.path.join(folder, "{}{}-{}{}".format(prefix, stamp, n, EXTENSION))
+        n += 1
+    text = json.dumps(recording.to_dict(), separators=(",", ":"))
+    f = gzip.open(path, "wb")
+    try:
+        f.write(text.encode("utf-8"))
+    finally:
+        f.close()
+
+    old = sorted(n for n in os.listdir(folder) if n.startswith(prefix) and n.endswith(EXTENSION))
+    for n in old[:-KEEP_RECORDINGS]:
+        try: os.remove(os.path.join(folder, n))
+        except OSError: pass
+    return path
+
+
+def load(path):
+    """Lê um arquivo de gravação (dict)."""
+    f = gzip.open(path, "rb")
+    try:
+        data = json.loads(f.read().decode("utf-8"))
+    finally:
+        f.close()
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError("Versão de gravação não suportada: {}".format(data.get("version")))
+    return data
+
+
+class run(object):
+    """
+    Gravação de uma execução (context manager). Não faz nada se a gravação
+    está desligada ou se já existe uma aberta.
+    """
+
+    def __init__(self, name, folder=None):
+        self.name = name
+        self.folder = folder
+        self.recording = None
+
+    def __enter__(self):
+        global _ACTIVE
+        if _ACTIVE is None and enabled():
+            self.recording = _ACTIVE = Recording(self.name)
+        return self.recording
+
+    def __exit__(self, exc_type, exc, tb):
+        global _ACTIVE
+        if self.recording is None: return False
+        _ACTIVE = None
+        try:
+            path = write(self.recording, self.folder)
+            print("Gravação: {} ({})".format(path, self.recording.summary()))
+        except Exception as e:
+            print("Aviso: falha ao gravar as leituras do comando: {}".format(e))
+        return False
@@ -4,6 +4,7 @@ Wrappers da API do Revit para operações performáticas.
 """
 from Autodesk.Revit.DB import (FilteredElementCollector, ViewSheet, 
                                PDFExportOptions, ExportRange, BuiltInCategory)
+from manalib import api_audit
 
 
 def get_all_walls(doc):
@@ -71,7 +72,8 @@ def get_selected_elements(doc):
     if not element_ids:
         return []
     
-    return [doc.GetElement(eid) for eid in element_ids if doc.GetElement(eid) is not None]
+    reader = api_audit.counted(doc)
+    return [reader.GetElement(eid) for eid in element_ids if reader.GetElement(eid) is not None]
 
 
 def setup_transaction(doc, name):
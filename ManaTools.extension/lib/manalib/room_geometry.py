@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de geometria de Ambientes compartilhado entre comandos.
+
+Guarda, por ambiente, os segmentos de limite (face de acabamento), os IDs dos
+hospedeiros, os loops achatados em Z=0 e o sólido do SpatialElementGeometryCalculator.
+Entradas são descartadas quando o hook doc-changed registra alterações no
+ambiente ou em algum dos seus hospedeiros.
+"""
+from Autodesk.Revit.DB import (ElementId, XYZ, Line, CurveLoop, Transform,
+                               SpatialElementBoundaryOptions, SpatialElementBoundaryLocation,
+                               SpatialElementGeometryCalculator)
+from manalib import session, profiling, api_audit, replay
+
+STORE_NAME = "room_geometry"
+
+_MISSING = object()
+
+
+def get_boundary_options():
+    """Opções de limite padrão da Maná Tools (Face de Acabamento)."""
+    opt = SpatialElementBoundaryOptions()
+    opt.SpatialElementBoundaryLocation = SpatialElementBoundaryLocation.Finish
+    return opt
+
+
+def flatten_curves_to_z(curves, z_val=0.0):
+    """Reconstrói um CurveLoop forçando todas as coordenadas Z para um valor fixo."""
+    flat = []
+    for curve in curves:
+        p0 = curve.GetEndPoint(0)
+        p1 = curve.GetEndPoint(1)
+        try:
+            if isinstance(curve, Line):
+                flat.append(Line.CreateBound(XYZ(p0.X, p0.Y, z_val), XYZ(p1.X, p1.Y, z_val)))
+            else:
+                trans = XYZ(0, 0, z_val - p0.Z)
+                flat.append(curve.CreateTransformed(Transform.CreateTranslation(trans)))
+        except:
+            pass
+
+    try:
+        return CurveLoop.Create(flat)
+    except:
+        return None
+
+
+class RoomGeometryCache(object):
+    """
+    Geometria de ambientes de UM documento.
+    Use get_cache(doc) para obter a instância compartilhada da sessão.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._revision = session.get_revision(doc)
+        self._entries = {}
+        self._elements = {}
+        self._calculator = None
+
+    # --- Invalidação ---
+    def _sync(self):
+        """Descarta entradas afetadas por alterações desde a última consulta."""
+        current = session.get_revision(self.doc)
+        if current == self._revision: return
+
+        changes = session.changes_since(self.doc, self._revision)
+        self._revision = current
+        self._elements = {}
+        self._calculator = None
+
+        if changes is None or changes[1]:
+            # Log insuficiente ou parede/ambiente novo: não dá para saber quem mudou
+            self._entries.clear()
+            return
+
+        changed_ids = changes[0]
+        for room_id in list(self._entries.keys()):
+            entry = self._entries[room_id]
+            if room_id in changed_ids or not entry["hosts"].isdisjoint(changed_ids):
+                del self._entries[room_id]
+
+    def clear(self):
+        self._entries.clear()
+        self._elements = {}
+        self._calculator = None
+
+    # --- Extração ---
+    def _entry(self, room):
+        self._sync()
+        room_id = room.Id.IntegerValue
+        entry = self._entries.get(room_id)
+        if entry is not None:
+            # Gravação aberta depois de o ambiente entrar no cache (já deduplicado)
+            replay.note_room(room, entry["loops"])
+            return entry
+
+        loops = []
+        hosts = set()
+        try:
+            with profiling.span("GetBoundarySegments"):
+                segments_list = api_audit.counted(room).GetBoundarySegments(get_boundary_options())
+        except:
+            segments_list = None
+
+        if segments_list:
+            for segments in segments_list:
+                loop = []
+                for seg in segments:
+                    host_id = seg.ElementId.IntegerValue
+                    loop.append((seg.GetCurve(), host_id))
+                    if host_id > 0: hosts.add(host_id)
+                if loop: loops.append(loop)
+
+        entry = {"loops": loops, "hosts": hosts, "flat": None, "outline": None, "solid": _MISSING}
+        self._entries[room_id] = entry
+        replay.note_room(room, loops)
+        return entry
+
+    def boundary_loops(self, room):
+        """Lista de loops; cada loop é uma lista de (Curve, host_id_int)."""
+        return self._entry(room)["loops"]
+
+    def host_ids(self, room):
+        """IDs (int) de todos os elementos que limitam o ambiente."""
+        return self._entry(room)["hosts"]
+
+    def flat_loops(self, room):
+        """CurveLoops do limite achatados em Z=0 (loops inválidos são omitidos)."""
+        entry = self._entry(room)
+        if entry["flat"] is None:
+            flat = []
+            for loop in entry["loops"]:
+                cl = flatten_curves_to_z([c for c, _ in loop], 0.0)
+                if cl: flat.append(cl)
+            entry["flat"] = flat
+        return entry["flat"]
+
+    def outline(self, room):
+        """
+        Loops do limite como listas de (x, y) - dados puros para cálculos 2D.
+        Arcos e demais curvas são tesselados pelo próprio Revit.
+        """
+        entry = self._entry(room)
+        if entry["outline"] is None:
+            outline = []
+            for loop in entry["loops"]:
+                pts = []
+                for curve, _ in loop:
+                    if isinstance(curve, Line):
+                        p = curve.GetEndPoint(0)
+                        pts.append((p.X, p.Y))
+                    else:
+                        # Último ponto = início do próximo segmento
+                        for p in list(curve.Tessellate())[:-1]:
+                            pts.append((p.X, p.Y))
+                if len(pts) >= 3: outline.append(pts)
+            entry["outline"] = outline
+        return entry["outline"]
+
+    def room_solid(self, room):
+        """Sólido exato do ambiente (um único GeometryCalculator por lote)."""
+        entry = self._entry(room)
+        if entry["solid"] is _MISSING:
+            solid = None
+            try:
+                if self._calculator is None:
+                    self._calculator = SpatialElementGeometryCalculator(self.doc, get_boundary_options())
+                results = self._calculator.CalculateSpatialElementGeometry(room)
+                solid = results.GetGeometry()
+            except Exception as e:
+                print("Aviso: Falha no GeometryCalculator para sala {}: {}".format(room.Id, e))
+            entry["solid"] = solid
+        return entry["solid"]
+
+    def get_element(self, element_id):
+        """doc.GetElement memorizado (aceita int ou ElementId)."""
+        self._sync()
+        key = element_id if isinstance(element_id, int) else element_id.IntegerValue
+        elem = self._elements.get(key, _MISSING)
+        if elem is _MISSING:
+            elem = api_audit.counted(self.doc).GetElement(ElementId(key)) if key > 0 else None
+            self._elements[key] = elem
+        return elem
+
+
+def get_cache(doc):
+    """Retorna o cache de geometria de ambientes da sessão para o documento."""
+    store = session.get_store(STORE_NAME)
+    key = session.document_key(doc)
+    cache = store.get(key)
+    if cache is None:
+        cache = RoomGeometryCache(doc)
+        store[key] = cache
+    return cache
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Localização de pontos em Ambientes sem doc.GetRoomAtPoint.
+
+Os polígonos dos ambientes de cada nível são lidos uma vez (cache de
+room_geometry) e registrados numa grade (spatial_index). Depois disso as
+consultas são Python puro e podem rodar no estágio de cálculo do pipeline.
+Cada ambiente é classificado como externo/interno uma única vez.
+"""
+from Autodesk.Revit.DB import FilteredElementCollector, BuiltInCategory, BuiltInParameter
+from manalib import room_geometry, spatial_index, geometry2d
+
+# Termos que indicam área externa (nome ou número do ambiente)
+EXTERNAL_TERMS = (
+    "calcada", "calçada", "rua", "exterior", "externo", "externa",
+    "varanda", "sacada", "area externa", "área externa",
+    "passeio", "logradouro", "jardim externo"
+)
+
+# Folga vertical (pés) ao comparar o Z do ponto com a altura do ambiente
+Z_TOLERANCE = 0.01
+
+
+def is_external_name(name, number):
+    """True se o nome ou o número do ambiente sugerem área externa."""
+    name_lower = (name or "").lower()
+    number_lower = (number or "").lower()
+    for term in EXTERNAL_TERMS:
+        if term in name_lower or term in number_lower:
+            return True
+    return False
+
+
+def _param_string(elem, bip):
+    try:
+        p = elem.get_Parameter(bip)
+        if p and p.HasValue: return p.AsString()
+    except: pass
+    return None
+
+
+class RoomRecord(object):
+    """Ambiente já lido da API (dados puros)."""
+    __slots__ = ("id", "level_id", "loops", "box", "area", "external")
+
+    def __init__(self, id, level_id, loops, box, area, external):
+        self.id = id
+        self.level_id = level_id
+        self.loops = loops
+        self.box = box
+        self.area = area
+        self.external = external
+
+
+def snapshot_room(room, geo_cache):
+    """Lê polígono, caixa, área e classificação do ambiente. None se não colocado."""
+    try:
+        area = room.Area
+    except:
+        return None
+    if not area or area <= 0: return None
+
+    loops = geo_cache.outline(room)
+    bb = room.get_BoundingBox(None)
+    if not loops or not bb: return None
+
+    return RoomRecord(
+        room.Id.IntegerValue,
+        room.LevelId.IntegerValue,
+        loops,
+        spatial_index.box_from_bounding_box(bb),
+        area,
+        is_external_name(_param_string(room, BuiltInParameter.ROOM_NAME),
+                         _param_string(room, BuiltInParameter.ROOM_NUMBER)),
+    )
+
+
+class RoomPointIndex(object):
+    """
+    Índice de pontos em ambientes, uma grade por nível. Python puro.
+
+    Args:
+        records (list): RoomRecord de todos os ambientes de interesse.
+    """
+
+    def __init__(self, records):
+        self._grids = {}
+        self._records = {}
+        by_level = {}
+        for rec in records:
+            self._records[rec.id] = rec
+            by_level.setdefault(rec.level_id, []).append(rec)
+
+        for level_id, recs in by_level.items():
+            # Grade só em X/Y: um nível raramente tem ambientes empilhados
+            cx, cy, _ = spatial_index.estimate_cell_size(r.box for r in recs)
+            grid = spatial_index.GridIndex((cx, cy, 1e6), Z_TOLERANCE)
+            for rec in recs:
+                grid.insert(rec.id, rec.box)
+            self._grids[level_id] = grid
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, room_id):
+        return self._records.get(room_id)
+
+    def room_at(self, point, level_id=None):
+        """
+        Ambiente que contém o ponto (x, y, z), como o GetRoomAtPoint.
+
+        Args:
+            level_id (int): Restringe a busca a um nível. None = todos.
+
+        Returns:
+            RoomRecord ou None.
+        """
+        probe = (point[0], point[1], point[2], point[0], point[1], point[2])
+        grids = [self._grids.get(level_id)] if level_id is not None else self._grids.values()
+        for grid in grids:
+            if grid is None: continue
+            for room_id in grid.query(probe):
+                rec = self._records[room_id]
+                if geometry2d.point_in_loops(point, rec.loops):
+                    return rec
+        return None
+
+
+def build_index(doc, level_ids=None):
+    """
+    Lê os ambientes (dos níveis informados) uma única vez e monta o índice.
+
+    Args:
+        level_ids (iterable): IDs (int) dos níveis. None = todos.
+    """
+    wanted = set(level_ids) if level_ids is not None else None
+    geo_cache = room_geometry.get_cache(doc)
+
+    records = []
+    rooms = FilteredElementCollector(doc)\
+            .OfCategory(BuiltInCategory.OST_Rooms)\
+            .WhereElementIsNotElementType()\
+            .ToElements()
+    for room in rooms:
+        if wanted is not None and room.LevelId.IntegerValue not in wanted: continue
+        rec = snapshot_room(room, geo_cache)
+        if rec: records.append(rec)
+    return RoomPointIndex(records)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Estado de sessão compartilhado entre comandos da Maná Tools.
+
+O pyRevit roda cada botão num engine próprio, então variáveis de módulo não
+sobrevivem entre comandos. Os caches ficam guardados no AppDomain (envvars do
+pyRevit) e são versionados por documento através do hook doc-changed.
+"""
+
+# Fallback quando rodamos fora do Revit (ou sem pyRevit)
+_LOCAL_ROOT = {}
+
+ROOT_ENV_KEY = "MANATOOLS_SESSION"
+
+# Quantas alterações guardamos no log por documento.
+# Caches mais antigos que o log são descartados por inteiro.
+MAX_CHANGE_LOG = 256
+
+# Categorias cuja CRIAÇÃO pode alterar limites de ambientes
+BOUNDARY_CATEGORY_NAMES = [
+    "OST_Walls", "OST_Rooms", "OST_RoomSeparationLines",
+    "OST_Columns", "OST_StructuralColumns",
+]
+
+
+# Import que falhou (fora do pyRevit) não é repetido: cada tentativa varre o sys.path
+_NO_PYREVIT = False
+
+
+def _root():
+    global _NO_PYREVIT
+    if _NO_PYREVIT: return _LOCAL_ROOT
+    try:
+        from pyrevit.coreutils import envvars
+    except ImportError:
+        _NO_PYREVIT = True
+        return _LOCAL_ROOT
+
+    root = envvars.get_pyrevit_env_var(ROOT_ENV_KEY)
+    if root is None:
+        root = {}
+        envvars.set_pyrevit_env_var(ROOT_ENV_KEY, root)
+    return root
+
+
+def get_store(name):
+    """
+    Retorna um dicionário persistente durante toda a sessão do Revit.
+    Convenção: as chaves de primeiro nível são document_key(doc).
+
+    Args:
+        name (str): Nome do store (ex: 'room_geometry')
+    """
+    return _root().setdefault(name, {})
+
+
+def document_key(doc):
+    """Chave estável do documento durante a sessão."""
+    try:
+        return doc.GetHashCode()
+    except AttributeError:
+        return id(doc)
+
+
+def _doc_state(doc):
+    states = get_store("documents")
+    key = document_key(doc)
+    state = states.get(key)
+    if state is None:
+        state = {"revision": 0, "log": []}
+        states[key] = state
+    return state
+
+
+def get_revision(doc):
+    """Revisão atual do documento (incrementa a cada DocumentChanged)."""
+    return _doc_state(doc)["revision"]
+
+
+def is_tracked(doc):
+    """
+    True se algum cache já leu a revisão do documento. Antes disso não há o
+    que invalidar: caches criados depois leem o modelo atual.
+    """
+    return document_key(doc) in get_store("documents")
+
+
+def _to_int_ids(element_ids):
+    ids = set()
+    if not element_ids: return ids
+    for eid in element_ids:
+        try: ids.add(eid.IntegerValue)
+        except AttributeError: ids.add(int(eid))
+    return ids
+
+
+def _classify_added(doc, element_ids):
+    """
+    Examina os elementos adicionados uma única vez.
+
+    Returns:
+        tuple: (pode_alterar_limites_de_ambiente, é_tipo_ou_nível)
+    """
+    if not element_ids: return False, False
+    try:
+        from Autodesk.Revit.DB import BuiltInCategory, ElementType, Level
+        cat_ids = set(int(getattr(BuiltInCategory, n)) for n in BOUNDARY_CATEGORY_NAMES)
+    except ImportError:
+        return True, True
+
+    boundary = catalog = False
+    for eid in element_ids:
+        elem = doc.GetElement(eid)
+        if elem is None: continue
+        if not catalog and isinstance(elem, (ElementType, Level)):
+            catalog = True
+        if not boundary and elem.Category is not None and elem.Category.Id.IntegerValue in cat_ids:
+            boundary = True
+        if boundary and catalog: break
+    return boundary, catalog
+
+
+def notify_document_changed(doc, added_ids=None, modified_ids=None, deleted_ids=None):
+    """
+    Registra uma alteração no documento. Chamado pelo hook doc-changed.
+
+    Documentos sem cache (ver is_tracked) são ignorados sem ler nada: o hook
+    roda a cada alteração do modelo, inclusive as que não são da ManaTools.
+
+    Args:
+        doc: Documento do Revit
+        added_ids / modified_ids / deleted_ids: Coleções de ElementId (ou int)
+    """
+    state = get_store("documents").get(document_key(doc))
+    if state is None: return
+    state["revision"] += 1
+    boundary_added, catalog_added = _classify_added(doc, added_ids)
+
+    entry = {
+        "revision": state["revision"],
+        "ids": _to_int_ids(modified_ids) | _to_int_ids(deleted_ids),
+        "boundary_added": boundary_added,
+        "catalog_added": catalog_added,
+    }
+
+    log = state["log"]
+    log.append(entry)
+    if len(log) > MAX_CHANGE_LOG:
+        del log[0]
+
+
+def changes_since(doc, revision, flag="boundary_added"):
+    """
+    Agrega as alterações feitas depois de 'revision'.
+
+    Args:
+        flag (str): Marcador de adições a agregar: "boundary_added" (paredes,
+                    ambientes...) ou "catalog_added" (tipos e níveis).
+
+    Returns:
+        tuple: (ids_alterados, houve_adicao_marcada) ou None se o log
+        não cobre mais essa revisão (o chamador deve descartar tudo).
+    """
+    state = _doc_state(doc)
+    if revision >= state["revision"]:
+        return set(), False
+
+    log = state["log"]
+    if not log or log[0]["revision"] > revision + 1:
+        return None
+
+    ids = set()
+    flagged = False
+    for entry in log:
+        if entry["revision"] <= revision: continue
+        ids |= entry["ids"]
+        flagged = flagged or entry.get(flag, True)
+    return ids, flagged
+
+
+def forget_document(doc):
+    """Remove todo o estado associado a um documento (hook doc-closing)."""
+    key = document_key(doc)
+    for store in _root().values():
+        store.pop(key, None)
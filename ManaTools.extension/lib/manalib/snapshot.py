@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot colunar do modelo para análises offline (quantitativos, QA em lote).
+
+export() lê ambientes (com os segmentos de limite), paredes, vãos, tipos e
+níveis do documento e grava um arquivo binário com uma coluna por campo.
+Abrir o arquivo (open_snapshot) mapeia-o com mmap e só lê o diretório: cada
+coluna é um memoryview tipado sobre o próprio arquivo, e os textos ficam numa
+tabela de strings decodificada sob demanda. Leitura não importa a API do
+Revit: scripts de análise rodam num Python comum.
+
+Layout (little-endian):
+    cabeçalho   MAGIC (8 bytes), versão (uint32), offset do diretório (uint64)
+    colunas     arrays contíguos alinhados em 8 bytes ('i' int32, 'd' float64,
+                'b' int8)
+    strings     bytes UTF-8 concatenados + coluna 'i' de offsets (n + 1)
+    diretório   JSON UTF-8: tabelas -> linhas e colunas (typecode, offset)
+
+Colunas de texto guardam o índice na tabela de strings (0 = vazio). IDs são
+ElementId.IntegerValue; comprimentos em pés, áreas em pés². Valores ausentes
+são NaN (float) ou 0 (índices de string). Exemplo:
+
+    from manalib import snapshot
+    with snapshot.open_snapshot("projeto.manasnap") as snap:
+        walls = snap.table("walls")
+        total = sum(walls["length"])
+        names = [snap.string(i) for i in walls["type_name"][:10]]
+"""
+import sys
+import json
+import mmap
+import struct
+from array import array
+
+MAGIC = b"MANASNAP"
+FORMAT_VERSION = 1
+EXTENSION = ".manasnap"
+
+_HEADER = struct.Struct("<8sIQ")
+_ALIGN = 8
+
+NAN = float("nan")
+
+# Tabelas e colunas (nome, typecode). "s" = índice na tabela de strings ('i')
+SCHEMA = [
+    ("levels", [("id", "i"), ("name", "s"), ("elevation", "d")]),
+    ("types", [("id", "i"), ("class", "s"), ("family", "s"), ("name", "s"), ("mark", "s"),
+               ("width", "d"), ("height", "d")]),
+    ("rooms", [("id", "i"), ("level", "i"), ("number", "s"), ("name", "s"), ("area", "d"),
+               ("perimeter", "d"), ("height", "d"), ("first_segment", "i"), ("segment_count", "i")]),
+    ("segments", [("room", "i"), ("loop", "i"), ("host", "i"), ("kind", "b"), ("x0", "d"), ("y0", "d"),
+                  ("x1", "d"), ("y1", "d"), ("length", "d")]),
+    ("walls", [("id", "i"), ("type", "i"), ("type_name", "s"), ("level", "i"), ("x0", "d"), ("y0", "d"),
+               ("x1", "d"), ("y1", "d"), ("length", "d"), ("width", "d"), ("height", "d"), ("flipped", "b")]),
+    ("openings", [("id", "i"), ("kind", "b"), ("type", "i"), ("host", "i"), ("level", "i"), ("x", "d"),
+                  ("y", "d"), ("width", "d"), ("sill", "d")]),
+]
+
+# Tipo de curva (segments.kind) e de vão (openings.kind)
+LINE, ARC, OTHER = 0, 1, 2
+DOOR, WINDOW = 1, 2
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+# --- Gravação ---
+class _StringTable(object):
+    """Textos únicos em ordem de chegada; índice 0 é o texto vazio."""
+
+    def __init__(self):
+        self.items = [u""]
+        self.index = {u"": 0}
+
+    def add(self, text):
+        if not text: return 0
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = len(self.items)
+            self.items.append(text)
+        return idx
+
+
+class SnapshotWriter(object):
+    """
+    Monta as colunas em arrays tipados e grava o arquivo. Independe do Revit:
+    export() só alimenta add_row().
+    """
+
+    def __init__(self):
+        self.strings = _StringTable()
+        self.meta = {}
+        self._tables = []
+        self._columns = {}
+        for table, columns in SCHEMA:
+            cols = [(name, code, array("i" if code == "s" else code)) for name, code in columns]
+            self._tables.append((table, cols))
+            self._columns[table] = cols
+
+    def add_row(self, table, *values):
+        """Valores na ordem do SCHEMA; colunas "s" recebem o próprio texto."""
+        cols = self._columns[table]
+        for (name, code, arr), value in zip(cols, values):
+            if code == "s":
+                value = self.strings.add(value)
+            elif value is None:
+                value = NAN if code == "d" else 0
+            arr.append(value)
+
+    def rows(self, table):
+        return len(self._columns[table][0][2])
+
+    def _column(self, f, arr):
+        pad = -f.tell() % _ALIGN
+        if pad: f.write(b"\0" * pad)
+        offset = f.tell()
+        if _BIG_ENDIAN:
+            arr = array(arr.typecode, arr)
+            arr.byteswap()
+        arr.tofile(f)
+        return offset
+
+    def write(self, path):
+        f = open(path, "wb")
+        try:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+            directory = {"version": FORMAT_VERSION, "meta": self.meta, "tables": {}}
+            for table, cols in self._tables:
+                entry = {"rows": len(cols[0][2]), "columns": {}}
+                for name, code, arr in cols:
+                    entry["columns"][name] = [code, self._column(f, arr)]
+                directory["tables"][table] = entry
+
+            blob = [s.encode("utf-8") for s in self.strings.items]
+            offsets = array("i", [0])
+            for b in blob:
+                offsets.append(offsets[-1] + len(b))
+            pad = -f.tell() % _ALIGN
+            if pad: f.write(b"\0" * pad)
+            data_offset = f.tell()
+            f.write(b"".join(blob))
+            directory["strings"] = {"count": len(blob), "data": data_offset,
+                                    "offsets": self._column(f, offsets)}
+
+            directory_offset = f.tell()
+            f.write(json.dumps(directory, separators=(",", ":")).encode("utf-8"))
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, directory_offset))
+        finally:
+            f.close()
+        return path
+
+
+# --- Leitura do modelo ---
+def _curve_kind(curve):
+    from Autodesk.Revit.DB import Line, Arc
+    if isinstance(curve, Line): return LINE
+    if isinstance(curve, Arc): return ARC
+    return OTHER
+
+
+def _double(elem, bip):
+    try:
+        p = elem.get_Parameter(bip)
+        if p and p.HasValue: return p.AsDouble()
+    except Exception:
+        pass
+    return None
+
+
+def _string(elem, bip):
+    try:
+        p = elem.get_Parameter(bip)
+        if p and p.HasValue: return p.AsString()
+    except Exception:
+        pass
+    return None
+
+
+def _collect(doc, bic):
+    from Autodesk.Revit.DB import FilteredElementCollector
+    return FilteredElementCollector(doc).OfCategory(bic).WhereElementIsNotElementType().ToElements()
+
+
+class _Exporter(object):
+    """Lê o documento para um SnapshotWriter (tipos e níveis só os usados)."""
+
+    def __init__(self, doc, writer):
+        from manalib import param_resolver
+        self.doc = doc
+        self.writer = writer
+        self.resolver = param_resolver.get_resolver(doc)
+        self.types = set()
+        self.levels = set()
+
+    def _level(self, level_id):
+        key = level_id.IntegerValue
+        if key > 0 and key not in self.levels:
+            lvl = self.doc.GetElement(level_id)
+            if lvl is not None:
+                self.levels.add(key)
+                self.writer.add_row("levels", key, lvl.Name, lvl.Elevation)
+        return key
+
+    def _wall_type(self, wt):
+        from manalib import doc_index
+        key = wt.Id.IntegerValue
+        if key not in self.types:
+            self.types.add(key)
+            self.writer.add_row("types", key, "WallType", "", doc_index.type_name(wt), "", wt.Width, None)
+        return key
+
+    def _symbol(self, sym):
+        from Autodesk.Revit.DB import BuiltInParameter
+        from manalib import doc_index, param_resolver
+        key = sym.Id.IntegerValue
+        if key not in self.types:
+            self.types.add(key)
+            self.writer.add_row("types", key, "FamilySymbol", sym.Family.Name, doc_index.type_name(sym),
+                                _string(sym, BuiltInParameter.ALL_MODEL_TYPE_MARK),
+                                self.resolver.read(sym, param_resolver.TYPE_WIDTH),
+                                self.resolver.read(sym, param_resolver.TYPE_HEIGHT))
+        return key
+
+    def rooms(self):
+        from Autodesk.Revit.DB import BuiltInCategory, BuiltInParameter
+        from manalib import room_geometry
+        cache = room_geometry.get_cache(self.doc)
+        w = self.writer
+        for room in _collect(self.doc, BuiltInCategory.OST_Rooms):
+            if room.Location is None: continue  # Não posicionado
+            room_id = room.Id.IntegerValue
+            first = w.rows("segments")
+            perimeter = 0.0
+            for loop_idx, loop in enumerate(cache.boundary_loops(room)):
+                for curve, host_id in loop:
+                    p0, p1 = curve.GetEndPoint(0), curve.GetEndPoint(1)
+                    length = curve.Length
+                    perimeter += length
+                    w.add_row("segments", room_id, loop_idx, host_id, _curve_kind(curve),
+                              p0.X, p0.Y, p1.X, p1.Y, length)
+            try:
+                height = room.UnboundedHeight
+            except Exception:
+                height = None
+            w.add_row("rooms", room_id, self._level(room.LevelId),
+                      _string(room, BuiltInParameter.ROOM_NUMBER), _string(room, BuiltInParameter.ROOM_NAME),
+                      room.Area, perimeter, height, first, w.rows("segments") - first)
+
+    def walls(self):
+        from Autodesk.Revit.DB import BuiltInCategory, BuiltInParameter, LocationCurve, Wall
+        from manalib import doc_index
+        for wall in _collect(self.doc, BuiltInCategory.OST_Walls):
+            if not isinstance(wall, Wall): continue
+            loc = wall.Location
+            if not isinstance(loc, LocationCurve): continue
+            curve = loc.Curve
+            p0, p1 = curve.GetEndPoint(0), curve.GetEndPoint(1)
+            wt = wall.WallType
+            self.writer.add_row("walls", wall.Id.IntegerValue, self._wall_type(wt), doc_index.type_name(wt),
+                                self._level(wall.LevelId), p0.X, p0.Y, p1.X, p1.Y, curve.Length, wt.Width,
+                                _double(wall, BuiltInParameter.WALL_USER_HEIGHT_PARAM), bool(wall.Flipped))
+
+    def openings(self):
+        from Autodesk.Revit.DB import BuiltInCategory, BuiltInParameter
+        from manalib import param_resolver
+        for kind, bic in ((DOOR, BuiltInCategory.OST_Doors), (WINDOW, BuiltInCategory.OST_Windows)):
+            for ins in _collect(self.doc, bic):
+                try:
+                    point = ins.Location.Point
+                except AttributeError:
+                    continue
+                host = getattr(ins, "Host", None)
+                self.writer.add_row("openings", ins.Id.IntegerValue, kind, self._symbol(ins.Symbol),
+                                    host.Id.IntegerValue if host is not None else -1, self._level(ins.LevelId),
+                                    point.X, point.Y, self.resolver.read(ins, param_resolver.OPENING_WIDTH),
+                                    _double(ins, BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM))
+
+
+def export(doc, path):
+    """
+    Grava o snapshot colunar do documento.
+
+    Returns:
+        SnapshotWriter: O conteúdo gravado (contagens em rows(tabela)).
+    """
+    import time
+    from manalib import profiling
+    writer = SnapshotWriter()
+    exporter = _Exporter(doc, writer)
+    for name in ("rooms", "walls", "openings"):
+        with profiling.span("snapshot." + name):
+            getattr(exporter, name)()
+    writer.meta = {"document": doc.Title, "time": time.strftime("%Y-%m-%d %H:%M:%S"), "units": "ft"}
+    with profiling.span("snapshot.write"):
+        writer.write(path)
+    return writer
+
+
+# --- Leitura do arquivo ---
+class Table(object):
+    """Tabela do snapshot: table["coluna"] devolve um memoryview tipado (sem cópia)."""
+
+    def __init__(self, snapshot, name, entry):
+        self.snapshot = snapshot
+        self.name = name
+        self.rows = entry["rows"]
+        self._entry = entry["columns"]
+        self._cache = {}
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def columns(self):
+        """Nomes das colunas, na ordem do arquivo."""
+        return sorted(self._entry, key=lambda name: self._entry[name][1])
+
+    def __getitem__(self, column):
+        col = self._cache.get(column)
+        if col is None:
+            code, offset = self._entry[column]
+            col = self._cache[column] = self.snapshot._column("i" if code == "s" else code, offset, self.rows)
+        return col
+
+    def strings(self, column):
+        """Coluna de texto decodificada (lista de str)."""
+        text = self.snapshot.string
+        return [text(i) for i in self[column]]
+
+    def row(self, index):
+        """Linha como dict (textos já decodificados)."""
+        out = {}
+        for name, (code, _) in self._entry.items():
+            value = self[name][index]
+            out[name] = self.snapshot.string(value) if code == "s" else value
+        return out
+
+
+class Snapshot(object):
+    """
+    Snapshot aberto via mmap. Use como context manager (ou chame close());
+    memoryviews obtidos das tabelas não podem sobreviver ao close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        magic, version, directory_offset = _HEADER.unpack(self._map[:_HEADER.size])
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Arquivo não é um snapshot da ManaTools: {}".format(path))
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError("Versão de snapshot não suportada: {}".format(version))
+        self._view = memoryview(self._map)
+        self._views = []
+        self.directory = json.loads(self._map[directory_offset:].decode("utf-8"))
+        self.meta = self.directory.get("meta", {})
+        strings = self.directory["strings"]
+        self._string_data = strings["data"]
+        self._string_offsets = self._column("i", strings["offsets"], strings["count"] + 1)
+        self._strings = {}
+        self._index = None
+        self._tables = {}
+
+    def _column(self, code, offset, count):
+        size = array(code).itemsize
+        raw = self._view[offset:offset + size * count]
+        if not _BIG_ENDIAN and hasattr(raw, "cast"):
+            col = raw.cast(code)
+            self._views.extend([col, raw])
+            return col
+        # Python 2 / big-endian: cópia num array
+        data = raw.tobytes()
+        arr = array(code)
+        if hasattr(arr, "frombytes"):
+            arr.frombytes(data)
+        else:
+            arr.fromstring(data)
+        if _BIG_ENDIAN: arr.byteswap()
+        return arr
+
+    @property
+    def tables(self):
+        return sorted(self.directory["tables"])
+
+    def table(self, name):
+        t = self._tables.get(name)
+        if t is None:
+            t = self._tables[name] = Table(self, name, self.directory["tables"][name])
+        return t
+
+    def string(self, index):
+        """Texto do índice (decodificado na primeira consulta)."""
+        text = self._strings.get(index)
+        if text is None:
+            start = self._string_offsets[index]
+            end = self._string_offsets[index + 1]
+            base = self._string_data
+            text = self._strings[index] = self._map[base + start:base + end].decode("utf-8")
+        return text
+
+    def string_index(self, text):
+        """Índice de um texto (para filtrar colunas sem decodificar), ou -1."""
+        if self._index is None:
+            self._index = dict((self.string(i), i) for i in range(self.directory["strings"]["count"]))
+        return self._index.get(text, -1)
+
+    def close(self):
+        self._tables = {}
+        self._string_offsets = None
+        # O mmap só fecha sem memoryviews exportados (colunas antigas ficam inválidas)
+        for view in getattr(self, "_views", []) + [getattr(self, "_view", None)]:
+            if view is not None and hasattr(view, "release"): view.release()
+        self._views = []
+        self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def open_snapshot(path):
+    """Abre um snapshot (mmap, só o diretório é lido)."""
+    return Snapshot(path)
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Índice espacial (Grade Uniforme 3D) para pares candidatos por BoundingBox.
+Python puro: trabalha com caixas já "fotografadas" em tuplas, sem chamadas à API.
+
+Caixa = (min_x, min_y, min_z, max_x, max_y, max_z) em pés.
+Inclui union-find para agrupar pares em componentes conexos.
+"""
+import math
+
+# Caixas que ocupam mais células que isso vão para uma lista linear
+# (ex: uma laje cobrindo o pavimento inteiro). Evita explodir a grade.
+MAX_CELLS_PER_BOX = 4096
+
+
+def box_from_bounding_box(bb):
+    """Converte um BoundingBoxXYZ (ou equivalente) em tupla. Retorna None se vazio."""
+    if not bb: return None
+    mn, mx = bb.Min, bb.Max
+    return (mn.X, mn.Y, mn.Z, mx.X, mx.Y, mx.Z)
+
+
+def inflate_box(box, amount):
+    """Expande a caixa em 'amount' para todos os lados."""
+    if not amount: return box
+    return (box[0] - amount, box[1] - amount, box[2] - amount,
+            box[3] + amount, box[4] + amount, box[5] + amount)
+
+
+def boxes_overlap(a, b, tolerance=0.0):
+    """True se as caixas se tocam (folga <= tolerance)."""
+    return (a[0] - tolerance <= b[3] and a[3] + tolerance >= b[0] and
+            a[1] - tolerance <= b[4] and a[4] + tolerance >= b[1] and
+            a[2] - tolerance <= b[5] and a[5] + tolerance >= b[2])
+
+
+def estimate_cell_size(boxes):
+    """
+    Tamanho de célula por eixo = média das dimensões das caixas.
+    Boa heurística para elementos de tamanho parecido (paredes, pilares).
+    """
+    n = 0
+    sx = sy = sz = 0.0
+    for box in boxes:
+        sx += box[3] - box[0]
+        sy += box[4] - box[1]
+        sz += box[5] - box[2]
+        n += 1
+    if not n: return (1.0, 1.0, 1.0)
+    return (max(sx / n, 0.1), max(sy / n, 0.1), max(sz / n, 0.1))
+
+
+class GridIndex(object):
+    """
+    Grade uniforme 3D. Cada caixa é registrada em todas as células que ocupa.
+    Consultas retornam apenas chaves cujas caixas realmente se sobrepõem.
+    """
+
+    def __init__(self, cell_size, tolerance=0.0):
+        """
+        Args:
+            cell_size (tuple): (cx, cy, cz) tamanho da célula em pés.
+            tolerance (float): Folga máxima (pés) para considerar caixas em contato.
+        """
+        self.cell_size = cell_size
+        self.tolerance = tolerance
+        self._cells = {}
+        self._boxes = {}
+        self._large = []
+
+    def _cell_range(self, box):
+        cx, cy, cz = self.cell_size
+        return (int(math.floor(box[0] / cx)), int(math.floor(box[3] / cx)),
+                int(math.floor(box[1] / cy)), int(math.floor(box[4] / cy)),
+                int(math.floor(box[2] / cz)), int(math.floor(box[5] / cz)))
+
+    def _iter_cells(self, box):
+        i0, i1, j0, j1, k0, k1 = self._cell_range(box)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for k in range(k0, k1 + 1):
+                    yield (i, j, k)
+
+    def _cell_count(self, box):
+        i0, i1, j0, j1, k0, k1 = self._cell_range(box)
+        return (i1 - i0 + 1) * (j1 - j0 + 1) * (k1 - k0 + 1)
+
+    def insert(self, key, box):
+        """Registra uma caixa sob a chave informada."""
+        self._boxes[key] = box
+        grown = inflate_box(box, self.tolerance / 2.0)
+        if self._cell_count(grown) > MAX_CELLS_PER_BOX:
+            self._large.append(key)
+            return
+        for cell in self._iter_cells(grown):
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                self._cells[cell] = [key]
+            else:
+                bucket.append(key)
+
+    def query(self, box):
+        """Retorna lista de chaves cujas caixas se sobrepõem à caixa dada."""
+        tol = self.tolerance
+        grown = inflate_box(box, tol / 2.0)
+        found = []
+        seen = set()
+
+        if self._cell_count(grown) > MAX_CELLS_PER_BOX:
+            candidates = self._boxes
+        else:
+            candidates = []
+            for cell in self._iter_cells(grown):
+                bucket = self._cells.get(cell)
+                if bucket: candidates.extend(bucket)
+            candidates.extend(self._large)
+
+        for key in candidates:
+            if key in seen: continue
+            seen.add(key)
+            if boxes_overlap(box, self._boxes[key], tol):
+                found.append(key)
+        return found
+
+    def __len__(self):
+        return len(self._boxes)
+
+
+def candidate_pairs(items_a, items_b, tolerance=0.0, cell_size=None):
+    """
+    Pares (chave_a, chave_b) cujas caixas se sobrepõem. Custo ~linear.
+
+    Args:
+        items_a / items_b: Listas de (chave, caixa). Caixas None são ignoradas.
+        tolerance (float): Folga máxima em pés.
+        cell_size (tuple): Opcional. Padrão: estimado a partir de items_b.
+
+    Returns:
+        list: [(chave_a, chave_b), ...] na ordem de items_a.
+    """
+    items_b = [(k, b) for k, b in items_b if b]
+    if not items_b: return []
+
+    if cell_size is None:
+        cell_size = estimate_cell_size(b for _, b in items_b)
+
+    grid = GridIndex(cell_size, tolerance)
+    for key, box in items_b:
+        grid.insert(key, box)
+
+    pairs = []
+    for key_a, box_a in items_a:
+        if not box_a: continue
+        for key_b in grid.query(box_a):
+            if key_b != key_a:
+                pairs.append((key_a, key_b))
+    return pairs
+
+
+def self_candidate_pairs(items, tolerance=0.0, cell_size=None):
+    """
+    Pares únicos (i < j na ordem de entrada) dentro de uma única lista.
+
+    Args:
+        items: Lista de (chave, caixa).
+
+    Returns:
+        list: [(chave_i, chave_j), ...]
+    """
+    items = [(k, b) for k, b in items if b]
+    if len(items) < 2: return []
+
+    if cell_size is None:
+        cell_size = estimate_cell_size(b for _, b in items)
+
+    order = {}
+    grid = GridIndex(cell_size, tolerance)
+    for idx, (key, box) in enumerate(items):
+        order[key] = idx
+        grid.insert(key, box)
+
+    pairs = []
+    for idx, (key, box) in enumerate(items):
+        hits = [k for k in grid.query(box) if order[k] > idx]
+        hits.sort(key=order.get)
+        for other in hits:
+            pairs.append((key, other))
+    return pairs
+
+
+class UnionFind(object):
+    """Conjuntos disjuntos (union-find) com compressão de caminho."""
+
+    def __init__(self, keys=None):
+        self._parent = {}
+        self._rank = {}
+        for key in keys or []:
+            self.add(key)
+
+    def add(self, key):
+        if key not in self._parent:
+            self._parent[key] = key
+            self._rank[key] = 0
+
+    def find(self, key):
+        self.add(key)
+        root = key
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[key] != root:
+            self._parent[key], key = root, self._parent[key]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb: return False
+        if self._rank[ra] < self._rank[rb]:
+            ra, rb = rb, ra
+        self._parent[rb] = ra
+        if self._rank[ra] == self._rank[rb]:
+            self._rank[ra] += 1
+        return True
+
+
+def connected_components(keys, pairs):
+    """
+    Agrupa chaves ligadas por pares (ex: caixas que se tocam).
+
+    Returns:
+        list: Listas de chaves, na ordem da primeira aparição em 'keys'.
+    """
+    uf = UnionFind(keys)
+    for a, b in pairs:
+        uf.union(a, b)
+
+    groups = {}
+    order = []
+    for key in keys:
+        root = uf.find(key)
+        if root not in groups:
+            groups[root] = []
+            order.append(root)
+        groups[root].append(key)
+    return [groups[r] for r in order]
+
+
+def endpoint_pairs(segments, tolerance=0.01):
+    """
+    Pares de segmentos que compartilham uma extremidade (canto ou emenda).
+    Hash de extremidades em células do tamanho da tolerância: custo ~linear.
+
+    Args:
+        segments: Lista de (chave, p0, p1); pontos (x, y[, z]), só X/Y contam.
+        tolerance (float): Distância máxima entre extremidades (pés).
+
+    Returns:
+        list: [(chave_i, chave_j), ...] únicos, i < j na ordem de entrada.
+    """
+    size = max(tolerance, 1e-6)
+    tol2 = tolerance * tolerance
+    cells = {}
+    points = []
+    for idx, (key, p0, p1) in enumerate(segments):
+        for p in (p0, p1):
+            cell = (int(math.floor(p[0] / size)), int(math.floor(p[1] / size)))
+            cells.setdefault(cell, []).append(len(points))
+            points.append((idx, p, cell))
+
+    found = set()
+    for idx, p, (ci, cj) in points:
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for other in cells.get((ci + di, cj + dj), ()):
+                    o_idx, q, _ = points[other]
+                    if o_idx <= idx: continue
+                    dx, dy = p[0] - q[0], p[1] - q[1]
+                    if dx * dx + dy * dy <= tol2:
+                        found.add((idx, o_idx))
+
+    return [(segments[i][0], segments[j][0]) for i, j in sorted(found)]
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Carimbo (Extensible Storage) dos elementos gerados pelos comandos.
+
+Cada elemento criado guarda: origem (ID do ambiente, ou chave do grupo de
+elementos de origem), comando e um hash do snapshot da origem + opções do
+diálogo. Numa nova execução:
+
+    - origem com o mesmo hash: nada a fazer (o ambiente é pulado);
+    - hash diferente: os elementos antigos são apagados e recriados;
+    - sem carimbo: criação normal.
+
+Assim, rodar de novo depois de uma alteração de projeto mexe só nos
+ambientes que mudaram, e não duplica os demais.
+
+Uso:
+    index = stamps.StampIndex(doc, CMD_ID)
+    digest = stamps.digest(snapshot, opcoes)
+    if index.is_current(source, digest): pular
+    index.delete_stale(source)
+    ... cria ...
+    stamps.stamp_all(criados, source, CMD_ID, digest)
+"""
+import hashlib
+from System import Guid, String
+from System.Collections.Generic import List
+from Autodesk.Revit.DB import FilteredElementCollector, ElementId
+from Autodesk.Revit.DB.ExtensibleStorage import (Schema, SchemaBuilder, AccessLevel, Entity,
+                                                 ExtensibleStorageFilter)
+from manalib import session
+
+SCHEMA_GUID = Guid("6f1c2a4e-9b3d-4c57-8e21-5a7d0b93c4f6")
+SCHEMA_NAME = "ManaToolsGeneratedBy"
+
+FIELD_SOURCE = "Source"
+FIELD_COMMAND = "Command"
+FIELD_HASH = "Hash"
+
+# Contador de carimbos gravados por documento (quem indexa carimbos sabe quando reler)
+GENERATION_STORE = "stamp_generation"
+
+# Casas decimais dos números no hash (abaixo disso, ruído de ponto flutuante)
+HASH_DIGITS = 6
+
+
+def get_schema():
+    """Schema dos carimbos (criado na primeira chamada da sessão)."""
+    schema = Schema.Lookup(SCHEMA_GUID)
+    if schema is not None: return schema
+
+    builder = SchemaBuilder(SCHEMA_GUID)
+    builder.SetSchemaName(SCHEMA_NAME)
+    builder.SetReadAccessLevel(AccessLevel.Public)
+    builder.SetWriteAccessLevel(AccessLevel.Public)
+    builder.SetDocumentation("Origem dos elementos gerados pela Maná Tools.")
+    for name in (FIELD_SOURCE, FIELD_COMMAND, FIELD_HASH):
+        builder.AddSimpleField(name, String)
+    return builder.Finish()
+
+
+def _canonical(value):
+    """Texto estável de dados puros (floats arredondados, dicts ordenados)."""
+    if isinstance(value, float):
+        return repr(round(value, HASH_DIGITS) + 0.0)
+    if isinstance(value, dict):
+        return "{" + ",".join("{}:{}".format(_canonical(k), _canonical(value[k]))
+                              for k in sorted(value.keys(), key=str)) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_canonical(v) for v in value) + "]"
+    if value is None or isinstance(value, (bool, int, str)):
+        return repr(value)
+    try:
+        # Elementos e ElementIds entram pelo ID
+        return "#{}".format(value.IntegerValue)
+    except AttributeError:
+        pass
+    try:
+        return "#{}".format(value.Id.IntegerValue)
+    except AttributeError:
+        return repr(value)
+
+
+def digest(*parts):
+    """Hash (hex) de snapshots e opções em dados puros."""
+    text = _canonical(list(parts))
+    if not isinstance(text, bytes):
+        text = text.encode("utf-8")
+    return hashlib.md5(text).hexdigest()
+
+
+def room_source(room):
+    """Origem de elementos gerados por ambiente."""
+    return str(room.Id.IntegerValue)
+
+
+def group_source(elements):
+    """Origem de elementos gerados a partir de vários elementos (ex: piso unificado)."""
+    return "+".join(str(i) for i in sorted(e.Id.IntegerValue for e in elements))
+
+
+def stamp(element, source, command_id, hash_value):
+    """Grava o carimbo no elemento (dentro de uma Transaction)."""
+    schema = get_schema()
+    entity = Entity(schema)
+    entity.Set[String](FIELD_SOURCE, str(source))
+    entity.Set[String](FIELD_COMMAND, command_id)
+    entity.Set[String](FIELD_HASH, hash_value)
+    element.SetEntity(entity)
+    store = session.get_store(GENERATION_STORE)
+    key = session.document_key(element.Document)
+    store[key] = store.get(key, 0) + 1
+
+
+def generation(doc):
+    """Muda sempre que algum elemento do documento é carimbado."""
+    return session.get_store(GENERATION_STORE).get(session.document_key(doc), 0)
+
+
+def stamp_all(elements, source, command_id, hash_value):
+    """Carimba vários elementos (None é ignorado). Retorna a quantidade."""
+    count = 0
+    for e in elements or []:
+        if e is None: continue
+        stamp(e, source, command_id, hash_value)
+        count += 1
+    return count
+
+
+def read(element):
+    """(origem, comando, hash) do elemento, ou None se não tem carimbo."""
+    schema = get_schema()
+    entity = element.GetEntity(schema)
+    if entity is None or not entity.IsValid(): return None
+    return (entity.Get[String](FIELD_SOURCE),
+            entity.Get[String](FIELD_COMMAND),
+            entity.Get[String](FIELD_HASH))
+
+
+def stamped_elements(doc):
+    """Todos os elementos carimbados do documento (uma coleta filtrada)."""
+    return FilteredElementCollector(doc).WherePasses(ExtensibleStorageFilter(SCHEMA_GUID))
+
+
+def sources_by_command(doc):
+    """{comando: set(origens)} de todos os carimbos do documento."""
+    result = {}
+    for elem in stamped_elements(doc):
+        info = read(elem)
+        if info: result.setdefault(info[1], set()).add(info[0])
+    return result
+
+
+def source_ids(source):
+    """IDs (int) de uma origem: '123' -> [123]; '1+2+3' -> [1, 2, 3]."""
+    ids = []
+    for part in str(source).split("+"):
+        try: ids.append(int(part))
+        except ValueError: pass
+    return ids
+
+
+class StampIndex(object):
+    """
+    Elementos carimbados por UM comando, agrupados por origem.
+    Uma única coleta filtrada pelo schema (ExtensibleStorageFilter).
+    """
+
+    def __init__(self, doc, command_id):
+        self.doc = doc
+        self.command_id = command_id
+        # origem -> [hashes, ids]
+        self._sources = {}
+        self.unchanged = 0
+        self.replaced = 0
+
+        for elem in stamped_elements(doc):
+            info = read(elem)
+            if info is None or info[1] != command_id: continue
+            entry = self._sources.setdefault(info[0], [set(), []])
+            entry[0].add(info[2])
+            entry[1].append(elem.Id.IntegerValue)
+
+    def __len__(self):
+        return len(self._sources)
+
+    def is_current(self, source, hash_value):
+        """True se a origem já tem elementos gerados com este mesmo hash."""
+        entry = self._sources.get(str(source))
+        current = entry is not None and entry[0] == set([hash_value])
+        if current: self.unchanged += 1
+        return current
+
+    def element_ids(self, source):
+        entry = self._sources.get(str(source))
+        return list(entry[1]) if entry else []
+
+    def delete_stale(self, source):
+        """Apaga os elementos gerados antes para a origem. Retorna a quantidade."""
+        entry = self._sources.pop(str(source), None)
+        if not entry: return 0
+        ids = [ElementId(i) for i in entry[1] if self.doc.GetElement(ElementId(i)) is not None]
+        if ids:
+            self.doc.Delete(List[ElementId](ids))
+            self.replaced += 1
+        return len(ids)
+
+    def summary(self):
+        return "{} sem alteração (pulados) | {} regenerados".format(self.unchanged, self.replaced)
@@ -43,7 +43,11 @@ def sanitize_filename(text):
             text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore')
             if isinstance(text, bytes):
                 text = text.decode('ASCII')
-    
+
+    # No CPython 3 o encode acima devolve bytes (no IronPython/Python 2, str)
+    if not isinstance(text, str):
+        text = text.decode('ASCII')
+
     # 2. Upper case
     text = text.upper()
     
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Offset e trim de cantos dos revestimentos (cebola) em Python puro.
+
+Cada segmento do limite do ambiente vira um dicionário com tuplas:
+    linha:  {"kind": LINE, "p0", "p1"}
+    arco:   {"kind": ARC, "p0", "p1", "center", "radius", "ccw"}
+    outro:  {"kind": OTHER, "p0", "p1"}  (elipses/splines: só as extremidades)
+
+Os cantos são calculados em forma fechada (reta/reta, reta/arco, arco/arco)
+e os arcos são aparados mantendo centro e raio. A API do Revit só entra
+depois, para criar as curvas finais.
+"""
+import math
+from manalib import geometry2d
+
+LINE = "line"
+ARC = "arc"
+OTHER = "other"
+
+# Mesmo alcance das antigas linhas auxiliares de ±1000 pés
+MAX_REACH = 1000.0
+
+# Tolerância (pés) para aceitar um vértice como "sobre o círculo"
+ON_ARC_TOLERANCE = 1e-6
+
+_TWO_PI = 2.0 * math.pi
+
+# Loops com área menor que isso (pés²) não têm orientação confiável
+MIN_LOOP_AREA = 1e-4
+
+
+def room_left_sides(point_loops, min_area=MIN_LOOP_AREA):
+    """
+    Lado do ambiente em cada loop do limite, pela área com sinal.
+
+    Os loops do GetBoundarySegments têm orientação consistente: o contorno
+    externo (maior área) é anti-horário e os internos (pilares, ilhas) são
+    horários, ou seja, o ambiente fica sempre à ESQUERDA do percurso.
+    A comparação com o contorno externo tolera loops com o sentido invertido.
+
+    Args:
+        point_loops (list): Por loop, os vértices (x, y) em ordem de percurso.
+
+    Returns:
+        list: Por loop, True (ambiente à esquerda), False (à direita)
+              ou None quando o loop é degenerado (use um teste pontual).
+    """
+    areas = [geometry2d.signed_area(pts) if len(pts) >= 3 else 0.0 for pts in point_loops]
+    if not areas: return []
+    outer = max(range(len(areas)), key=lambda i: abs(areas[i]))
+
+    sides = []
+    for i, area in enumerate(areas):
+        if abs(area) < min_area:
+            sides.append(None)
+        else:
+            sides.append((area > 0) == (i == outer))
+    return sides
+
+
+def line_segment(p0, p1):
+    return {"kind": LINE, "p0": p0, "p1": p1}
+
+
+def arc_segment(p0, p1, center, radius, ccw):
+    """Arco de p0 a p1 em torno de center (ccw = sentido anti-horário)."""
+    return {"kind": ARC, "p0": p0, "p1": p1, "center": center, "radius": radius, "ccw": ccw}
+
+
+def other_segment(p0, p1):
+    return {"kind": OTHER, "p0": p0, "p1": p1}
+
+
+def _chord_right(seg):
+    """Normal à direita da corda p0 -> p1."""
+    t = geometry2d.normalize(geometry2d.sub(seg["p1"], seg["p0"]))
+    return (t[1], -t[0])
+
+
+def offset_segment(seg, dist):
+    """
+    Desloca o segmento 'dist' pés para a DIREITA do sentido de percurso
+    (mesma convenção de Curve.CreateOffset(dist, XYZ.BasisZ)).
+
+    Returns:
+        dict: Segmento deslocado, ou None se degenerar (arco com raio <= 0).
+    """
+    if seg["kind"] == ARC:
+        # Anti-horário: a direita aponta para fora do círculo
+        radius = seg["radius"] + (dist if seg["ccw"] else -dist)
+        if radius <= 1e-6: return None
+        c = seg["center"]
+        k = radius / seg["radius"]
+        p0 = geometry2d.add(c, geometry2d.scale(geometry2d.sub(seg["p0"], c), k))
+        p1 = geometry2d.add(c, geometry2d.scale(geometry2d.sub(seg["p1"], c), k))
+        return arc_segment(p0, p1, c, radius, seg["ccw"])
+
+    n = geometry2d.scale(_chord_right(seg), dist)
+    moved = dict(seg)
+    moved["p0"] = geometry2d.add(seg["p0"], n)
+    moved["p1"] = geometry2d.add(seg["p1"], n)
+    return moved
+
+
+def corner_point(a, b, max_reach=MAX_REACH):
+    """
+    Vértice entre o fim de 'a' e o início de 'b' (curvas estendidas).
+
+    Returns:
+        tuple: (x, y) ou None se não houver interseção confiável
+               (paralelas, curvas que não se cortam, alcance excedido).
+    """
+    near = geometry2d.scale(geometry2d.add(a["p1"], b["p0"]), 0.5)
+    ka, kb = a["kind"], b["kind"]
+    pt = None
+
+    if ka == LINE and kb == LINE:
+        try:
+            va = geometry2d.normalize(geometry2d.sub(a["p1"], a["p0"]))
+            vb = geometry2d.normalize(geometry2d.sub(b["p1"], b["p0"]))
+        except ValueError:
+            return None
+        pt = geometry2d.line_intersection(a["p0"], va, b["p0"], vb)
+
+    elif (ka, kb) in ((LINE, ARC), (ARC, LINE)):
+        line, arc = (a, b) if ka == LINE else (b, a)
+        try:
+            v = geometry2d.normalize(geometry2d.sub(line["p1"], line["p0"]))
+        except ValueError:
+            return None
+        pts = geometry2d.line_circle_intersections(line["p0"], v, arc["center"], arc["radius"])
+        pt = geometry2d.nearest(pts, near)
+
+    elif ka == ARC and kb == ARC:
+        pts = geometry2d.circle_intersections(a["center"], a["radius"], b["center"], b["radius"])
+        pt = geometry2d.nearest(pts, near)
+
+    if pt is None or geometry2d.distance(pt, near) > max_reach:
+        return None
+    return pt
+
+
+def _angle(center, p):
+    return math.atan2(p[1] - center[1], p[0] - center[0])
+
+
+def _trim_arc(seg, start, end, min_length):
+    """Arco com novas extremidades (mesmo centro/raio). None se degenerar."""
+    c, r = seg["center"], seg["radius"]
+    # Vértice de fallback (fora do círculo) não serve: mantém a extremidade do offset
+    if abs(geometry2d.distance(start, c) - r) > ON_ARC_TOLERANCE: start = seg["p0"]
+    if abs(geometry2d.distance(end, c) - r) > ON_ARC_TOLERANCE: end = seg["p1"]
+    if geometry2d.distance(start, end) < min_length: return None
+
+    a0, a1 = _angle(c, start), _angle(c, end)
+    span = (a1 - a0) % _TWO_PI if seg["ccw"] else (a0 - a1) % _TWO_PI
+    if span * r < min_length: return None
+
+    mid = a0 + span / 2.0 if seg["ccw"] else a0 - span / 2.0
+    return (ARC, start, end, (c[0] + r * math.cos(mid), c[1] + r * math.sin(mid)))
+
+
+def _final(seg, start, end, min_length):
+    """Curva final de um segmento: (LINE, p0, p1) | (ARC, p0, p1, p_meio) | (OTHER,) | None."""
+    if seg["kind"] == LINE:
+        if geometry2d.distance(start, end) < min_length: return None
+        return (LINE, start, end)
+    if seg["kind"] == ARC:
+        return _trim_arc(seg, start, end, min_length)
+    return (OTHER,)
+
+
+def trim_loop(segments, min_length=0.01, max_reach=MAX_REACH):
+    """
+    Fecha os cantos de um loop de segmentos JÁ deslocados.
+    O vértice i fica entre o segmento i e o i+1 (cíclico); sem interseção,
+    usa a média das extremidades (fresta/sobreposição, mas não falha).
+
+    Returns:
+        list: [(índice, curva_final), ...] - ver _final. Segmentos nulos são omitidos.
+    """
+    n = len(segments)
+    if n < 2:
+        # Sem vizinhos, sem trim
+        result = []
+        for i, seg in enumerate(segments):
+            final = _final(seg, seg["p0"], seg["p1"], min_length)
+            if final: result.append((i, final))
+        return result
+
+    vertices = []
+    for i in range(n):
+        a, b = segments[i], segments[(i + 1) % n]
+        pt = corner_point(a, b, max_reach)
+        if pt is None:
+            pt = geometry2d.scale(geometry2d.add(a["p1"], b["p0"]), 0.5)
+        vertices.append(pt)
+
+    result = []
+    for i in range(n):
+        final = _final(segments[i], vertices[i - 1], vertices[i], min_length)
+        if final: result.append((i, final))
+    return result
@@ -19,5 +19,18 @@ def _notify():
         print("ManaTools startup: falha ao logar: {}".format(log_err))
 
 
+def _register_finish_sync():
+    """IUpdater de sincronização de acabamentos (opcional, desligado por padrão)."""
+    try:
+        cfg = script.get_config("manatools_finish_sync")
+        if not getattr(cfg, "enabled", False): return
+        from manalib import finish_updater
+        finish_updater.register(__revit__.Application.ActiveAddInId)
+        script.get_logger().info("ManaTools: sincronização de acabamentos ativa.")
+    except Exception as sync_err:
+        print("ManaTools startup: falha ao registrar sincronização: {}".format(sync_err))
+
+
 _notify()
+_register_finish_sync()
 
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks dos caminhos quentes da manalib sobre modelos sintéticos.
+
+    python dev/benchmarks.py                     # todas as escalas, compara com a baseline
+    python dev/benchmarks.py --scales 10,100     # só as escalas pequenas
+    python dev/benchmarks.py --only floor_union  # um benchmark
+    python dev/benchmarks.py --save-baseline     # grava os resultados como nova baseline
+
+Cada benchmark tem um preparo (não cronometrado: modelo, caches limpos,
+snapshots da API falsa) e uma execução (cronometrada). Mede:
+
+    per_sec  - itens por segundo (melhor de REPEAT rodadas)
+    peak_kb  - pico de memória Python alocada durante UMA execução (tracemalloc)
+
+Resultados vão para dev/results/latest.json. Comparação com dev/baselines.json:
+throughput abaixo de (1 - limite) ou pico acima de (1 + limite) é regressão
+(código de saída 1). Baselines só valem para a máquina em que foram gravadas.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+import headless
+import synthetic
+
+from Autodesk.Revit.DB import Line, Arc
+from manalib import (room_geometry, openings, geometry2d, flooring, wall_trim, joinery, text_utils,
+                     param_resolver)
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Relógio de maior resolução disponível (perf_counter não existe no Python 2)
+_clock = getattr(time, "perf_counter", time.time)
+
+DEV_DIR = headless.DEV_DIR
+BASELINE_FILE = os.path.join(DEV_DIR, "baselines.json")
+RESULTS_FILE = os.path.join(DEV_DIR, "results", "latest.json")
+
+# Ambientes -> (níveis, linhas, colunas) do edifício sintético
+SCALES = {
+    10: (1, 2, 5),
+    100: (1, 10, 10),
+    1000: (4, 10, 25),
+    10000: (10, 25, 40),
+}
+
+# Tolerância relativa antes de acusar regressão. Entre processos o mesmo
+# código varia ~20% numa máquina compartilhada; abaixo disso é ruído.
+DEFAULT_THRESHOLD = 0.30
+
+# Picos de memória abaixo disso (KB) são ruído do alocador
+MEMORY_SLACK_KB = 64
+
+# Cada rodada repete a execução até somar pelo menos MIN_ROUND_SECONDS
+REPEAT = 5
+MIN_ROUND_SECONDS = 0.2
+
+
+# --- Benchmarks ---
+# Cada um: prepare(model) -> estado; run(estado) -> itens processados.
+
+def _clear_caches(doc):
+    room_geometry.get_cache(doc).clear()
+    param_resolver.get_resolver(doc).clear()
+
+
+def _cuts_skirting(opening):
+    """Mesmo filtro do Criar Rodapé: portas sempre; janelas com peitoril no chão."""
+    if opening.kind == openings.DOOR: return True
+    return opening.sill is None or opening.sill <= 0.5
+
+
+def prepare_skirting(model):
+    _clear_caches(model.doc)
+    return model
+
+
+def run_skirting(model):
+    """Limites + vãos por parede + recorte (snapshot/compute do Criar Rodapé)."""
+    doc = model.doc
+    geo_cache = room_geometry.get_cache(doc)
+    index = openings.OpeningIndex(doc)
+    gap_margin = 0.0
+    pieces = 0
+    for room in model.rooms:
+        for segments in geo_cache.boundary_loops(room):
+            for curve, host_id in segments:
+                p0 = curve.GetEndPoint(0)
+                p1 = curve.GetEndPoint(1)
+                a = (p0.X, p0.Y, p0.Z)
+                b = (p1.X, p1.Y, p1.Z)
+                wall = geo_cache.get_element(host_id)
+                found = index.query(wall, a, b, gap_margin + 1.0, predicate=_cuts_skirting) if wall else []
+                pieces += len(geometry2d.segment_minus_openings(a, b, found, gap_margin))
+    return len(model.rooms)
+
+
+def prepare_floor_union(model):
+    """Contornos dos ambientes + pontes das portas (o que o Criar Piso 2D lê da API)."""
+    doc = model.doc
+    _clear_caches(doc)
+    regions = [flooring.snapshot_room_outline(doc, r) for r in model.rooms]
+    for door in model.doors:
+        snap = flooring.snapshot_door_bridge(doc, door)
+        if snap:
+            regions.append([flooring.door_bridge_rectangle(snap, 0.16, flooring.BRIDGE_SNAP_OVERLAP)])
+    return (len(model.rooms), [r for r in regions if r])
+
+
+def run_floor_union(state):
+    """União 2D com merge_all (contraparte sem sólidos de flooring.unify_solids)."""
+    count, regions = state
+    flooring.union_outlines(regions, merge_all=True, workers=1)
+    return count
+
+
+def _trim_segment(curve, p0, p1):
+    """Mesma conversão do Criar Revestimento (snapshot_segment)."""
+    if isinstance(curve, Line):
+        return wall_trim.line_segment((p0.X, p0.Y), (p1.X, p1.Y))
+    if isinstance(curve, Arc):
+        c = curve.Center
+        return wall_trim.arc_segment((p0.X, p0.Y), (p1.X, p1.Y), (c.X, c.Y), curve.Radius, curve.Normal.Z > 0)
+    return wall_trim.other_segment((p0.X, p0.Y), (p1.X, p1.Y))
+
+
+def prepare_corner_trim(model):
+    """Loops do limite como segmentos wall_trim (snapshot do Criar Revestimento)."""
+    geo_cache = room_geometry.get_cache(model.doc)
+    geo_cache.clear()
+    rooms = []
+    for room in model.rooms:
+        loops = []
+        for segments in geo_cache.boundary_loops(room):
+            points = []
+            segs = []
+            for curve, _ in segments:
+                p0 = curve.GetEndPoint(0)
+                p1 = curve.GetEndPoint(1)
+                points.append((p0.X, p0.Y))
+                segs.append(_trim_segment(curve, p0, p1))
+                if not isinstance(curve, Line):
+                    m = curve.Evaluate(0.5, True)
+                    points.append((m.X, m.Y))
+            loops.append((points, segs))
+        rooms.append(loops)
+    return (rooms, model.types["finish_wall"].Width)
+
+
+def run_corner_trim(state):
+    """Lado do ambiente + offset + trim dos cantos (compute do Criar Revestimento)."""
+    rooms, width = state
+    for loops in rooms:
+        sides = wall_trim.room_left_sides([points for points, _ in loops])
+        for (_, segs), room_left in zip(loops, sides):
+            dist = -(width / 2.0) if room_left else width / 2.0
+            moved = [wall_trim.offset_segment(s, dist) for s in segs]
+            wall_trim.trim_loop([m for m in moved if m is not None])
+    return len(rooms)
+
+
+def prepare_joinery_names(model):
+    _clear_caches(model.doc)
+    return [op.Symbol for op in model.doors + model.windows]
+
+
+def run_joinery_names(symbols):
+    """Nome 'MARCA - LxH' por vão (Renomear Esquadrias; leitura com cache por tipo)."""
+    for symbol in symbols:
+        joinery.generate_new_name(symbol)
+    return len(symbols)
+
+
+def prepare_sanitize(model):
+    return [u"PL-{:04d} - {} (Revisão {}) / Térreo".format(i, room.Level.Name, i % 7)
+            for i, room in enumerate(model.rooms)]
+
+
+def run_sanitize(names):
+    """Nomes de arquivo das folhas (Exportar PDFs): um por ambiente."""
+    for name in names:
+        text_utils.sanitize_filename(name)
+    return len(names)
+
+
+BENCHMARKS = [
+    ("skirting_segments", prepare_skirting, run_skirting),
+    ("floor_union", prepare_floor_union, run_floor_union),
+    ("corner_trim", prepare_corner_trim, run_corner_trim),
+    ("joinery_names", prepare_joinery_names, run_joinery_names),
+    ("sanitize_filename", prepare_sanitize, run_sanitize),
+]
+
+
+# --- Medição ---
+def _time_round(prepare, run, model):
+    """Segundos por execução: repete (preparo fora do relógio) até MIN_ROUND_SECONDS."""
+    elapsed = 0.0
+    calls = 0
+    items = 0
+    while elapsed < MIN_ROUND_SECONDS or calls == 0:
+        state = prepare(model)
+        gc.collect()
+        # Como o timeit: sem coletas do GC no meio da medição
+        gc.disable()
+        try:
+            start = _clock()
+            items = run(state)
+            elapsed += _clock() - start
+        finally:
+            gc.enable()
+        calls += 1
+    return elapsed / calls, items
+
+
+def _peak_kb(prepare, run, model):
+    if tracemalloc is None: return None
+    state = prepare(model)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024.0, 1)
+
+
+def measure(name, prepare, run, model, scale, repeat=REPEAT):
+    best = None
+    items = 0
+    for _ in range(repeat):
+        seconds, items = _time_round(prepare, run, model)
+        best = seconds if best is None else min(best, seconds)
+    return {
+        "benchmark": name,
+        "scale": scale,
+        "items": items,
+        "seconds": round(best, 6),
+        "per_sec": round(items / best, 1) if best > 0 else None,
+        "peak_kb": _peak_kb(prepare, run, model),
+    }
+
+
+def machine_info():
+    return {
+        "python": platform.python_implementation() + " " + platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def run_suite(scales, only=None, repeat=REPEAT, log=print, pairs=None):
+    """pairs: set((benchmark, escala)) - mede só essas combinações."""
+    results = []
+    for scale in scales:
+        if pairs is not None and not any(s == scale for _, s in pairs): continue
+        levels, rows, cols = SCALES[scale]
+        start = time.time()
+        model = synthetic.build(levels, rows, cols)
+        log("Escala {} ({} elementos, modelo em {:.1f}s)".format(scale, len(model.doc), time.time() - start))
+        for name, prepare, run in BENCHMARKS:
+            if only and name not in only: continue
+            if pairs is not None and (name, scale) not in pairs: continue
+            # 10.000 ambientes: uma rodada basta (e a suíte não leva minutos a mais)
+            result = measure(name, prepare, run, model, scale, 1 if scale >= 10000 else repeat)
+            log("  {:<20} {:>12} itens/s  {:>10} KB".format(name, result["per_sec"], result["peak_kb"]))
+            results.append(result)
+    return results
+
+
+# --- Baselines ---
+def _key(result):
+    return "{}@{}".format(result["benchmark"], result["scale"])
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path): return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_FILE, threshold=DEFAULT_THRESHOLD):
+    """Mescla os resultados na baseline (chaves não medidas agora ficam como estavam)."""
+    data = load_baseline(path) or {"threshold": threshold, "results": {}}
+    data["machine"] = machine_info()
+    for r in results:
+        data["results"][_key(r)] = {"per_sec": r["per_sec"], "peak_kb": r["peak_kb"]}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, threshold=None):
+    """
+    Returns:
+        list: [(chave, métrica, baseline, atual, variação), ...] só das regressões.
+    """
+    if threshold is None: threshold = baseline.get("threshold", DEFAULT_THRESHOLD)
+    regressions = []
+    for r in results:
+        base = baseline["results"].get(_key(r))
+        if not base: continue
+        if base.get("per_sec") and r["per_sec"] is not None:
+            if r["per_sec"] < base["per_sec"] * (1.0 - threshold):
+                regressions.append((_key(r), "per_sec", base["per_sec"], r["per_sec"],
+                                    r["per_sec"] / base["per_sec"] - 1.0))
+        if base.get("peak_kb") is not None and r["peak_kb"] is not None:
+            limit = max(base["peak_kb"] * (1.0 + threshold), base["peak_kb"] + MEMORY_SLACK_KB)
+            if r["peak_kb"] > limit:
+                regressions.append((_key(r), "peak_kb", base["peak_kb"], r["peak_kb"],
+                                    r["peak_kb"] / base["peak_kb"] - 1.0 if base["peak_kb"] else 0.0))
+    return regressions
+
+
+def write_results(results, path=RESULTS_FILE):
+    folder = os.path.dirname(path)
+    if not os.path.isdir(folder): os.makedirs(folder)
+    with open(path, "w") as f:
+        json.dump({"machine": machine_info(), "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                   "results": results}, f, indent=2)
+        f.write("\n")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da manalib (Revit falso).")
+    parser.add_argument("--scales", default=",".join(str(s) for s in sorted(SCALES)),
+                        help="Escalas em ambientes, separadas por vírgula.")
+    parser.add_argument("--only", default="", help="Benchmarks separados por vírgula.")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Variação tolerada (0.25 = 25%%). Padrão: o da baseline.")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown: parser.error("escalas desconhecidas: {}".format(unknown))
+    only = set(n for n in args.only.split(",") if n) or None
+
+    results = run_suite(scales, only, args.repeat)
+    print("Resultados: {}".format(write_results(results, args.output)))
+
+    if args.save_baseline:
+        save_baseline(results, threshold=args.threshold or DEFAULT_THRESHOLD)
+        print("Baseline gravada: {}".format(BASELINE_FILE))
+        return 0
+
+    baseline = load_baseline()
+    if baseline is None:
+        print("Sem baseline (rode com --save-baseline).")
+        return 0
+    if baseline.get("machine") != machine_info():
+        print("Aviso: baseline gravada em outra máquina/Python: {}".format(baseline.get("machine")))
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        # Confirma: mede de novo só o que regrediu e fica com a melhor medição
+        print("Confirmando {} possível(is) regressão(ões)...".format(len(regressions)))
+        pairs = set((key.split("@")[0], int(key.split("@")[1])) for key, _, _, _, _ in regressions)
+        retry = dict((_key(r), r) for r in run_suite(scales, only, args.repeat, pairs=pairs))
+        for r in results:
+            again = retry.get(_key(r))
+            if again is None: continue
+            r["per_sec"] = max(r["per_sec"], again["per_sec"])
+            if r["peak_kb"] is not None and again["peak_kb"] is not None:
+                r["peak_kb"] = min(r["peak_kb"], again["peak_kb"])
+        write_results(results, args.output)
+        regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print("Sem regressões.")
+        return 0
+    print("REGRESSÕES:")
+    for key, metric, base, current, change in regressions:
+        print("  {:<28} {:<8} {:>12} -> {:>12} ({:+.0%})".format(key, metric, base, current, change))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
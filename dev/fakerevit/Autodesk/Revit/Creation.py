@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""Autodesk.Revit.Creation: dados de criação em lote de instâncias."""
+
+
+class FamilyInstanceCreationData(object):
+    def __init__(self, curve, symbol, level, structural_type):
+        self.Curve = curve
+        self.Symbol = symbol
+        self.Level = level
+        self.StructuralType = structural_type
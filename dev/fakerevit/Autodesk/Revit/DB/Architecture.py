@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+"""Autodesk.Revit.DB.Architecture (Room vive em _model)."""
+from Autodesk.Revit.DB._model import Room
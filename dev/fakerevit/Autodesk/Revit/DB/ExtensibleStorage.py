@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Extensible Storage do Revit falso: schemas em memória, Entity com campos simples."""
+
+
+class AccessLevel(object):
+    Public = "Public"
+    Vendor = "Vendor"
+    Application = "Application"
+
+
+class Schema(object):
+    _registry = {}
+
+    def __init__(self, guid, name, fields):
+        self.GUID = guid
+        self.SchemaName = name
+        self._fields = list(fields)
+
+    @staticmethod
+    def Lookup(guid):
+        return Schema._registry.get(guid)
+
+    @staticmethod
+    def ListSchemas():
+        return list(Schema._registry.values())
+
+    def ListFields(self):
+        return list(self._fields)
+
+
+class SchemaBuilder(object):
+    def __init__(self, guid):
+        self._guid = guid
+        self._name = ""
+        self._fields = []
+
+    def SetSchemaName(self, name):
+        self._name = name
+
+    def SetReadAccessLevel(self, level):
+        pass
+
+    def SetWriteAccessLevel(self, level):
+        pass
+
+    def SetDocumentation(self, text):
+        pass
+
+    def AddSimpleField(self, name, field_type):
+        self._fields.append(name)
+
+    def Finish(self):
+        schema = Schema(self._guid, self._name, self._fields)
+        Schema._registry[self._guid] = schema
+        return schema
+
+
+class _GenericMethod(object):
+    """entity.Set[String](...) / entity.Get[String](...): o tipo é ignorado."""
+
+    def __init__(self, func):
+        self._func = func
+
+    def __getitem__(self, field_type):
+        return self._func
+
+    def __call__(self, *args):
+        return self._func(*args)
+
+
+class Entity(object):
+    def __init__(self, schema=None):
+        self.Schema = schema
+        self._values = {}
+        self.Set = _GenericMethod(self._set)
+        self.Get = _GenericMethod(self._get)
+
+    def IsValid(self):
+        return self.Schema is not None
+
+    def _set(self, name, value):
+        if name not in self.Schema.ListFields():
+            raise KeyError(name)
+        self._values[name] = value
+
+    def _get(self, name):
+        return self._values.get(name)
+
+    def copy(self):
+        other = Entity(self.Schema)
+        other._values = dict(self._values)
+        return other
+
+
+class ExtensibleStorageFilter(object):
+    def __init__(self, guid, inverted=False):
+        self._guid = guid
+        self._inverted = inverted
+
+    def PassesElement(self, elem):
+        return (self._guid in elem._entities) != self._inverted
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Autodesk.Revit.DB.Structure (só o StructuralType)."""
+
+
+class StructuralType(object):
+    NonStructural = "NonStructural"
+    Beam = "Beam"
+    Column = "Column"
+    Footing = "Footing"
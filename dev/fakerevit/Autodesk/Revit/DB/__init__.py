@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""Autodesk.Revit.DB falso: geometria (_geometry) + elementos e documento (_model)."""
+from Autodesk.Revit.DB._geometry import *
+from Autodesk.Revit.DB._model import *
+from Autodesk.Revit.DB import Structure, ExtensibleStorage, Architecture
@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""Geometria do Revit falso: XYZ, UV, Transform, Line, Arc, CurveLoop, Plane, caixas."""
+import math
+
+# Mesma ordem de grandeza das tolerâncias do Revit (pés)
+VERTEX_TOLERANCE = 0.0005233832795
+SHORT_CURVE_TOLERANCE = 0.00256
+ANGLE_TOLERANCE = 0.00174532925199433
+
+# Passo angular da tesselação de arcos (rad)
+TESSELLATE_STEP = math.pi / 24.0
+
+
+class ArgumentsInconsistentException(Exception):
+    pass
+
+
+class XYZ(object):
+    """Ponto/vetor 3D. Igualdade por referência, como no Revit: use IsAlmostEqualTo."""
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.X = float(x)
+        self.Y = float(y)
+        self.Z = float(z)
+
+    def __getitem__(self, i):
+        return (self.X, self.Y, self.Z)[i]
+
+    def Add(self, o):
+        return XYZ(self.X + o.X, self.Y + o.Y, self.Z + o.Z)
+
+    def Subtract(self, o):
+        return XYZ(self.X - o.X, self.Y - o.Y, self.Z - o.Z)
+
+    def Multiply(self, k):
+        return XYZ(self.X * k, self.Y * k, self.Z * k)
+
+    def Divide(self, k):
+        return XYZ(self.X / k, self.Y / k, self.Z / k)
+
+    def Negate(self):
+        return XYZ(-self.X, -self.Y, -self.Z)
+
+    __add__ = Add
+    __sub__ = Subtract
+    __mul__ = Multiply
+    __rmul__ = Multiply
+    __truediv__ = Divide
+    __div__ = Divide
+    __neg__ = Negate
+
+    def DotProduct(self, o):
+        return self.X * o.X + self.Y * o.Y + self.Z * o.Z
+
+    def CrossProduct(self, o):
+        return XYZ(self.Y * o.Z - self.Z * o.Y, self.Z * o.X - self.X * o.Z, self.X * o.Y - self.Y * o.X)
+
+    def GetLength(self):
+        return math.sqrt(self.DotProduct(self))
+
+    def IsZeroLength(self):
+        return self.GetLength() < 1e-9
+
+    def IsUnitLength(self):
+        return abs(self.GetLength() - 1.0) < 1e-9
+
+    def Normalize(self):
+        n = self.GetLength()
+        return self.Divide(n) if n > 1e-12 else XYZ()
+
+    def DistanceTo(self, o):
+        return self.Subtract(o).GetLength()
+
+    def IsAlmostEqualTo(self, o, tolerance=1e-9):
+        return self.DistanceTo(o) <= tolerance
+
+    def AngleTo(self, o):
+        d = self.Normalize().DotProduct(o.Normalize())
+        return math.acos(max(-1.0, min(1.0, d)))
+
+    def ToString(self):
+        return "({:.9f}, {:.9f}, {:.9f})".format(self.X, self.Y, self.Z)
+
+    def __repr__(self):
+        return "XYZ({!r}, {!r}, {!r})".format(self.X, self.Y, self.Z)
+    __str__ = ToString
+
+
+XYZ.Zero = XYZ(0, 0, 0)
+XYZ.BasisX = XYZ(1, 0, 0)
+XYZ.BasisY = XYZ(0, 1, 0)
+XYZ.BasisZ = XYZ(0, 0, 1)
+
+
+class UV(object):
+    __slots__ = ("U", "V")
+
+    def __init__(self, u=0.0, v=0.0):
+        self.U = float(u)
+        self.V = float(v)
+
+    def __repr__(self):
+        return "UV({!r}, {!r})".format(self.U, self.V)
+
+
+class Transform(object):
+    """Transformação afim (origem + três eixos)."""
+
+    def __init__(self, other=None):
+        if other is None:
+            self.Origin, self.BasisX, self.BasisY, self.BasisZ = XYZ(), XYZ.BasisX, XYZ.BasisY, XYZ.BasisZ
+        else:
+            self.Origin, self.BasisX, self.BasisY, self.BasisZ = other.Origin, other.BasisX, other.BasisY, other.BasisZ
+
+    @staticmethod
+    def CreateTranslation(vector):
+        t = Transform()
+        t.Origin = vector
+        return t
+
+    @staticmethod
+    def CreateRotation(axis, angle):
+        """Rotação em torno de um eixo pela origem (Rodrigues)."""
+        k = axis.Normalize()
+        c, s = math.cos(angle), math.sin(angle)
+
+        def rot(v):
+            return v.Multiply(c).Add(k.CrossProduct(v).Multiply(s)).Add(k.Multiply(k.DotProduct(v) * (1 - c)))
+        t = Transform()
+        t.BasisX, t.BasisY, t.BasisZ = rot(XYZ.BasisX), rot(XYZ.BasisY), rot(XYZ.BasisZ)
+        return t
+
+    def OfVector(self, v):
+        return self.BasisX.Multiply(v.X).Add(self.BasisY.Multiply(v.Y)).Add(self.BasisZ.Multiply(v.Z))
+
+    def OfPoint(self, p):
+        return self.Origin.Add(self.OfVector(p))
+
+    def Multiply(self, other):
+        t = Transform()
+        t.Origin = self.OfPoint(other.Origin)
+        t.BasisX, t.BasisY, t.BasisZ = self.OfVector(other.BasisX), self.OfVector(other.BasisY), self.OfVector(other.BasisZ)
+        return t
+
+
+Transform.Identity = Transform()
+
+
+class IntersectionResult(object):
+    def __init__(self, point, parameter, distance):
+        self.XYZPoint = point
+        self.Parameter = parameter
+        self.Distance = distance
+
+
+class Curve(object):
+    """Base das curvas. Parâmetro 'bruto' = comprimento (Line) ou ângulo (Arc)."""
+
+    IsBound = True
+
+    def GetEndPoint(self, index):
+        return self._p0 if index == 0 else self._p1
+
+    def GetEndParameter(self, index):
+        return self._t0 if index == 0 else self._t1
+
+    def ComputeRawParameter(self, normalized):
+        return self._t0 + (self._t1 - self._t0) * normalized
+
+    def ComputeNormalizedParameter(self, raw):
+        span = self._t1 - self._t0
+        return (raw - self._t0) / span if span else 0.0
+
+    def Evaluate(self, parameter, normalized):
+        return self._at(self.ComputeRawParameter(parameter) if normalized else parameter)
+
+    def ComputeDerivatives(self, parameter, normalized):
+        """Transform com Origin = ponto e BasisX = tangente (1ª derivada)."""
+        raw = self.ComputeRawParameter(parameter) if normalized else parameter
+        t = Transform()
+        t.Origin = self._at(raw)
+        t.BasisX = self._tangent(raw)
+        t.BasisZ = XYZ.BasisZ
+        t.BasisY = t.BasisZ.CrossProduct(t.BasisX)
+        return t
+
+    def Distance(self, point):
+        return self.Project(point).Distance
+
+    def CreateTransformed(self, transform):
+        raise NotImplementedError
+
+    def Clone(self):
+        return self.CreateTransformed(Transform.Identity)
+
+
+class Line(Curve):
+    """Segmento de reta (ou reta ilimitada, via CreateUnbound)."""
+
+    def __init__(self, p0, p1, bound=True):
+        self._p0, self._p1 = p0, p1
+        self.IsBound = bound
+        self.Direction = p1.Subtract(p0).Normalize()
+        self.Origin = p0
+        self._t0, self._t1 = 0.0, p1.DistanceTo(p0)
+
+    @staticmethod
+    def CreateBound(p0, p1):
+        if p0.DistanceTo(p1) < SHORT_CURVE_TOLERANCE:
+            raise ArgumentsInconsistentException("Curve length is too small for Revit's tolerance")
+        return Line(p0, p1)
+
+    @staticmethod
+    def CreateUnbound(origin, direction):
+        return Line(origin, origin.Add(direction.Normalize()), bound=False)
+
+    @property
+    def Length(self):
+        return self._t1
+
+    def _at(self, raw):
+        return self._p0.Add(self.Direction.Multiply(raw))
+
+    def _tangent(self, raw):
+        return self.Direction
+
+    def Tessellate(self):
+        return [self._p0, self._p1]
+
+    def Project(self, point):
+        raw = point.Subtract(self._p0).DotProduct(self.Direction)
+        if self.IsBound: raw = max(0.0, min(self._t1, raw))
+        p = self._at(raw)
+        return IntersectionResult(p, raw, p.DistanceTo(point))
+
+    def CreateTransformed(self, transform):
+        return Line(transform.OfPoint(self._p0), transform.OfPoint(self._p1), self.IsBound)
+
+    def CreateReversed(self):
+        return Line(self._p1, self._p0, self.IsBound)
+
+    def CreateOffset(self, distance, reference):
+        """Desloca para tangente x referência (como Curve.CreateOffset)."""
+        v = self.Direction.CrossProduct(reference).Normalize().Multiply(distance)
+        return Line(self._p0.Add(v), self._p1.Add(v), self.IsBound)
+
+    def __repr__(self):
+        return "Line({} -> {})".format(self._p0, self._p1)
+
+
+class Arc(Curve):
+    """Arco num plano horizontal ou não (centro, raio, eixos X/Y, ângulos)."""
+
+    def __init__(self, center, radius, a0, a1, x_axis, y_axis):
+        self.Center = center
+        self.Radius = float(radius)
+        self.XDirection = x_axis.Normalize()
+        self.YDirection = y_axis.Normalize()
+        self.Normal = self.XDirection.CrossProduct(self.YDirection)
+        self._t0, self._t1 = a0, a1
+        self._p0, self._p1 = self._at(a0), self._at(a1)
+
+    @staticmethod
+    def Create(*args):
+        """Create(início, fim, ponto_no_arco) | Create(centro, raio, a0, a1, eixo_x, eixo_y)."""
+        if len(args) == 3:
+            return Arc._through(*args)
+        if len(args) == 6:
+            return Arc(*args)
+        raise ArgumentsInconsistentException("Arc.Create: assinatura não suportada")
+
+    @staticmethod
+    def _through(p0, p1, pm):
+        # Circuncentro no plano dos três pontos
+        a, b = p0.Subtract(pm), p1.Subtract(pm)
+        axb = a.CrossProduct(b)
+        d = 2.0 * axb.DotProduct(axb)
+        if d < 1e-18:
+            raise ArgumentsInconsistentException("Pontos colineares")
+        center = pm.Add(b.Multiply(a.DotProduct(a)).Subtract(a.Multiply(b.DotProduct(b))).CrossProduct(axb).Divide(d))
+        normal = axb.Normalize().Negate()
+        x_axis = p0.Subtract(center).Normalize()
+        y_axis = normal.CrossProduct(x_axis)
+        radius = p0.DistanceTo(center)
+
+        def angle(p):
+            v = p.Subtract(center)
+            ang = math.atan2(v.DotProduct(y_axis), v.DotProduct(x_axis))
+            return ang if ang >= 0 else ang + 2 * math.pi
+        a1, am = angle(p1), angle(pm)
+        if am > a1:
+            # O ponto do meio está do outro lado: inverte o sentido
+            normal = normal.Negate()
+            y_axis = y_axis.Negate()
+            a1 = 2 * math.pi - a1
+        return Arc(center, radius, 0.0, a1, x_axis, y_axis)
+
+    @property
+    def Length(self):
+        return self.Radius * abs(self._t1 - self._t0)
+
+    def _at(self, raw):
+        return self.Center.Add(self.XDirection.Multiply(self.Radius * math.cos(raw)))\
+                          .Add(self.YDirection.Multiply(self.Radius * math.sin(raw)))
+
+    def _tangent(self, raw):
+        return self.XDirection.Multiply(-math.sin(raw)).Add(self.YDirection.Multiply(math.cos(raw)))
+
+    def Tessellate(self):
+        n = max(2, int(math.ceil(abs(self._t1 - self._t0) / TESSELLATE_STEP)))
+        return [self._at(self._t0 + (self._t1 - self._t0) * i / float(n)) for i in range(n + 1)]
+
+    def Project(self, point):
+        v = point.Subtract(self.Center)
+        raw = math.atan2(v.DotProduct(self.YDirection), v.DotProduct(self.XDirection))
+        if raw < self._t0: raw += 2 * math.pi
+        raw = max(self._t0, min(self._t1, raw))
+        p = self._at(raw)
+        return IntersectionResult(p, raw, p.DistanceTo(point))
+
+    def CreateTransformed(self, transform):
+        return Arc(transform.OfPoint(self.Center), self.Radius, self._t0, self._t1,
+                   transform.OfVector(self.XDirection), transform.OfVector(self.YDirection))
+
+    def CreateReversed(self):
+        # Mesmo arco percorrido ao contrário: espelha o eixo Y
+        return Arc(self.Center, self.Radius, -self._t1, -self._t0, self.XDirection, self.YDirection.Negate())
+
+    def CreateOffset(self, distance, reference):
+        # tangente x referência aponta para fora quando o arco é anti-horário em torno da referência
+        outward = self.Normal.DotProduct(reference) > 0
+        radius = self.Radius + (distance if outward else -distance)
+        return Arc(self.Center, radius, self._t0, self._t1, self.XDirection, self.YDirection)
+
+    def __repr__(self):
+        return "Arc(c={}, r={:.4f})".format(self.Center, self.Radius)
+
+
+def _line_intersection_2d(p, d, q, e):
+    """Interseção das retas p + t*d e q + s*e no plano XY (None se paralelas)."""
+    den = d.X * e.Y - d.Y * e.X
+    if abs(den) < 1e-12: return None
+    t = ((q.X - p.X) * e.Y - (q.Y - p.Y) * e.X) / den
+    return XYZ(p.X + d.X * t, p.Y + d.Y * t, p.Z)
+
+
+class CurveLoop(object):
+    """Sequência de curvas contíguas."""
+
+    def __init__(self):
+        self._curves = []
+
+    @staticmethod
+    def Create(curves):
+        loop = CurveLoop()
+        for c in curves:
+            loop.Append(c)
+        return loop
+
+    @staticmethod
+    def CreateViaOffset(loop, distance, normal):
+        """
+        Desloca cada curva para tangente x normal e reencontra os cantos.
+        Retas: interseção das retas deslocadas; arcos: mesmo centro, outro raio.
+        """
+        curves = list(loop)
+        if not curves: raise ArgumentsInconsistentException("Loop vazio")
+        if loop.IsOpen(): raise ArgumentsInconsistentException("Loop aberto")
+        moved = [c.CreateOffset(distance, normal) for c in curves]
+
+        n = len(moved)
+        corners = []
+        for i in range(n):
+            a, b = moved[i - 1], moved[i]
+            if isinstance(a, Line) and isinstance(b, Line):
+                p = _line_intersection_2d(a.GetEndPoint(0), a.Direction, b.GetEndPoint(0), b.Direction)
+                corners.append(p if p is not None else b.GetEndPoint(0))
+            else:
+                corners.append(b.GetEndPoint(0))
+
+        result = CurveLoop()
+        for i, c in enumerate(moved):
+            p0, p1 = corners[i], corners[(i + 1) % n]
+            if isinstance(c, Line):
+                result.Append(Line.CreateBound(p0, p1))
+            else:
+                result.Append(c)
+        return result
+
+    def Append(self, curve):
+        if self._curves:
+            last = self._curves[-1].GetEndPoint(1)
+            if not last.IsAlmostEqualTo(curve.GetEndPoint(0), VERTEX_TOLERANCE * 10):
+                raise ArgumentsInconsistentException("Curvas não contíguas")
+        self._curves.append(curve)
+
+    def __iter__(self):
+        return iter(list(self._curves))
+
+    def NumberOfCurves(self):
+        return len(self._curves)
+
+    def IsOpen(self):
+        if not self._curves: return True
+        return not self._curves[-1].GetEndPoint(1).IsAlmostEqualTo(self._curves[0].GetEndPoint(0),
+                                                                   VERTEX_TOLERANCE * 10)
+
+    def GetExactLength(self):
+        return sum(c.Length for c in self._curves)
+
+    def _signed_area(self):
+        pts = []
+        for c in self._curves:
+            pts.extend(c.Tessellate()[:-1])
+        area = 0.0
+        for i in range(len(pts)):
+            a, b = pts[i - 1], pts[i]
+            area += a.X * b.Y - b.X * a.Y
+        return area / 2.0
+
+    def IsCounterclockwise(self, normal):
+        area = self._signed_area()
+        return area > 0 if normal.Z >= 0 else area < 0
+
+    def Flip(self):
+        self._curves = [c.CreateReversed() for c in reversed(self._curves)]
+
+    def GetPlane(self):
+        return Plane.CreateByNormalAndOrigin(XYZ.BasisZ, self._curves[0].GetEndPoint(0))
+
+
+class Plane(object):
+    def __init__(self, normal, origin):
+        self.Normal = normal.Normalize()
+        self.Origin = origin
+        ref = XYZ.BasisX if abs(self.Normal.X) < 0.9 else XYZ.BasisY
+        self.XVec = ref.Subtract(self.Normal.Multiply(ref.DotProduct(self.Normal))).Normalize()
+        self.YVec = self.Normal.CrossProduct(self.XVec)
+
+    @staticmethod
+    def CreateByNormalAndOrigin(normal, origin):
+        return Plane(normal, origin)
+
+    @staticmethod
+    def CreateByThreePoints(a, b, c):
+        return Plane(b.Subtract(a).CrossProduct(c.Subtract(a)), a)
+
+
+class BoundingBoxXYZ(object):
+    def __init__(self, mn=None, mx=None):
+        self.Min = mn or XYZ()
+        self.Max = mx or XYZ()
+        self.Enabled = True
+        self.Transform = Transform.Identity
+
+    @staticmethod
+    def from_points(points):
+        pts = list(points)
+        if not pts: return None
+        return BoundingBoxXYZ(XYZ(min(p.X for p in pts), min(p.Y for p in pts), min(p.Z for p in pts)),
+                              XYZ(max(p.X for p in pts), max(p.Y for p in pts), max(p.Z for p in pts)))
+
+
+class Outline(object):
+    def __init__(self, mn, mx):
+        self.MinimumPoint = mn
+        self.MaximumPoint = mx
+
+    def Intersects(self, other, tolerance=0.0):
+        a0, a1, b0, b1 = self.MinimumPoint, self.MaximumPoint, other.MinimumPoint, other.MaximumPoint
+        return (a0.X <= b1.X + tolerance and b0.X <= a1.X + tolerance and
+                a0.Y <= b1.Y + tolerance and b0.Y <= a1.Y + tolerance and
+                a0.Z <= b1.Z + tolerance and b0.Z <= a1.Z + tolerance)
@@ -0,0 +1,1147 @@
+# -*- coding: utf-8 -*-
+"""Elementos, Documento, Transactions e coletores do Revit falso."""
+import itertools
+from System.Collections.Generic import List
+from Autodesk.Revit.Exceptions import InvalidOperationException, ArgumentException
+from Autodesk.Revit.DB._geometry import (XYZ, Line, CurveLoop, BoundingBoxXYZ, Transform,
+                                         ArgumentsInconsistentException)
+
+
+# --- Enumerações ---
+class _EnumValue(int):
+    """Membro de enumeração: um int com nome (int(BuiltInCategory.OST_Walls) funciona)."""
+
+    def __new__(cls, value, owner, name):
+        obj = int.__new__(cls, value)
+        obj._owner = owner
+        obj.name = name
+        return obj
+
+    def __repr__(self):
+        return "{}.{}".format(self._owner, self.name)
+
+    def ToString(self):
+        return self.name
+    # Como no .NET (e no IronPython): str(BuiltInParameter.DOOR_WIDTH) == "DOOR_WIDTH"
+    __str__ = ToString
+
+
+class _Enum(object):
+    """
+    Enumeração aberta: qualquer nome vira um membro estável na primeira leitura
+    (BuiltInParameter tem milhares de membros; só os usados são criados).
+    """
+
+    def __init__(self, name, members=(), start=0, step=1):
+        self._name = name
+        self._next = start
+        self._step = step
+        self._members = {}
+        for m in members:
+            getattr(self, m)
+
+    def __getattr__(self, name):
+        if name.startswith("_"): raise AttributeError(name)
+        value = self._members.get(name)
+        if value is None:
+            value = _EnumValue(self._next, self._name, name)
+            self._next += self._step
+            self._members[name] = value
+            setattr(self, name, value)
+        return value
+
+    def __iter__(self):
+        return iter(list(self._members.values()))
+
+
+def _closed_enum(name, members):
+    """Enumeração fechada: nomes fora da lista levantam AttributeError."""
+    enum = _Enum(name, members)
+    enum.__class__ = type(name, (_Enum,), {"__getattr__": lambda self, n: _missing(n)})
+    return enum
+
+
+def _missing(name):
+    raise AttributeError(name)
+
+
+BuiltInCategory = _Enum("BuiltInCategory", start=-2000000, step=-1)
+BuiltInParameter = _Enum("BuiltInParameter", start=-1000000, step=-1)
+TransactionStatus = _closed_enum("TransactionStatus", ["Uninitialized", "Started", "RolledBack",
+                                                       "Committed", "Pending", "Error", "Proceed"])
+WallKind = _closed_enum("WallKind", ["Unknown", "Basic", "Curtain", "Stacked"])
+FamilyPlacementType = _closed_enum("FamilyPlacementType", [
+    "Invalid", "OneLevelBased", "OneLevelBasedHosted", "TwoLevelsBased", "ViewBased", "WorkPlaneBased",
+    "CurveBased", "CurveBasedDetail", "CurveDrivenStructural", "Adaptive"])
+SpatialElementBoundaryLocation = _closed_enum("SpatialElementBoundaryLocation",
+                                              ["Finish", "Center", "CoreBoundary", "CoreCenter"])
+StorageType = _closed_enum("StorageType", ["None", "Integer", "Double", "String", "ElementId"])
+FailureSeverity = _closed_enum("FailureSeverity", ["None", "Warning", "Error", "DocumentCorruption"])
+FailureProcessingResult = _closed_enum("FailureProcessingResult", [
+    "Continue", "ProceedWithCommit", "WaitForUserInput", "ProceedWithRollBack"])
+ChangePriority = _closed_enum("ChangePriority", [
+    "GridsLevelsReferencePlanes", "Annotations", "FloorsRoofsStructuralWalls", "DoorsWindowsOpenings",
+    "RoomsSpacesZones", "Views", "MEPAccessoriesFittingsSegmentsWires", "MEPSystems", "FreeFormElements"])
+ExportRange = _closed_enum("ExportRange", ["CurrentView", "VisibleRegionOfCurrentView", "SetOfViews"])
+BooleanOperationsType = _closed_enum("BooleanOperationsType", ["Union", "Difference", "Intersect"])
+
+
+class ElementId(object):
+    __slots__ = ("IntegerValue",)
+
+    def __init__(self, value):
+        self.IntegerValue = int(value)
+
+    @property
+    def Value(self):
+        return self.IntegerValue
+
+    def __eq__(self, other):
+        return isinstance(other, ElementId) and other.IntegerValue == self.IntegerValue
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.IntegerValue)
+
+    def ToString(self):
+        return str(self.IntegerValue)
+    __str__ = ToString
+
+    def __repr__(self):
+        return "ElementId({})".format(self.IntegerValue)
+
+
+ElementId.InvalidElementId = ElementId(-1)
+
+
+class Category(object):
+    def __init__(self, bic, name=None):
+        self.BuiltInCategory = bic
+        self.Id = ElementId(int(bic))
+        self.Name = name or bic.name.replace("OST_", "")
+
+    _cache = {}
+
+    @staticmethod
+    def GetCategory(doc, bic):
+        return _category(bic)
+
+
+def _category(bic):
+    cat = Category._cache.get(bic.name)
+    if cat is None:
+        cat = Category._cache[bic.name] = Category(bic)
+    return cat
+
+
+class Definition(object):
+    def __init__(self, name):
+        self.Name = name
+
+
+class Parameter(object):
+    """Parâmetro com valor, tipo de armazenamento e leitura/escrita."""
+
+    def __init__(self, owner, name, value=None, read_only=False, bip=None):
+        self._owner = owner
+        self.Definition = Definition(name)
+        self.IsReadOnly = read_only
+        self.Id = ElementId(int(bip)) if bip is not None else ElementId(-1)
+        self._value = value
+
+    @property
+    def HasValue(self):
+        return self._value is not None
+
+    @property
+    def StorageType(self):
+        v = self._value
+        if isinstance(v, ElementId): return StorageType.ElementId
+        if isinstance(v, bool) or isinstance(v, int): return StorageType.Integer
+        if isinstance(v, float): return StorageType.Double
+        if isinstance(v, str): return StorageType.String
+        return getattr(StorageType, "None")
+
+    def AsDouble(self):
+        return float(self._value) if isinstance(self._value, (int, float)) else 0.0
+
+    def AsInteger(self):
+        return int(self._value) if isinstance(self._value, (int, float)) else 0
+
+    def AsString(self):
+        return self._value if isinstance(self._value, str) else None
+
+    def AsElementId(self):
+        return self._value if isinstance(self._value, ElementId) else ElementId.InvalidElementId
+
+    def AsValueString(self):
+        return None if self._value is None else str(self._value)
+
+    def Set(self, value):
+        if self.IsReadOnly: return False
+        doc = self._owner.Document
+        doc._require_transaction()
+        old = self._value
+        doc._journal(lambda: setattr(self, "_value", old))
+        self._value = value
+        self._owner._parameter_changed(self)
+        doc._modified(self._owner)
+        return True
+
+
+class _NameProperty(object):
+    """Element.Name como propriedade .NET (Element.Name.GetValue(e) também funciona)."""
+
+    def __get__(self, obj, cls=None):
+        return self if obj is None else obj._name
+
+    def __set__(self, obj, value):
+        obj.Document._require_transaction()
+        old = obj._name
+        obj.Document._journal(lambda: setattr(obj, "_name", old))
+        obj._name = value
+        obj.Document._modified(obj)
+
+    def GetValue(self, obj):
+        return obj._name
+
+
+# --- Elementos ---
+class Element(object):
+    """Base dos elementos: ID, categoria, parâmetros, caixa e Extensible Storage."""
+
+    CATEGORY = None
+    Name = _NameProperty()
+
+    def __init__(self, doc, name=None, category=None):
+        self.Document = doc
+        self._name = name or ""
+        bic = category or self.CATEGORY
+        self.Category = _category(getattr(BuiltInCategory, bic)) if bic else None
+        self._params = {}
+        self._entities = {}
+        self.Location = None
+        self.LevelId = ElementId.InvalidElementId
+        self.Pinned = False
+        self.Id = doc._register(self)
+
+    # Parâmetros
+    def set_param(self, key, value, read_only=False):
+        """Configuração do modelo falso: key é um BuiltInParameter ou um nome."""
+        name = key.name if isinstance(key, _EnumValue) else key
+        p = Parameter(self, name, value, read_only, key if isinstance(key, _EnumValue) else None)
+        self._params[key] = p
+        if isinstance(key, _EnumValue): self._params[name] = p
+        return p
+
+    def get_Parameter(self, key):
+        return self._params.get(key)
+
+    def LookupParameter(self, name):
+        return self._params.get(name)
+
+    @property
+    def Parameters(self):
+        return list(set(self._params.values()))
+
+    def _parameter_changed(self, param):
+        pass
+
+    def GetTypeId(self):
+        return ElementId.InvalidElementId
+
+    @property
+    def IsValidObject(self):
+        return self.Document._elements.get(self.Id.IntegerValue) is self
+
+    # Geometria
+    def _box(self):
+        return None
+
+    def get_BoundingBox(self, view):
+        return self._box()
+
+    # Extensible Storage
+    def GetEntity(self, schema):
+        from Autodesk.Revit.DB.ExtensibleStorage import Entity
+        return self._entities.get(schema.GUID) or Entity()
+
+    def SetEntity(self, entity):
+        self.Document._require_transaction()
+        guid = entity.Schema.GUID
+        old = self._entities.get(guid)
+        self.Document._journal(lambda: self._entities.__setitem__(guid, old) if old else self._entities.pop(guid, None))
+        self._entities[guid] = entity.copy()
+        self.Document._modified(self)
+
+    def DeleteEntity(self, schema):
+        self._entities.pop(schema.GUID, None)
+
+    def GetEntitySchemaGuids(self):
+        return list(self._entities.keys())
+
+    def GetHashCode(self):
+        return id(self)
+
+    # Alterações
+    @staticmethod
+    def GetChangeTypeGeometry():
+        return "geometry"
+
+    @staticmethod
+    def GetChangeTypeElementAddition():
+        return "addition"
+
+    @staticmethod
+    def GetChangeTypeElementDeletion():
+        return "deletion"
+
+    @staticmethod
+    def GetChangeTypeAny():
+        return "any"
+
+    def __repr__(self):
+        return "<{} {} '{}'>".format(type(self).__name__, self.Id.IntegerValue, self._name)
+
+
+class ElementType(Element):
+    @property
+    def FamilyName(self):
+        return getattr(self, "_family_name", type(self).__name__)
+
+
+class Level(Element):
+    CATEGORY = "OST_Levels"
+
+    def __init__(self, doc, name, elevation):
+        Element.__init__(self, doc, name)
+        self.Elevation = float(elevation)
+        self.ProjectElevation = self.Elevation
+
+
+class WallType(ElementType):
+    CATEGORY = "OST_Walls"
+
+    def __init__(self, doc, name, width, kind=None):
+        ElementType.__init__(self, doc, name)
+        self.Width = float(width)
+        self.Kind = kind if kind is not None else WallKind.Basic
+        self._family_name = "Parede básica"
+
+
+class FloorType(ElementType):
+    CATEGORY = "OST_Floors"
+
+
+class CeilingType(ElementType):
+    CATEGORY = "OST_Ceilings"
+
+
+class Family(Element):
+    """Como no Revit, a Family não tem Category; a categoria fica em FamilyCategory."""
+
+    def __init__(self, doc, name, placement, category):
+        Element.__init__(self, doc, name)
+        self.FamilyPlacementType = placement
+        self.FamilyCategory = _category(getattr(BuiltInCategory, category))
+
+
+class FamilySymbol(ElementType):
+    def __init__(self, doc, family, name):
+        ElementType.__init__(self, doc, name, family.FamilyCategory.BuiltInCategory.name)
+        self.Family = family
+        self._family_name = family.Name
+        self.IsActive = False
+
+    def Activate(self):
+        self.Document._require_transaction()
+        self.IsActive = True
+
+
+class LocationCurve(object):
+    def __init__(self, curve):
+        self.Curve = curve
+
+
+class LocationPoint(object):
+    def __init__(self, point, rotation=0.0):
+        self.Point = point
+        self.Rotation = rotation
+
+
+class HostObject(Element):
+    def FindInserts(self, add_rect_openings, include_shadows, include_embedded_walls, include_shared_embedded):
+        return List[ElementId]([e.Id for e in self.Document._hosted.get(self.Id.IntegerValue, [])])
+
+
+class Wall(HostObject):
+    CATEGORY = "OST_Walls"
+
+    def __init__(self, doc, curve, wall_type, level, height, base_offset=0.0, flipped=False):
+        HostObject.__init__(self, doc, wall_type.Name)
+        self.WallType = wall_type
+        self.Location = LocationCurve(curve)
+        self.LevelId = level.Id
+        self.Flipped = flipped
+        self.set_param(BuiltInParameter.WALL_USER_HEIGHT_PARAM, float(height))
+        self.set_param(BuiltInParameter.WALL_BASE_OFFSET, float(base_offset))
+        self.set_param(BuiltInParameter.WALL_HEIGHT_TYPE, ElementId.InvalidElementId)
+        self.set_param(BuiltInParameter.WALL_TOP_OFFSET, 0.0)
+        self.set_param(BuiltInParameter.WALL_KEY_REF_PARAM, 0)
+        self.set_param(BuiltInParameter.WALL_BASE_CONSTRAINT, level.Id)
+
+    @staticmethod
+    def Create(doc, curve, wall_type_id, level_id, height, offset, flip, structural):
+        doc._require_transaction()
+        wall_type = doc.GetElement(wall_type_id)
+        level = doc.GetElement(level_id)
+        if not isinstance(wall_type, WallType) or not isinstance(level, Level):
+            raise ArgumentException("Tipo de parede ou nível inválido")
+        return Wall(doc, curve, wall_type, level, height, offset, flip)
+
+    @property
+    def Width(self):
+        return self.WallType.Width
+
+    def GetTypeId(self):
+        return self.WallType.Id
+
+    @property
+    def Orientation(self):
+        d = self.Location.Curve.ComputeDerivatives(0.5, True).BasisX
+        n = XYZ(d.Y, -d.X, 0).Normalize()
+        return n.Negate() if self.Flipped else n
+
+    def Flip(self):
+        self.Document._require_transaction()
+        self.Flipped = not self.Flipped
+        self.Document._journal(lambda: setattr(self, "Flipped", not self.Flipped))
+        self.Document._modified(self)
+
+    def _box(self):
+        level = self.Document.GetElement(self.LevelId)
+        z0 = (level.Elevation if level else 0.0) + self.get_Parameter(BuiltInParameter.WALL_BASE_OFFSET).AsDouble()
+        z1 = z0 + self.get_Parameter(BuiltInParameter.WALL_USER_HEIGHT_PARAM).AsDouble()
+        half = self.Width / 2.0
+        pts = self.Location.Curve.Tessellate()
+        box = BoundingBoxXYZ.from_points(pts)
+        return BoundingBoxXYZ(XYZ(box.Min.X - half, box.Min.Y - half, z0), XYZ(box.Max.X + half, box.Max.Y + half, z1))
+
+
+class FamilyInstance(Element):
+    """Instância de família: por ponto (portas/janelas, com hospedeiro) ou por linha."""
+
+    def __init__(self, doc, symbol, location, level, host=None):
+        Element.__init__(self, doc, symbol.Name, symbol.Category.BuiltInCategory.name)
+        self.Symbol = symbol
+        self.Host = host
+        self.Location = location
+        self.LevelId = level.Id if level is not None else ElementId.InvalidElementId
+        self.Mirrored = False
+        if host is not None:
+            doc._host(host, self)
+
+    def GetTypeId(self):
+        return self.Symbol.Id
+
+    @property
+    def HandOrientation(self):
+        if isinstance(self.Location, LocationCurve):
+            return self.Location.Curve.ComputeDerivatives(0.0, True).BasisX
+        if self.Host is not None and isinstance(self.Host.Location, LocationCurve):
+            return self.Host.Location.Curve.ComputeDerivatives(0.5, True).BasisX
+        return XYZ.BasisX
+
+    @property
+    def FacingOrientation(self):
+        h = self.HandOrientation
+        return XYZ(-h.Y, h.X, 0)
+
+    def _width(self):
+        for key in (BuiltInParameter.DOOR_WIDTH, BuiltInParameter.WINDOW_WIDTH, BuiltInParameter.FAMILY_WIDTH_PARAM):
+            p = self.get_Parameter(key) or self.Symbol.get_Parameter(key)
+            if p and p.HasValue: return p.AsDouble()
+        return 1.0
+
+    def _box(self):
+        if isinstance(self.Location, LocationCurve):
+            return BoundingBoxXYZ.from_points(self.Location.Curve.Tessellate())
+        p = self.Location.Point
+        r = self._width() / 2.0
+        return BoundingBoxXYZ(XYZ(p.X - r, p.Y - r, p.Z), XYZ(p.X + r, p.Y + r, p.Z + 7.0))
+
+
+class _SketchElement(Element):
+    """Piso/forro: loops de contorno + altura."""
+
+    def __init__(self, doc, loops, elem_type, level, height_param):
+        Element.__init__(self, doc, elem_type.Name)
+        self.Type = elem_type
+        self.LevelId = level.Id
+        self.Loops = [list(l) for l in loops]
+        self._height_param = height_param
+        self.set_param(height_param, 0.0)
+
+    @classmethod
+    def _create(cls, doc, loops, type_id, level_id, type_cls, height_param):
+        doc._require_transaction()
+        loops = list(loops)
+        if not loops or any(l.IsOpen() for l in loops):
+            raise ArgumentsInconsistentException("Loops do contorno abertos ou vazios")
+        elem_type = doc.GetElement(type_id)
+        level = doc.GetElement(level_id)
+        if not isinstance(elem_type, type_cls) or not isinstance(level, Level):
+            raise ArgumentException("Tipo ou nível inválido")
+        return cls(doc, loops, elem_type, level, height_param)
+
+    def GetTypeId(self):
+        return self.Type.Id
+
+    def _box(self):
+        level = self.Document.GetElement(self.LevelId)
+        z = (level.Elevation if level else 0.0) + self.get_Parameter(self._height_param).AsDouble()
+        pts = [p for loop in self.Loops for c in loop for p in c.Tessellate()]
+        box = BoundingBoxXYZ.from_points(pts)
+        return BoundingBoxXYZ(XYZ(box.Min.X, box.Min.Y, z - 0.1), XYZ(box.Max.X, box.Max.Y, z))
+
+
+class Floor(_SketchElement):
+    CATEGORY = "OST_Floors"
+
+    @staticmethod
+    def Create(doc, loops, floor_type_id, level_id, *args):
+        return Floor._create(doc, loops, floor_type_id, level_id, FloorType,
+                             BuiltInParameter.FLOOR_HEIGHTABOVELEVEL_PARAM)
+
+
+class Ceiling(_SketchElement):
+    CATEGORY = "OST_Ceilings"
+
+    @staticmethod
+    def Create(doc, loops, ceiling_type_id, level_id, *args):
+        return Ceiling._create(doc, loops, ceiling_type_id, level_id, CeilingType,
+                               BuiltInParameter.CEILING_HEIGHTABOVELEVEL_PARAM)
+
+
+class BoundarySegment(object):
+    def __init__(self, curve, element_id):
+        self._curve = curve
+        self.ElementId = element_id
+        self.LinkElementId = ElementId.InvalidElementId
+
+    def GetCurve(self):
+        return self._curve
+
+
+class SpatialElementBoundaryOptions(object):
+    def __init__(self):
+        self.SpatialElementBoundaryLocation = SpatialElementBoundaryLocation.Finish
+        self.StoreFreeBoundaryFaces = False
+
+
+class SpatialElement(Element):
+    pass
+
+
+class Room(SpatialElement):
+    """
+    Ambiente. Os limites são definidos pelo gerador (set_boundary) na face de
+    acabamento; qualquer SpatialElementBoundaryLocation devolve os mesmos loops.
+    """
+    CATEGORY = "OST_Rooms"
+
+    def __init__(self, doc, level, number, name, height=9.0):
+        SpatialElement.__init__(self, doc, name)
+        self.Level = level
+        self.LevelId = level.Id
+        self.Number = number
+        self.UnboundedHeight = float(height)
+        self._loops = []
+        self.set_param(BuiltInParameter.ROOM_NAME, name)
+        self.set_param(BuiltInParameter.ROOM_NUMBER, number)
+
+    def set_boundary(self, loops):
+        """loops: [[(Curve, host_id_int), ...], ...] - contorno externo anti-horário."""
+        self._loops = [list(l) for l in loops]
+        pts = [c.GetEndPoint(0) for c, _ in self._loops[0]] if self._loops else []
+        if pts:
+            cx = sum(p.X for p in pts) / len(pts)
+            cy = sum(p.Y for p in pts) / len(pts)
+            self.Location = LocationPoint(XYZ(cx, cy, self.Level.Elevation))
+
+    def GetBoundarySegments(self, options):
+        return [[BoundarySegment(c, ElementId(h)) for c, h in loop] for loop in self._loops]
+
+    @property
+    def Area(self):
+        total = 0.0
+        for loop in self._loops:
+            cl = CurveLoop.Create([c for c, _ in loop])
+            total += cl._signed_area()
+        return abs(total) if self._loops else 0.0
+
+    def _box(self):
+        if not self._loops: return None
+        pts = [p for loop in self._loops for c, _ in loop for p in c.Tessellate()]
+        box = BoundingBoxXYZ.from_points(pts)
+        z = self.Level.Elevation
+        return BoundingBoxXYZ(XYZ(box.Min.X, box.Min.Y, z), XYZ(box.Max.X, box.Max.Y, z + self.UnboundedHeight))
+
+
+class SpatialElementTag(Element):
+    CATEGORY = "OST_RoomTags"
+
+    def __init__(self, doc, room):
+        Element.__init__(self, doc, "Tag")
+        self.Room = room
+
+
+class SpatialElementGeometryCalculator(object):
+    """Sólidos não existem no modelo falso: use o modo 2D dos comandos."""
+
+    def __init__(self, doc, options=None):
+        self.doc = doc
+
+    def CalculateSpatialElementGeometry(self, room):
+        raise NotImplementedError("Revit falso: sem sólidos de ambiente")
+
+
+class ViewSheet(Element):
+    CATEGORY = "OST_Sheets"
+
+    def __init__(self, doc, number, name):
+        Element.__init__(self, doc, name)
+        self.SheetNumber = number
+        self.set_param(BuiltInParameter.SHEET_NUMBER, number)
+
+    def GetAllRevisionIds(self):
+        return List[ElementId]()
+
+
+# --- Documento ---
+class _Creation(object):
+    def __init__(self, doc):
+        self._doc = doc
+
+    def NewFamilyInstances2(self, data_list):
+        """Cria instâncias por linha em lote; devolve os IDs na ordem dos dados."""
+        doc = self._doc
+        doc._require_transaction()
+        ids = List[ElementId]()
+        for data in data_list:
+            if not data.Symbol.IsActive:
+                raise InvalidOperationException("FamilySymbol não ativado")
+            inst = FamilyInstance(doc, data.Symbol, LocationCurve(data.Curve), data.Level)
+            inst.set_param(BuiltInParameter.INSTANCE_ELEVATION_PARAM, 0.0)
+            ids.Add(inst.Id)
+        doc.Regenerate()
+        return ids
+
+    def NewFamilyInstance(self, location, symbol, *args):
+        """Sobrecargas (local, símbolo, hospedeiro, nível, tipo) e (curva, símbolo, nível, tipo)."""
+        self._doc._require_transaction()
+        host, level = (args[0], args[1]) if len(args) == 3 else (None, args[0])
+        if not symbol.IsActive:
+            raise InvalidOperationException("FamilySymbol não ativado")
+        if isinstance(location, Line):
+            inst = FamilyInstance(self._doc, symbol, LocationCurve(location), level, host)
+            inst.set_param(BuiltInParameter.INSTANCE_ELEVATION_PARAM, 0.0)
+            return inst
+        return FamilyInstance(self._doc, symbol, LocationPoint(location), level, host)
+
+
+class Document(object):
+    """
+    Documento em memória. Elementos criados pela API falsa exigem uma
+    Transaction aberta; Transactions e SubTransactions desfazem criações,
+    exclusões e parâmetros gravados.
+    """
+
+    def __init__(self, title="Modelo Sintético"):
+        self.Title = title
+        self.PathName = ""
+        self.IsFamilyDocument = False
+        self.IsWorkshared = False
+        self.ActiveView = None
+        self._elements = {}
+        self._ids = itertools.count(100000)
+        self._hosted = {}
+        self._joins = {}
+        self._cutters = {}
+        self._frames = []
+        self._loading = False
+        self._forced_id = None
+        self.Create = _Creation(self)
+        self.stats = {"regenerations": 0, "created": 0, "deleted": 0, "modified": 0}
+
+    # Registro interno
+    def _register(self, elem):
+        if not self._loading: self._require_transaction()
+        if self._forced_id is not None:
+            eid, self._forced_id = ElementId(self._forced_id), None
+        else:
+            eid = ElementId(next(self._ids))
+        self._elements[eid.IntegerValue] = elem
+        self.stats["created"] += 1
+        self._journal(lambda: self._elements.pop(eid.IntegerValue, None))
+        return eid
+
+    def _host(self, host, inst):
+        hosted = self._hosted.setdefault(host.Id.IntegerValue, [])
+        hosted.append(inst)
+        self._journal(lambda: hosted.remove(inst) if inst in hosted else None)
+
+    def _modified(self, elem):
+        self.stats["modified"] += 1
+
+    def use_id(self, value):
+        """Configuração do modelo falso: o próximo elemento criado recebe este ID."""
+        if value in self._elements:
+            raise ArgumentException("ID já usado: {}".format(value))
+        self._forced_id = int(value)
+
+    def start_ids_after(self, value):
+        """Novos IDs (sem use_id) começam depois de value."""
+        self._ids = itertools.count(max(int(value) + 1, 100000))
+
+    def loading(self):
+        """Context manager do gerador: cria elementos sem Transaction (modelo inicial)."""
+        doc = self
+
+        class _Loading(object):
+            def __enter__(self):
+                doc._loading = True
+                return doc
+
+            def __exit__(self, *exc):
+                doc._loading = False
+                return False
+        return _Loading()
+
+    # Transactions
+    @property
+    def IsModifiable(self):
+        return bool(self._frames) or self._loading
+
+    def _require_transaction(self):
+        if not self.IsModifiable:
+            raise InvalidOperationException("Modificação fora de uma Transaction")
+
+    def _journal(self, undo):
+        if self._frames: self._frames[-1].append(undo)
+
+    def _push_frame(self):
+        self._frames.append([])
+
+    def _pop_frame(self, commit):
+        frame = self._frames.pop()
+        if commit:
+            if self._frames: self._frames[-1].extend(frame)
+        else:
+            for undo in reversed(frame):
+                undo()
+
+    # API
+    def GetElement(self, key):
+        if isinstance(key, ElementId):
+            return self._elements.get(key.IntegerValue)
+        if isinstance(key, int):
+            return self._elements.get(key)
+        return None
+
+    def Delete(self, ids):
+        self._require_transaction()
+        targets = [ids] if isinstance(ids, ElementId) else list(ids)
+        deleted = List[ElementId]()
+        for eid in targets:
+            elem = self._elements.get(eid.IntegerValue)
+            if elem is None:
+                raise ArgumentException("Elemento inexistente: {}".format(eid))
+            for hosted in list(self._hosted.get(eid.IntegerValue, [])):
+                if hosted.IsValidObject: deleted.AddRange(self._delete_one(hosted))
+            deleted.AddRange(self._delete_one(elem))
+        return deleted
+
+    def _delete_one(self, elem):
+        key = elem.Id.IntegerValue
+        self._elements.pop(key, None)
+        self.stats["deleted"] += 1
+        self._journal(lambda: self._elements.__setitem__(key, elem))
+        for other in list(self._joins.get(key, ())):
+            _unjoin(self, key, other)
+        return [elem.Id]
+
+    def Regenerate(self):
+        self._require_transaction()
+        self.stats["regenerations"] += 1
+
+    def GetHashCode(self):
+        return id(self)
+
+    def __len__(self):
+        return len(self._elements)
+
+
+class FailureHandlingOptions(object):
+    def __init__(self):
+        self.preprocessor = None
+        self.clear_after_rollback = False
+
+    def SetFailuresPreprocessor(self, preprocessor):
+        self.preprocessor = preprocessor
+        return self
+
+    def SetClearAfterRollback(self, value):
+        self.clear_after_rollback = value
+        return self
+
+
+class IFailuresPreprocessor(object):
+    def PreprocessFailures(self, accessor):
+        return FailureProcessingResult.Continue
+
+
+class _FailureDefinitionId(object):
+    def __init__(self):
+        from System import Guid
+        self.Guid = Guid()
+
+
+class _FailureGroup(object):
+    """BuiltInFailures.Grupo.Nome -> FailureDefinitionId (criados sob demanda)."""
+
+    def __init__(self, depth=2):
+        self._depth = depth
+
+    def __getattr__(self, name):
+        if name.startswith("_"): raise AttributeError(name)
+        value = _FailureGroup(self._depth - 1) if self._depth > 1 else _FailureDefinitionId()
+        setattr(self, name, value)
+        return value
+
+
+BuiltInFailures = _FailureGroup()
+
+
+class _TransactionBase(object):
+    def __init__(self, doc, name=None):
+        self._doc = doc
+        self._name = name or ""
+        self._status = TransactionStatus.Uninitialized
+
+    def Start(self, name=None):
+        if self._status == TransactionStatus.Started:
+            raise InvalidOperationException("Já iniciada")
+        if name: self._name = name
+        self._doc._push_frame()
+        self._status = TransactionStatus.Started
+        return self._status
+
+    def _end(self, commit):
+        if self._status != TransactionStatus.Started:
+            raise InvalidOperationException("Não iniciada")
+        self._doc._pop_frame(commit)
+        self._status = TransactionStatus.Committed if commit else TransactionStatus.RolledBack
+        return self._status
+
+    def Commit(self):
+        return self._end(True)
+
+    def RollBack(self):
+        return self._end(False)
+
+    def GetStatus(self):
+        return self._status
+
+    def HasStarted(self):
+        return self._status != TransactionStatus.Uninitialized
+
+    def HasEnded(self):
+        return self._status in (TransactionStatus.Committed, TransactionStatus.RolledBack)
+
+    def GetName(self):
+        return self._name
+
+    def SetName(self, name):
+        self._name = name
+
+    def Dispose(self):
+        if self._status == TransactionStatus.Started: self.RollBack()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.Dispose()
+        return False
+
+
+class Transaction(_TransactionBase):
+    def __init__(self, doc, name=None):
+        _TransactionBase.__init__(self, doc, name)
+        self._options = FailureHandlingOptions()
+
+    def Start(self, name=None):
+        # Uma Transaction não abre dentro de outra (só em TransactionGroup)
+        if any(isinstance(u, _TransactionMarker) for f in self._doc._frames for u in f):
+            raise InvalidOperationException("Já existe uma Transaction aberta")
+        status = _TransactionBase.Start(self, name)
+        self._doc._frames[-1].append(_TransactionMarker())
+        return status
+
+    def _end(self, commit):
+        frame = self._doc._frames[-1] if self._doc._frames else []
+        frame[:] = [u for u in frame if not isinstance(u, _TransactionMarker)]
+        return _TransactionBase._end(self, commit)
+
+    def GetFailureHandlingOptions(self):
+        return self._options
+
+    def SetFailureHandlingOptions(self, options):
+        self._options = options
+
+
+class _TransactionMarker(object):
+    """Marca (no journal) de uma Transaction aberta; desfazer não faz nada."""
+
+    def __call__(self):
+        pass
+
+
+class SubTransaction(_TransactionBase):
+    def __init__(self, doc):
+        _TransactionBase.__init__(self, doc)
+
+    def Start(self):
+        if not self._doc._frames:
+            raise InvalidOperationException("SubTransaction exige uma Transaction aberta")
+        return _TransactionBase.Start(self)
+
+
+class TransactionGroup(_TransactionBase):
+    def Assimilate(self):
+        return self._end(True)
+
+
+# --- Coletor ---
+class ElementCategoryFilter(object):
+    def __init__(self, bic, inverted=False):
+        self._id = int(bic)
+        self._inverted = inverted
+
+    def PassesElement(self, elem):
+        ok = elem.Category is not None and elem.Category.Id.IntegerValue == self._id
+        return ok != self._inverted
+
+
+class ElementMulticategoryFilter(object):
+    def __init__(self, bics, inverted=False):
+        self._ids = set(int(b) for b in bics)
+        self._inverted = inverted
+
+    def PassesElement(self, elem):
+        ok = elem.Category is not None and elem.Category.Id.IntegerValue in self._ids
+        return ok != self._inverted
+
+
+class ElementClassFilter(object):
+    def __init__(self, cls, inverted=False):
+        self._cls = cls
+        self._inverted = inverted
+
+    def PassesElement(self, elem):
+        return isinstance(elem, self._cls) != self._inverted
+
+
+class FilteredElementCollector(object):
+    """Coletor encadeável (filtros avaliados na iteração, como no Revit)."""
+
+    def __init__(self, doc, scope=None):
+        self._doc = doc
+        self._scope = None
+        if scope is not None and not isinstance(scope, ElementId):
+            self._scope = set(e.IntegerValue for e in scope)
+        self._filters = []
+
+    def _add(self, predicate):
+        self._filters.append(predicate)
+        return self
+
+    def OfClass(self, cls):
+        return self._add(lambda e: isinstance(e, cls))
+
+    def OfCategory(self, bic):
+        key = int(bic)
+        return self._add(lambda e: e.Category is not None and e.Category.Id.IntegerValue == key)
+
+    def OfCategoryId(self, category_id):
+        return self._add(lambda e: e.Category is not None and e.Category.Id == category_id)
+
+    def WhereElementIsElementType(self):
+        return self._add(lambda e: isinstance(e, ElementType))
+
+    def WhereElementIsNotElementType(self):
+        return self._add(lambda e: not isinstance(e, ElementType))
+
+    def WherePasses(self, element_filter):
+        return self._add(element_filter.PassesElement)
+
+    def Excluding(self, ids):
+        excluded = set(i.IntegerValue for i in ids)
+        return self._add(lambda e: e.Id.IntegerValue not in excluded)
+
+    def __iter__(self):
+        for key, elem in list(self._doc._elements.items()):
+            if self._scope is not None and key not in self._scope: continue
+            if all(f(elem) for f in self._filters):
+                yield elem
+
+    def ToElements(self):
+        return List[Element](list(self))
+
+    def ToElementIds(self):
+        return List[ElementId]([e.Id for e in self])
+
+    def FirstElement(self):
+        for e in self: return e
+        return None
+
+    def GetElementCount(self):
+        return sum(1 for _ in self)
+
+
+# --- Uniões e transformações ---
+def _unjoin(doc, a, b):
+    for x, y in ((a, b), (b, a)):
+        s = doc._joins.get(x)
+        if s: s.discard(y)
+    doc._cutters.pop((min(a, b), max(a, b)), None)
+
+
+class JoinGeometryUtils(object):
+    @staticmethod
+    def AreElementsJoined(doc, a, b):
+        return b.Id.IntegerValue in doc._joins.get(a.Id.IntegerValue, ())
+
+    @staticmethod
+    def JoinGeometry(doc, a, b):
+        doc._require_transaction()
+        ia, ib = a.Id.IntegerValue, b.Id.IntegerValue
+        if ia == ib or ib in doc._joins.get(ia, ()):
+            raise ArgumentException("Os elementos já estão unidos")
+        if not a.get_BoundingBox(None) or not b.get_BoundingBox(None):
+            raise ArgumentException("Elemento sem geometria")
+        doc._joins.setdefault(ia, set()).add(ib)
+        doc._joins.setdefault(ib, set()).add(ia)
+        doc._cutters[(min(ia, ib), max(ia, ib))] = ia
+        doc._journal(lambda: _unjoin(doc, ia, ib))
+        doc._modified(a)
+        doc._modified(b)
+
+    @staticmethod
+    def UnjoinGeometry(doc, a, b):
+        doc._require_transaction()
+        _unjoin(doc, a.Id.IntegerValue, b.Id.IntegerValue)
+
+    @staticmethod
+    def GetJoinedElements(doc, elem):
+        return List[ElementId]([ElementId(i) for i in sorted(doc._joins.get(elem.Id.IntegerValue, ()))])
+
+    @staticmethod
+    def IsCuttingElementInJoin(doc, a, b):
+        ia, ib = a.Id.IntegerValue, b.Id.IntegerValue
+        if ib not in doc._joins.get(ia, ()):
+            raise ArgumentException("Os elementos não estão unidos")
+        return doc._cutters.get((min(ia, ib), max(ia, ib))) == ia
+
+    @staticmethod
+    def SwitchJoinOrder(doc, a, b):
+        doc._require_transaction()
+        ia, ib = a.Id.IntegerValue, b.Id.IntegerValue
+        key = (min(ia, ib), max(ia, ib))
+        old = doc._cutters.get(key)
+        doc._cutters[key] = ib if old == ia else ia
+        doc._journal(lambda: doc._cutters.__setitem__(key, old))
+
+
+class ElementTransformUtils(object):
+    @staticmethod
+    def MirrorElements(doc, ids, plane, mirror_copies):
+        """Espelha instâncias por linha num plano horizontal (só o que a manalib usa)."""
+        doc._require_transaction()
+        for eid in ids:
+            elem = doc.GetElement(eid)
+            if elem is None: continue
+            elem.Mirrored = not getattr(elem, "Mirrored", False)
+            if isinstance(elem.Location, LocationCurve):
+                z0 = plane.Origin.Z
+                t = Transform()
+                t.BasisZ = XYZ(0, 0, -1)
+                t.Origin = XYZ(0, 0, 2 * z0)
+                elem.Location = LocationCurve(elem.Location.Curve.CreateTransformed(t))
+            doc._modified(elem)
+
+
+# --- Nomes usados só nos imports (sem comportamento no modelo falso) ---
+class _Unsupported(object):
+    def __init__(self, *args, **kwargs):
+        raise NotImplementedError("Revit falso: {} não é suportado".format(type(self).__name__))
+
+
+class GeometryCreationUtilities(object):
+    @staticmethod
+    def CreateExtrusionGeometry(*args):
+        raise NotImplementedError("Revit falso: sem sólidos")
+
+
+class BooleanOperationsUtils(object):
+    @staticmethod
+    def ExecuteBooleanOperation(*args):
+        raise NotImplementedError("Revit falso: sem sólidos")
+
+
+class Solid(_Unsupported):
+    pass
+
+
+class PlanarFace(_Unsupported):
+    pass
+
+
+class PDFExportOptions(object):
+    def __init__(self):
+        self.Combine = False
+        self.FileName = ""
+        self.HideScopeBoxes = True
+
+
+class IUpdater(object):
+    pass
+
+
+class UpdaterId(object):
+    def __init__(self, addin_id, guid):
+        self.AddInId = addin_id
+        self.Guid = guid
+
+
+class UpdaterRegistry(object):
+    _registered = {}
+
+    @staticmethod
+    def IsUpdaterRegistered(uid):
+        return uid.Guid in UpdaterRegistry._registered
+
+    @staticmethod
+    def RegisterUpdater(updater, optional=False):
+        UpdaterRegistry._registered[updater.GetUpdaterId().Guid] = updater
+
+    @staticmethod
+    def UnregisterUpdater(uid):
+        UpdaterRegistry._registered.pop(uid.Guid, None)
+
+    @staticmethod
+    def AddTrigger(uid, element_filter, change_type):
+        pass
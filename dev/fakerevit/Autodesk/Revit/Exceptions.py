@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+
+class OperationCanceledException(Exception):
+    pass
+
+
+class InvalidOperationException(Exception):
+    pass
+
+
+class ArgumentException(Exception):
+    pass
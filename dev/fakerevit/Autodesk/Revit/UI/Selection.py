@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+
+class ObjectType(object):
+    Element = 1
+    Face = 2
+    Edge = 3
+    PointOnElement = 4
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""UI falsa: só nomes, para os imports dos scripts resolverem."""
+
+
+class TaskDialog(object):
+    @staticmethod
+    def Show(title, message):
+        print("[{}] {}".format(title, message))
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Modelo de objetos FALSO do Revit, para rodar a manalib fora do Revit (Linux).
+
+Cobre só o subconjunto usado pelos módulos: geometria (XYZ, Line, Arc,
+CurveLoop), Ambientes com limites, Paredes com vãos, Tipos/Símbolos com
+parâmetros, FilteredElementCollector e Transactions. Não é um Revit: não há
+regeneração real, sólidos nem UI. Gere modelos com dev/synthetic.py.
+"""
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""List[T] e Dictionary[K, V] como list/dict do Python (ver dev/fakerevit)."""
+
+
+class _TypedList(list):
+    """List[T]() / List[T](iterável) com a interface .NET usada pela manalib."""
+
+    def Add(self, item):
+        self.append(item)
+
+    def AddRange(self, items):
+        self.extend(items)
+
+    def Contains(self, item):
+        return item in self
+
+    def Clear(self):
+        del self[:]
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class _TypedDict(dict):
+    def Add(self, key, value):
+        self[key] = value
+
+    def ContainsKey(self, key):
+        return key in self
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class _Generic(object):
+    """List[ElementId] devolve a própria classe (o tipo T é ignorado)."""
+
+    def __init__(self, cls):
+        self._cls = cls
+
+    def __getitem__(self, types):
+        return self._cls
+
+    def __call__(self, *args):
+        return self._cls(*args)
+
+
+List = _Generic(_TypedList)
+Dictionary = _Generic(_TypedDict)
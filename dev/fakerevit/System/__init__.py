@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Subconjunto do namespace System usado pela manalib (ver dev/fakerevit)."""
+import uuid
+
+String = str
+Double = float
+Int32 = int
+
+
+class Guid(object):
+    def __init__(self, text=None):
+        self._value = uuid.UUID(str(text)) if text else uuid.uuid4()
+
+    @staticmethod
+    def NewGuid():
+        return Guid()
+
+    def __eq__(self, other):
+        return isinstance(other, Guid) and other._value == self._value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self._value)
+
+    def ToString(self):
+        return str(self._value)
+    __str__ = ToString
+
+
+class TimeSpan(object):
+    def __init__(self, seconds=0.0):
+        self.TotalSeconds = seconds
+
+    @staticmethod
+    def FromSeconds(seconds):
+        return TimeSpan(seconds)
+
+
+class Environment(object):
+    ProcessorCount = 1
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""clr falso: as referências já estão 'carregadas' (ver dev/fakerevit)."""
+
+
+def AddReference(name):
+    pass
+
+
+def AddReferenceByName(name):
+    pass
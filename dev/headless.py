@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Prepara o sys.path para rodar a manalib fora do Revit: o Revit falso
+(dev/fakerevit) e ManaTools.extension/lib. pyrevit não existe aqui; os
+módulos que o importam só no uso (saída, config) caem nos fallbacks.
+"""
+import os
+import sys
+
+DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(DEV_DIR)
+FAKE_REVIT_DIR = os.path.join(DEV_DIR, "fakerevit")
+LIB_DIR = os.path.join(ROOT_DIR, "ManaTools.extension", "lib")
+
+
+def setup():
+    """Idempotente. Retorna o caminho da lib."""
+    for path in (LIB_DIR, FAKE_REVIT_DIR, DEV_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return LIB_DIR
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Reprodução de gravações de comandos (manalib.replay) no Revit falso.
+
+    python dev/replay.py CriarRevest_20260101-120000.replay.json.gz
+    python dev/replay.py arquivo.replay.json.gz --bench               # benchmarks sobre o modelo gravado
+    python dev/replay.py arquivo.replay.json.gz --profile floor_union # cProfile de um benchmark
+
+O modelo reconstruído tem os mesmos IDs, níveis, tipos, paredes, vãos,
+limites de ambiente (com hospedeiros), uniões e os parâmetros que o
+param_resolver leu. load() devolve um synthetic.SyntheticModel, então os
+benchmarks (e qualquer script de dev) rodam igual sobre modelos gravados
+ou sintéticos.
+"""
+import argparse
+import sys
+
+import headless
+import synthetic
+
+from Autodesk.Revit.DB import (Document, XYZ, Line, Arc, BuiltInParameter, FamilyPlacementType, WallKind,
+                               Level, WallType, Family, FamilySymbol, Wall, FamilyInstance, LocationPoint,
+                               Room, JoinGeometryUtils, FloorType, CeilingType)
+from manalib import replay
+
+# Categoria do símbolo pelo tipo de vão gravado
+_CATEGORIES = {"door": "OST_Doors", "window": "OST_Windows"}
+
+
+def _xyz(p):
+    return XYZ(p[0], p[1], p[2])
+
+
+def decode_curves(encoded):
+    """Curvas do Revit falso de uma curva gravada (polilinhas viram várias Lines)."""
+    kind = encoded[0]
+    if kind == "L":
+        return [Line.CreateBound(_xyz(encoded[1]), _xyz(encoded[2]))]
+    if kind == "A":
+        return [Arc.Create(_xyz(encoded[1]), _xyz(encoded[2]), _xyz(encoded[3]))]
+    points = [_xyz(p) for p in encoded[1]]
+    curves = []
+    for a, b in zip(points, points[1:]):
+        if a.DistanceTo(b) > 1e-6: curves.append(Line.CreateBound(a, b))
+    return curves
+
+
+def _wall_curve(encoded):
+    """Parede com curva genérica: a corda entre as extremidades."""
+    if encoded[0] != "P": return decode_curves(encoded)[0]
+    return Line.CreateBound(_xyz(encoded[1][0]), _xyz(encoded[1][-1]))
+
+
+def _enum(enum, name, default):
+    try:
+        return getattr(enum, name)
+    except AttributeError:
+        return default
+
+
+def _build_types(doc, data, model):
+    families = {}
+    for t in data["types"]:
+        if t["class"] == "WallType":
+            doc.use_id(t["id"])
+            synthetic._type_params(WallType(doc, t["name"], t["width"], _enum(WallKind, t["kind"], WallKind.Basic)),
+                                   t["name"])
+            continue
+        key = (t["family"], t["kind"])
+        if key not in families:
+            placement = _enum(FamilyPlacementType, t["placement"], FamilyPlacementType.OneLevelBasedHosted)
+            families[key] = Family(doc, t["family"], placement, _CATEGORIES[t["kind"]])
+        doc.use_id(t["id"])
+        symbol = synthetic._type_params(FamilySymbol(doc, families[key], t["name"]), t["name"])
+        if t.get("mark"): symbol.set_param(BuiltInParameter.ALL_MODEL_TYPE_MARK, t["mark"])
+        model.types.setdefault(t["kind"], symbol)
+
+
+def load(path):
+    """Reconstrói o modelo gravado. Retorna um synthetic.SyntheticModel."""
+    data = replay.load(path)
+    doc = Document(data.get("document") or path)
+    model = synthetic.SyntheticModel(doc)
+    ids = [r[0] for key in ("levels", "walls", "inserts", "rooms") for r in data[key]]
+    ids += [t["id"] for t in data["types"]]
+    doc.start_ids_after(max(ids or [0]))
+
+    with doc.loading():
+        levels = {}
+        for level_id, name, elevation in data["levels"]:
+            doc.use_id(level_id)
+            levels[level_id] = Level(doc, name, elevation)
+        model.levels = sorted(levels.values(), key=lambda l: l.Elevation)
+        if not model.levels:
+            model.levels = [Level(doc, "Nível (replay)", 0.0)]
+        fallback = model.levels[0]
+
+        _build_types(doc, data, model)
+
+        for wall_id, type_id, level_id, curve, flipped, height, base_offset in data["walls"]:
+            doc.use_id(wall_id)
+            wall = Wall(doc, _wall_curve(curve), doc.GetElement(type_id), levels.get(level_id, fallback),
+                        height or synthetic.LEVEL_HEIGHT, base_offset or 0.0, flipped)
+            model.walls.append(wall)
+
+        for ins_id, symbol_id, host_id, level_id, kind, point, sill in data["inserts"]:
+            doc.use_id(ins_id)
+            inst = FamilyInstance(doc, doc.GetElement(symbol_id), LocationPoint(_xyz(point)),
+                                  levels.get(level_id, fallback), doc.GetElement(host_id))
+            if sill is not None:
+                inst.set_param(BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM, sill)
+            (model.doors if kind == "door" else model.windows).append(inst)
+
+        for room_id, level_id, number, name, height, loops in data["rooms"]:
+            doc.use_id(room_id)
+            room = Room(doc, levels.get(level_id, fallback), number, name, height or synthetic.LEVEL_HEIGHT)
+            room.set_boundary([[(c, host_id) for encoded, host_id in loop for c in decode_curves(encoded)]
+                               for loop in loops])
+            model.rooms.append(room)
+
+        for a, b in data["joins"]:
+            ea, eb = doc.GetElement(a), doc.GetElement(b)
+            if ea is not None and eb is not None and not JoinGeometryUtils.AreElementsJoined(doc, ea, eb):
+                JoinGeometryUtils.JoinGeometry(doc, ea, eb)
+
+        for elem_id, source, kind, key, value in data["params"]:
+            elem = doc.GetElement(elem_id)
+            if elem is None: continue
+            elem.set_param(getattr(BuiltInParameter, key) if kind == "bip" else key, value)
+
+        # Tipos escolhidos nos diálogos não fazem parte da gravação
+        model.types["finish_wall"] = WallType(doc, "Revestimento (replay)", synthetic.FINISH_WIDTH)
+        model.types["floor"] = FloorType(doc, "Piso (replay)")
+        model.types["ceiling"] = CeilingType(doc, "Forro (replay)")
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduz uma gravação da manalib no Revit falso.")
+    parser.add_argument("path")
+    parser.add_argument("--bench", action="store_true", help="Roda os benchmarks sobre o modelo.")
+    parser.add_argument("--profile", default="", help="cProfile de um benchmark (nome).")
+    args = parser.parse_args(argv)
+
+    model = load(args.path)
+    print(model.doc.Title)
+    for label, count in model.counts():
+        print("  {:<16} {:>8}".format(label, count))
+
+    import benchmarks
+    if args.bench:
+        for name, prepare, run in benchmarks.BENCHMARKS:
+            result = benchmarks.measure(name, prepare, run, model, len(model.rooms))
+            print("  {:<20} {:>12} itens/s  {:>10} KB".format(name, result["per_sec"], result["peak_kb"]))
+    if args.profile:
+        import cProfile
+        import pstats
+        found = [b for b in benchmarks.BENCHMARKS if b[0] == args.profile]
+        if not found: parser.error("benchmark desconhecido: {}".format(args.profile))
+        _, prepare, run = found[0]
+        state = prepare(model)
+        profiler = cProfile.Profile()
+        profiler.runcall(run, state)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Gerador de edifícios sintéticos sobre o Revit falso (dev/fakerevit).
+
+Cada pavimento é uma grade de ambientes retangulares. Cada aresta da grade
+vira UMA parede (as internas são compartilhadas por dois ambientes). Os
+limites dos ambientes ficam na face de acabamento, como devolve o Revit
+com SpatialElementBoundaryLocation.Finish: recuados meia espessura da
+parede e com cada segmento apontando para a parede hospedeira.
+
+    import headless; headless.setup()
+    import synthetic
+    model = synthetic.build(levels=3, rows=4, cols=6, onion=True)
+    model.doc, model.rooms, model.types["finish_wall"]
+
+Unidades em pés, como na API.
+"""
+import sys
+import headless
+
+headless.setup()
+
+from Autodesk.Revit.DB import (Document, XYZ, Line, CurveLoop, BuiltInParameter, FamilyPlacementType,
+                               Level, WallType, FloorType, CeilingType, Family, FamilySymbol, Wall,
+                               FamilyInstance, LocationPoint, Room, JoinGeometryUtils, WallKind)
+
+# Espessuras e dimensões padrão (pés)
+EXTERIOR_WIDTH = 0.82
+INTERIOR_WIDTH = 0.49
+FINISH_WIDTH = 0.1
+LEVEL_HEIGHT = 9.84
+ROOM_SIZE = (14.0, 11.0)
+DOOR_WIDTH = 2.62
+WINDOW_WIDTH = 3.94
+WINDOW_SILL = 3.61
+
+
+class SyntheticModel(object):
+    """Documento gerado + atalhos para os elementos de cada tipo."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.levels = []
+        self.rooms = []
+        self.walls = []
+        self.doors = []
+        self.windows = []
+        self.finish_walls = []
+        self.types = {}
+
+    def counts(self):
+        return [
+            ("Níveis", len(self.levels)),
+            ("Ambientes", len(self.rooms)),
+            ("Paredes", len(self.walls)),
+            ("Portas", len(self.doors)),
+            ("Janelas", len(self.windows)),
+            ("Paredes cebola", len(self.finish_walls)),
+            ("Elementos", len(self.doc)),
+        ]
+
+
+def _type_params(elem, name):
+    elem.set_param(BuiltInParameter.ALL_MODEL_TYPE_NAME, name)
+    elem.set_param(BuiltInParameter.SYMBOL_NAME_PARAM, name)
+    elem.set_param(BuiltInParameter.ALL_MODEL_TYPE_MARK, "")
+    return elem
+
+
+def _symbol(doc, family_name, category, placement, name, width=None, width_bip=None, height=None):
+    family = Family(doc, family_name, placement, category)
+    symbol = _type_params(FamilySymbol(doc, family, name), name)
+    if width is not None:
+        symbol.set_param(width_bip or BuiltInParameter.FAMILY_WIDTH_PARAM, width)
+        symbol.set_param(BuiltInParameter.FAMILY_WIDTH_PARAM, width)
+        symbol.set_param("Largura", width)
+    if height is not None:
+        symbol.set_param(BuiltInParameter.FAMILY_HEIGHT_PARAM, height)
+    return symbol
+
+
+def _create_types(doc):
+    types = {
+        "exterior_wall": _type_params(WallType(doc, "Parede Externa 25cm", EXTERIOR_WIDTH), "Parede Externa 25cm"),
+        "interior_wall": _type_params(WallType(doc, "Parede Interna 15cm", INTERIOR_WIDTH), "Parede Interna 15cm"),
+        "finish_wall": _type_params(WallType(doc, "Revestimento 3cm", FINISH_WIDTH), "Revestimento 3cm"),
+        "curtain_wall": _type_params(WallType(doc, "Cortina", 0.0, WallKind.Curtain), "Cortina"),
+        "floor": _type_params(FloorType(doc, "Piso Cerâmico 2cm"), "Piso Cerâmico 2cm"),
+        "ceiling": _type_params(CeilingType(doc, "Forro Gesso"), "Forro Gesso"),
+    }
+    types["door"] = _symbol(doc, "Porta Giro", "OST_Doors", FamilyPlacementType.OneLevelBasedHosted,
+                            "P 80x210", DOOR_WIDTH, BuiltInParameter.DOOR_WIDTH, 6.89)
+    types["wide_door"] = _symbol(doc, "Porta Giro", "OST_Doors", FamilyPlacementType.OneLevelBasedHosted,
+                                 "P 90x210", DOOR_WIDTH + 0.33, BuiltInParameter.DOOR_WIDTH, 6.89)
+    types["window"] = _symbol(doc, "Janela Correr", "OST_Windows", FamilyPlacementType.OneLevelBasedHosted,
+                              "J 120x100", WINDOW_WIDTH, BuiltInParameter.WINDOW_WIDTH, 3.28)
+    types["line_based"] = _symbol(doc, "Rodapé Line Based", "OST_GenericModel",
+                                  FamilyPlacementType.CurveBased, "Rodapé 7cm")
+    return types
+
+
+def _grid_wall(doc, p0, p1, wall_type, level, height):
+    return Wall(doc, Line.CreateBound(p0, p1), wall_type, level, height)
+
+
+def _insert(doc, symbol, wall, level, fraction, sill):
+    curve = wall.Location.Curve
+    p = curve.Evaluate(fraction, True)
+    inst = FamilyInstance(doc, symbol, LocationPoint(XYZ(p.X, p.Y, level.Elevation)), level, wall)
+    inst.set_param(BuiltInParameter.INSTANCE_SILL_HEIGHT_PARAM, sill)
+    inst.set_param(BuiltInParameter.INSTANCE_ELEVATION_PARAM, sill)
+    return inst
+
+
+def _room_boundary(x0, y0, x1, y1, z, walls):
+    """
+    Loop anti-horário na face de acabamento. walls = (baixo, direita, cima, esquerda).
+    Cada lado recua meia espessura da sua parede.
+    """
+    b, r, t, l = walls
+    xa, xb = x0 + l.Width / 2.0, x1 - r.Width / 2.0
+    ya, yb = y0 + b.Width / 2.0, y1 - t.Width / 2.0
+    corners = [XYZ(xa, ya, z), XYZ(xb, ya, z), XYZ(xb, yb, z), XYZ(xa, yb, z)]
+    loop = []
+    for i, host in enumerate((b, r, t, l)):
+        curve = Line.CreateBound(corners[i], corners[(i + 1) % 4])
+        loop.append((curve, host.Id.IntegerValue))
+    return [loop]
+
+
+def _onion_walls(doc, room, finish_type, level, height):
+    """Paredes de revestimento (como o comando Revestimento) unidas às hospedeiras."""
+    created = []
+    for loop in room._loops:
+        offset = CurveLoop.CreateViaOffset(CurveLoop.Create([c for c, _ in loop]),
+                                           -finish_type.Width / 2.0, XYZ.BasisZ)
+        for curve, (_, host_id) in zip(offset, loop):
+            wall = Wall(doc, curve, finish_type, level, height, flipped=True)
+            wall.set_param(BuiltInParameter.WALL_KEY_REF_PARAM, 3)
+            JoinGeometryUtils.JoinGeometry(doc, wall, doc.GetElement(host_id))
+            created.append(wall)
+    return created
+
+
+def build(levels=2, rows=3, cols=4, room_size=ROOM_SIZE, doors=True, windows=True, onion=False,
+          level_height=LEVEL_HEIGHT, title=None):
+    """
+    Gera o edifício: levels × (rows × cols) ambientes.
+
+    Args:
+        doors (bool): Uma porta em cada parede interna vertical e em metade das horizontais.
+        windows (bool): Uma janela em cada parede externa.
+        onion (bool): Paredes de revestimento já criadas e unidas (reexecuções).
+    """
+    doc = Document(title or "Sintético {}x{}x{}".format(levels, rows, cols))
+    model = SyntheticModel(doc)
+    dx, dy = room_size
+
+    with doc.loading():
+        model.types = types = _create_types(doc)
+        for n in range(levels):
+            level = Level(doc, "Pavimento {:02d}".format(n + 1), n * level_height)
+            model.levels.append(level)
+            z = level.Elevation
+            height = level_height
+
+            # Paredes horizontais h[j][i] (linha j, coluna i) e verticais v[j][i]
+            h = []
+            for j in range(rows + 1):
+                exterior = j in (0, rows)
+                wtype = types["exterior_wall"] if exterior else types["interior_wall"]
+                h.append([_grid_wall(doc, XYZ(i * dx, j * dy, z), XYZ((i + 1) * dx, j * dy, z),
+                                     wtype, level, height) for i in range(cols)])
+            v = []
+            for j in range(rows):
+                row = []
+                for i in range(cols + 1):
+                    exterior = i in (0, cols)
+                    wtype = types["exterior_wall"] if exterior else types["interior_wall"]
+                    row.append(_grid_wall(doc, XYZ(i * dx, j * dy, z), XYZ(i * dx, (j + 1) * dy, z),
+                                          wtype, level, height))
+                v.append(row)
+            level_walls = [w for row in h + v for w in row]
+            model.walls.extend(level_walls)
+
+            for wall in level_walls:
+                exterior = wall.WallType is types["exterior_wall"]
+                if exterior and windows:
+                    model.windows.append(_insert(doc, types["window"], wall, level, 0.5, WINDOW_SILL))
+                elif not exterior and doors:
+                    vertical = abs(wall.Location.Curve.Direction.X) < 0.5
+                    index = len(model.doors)
+                    if vertical or index % 2 == 0:
+                        symbol = types["door"] if index % 3 else types["wide_door"]
+                        model.doors.append(_insert(doc, symbol, wall, level, 0.3, 0.0))
+
+            for j in range(rows):
+                for i in range(cols):
+                    number = "{}{:02d}".format(n + 1, j * cols + i + 1)
+                    name = "Varanda" if (i == cols - 1 and j == 0) else "Sala"
+                    room = Room(doc, level, number, name, height)
+                    room.set_boundary(_room_boundary(i * dx, j * dy, (i + 1) * dx, (j + 1) * dy, z,
+                                                     (h[j][i], v[j][i + 1], h[j + 1][i], v[j][i])))
+                    model.rooms.append(room)
+                    if onion:
+                        model.finish_walls.extend(_onion_walls(doc, room, types["finish_wall"], level, height))
+    return model
+
+
+def main(argv=None):
+    """python dev/synthetic.py [níveis] [linhas] [colunas] [--onion]"""
+    args = list(sys.argv[1:] if argv is None else argv)
+    onion = "--onion" in args
+    numbers = [int(a) for a in args if not a.startswith("--")]
+    levels, rows, cols = (numbers + [2, 3, 4][len(numbers):])[:3]
+    model = build(levels, rows, cols, onion=onion)
+    print(model.doc.Title)
+    for label, count in model.counts():
+        print("  {:<16} {:>8}".format(label, count))
+
+
+if __name__ == "__main__":
+    main()
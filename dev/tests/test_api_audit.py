@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+api_audit: chamadas feitas por helpers da manalib são atribuídas também à
+linha do comando (fora da manalib) que levou até elas.
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+import synthetic
+from manalib import api_audit, room_geometry, session
+
+
+def _first_loop(room):
+    return room_geometry.get_cache(room.Document).boundary_loops(room)
+
+
+def _second_loop(room):
+    return room_geometry.get_cache(room.Document).boundary_loops(room)
+
+
+class CallSiteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = synthetic.build(levels=1, rows=1, cols=2, doors=False, windows=False)
+        self.audit = api_audit.Audit("teste")
+        api_audit._ACTIVE = self.audit
+
+    def tearDown(self):
+        api_audit._ACTIVE = None
+        session.get_store(room_geometry.STORE_NAME).pop(session.document_key(self.model.doc), None)
+
+    def test_helper_calls_are_split_by_command_line(self):
+        a, b = self.model.rooms
+        _first_loop(a)
+        _second_loop(b)
+        sites = [site for site, method, n in self.audit.site_rows() if method.endswith("GetBoundarySegments")]
+        self.assertEqual(len(sites), 2)
+        for site in sites:
+            helper, caller = site.split(" < ")
+            self.assertTrue(helper.startswith("manalib/room_geometry.py:"), helper)
+            self.assertTrue(caller.startswith("tests/test_api_audit.py:"), caller)
+        self.assertNotEqual(sites[0].split(" < ")[1], sites[1].split(" < ")[1])
+
+    def test_direct_call_has_single_frame(self):
+        api_audit.counted(self.model.doc).GetElement(self.model.walls[0].Id)
+        sites = [site for site, method, n in self.audit.site_rows()]
+        self.assertEqual(len(sites), 1)
+        self.assertTrue(sites[0].startswith("tests/test_api_audit.py:"), sites[0])
+        self.assertNotIn(" < ", sites[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
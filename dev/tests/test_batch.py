@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+batch: o checkpoint só sobrevive a lotes interrompidos, e só é oferecido
+para a mesma combinação de comando + opções.
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+import synthetic
+from manalib import batch, session
+
+COMMAND = "manatools_teste"
+SETTINGS = ("tipo", 0.1, True)
+
+
+class _Stop(Exception):
+    pass
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = synthetic.build(levels=1, rows=2, cols=2, doors=False, windows=False)
+        self.doc = self.model.doc
+        self.rooms = self.model.rooms
+
+    def tearDown(self):
+        session.get_store(batch.STORE_NAME).pop(session.document_key(self.doc), None)
+
+    def _create(self, room):
+        # Um elemento existente basta: o checkpoint só confere se os IDs existem
+        return self.doc.GetElement(self.model.walls[0].Id)
+
+    def _run(self, settings=SETTINGS, fail=(), stop_after=None, resume=True):
+        executor = batch.BatchExecutor(self.doc, "Teste", COMMAND, chunk_size=1, resume=resume,
+                                       settings=settings)
+        try:
+            with executor:
+                for n, room in enumerate(executor.pending(self.rooms)):
+                    if stop_after is not None and n == stop_after: raise _Stop()
+                    key = batch.element_key(room)
+                    if key in fail:
+                        executor.apply(key, lambda: 1 / 0)
+                    else:
+                        executor.apply(key, lambda: self._create(room))
+        except _Stop:
+            pass
+        return executor.report
+
+    def test_failed_items_do_not_keep_checkpoint(self):
+        report = self._run(fail={batch.element_key(self.rooms[0])})
+        self.assertEqual(len(report.failures), 1)
+        self.assertFalse(report.interrupted)
+        self.assertIsNone(batch.get_checkpoint(self.doc, COMMAND, SETTINGS))
+        # A próxima execução não pula nada
+        self.assertEqual(self._run().resumed, 0)
+
+    def test_interrupted_run_resumes_with_same_settings(self):
+        report = self._run(stop_after=2)
+        self.assertTrue(report.interrupted)
+        self.assertEqual(len(batch.get_checkpoint(self.doc, COMMAND, SETTINGS)), 2)
+        report = self._run()
+        self.assertEqual((report.resumed, report.done), (2, len(self.rooms) - 2))
+        self.assertIsNone(batch.get_checkpoint(self.doc, COMMAND, SETTINGS))
+
+    def test_other_settings_do_not_resume(self):
+        self._run(stop_after=2)
+        other = ("tipo", 0.2, True)
+        self.assertIsNone(batch.get_checkpoint(self.doc, COMMAND, other))
+        self.assertTrue(batch.ask_resume(self.doc, COMMAND, other))
+        report = self._run(settings=other)
+        self.assertEqual(report.resumed, 0)
+        # O checkpoint antigo foi substituído
+        self.assertIsNone(batch.get_checkpoint(self.doc, COMMAND, SETTINGS))
+
+
+if __name__ == "__main__":
+    unittest.main()
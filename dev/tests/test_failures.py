@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+failures.BatchFailuresPreprocessor: só apaga avisos inofensivos e só
+resolve erros da lista; o resto fica no modelo ou desfaz a Transaction.
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+from Autodesk.Revit.DB import BuiltInFailures, FailureSeverity, FailureProcessingResult
+from manalib import failures
+
+
+class _Message(object):
+    """FailureMessageAccessor mínimo."""
+
+    def __init__(self, definition, severity, text, resolutions=True):
+        self._definition = definition
+        self._severity = severity
+        self._text = text
+        self._resolutions = resolutions
+
+    def GetFailureDefinitionId(self):
+        return self._definition
+
+    def GetSeverity(self):
+        return self._severity
+
+    def GetDescriptionText(self):
+        return self._text
+
+    def HasResolutions(self):
+        return self._resolutions
+
+
+class _Accessor(object):
+    """FailuresAccessor mínimo: registra o que foi apagado/resolvido."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.deleted = []
+        self.resolved = []
+
+    def GetFailureMessages(self):
+        return list(self.messages)
+
+    def DeleteWarning(self, msg):
+        self.deleted.append(msg)
+
+    def ResolveFailure(self, msg):
+        self.resolved.append(msg)
+
+
+WALLS_OVERLAP = _Message(BuiltInFailures.OverlapFailures.WallsOverlap, FailureSeverity.Warning, "Paredes sobrepostas")
+ROOM_NOT_ENCLOSED = _Message(BuiltInFailures.RoomFailures.RoomNotEnclosed, FailureSeverity.Warning, "Ambiente aberto")
+CANNOT_JOIN = _Message(BuiltInFailures.JoinElementsFailures.CannotJoinElementsError, FailureSeverity.Error,
+                       "Não é possível unir")
+FLOOR_INVALID = _Message(BuiltInFailures.SketchFailures.SketchInvalid, FailureSeverity.Error, "Esboço inválido")
+
+
+class PreprocessorTest(unittest.TestCase):
+
+    def _run(self, messages):
+        accessor = _Accessor(messages)
+        preprocessor = failures.BatchFailuresPreprocessor()
+        return preprocessor.PreprocessFailures(accessor), accessor, preprocessor.report
+
+    def test_only_benign_warnings_are_deleted(self):
+        result, accessor, report = self._run([WALLS_OVERLAP, ROOM_NOT_ENCLOSED])
+        self.assertEqual(result, FailureProcessingResult.Continue)
+        self.assertEqual(accessor.deleted, [WALLS_OVERLAP])
+        self.assertEqual(report.benign, {"Paredes sobrepostas": 1})
+        self.assertEqual(report.other_warnings, {"Ambiente aberto": 1})
+
+    def test_known_error_is_resolved(self):
+        result, accessor, report = self._run([CANNOT_JOIN, WALLS_OVERLAP])
+        self.assertEqual(result, FailureProcessingResult.ProceedWithCommit)
+        self.assertEqual(accessor.resolved, [CANNOT_JOIN])
+        self.assertEqual(report.resolved, {"Não é possível unir": 1})
+
+    def test_unknown_error_rolls_back(self):
+        # Tem resolução padrão, mas não está na lista: não resolve
+        result, accessor, report = self._run([FLOOR_INVALID, CANNOT_JOIN])
+        self.assertEqual(result, FailureProcessingResult.ProceedWithRollBack)
+        self.assertNotIn(FLOOR_INVALID, accessor.resolved)
+        self.assertEqual(report.unresolved, {"Esboço inválido": 1})
+
+    def test_known_error_without_resolution(self):
+        no_resolution = _Message(CANNOT_JOIN.GetFailureDefinitionId(), FailureSeverity.Error, "Sem resolução", False)
+        result, accessor, _ = self._run([no_resolution])
+        self.assertEqual(result, FailureProcessingResult.ProceedWithRollBack)
+        self.assertEqual(accessor.resolved, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+finish_sync.DependencyTracker alimentado por um feed de alterações falso
+(ChangeSets com IDs inteiros, sem Revit).
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+from manalib import finish_sync, session
+from manalib.finish_sync import ChangeSet, WALL, ROOM, OPENING, SEPARATOR
+
+#  Dois ambientes lado a lado, parede 12 entre eles:
+#
+#     +--10--+--11--+
+#     |  1   12  2  |      porta 20 na parede 12, janela 21 na parede 11
+#     +--13--+--14--+
+ROOM_A, ROOM_B = 1, 2
+WALL_A, WALL_B, WALL_SHARED, WALL_A_BOTTOM, WALL_B_BOTTOM = 10, 11, 12, 13, 14
+DOOR, WINDOW = 20, 21
+COMMAND = "manatools_criarrevest"
+
+
+class _Doc(object):
+    """Documento mínimo: finish_sync só usa a chave da sessão."""
+
+
+def _tracker():
+    tracker = finish_sync.DependencyTracker()
+    tracker.set_room(ROOM_A, [WALL_A, WALL_SHARED, WALL_A_BOTTOM], (0, 0, 0, 10, 10, 3))
+    tracker.set_room(ROOM_B, [WALL_B, WALL_SHARED, WALL_B_BOTTOM], (10, 0, 0, 20, 10, 3))
+    tracker.set_opening(DOOR, WALL_SHARED)
+    tracker.set_opening(WINDOW, WALL_B)
+    return tracker
+
+
+def _feed(doc, tracker, change):
+    """Mesma ordem do FinishSyncUpdater.Execute, sem a leitura do Revit."""
+    if finish_sync.is_suspended(doc): return set()
+    if change.is_empty(): return set()
+    affected = tracker.affected(change)
+    finish_sync.queue_rooms(doc, affected)
+    return affected
+
+
+class ModifiedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = _tracker()
+
+    def test_room(self):
+        self.assertEqual(self.tracker.affected(ChangeSet({ROOM_A: ROOM})), {ROOM_A})
+
+    def test_untracked_room(self):
+        self.assertEqual(self.tracker.affected(ChangeSet({99: ROOM})), set())
+
+    def test_wall(self):
+        self.assertEqual(self.tracker.affected(ChangeSet({WALL_A: WALL})), {ROOM_A})
+        self.assertEqual(self.tracker.affected(ChangeSet({WALL_SHARED: WALL})), {ROOM_A, ROOM_B})
+
+    def test_separator(self):
+        self.assertEqual(self.tracker.affected(ChangeSet({WALL_B_BOTTOM: SEPARATOR})), {ROOM_B})
+
+    def test_opening(self):
+        self.assertEqual(self.tracker.affected(ChangeSet({WINDOW: OPENING})), {ROOM_B})
+
+    def test_opening_moved_to_other_host(self):
+        change = ChangeSet({WINDOW: OPENING}, opening_hosts={WINDOW: WALL_A})
+        self.assertEqual(self.tracker.affected(change), {ROOM_A, ROOM_B})
+        # O novo hospedeiro passa a valer nas próximas alterações
+        self.assertEqual(self.tracker.affected(ChangeSet({WINDOW: OPENING})), {ROOM_A})
+
+
+class DeletedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = _tracker()
+
+    def test_wall(self):
+        self.assertEqual(self.tracker.affected(ChangeSet(deleted=[WALL_SHARED])), {ROOM_A, ROOM_B})
+
+    def test_opening(self):
+        self.assertEqual(self.tracker.affected(ChangeSet(deleted=[DOOR])), {ROOM_A, ROOM_B})
+        # Vão excluído sai do tracker
+        self.assertEqual(self.tracker.affected(ChangeSet({DOOR: OPENING})), set())
+
+    def test_room_is_forgotten(self):
+        self.assertEqual(self.tracker.affected(ChangeSet(deleted=[ROOM_A])), {ROOM_A})
+        self.assertEqual(len(self.tracker), 1)
+        self.assertEqual(self.tracker.affected(ChangeSet({WALL_A: WALL})), set())
+        self.assertEqual(self.tracker.affected(ChangeSet({WALL_SHARED: WALL})), {ROOM_B})
+
+    def test_unknown(self):
+        self.assertEqual(self.tracker.affected(ChangeSet(deleted=[999])), set())
+
+
+class AddedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = _tracker()
+
+    def test_wall_by_box(self):
+        # Parede nova dentro do ambiente B
+        change = ChangeSet(added={30: (WALL, (14, 2, 0, 16, 8, 3))})
+        self.assertEqual(self.tracker.affected(change), {ROOM_B})
+
+    def test_wall_far_away(self):
+        change = ChangeSet(added={30: (WALL, (100, 100, 0, 110, 101, 3))})
+        self.assertEqual(self.tracker.affected(change), set())
+
+    def test_opening(self):
+        change = ChangeSet(added={31: (OPENING, None)}, opening_hosts={31: WALL_A})
+        self.assertEqual(self.tracker.affected(change), {ROOM_A})
+
+
+class SuspendedFeedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = _Doc()
+        self.tracker = _tracker()
+        state = finish_sync.get_state(self.doc)
+        state["room_commands"] = {ROOM_A: {COMMAND}, ROOM_B: {COMMAND}}
+
+    def tearDown(self):
+        session.get_store(finish_sync.STORE_NAME).pop(session.document_key(self.doc), None)
+
+    def test_queues_per_command(self):
+        _feed(self.doc, self.tracker, ChangeSet({WALL_A: WALL}))
+        self.assertEqual(finish_sync.pending_rooms(self.doc, COMMAND), {ROOM_A})
+        finish_sync.mark_synced(self.doc, COMMAND, [ROOM_A])
+        self.assertEqual(finish_sync.pending_rooms(self.doc, COMMAND), set())
+
+    def test_suspended_changes_are_ignored(self):
+        finish_sync.suspend(self.doc)
+        finish_sync.suspend(self.doc)  # Lote aninhado
+        self.assertEqual(_feed(self.doc, self.tracker, ChangeSet({WALL_SHARED: WALL})), set())
+        finish_sync.resume(self.doc)
+        self.assertTrue(finish_sync.is_suspended(self.doc))
+        self.assertEqual(_feed(self.doc, self.tracker, ChangeSet(deleted=[DOOR])), set())
+        finish_sync.resume(self.doc)
+        self.assertFalse(finish_sync.is_suspended(self.doc))
+        self.assertEqual(finish_sync.pending_rooms(self.doc, COMMAND), set())
+
+        _feed(self.doc, self.tracker, ChangeSet({WINDOW: OPENING}))
+        self.assertEqual(finish_sync.pending_rooms(self.doc, COMMAND), {ROOM_B})
+
+    def test_updater_errors_are_kept_until_taken(self):
+        state = finish_sync.get_state(self.doc)
+        state["tracker"] = self.tracker
+        finish_sync.note_error(self.doc, ValueError("primeira"))
+        finish_sync.note_error(self.doc, ValueError("segunda"))
+        # Tracker possivelmente incompleto: refeito na próxima alteração
+        self.assertIsNone(state["tracker"])
+        self.assertEqual(finish_sync.take_errors(self.doc), (2, "segunda"))
+        self.assertEqual(finish_sync.take_errors(self.doc), (0, None))
+
+    def test_resume_without_suspend(self):
+        finish_sync.resume(self.doc)
+        self.assertFalse(finish_sync.is_suspended(self.doc))
+        finish_sync.suspend(self.doc)
+        self.assertTrue(finish_sync.is_suspended(self.doc))
+        finish_sync.resume(self.doc)
+
+
+if __name__ == "__main__":
+    unittest.main()
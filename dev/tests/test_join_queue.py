@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+join_queue: uniões de uma Transaction desfeita não podem ficar no grafo
+da sessão (o RollBack não dispara o doc-changed).
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+import synthetic
+from Autodesk.Revit.DB import Transaction, JoinGeometryUtils
+from manalib import join_queue, session
+
+
+class ProvisionalJoinsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = synthetic.build(levels=1, rows=1, cols=2, doors=False, windows=False, onion=True)
+        self.doc = self.model.doc
+        self.a, self.b = self.model.finish_walls[0], self.model.walls[-1]
+        self.assertFalse(JoinGeometryUtils.AreElementsJoined(self.doc, self.a, self.b))
+
+    def tearDown(self):
+        session.get_store(join_queue.STORE_NAME).pop(session.document_key(self.doc), None)
+
+    def _join(self, commit, confirm=True):
+        t = Transaction(self.doc, "Unir")
+        t.Start()
+        queue = join_queue.JoinQueue(self.doc)
+        queue.add(self.a, self.b)
+        report = queue.flush()
+        if commit:
+            t.Commit()
+            if confirm: queue.graph.confirm()
+        else:
+            t.RollBack()
+            if confirm: queue.graph.discard()
+        return report
+
+    def test_rollback_then_retry(self):
+        self.assertEqual(self._join(commit=False).joined, 1)
+        self.assertFalse(JoinGeometryUtils.AreElementsJoined(self.doc, self.a, self.b))
+        report = self._join(commit=True)
+        self.assertEqual((report.joined, report.already), (1, 0))
+        self.assertTrue(JoinGeometryUtils.AreElementsJoined(self.doc, self.a, self.b))
+
+    def test_unconfirmed_rollback_is_dropped(self):
+        self._join(commit=False, confirm=False)
+        # Consulta fora de uma Transaction: as provisórias caem
+        self.assertFalse(join_queue.get_graph(self.doc).are_joined(self.a, self.b))
+        report = self._join(commit=True)
+        self.assertEqual((report.joined, report.already), (1, 0))
+
+    def test_committed_join_is_remembered(self):
+        self._join(commit=True)
+        graph = join_queue.get_graph(self.doc)
+        reads = graph.reads
+        self.assertTrue(graph.are_joined(self.a, self.b))
+        self.assertEqual(graph.reads, reads)
+        self.assertEqual(self._join(commit=True).already, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
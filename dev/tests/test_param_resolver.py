@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+param_resolver: o cache por tipo não pode esconder valores de instância
+(tipo sem largura, só algumas instâncias com DOOR_WIDTH próprio).
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+import synthetic
+from Autodesk.Revit.DB import BuiltInParameter, FamilyInstance, LocationPoint, XYZ
+from manalib import param_resolver, session
+from manalib.param_resolver import DOOR_WIDTH, OPENING_WIDTH
+
+
+class ResolverCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = synthetic.build(levels=1, rows=2, cols=2, windows=False)
+        self.doc = self.model.doc
+        self.resolver = param_resolver.ParameterResolver(self.doc)
+
+    def tearDown(self):
+        session.get_store(param_resolver.STORE_NAME).pop(session.document_key(self.doc), None)
+
+    def _instances(self, symbol, count):
+        level = self.model.levels[0]
+        with self.doc.loading():
+            return [FamilyInstance(self.doc, symbol, LocationPoint(XYZ(i, 0, 0)), level)
+                    for i in range(count)]
+
+    def test_type_miss_keeps_reading_instances(self):
+        # Tipo sem nenhuma largura: a primeira instância cai no padrão
+        plain, own, other = self._instances(self.model.types["line_based"], 3)
+        own.set_param(BuiltInParameter.DOOR_WIDTH, 1.5)
+        other.set_param(BuiltInParameter.FURNITURE_WIDTH, 2.0)
+
+        self.assertEqual(self.resolver.read(plain, DOOR_WIDTH), DOOR_WIDTH.default)
+        self.assertEqual(self.resolver.read(own, DOOR_WIDTH), 1.5)
+        self.assertEqual(self.resolver.read(other, DOOR_WIDTH), 2.0)
+        self.assertEqual(self.resolver.read(plain, DOOR_WIDTH), DOOR_WIDTH.default)
+        # Só a primeira leitura percorreu a cadeia do tipo
+        self.assertEqual(self.resolver.misses, 1)
+
+    def test_instance_value_beats_cached_type_value(self):
+        first, second = self._instances(self.model.types["door"], 2)
+        type_width = first.Symbol.get_Parameter(BuiltInParameter.DOOR_WIDTH).AsDouble()
+        second.set_param(BuiltInParameter.DOOR_WIDTH, type_width + 1.0)
+
+        self.assertEqual(self.resolver.read(first, DOOR_WIDTH), type_width)
+        self.assertEqual(self.resolver.read(second, DOOR_WIDTH), type_width + 1.0)
+        self.assertEqual(self.resolver.read(first, OPENING_WIDTH), type_width)
+        self.assertEqual(self.resolver.read(second, OPENING_WIDTH), type_width + 1.0)
+
+    def test_type_value_is_cached(self):
+        doors = self._instances(self.model.types["door"], 5)
+        values = set(self.resolver.read(d, DOOR_WIDTH) for d in doors)
+        self.assertEqual(len(values), 1)
+        self.assertEqual(self.resolver.misses, 1)
+        self.assertEqual(self.resolver.hits, len(doors) - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+polygon2d.union contra a força bruta: área por contagem de células e
+pertinência ponto a ponto (o ponto está na união se está em alguma região).
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+from manalib import polygon2d
+
+
+def _rect(x0, y0, x1, y1):
+    return [[(x0, y0), (x1, y0), (x1, y1), (x0, y1)]]
+
+
+def _island_area(outer, holes):
+    return (abs(polygon2d.signed_area2(outer)) - sum(abs(polygon2d.signed_area2(h)) for h in holes)) / 2.0
+
+
+def _union_area(islands):
+    return sum(_island_area(o, h) for o, h in islands)
+
+
+def _located(point, islands):
+    """Posição de um ponto (inteiro) na união: INSIDE se em alguma ilha."""
+    for outer, holes in islands:
+        status = polygon2d.locate(point, [outer] + holes)
+        if status != polygon2d.OUTSIDE: return status
+    return polygon2d.OUTSIDE
+
+
+def _random_rects(rng, count, size=20):
+    rects = []
+    for _ in range(count):
+        x0, y0 = rng.randint(0, size - 1), rng.randint(0, size - 1)
+        rects.append((x0, y0, rng.randint(x0 + 1, size), rng.randint(y0 + 1, size)))
+    return rects
+
+
+class UnionRectanglesTest(unittest.TestCase):
+    """Retângulos em coordenadas inteiras (snap=1): a área exata é a contagem de células."""
+
+    def _check(self, rects):
+        regions = [polygon2d.snap_region(_rect(*r), 1.0) for r in rects]
+        islands = polygon2d.union_regions(regions, 1.0, 0.0)
+
+        cells = set()
+        for x0, y0, x1, y1 in rects:
+            for x in range(x0, x1):
+                for y in range(y0, y1):
+                    cells.add((x, y))
+        self.assertEqual(_union_area(islands), len(cells))
+
+        # Centros de célula (coordenadas dobradas para ficarem inteiras)
+        doubled = [([(2 * x, 2 * y) for x, y in o], [[(2 * x, 2 * y) for x, y in h] for h in hs])
+                   for o, hs in islands]
+        for x in range(-1, 22):
+            for y in range(-1, 22):
+                expected = polygon2d.INSIDE if (x, y) in cells else polygon2d.OUTSIDE
+                self.assertEqual(_located((2 * x + 1, 2 * y + 1), doubled), expected, (x, y))
+
+        for outer, holes in islands:
+            self.assertGreater(polygon2d.signed_area2(outer), 0)
+            for hole in holes:
+                self.assertLess(polygon2d.signed_area2(hole), 0)
+
+    def test_random(self):
+        rng = random.Random(1)
+        for _ in range(40):
+            self._check(_random_rects(rng, rng.randint(2, 8)))
+
+    def test_shared_edge(self):
+        islands = polygon2d.union_regions(
+            [polygon2d.snap_region(_rect(0, 0, 4, 4), 1.0), polygon2d.snap_region(_rect(4, 0, 8, 4), 1.0)],
+            1.0, 0.0)
+        self.assertEqual(len(islands), 1)
+        # Aresta interna some e os vértices colineares são simplificados
+        self.assertEqual(len(islands[0][0]), 4)
+
+    def test_ring_makes_hole(self):
+        rects = [(0, 0, 9, 3), (0, 6, 9, 9), (0, 0, 3, 9), (6, 0, 9, 9)]
+        self._check(rects)
+        regions = [polygon2d.snap_region(_rect(*r), 1.0) for r in rects]
+        islands = polygon2d.union_regions(regions, 1.0, 0.0)
+        self.assertEqual(len(islands), 1)
+        self.assertEqual(len(islands[0][1]), 1)
+
+    def test_disjoint(self):
+        self._check([(0, 0, 2, 2), (5, 5, 7, 7), (10, 0, 12, 3)])
+
+
+class UnionFloatTest(unittest.TestCase):
+    """Atalho em pés: triângulos e retângulos oblíquos, pertinência por amostragem."""
+
+    def test_random_membership(self):
+        rng = random.Random(2)
+        snap = polygon2d.SNAP
+        for _ in range(15):
+            polygons = []
+            for _ in range(rng.randint(2, 5)):
+                cx, cy = rng.uniform(0, 10), rng.uniform(0, 10)
+                pts = [(cx + rng.uniform(-4, 4), cy + rng.uniform(-4, 4)) for _ in range(3)]
+                polygons.append([pts])
+            regions = [polygon2d.snap_region(p) for p in polygons]
+            islands = polygon2d.union_regions(regions, snap, 0.0)
+
+            for _ in range(300):
+                p = (rng.randint(-512, 4096), rng.randint(-512, 4096))
+                statuses = [polygon2d.locate(p, r) for r in regions if r]
+                if polygon2d.BOUNDARY in statuses: continue
+                got = _located(p, islands)
+                if got == polygon2d.BOUNDARY: continue
+                expected = polygon2d.INSIDE if polygon2d.INSIDE in statuses else polygon2d.OUTSIDE
+                self.assertEqual(got, expected, p)
+
+    def test_union_in_feet(self):
+        islands = polygon2d.union([_rect(0, 0, 2.5, 2), _rect(2, 0, 4, 2)])
+        self.assertEqual(len(islands), 1)
+        outer, holes = islands[0]
+        self.assertEqual(holes, [])
+        self.assertEqual(sorted(outer), [(0.0, 0.0), (0.0, 2.0), (4.0, 0.0), (4.0, 2.0)])
+
+    def test_min_area_drops_slivers(self):
+        self.assertEqual(polygon2d.union([_rect(0, 0, 0.05, 0.05)]), [])
+
+
+class GroupOverlappingTest(unittest.TestCase):
+
+    def test_groups(self):
+        regions = [polygon2d.snap_region(_rect(*r), 1.0)
+                   for r in [(0, 0, 2, 2), (10, 10, 12, 12), (1, 1, 3, 3), (2, 2, 4, 4)]]
+        self.assertEqual(polygon2d.group_overlapping(regions), [[0, 2, 3], [1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+replay: uma gravação aberta depois de os caches da sessão estarem cheios
+registra o mesmo que a primeira, e cada gravação vai para um arquivo próprio.
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+import synthetic
+from manalib import replay, room_geometry, param_resolver, session
+
+
+class CachedReadsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = synthetic.build(levels=1, rows=2, cols=3)
+        self.folder = tempfile.mkdtemp()
+        self._enabled = replay.enabled
+        replay.enabled = lambda: True
+
+    def tearDown(self):
+        replay.enabled = self._enabled
+        shutil.rmtree(self.folder, ignore_errors=True)
+        key = session.document_key(self.model.doc)
+        for store in (room_geometry.STORE_NAME, param_resolver.STORE_NAME):
+            session.get_store(store).pop(key, None)
+
+    def _record(self):
+        doc = self.model.doc
+        with replay.run("teste", self.folder) as recording:
+            cache = room_geometry.get_cache(doc)
+            for room in self.model.rooms:
+                cache.boundary_loops(room)
+            for opening in self.model.doors + self.model.windows:
+                param_resolver.read(opening, param_resolver.OPENING_WIDTH, doc)
+        return recording
+
+    def test_second_recording_is_complete(self):
+        first = self._record()
+        second = self._record()
+        self.assertEqual(len(first.rooms), len(self.model.rooms))
+        self.assertTrue(first.walls and first.inserts and first.params)
+        self.assertEqual(second.to_dict()["rooms"], first.to_dict()["rooms"])
+        self.assertEqual(second.to_dict()["walls"], first.to_dict()["walls"])
+        self.assertEqual(second.to_dict()["inserts"], first.to_dict()["inserts"])
+        self.assertEqual(second.params, first.params)
+
+    def test_files_are_not_overwritten(self):
+        self._record()
+        self._record()
+        self.assertEqual(len([n for n in os.listdir(self.folder) if n.endswith(replay.EXTENSION)]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+spatial_index (grade uniforme) contra a força bruta O(n²): os pares
+candidatos precisam ser exatamente os mesmos, na mesma ordem.
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+from manalib import spatial_index
+
+
+def _random_boxes(rng, count, prefix, spread=60.0):
+    """Caixas de tamanhos variados, algumas coladas, algumas enormes, algumas None."""
+    items = []
+    for i in range(count):
+        key = "{}{}".format(prefix, i)
+        roll = rng.random()
+        if roll < 0.05:
+            items.append((key, None))
+            continue
+        x, y, z = rng.uniform(0, spread), rng.uniform(0, spread), rng.uniform(0, 12)
+        if roll < 0.10:
+            # Laje cobrindo quase tudo: vai para a lista linear da grade
+            dx, dy, dz = spread, spread, 0.5
+        else:
+            dx, dy, dz = rng.uniform(0.1, 8), rng.uniform(0.1, 8), rng.uniform(0.1, 3)
+        items.append((key, (x, y, z, x + dx, y + dy, z + dz)))
+    # Caixas que só se tocam pela face (folga zero)
+    items.append((prefix + "face0", (100.0, 0.0, 0.0, 101.0, 1.0, 1.0)))
+    items.append((prefix + "face1", (101.0, 0.0, 0.0, 102.0, 1.0, 1.0)))
+    return items
+
+
+def _brute_pairs(items_a, items_b, tolerance):
+    return [(ka, kb)
+            for ka, a in items_a if a
+            for kb, b in items_b if b
+            if ka != kb and spatial_index.boxes_overlap(a, b, tolerance)]
+
+
+def _brute_self_pairs(items, tolerance):
+    items = [(k, b) for k, b in items if b]
+    return [(items[i][0], items[j][0])
+            for i in range(len(items))
+            for j in range(i + 1, len(items))
+            if spatial_index.boxes_overlap(items[i][1], items[j][1], tolerance)]
+
+
+def _brute_endpoint_pairs(segments, tolerance):
+    tol2 = tolerance * tolerance
+    pairs = []
+    for i in range(len(segments)):
+        for j in range(i + 1, len(segments)):
+            _, a0, a1 = segments[i]
+            _, b0, b1 = segments[j]
+            for p in (a0, a1):
+                if any((p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 <= tol2 for q in (b0, b1)):
+                    pairs.append((segments[i][0], segments[j][0]))
+                    break
+    return pairs
+
+
+class CandidatePairsTest(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(1)
+        for tolerance in (0.0, 0.05, 1.0):
+            items_a = _random_boxes(rng, 150, "a")
+            items_b = _random_boxes(rng, 200, "b")
+            grid = spatial_index.candidate_pairs(items_a, items_b, tolerance)
+            # Mesma ordem de items_a; dentro de cada chave a ordem da grade é livre
+            self.assertEqual(sorted(grid), sorted(_brute_pairs(items_a, items_b, tolerance)))
+            self.assertEqual([a for a, _ in grid], [a for a, _ in _brute_pairs(items_a, items_b, tolerance)])
+
+    def test_fixed_cell_size(self):
+        rng = random.Random(2)
+        items_a = _random_boxes(rng, 80, "a")
+        items_b = _random_boxes(rng, 80, "b")
+        for cell_size in ((0.5, 0.5, 0.5), (50.0, 50.0, 50.0)):
+            grid = spatial_index.candidate_pairs(items_a, items_b, 0.1, cell_size)
+            self.assertEqual(sorted(grid), sorted(_brute_pairs(items_a, items_b, 0.1)))
+
+    def test_same_key_is_skipped(self):
+        box = (0, 0, 0, 1, 1, 1)
+        self.assertEqual(spatial_index.candidate_pairs([(1, box)], [(1, box), (2, box)]), [(1, 2)])
+
+    def test_empty(self):
+        self.assertEqual(spatial_index.candidate_pairs([(1, (0, 0, 0, 1, 1, 1))], [(2, None)]), [])
+
+
+class SelfCandidatePairsTest(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        for tolerance in (0.0, 0.05, 1.0):
+            items = _random_boxes(rng, 250, "s")
+            self.assertEqual(spatial_index.self_candidate_pairs(items, tolerance),
+                             _brute_self_pairs(items, tolerance))
+
+    def test_gap_within_tolerance(self):
+        items = [("a", (0, 0, 0, 1, 1, 1)), ("b", (1.04, 0, 0, 2, 1, 1))]
+        self.assertEqual(spatial_index.self_candidate_pairs(items, 0.0), [])
+        self.assertEqual(spatial_index.self_candidate_pairs(items, 0.05), [("a", "b")])
+
+
+class EndpointPairsTest(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(4)
+        # Pontos numa malha grossa: muitas extremidades coincidentes ou quase
+        grid = [(x * 2.5, y * 2.5) for x in range(8) for y in range(8)]
+        segments = []
+        for i in range(300):
+            p0, p1 = rng.sample(grid, 2)
+            jitter = rng.choice((0.0, 0.004, 0.02))
+            p1 = (p1[0] + jitter, p1[1] - jitter, rng.uniform(0, 3))
+            segments.append((i, p0, p1))
+        for tolerance in (0.0, 0.01, 0.05):
+            self.assertEqual(spatial_index.endpoint_pairs(segments, tolerance),
+                             _brute_endpoint_pairs(segments, tolerance))
+
+    def test_ignores_z(self):
+        segments = [("a", (0, 0, 0), (5, 0, 0)), ("b", (5, 0, 10), (5, 5, 10))]
+        self.assertEqual(spatial_index.endpoint_pairs(segments), [("a", "b")])
+
+
+class ConnectedComponentsTest(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(5)
+        items = [(k, b) for k, b in _random_boxes(rng, 120, "c") if b]
+        keys = [k for k, _ in items]
+        groups = spatial_index.connected_components(keys, spatial_index.self_candidate_pairs(items))
+
+        # Busca em largura sobre a força bruta
+        neighbours = dict((k, set()) for k in keys)
+        for a, b in _brute_self_pairs(items, 0.0):
+            neighbours[a].add(b)
+            neighbours[b].add(a)
+        expected, seen = [], set()
+        for key in keys:
+            if key in seen: continue
+            group, queue = [], [key]
+            seen.add(key)
+            while queue:
+                k = queue.pop()
+                group.append(k)
+                for n in neighbours[k] - seen:
+                    seen.add(n)
+                    queue.append(n)
+            expected.append(sorted(group, key=keys.index))
+
+        self.assertEqual(groups, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+wall_trim (offset + trim em forma fechada) contra referências por força
+bruta: distância às retas originais e interseções por amostragem do círculo.
+
+    python -m pytest dev/tests
+    python -m unittest discover dev/tests
+"""
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+headless.setup()
+
+from manalib import wall_trim, geometry2d
+from manalib.wall_trim import LINE, ARC, OTHER
+
+
+def _line_distance(p, a, b):
+    """Distância com sinal de p à reta a-b (positiva à esquerda)."""
+    t = geometry2d.normalize(geometry2d.sub(b, a))
+    return geometry2d.cross(t, geometry2d.sub(p, a))
+
+
+def _polygon(points):
+    n = len(points)
+    return [wall_trim.line_segment(points[i], points[(i + 1) % n]) for i in range(n)]
+
+
+def _random_convex(rng, count):
+    """Polígono convexo anti-horário (ângulos ordenados em torno de um centro)."""
+    angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(count))
+    radius = rng.uniform(5, 20)
+    return [(radius * math.cos(a), radius * math.sin(a)) for a in angles]
+
+
+def _sampled_circle_hits(center, radius, test, near, steps=50000):
+    """Interseção por amostragem: ponto do círculo onde test() troca de sinal, o mais perto de 'near'."""
+    hits = []
+    prev = None
+    for i in range(steps + 1):
+        a = 2 * math.pi * i / steps
+        p = (center[0] + radius * math.cos(a), center[1] + radius * math.sin(a))
+        value = test(p)
+        if prev is not None and (value > 0) != (prev > 0):
+            hits.append(p)
+        prev = value
+    return min(hits, key=lambda p: geometry2d.distance(p, near)) if hits else None
+
+
+class OffsetTest(unittest.TestCase):
+
+    def test_line_moves_right(self):
+        seg = wall_trim.offset_segment(wall_trim.line_segment((0, 0), (10, 0)), 0.5)
+        self.assertEqual((seg["p0"], seg["p1"]), ((0, -0.5), (10, -0.5)))
+
+    def test_arc_keeps_center(self):
+        arc = wall_trim.arc_segment((2, 0), (0, 2), (0, 0), 2.0, True)
+        moved = wall_trim.offset_segment(arc, 0.5)
+        self.assertAlmostEqual(moved["radius"], 2.5)
+        self.assertAlmostEqual(geometry2d.distance(moved["p1"], (0, 0)), 2.5)
+        inward = wall_trim.offset_segment(arc, -0.5)
+        self.assertAlmostEqual(inward["radius"], 1.5)
+        self.assertIsNone(wall_trim.offset_segment(arc, -2.0))
+
+
+class TrimPolygonTest(unittest.TestCase):
+
+    def _check_closed(self, result):
+        for k in range(len(result)):
+            _, cur = result[k]
+            _, nxt = result[(k + 1) % len(result)]
+            self.assertAlmostEqual(geometry2d.distance(cur[2], nxt[1]), 0.0, places=9)
+
+    def test_random_convex_matches_offset_lines(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            pts = _random_convex(rng, rng.randint(3, 9))
+            original = _polygon(pts)
+            if min(geometry2d.distance(s["p0"], s["p1"]) for s in original) < 0.5: continue
+            dist = rng.uniform(0.01, 0.3)
+            # Ambiente à esquerda: o revestimento entra (offset negativo)
+            moved = [wall_trim.offset_segment(s, -dist) for s in original]
+            result = wall_trim.trim_loop(moved)
+
+            self.assertEqual([i for i, _ in result], list(range(len(pts))))
+            self._check_closed(result)
+            for i, final in result:
+                self.assertEqual(final[0], LINE)
+                seg = original[i]
+                # Extremidades a 'dist' da própria reta e da reta vizinha
+                for p in final[1:]:
+                    self.assertAlmostEqual(_line_distance(p, seg["p0"], seg["p1"]), dist, places=6)
+                nxt = original[(i + 1) % len(original)]
+                self.assertAlmostEqual(_line_distance(final[2], nxt["p0"], nxt["p1"]), dist, places=6)
+
+    def test_concave_l_shape(self):
+        pts = [(0, 0), (10, 0), (10, 4), (4, 4), (4, 10), (0, 10)]
+        result = wall_trim.trim_loop([wall_trim.offset_segment(s, -0.25) for s in _polygon(pts)])
+        self._check_closed(result)
+        corners = sorted(final[1] for _, final in result)
+        expected = sorted([(0.25, 0.25), (9.75, 0.25), (9.75, 3.75), (3.75, 3.75), (3.75, 9.75), (0.25, 9.75)])
+        for got, exp in zip(corners, expected):
+            self.assertAlmostEqual(got[0], exp[0])
+            self.assertAlmostEqual(got[1], exp[1])
+
+    def test_collapsed_segment_is_dropped(self):
+        # Degrau de 0,2 pé com revestimento de 0,1: o trecho curto some no trim
+        pts = [(0, 0), (10, 0), (10, 5), (5, 5), (5, 5.2), (0, 5.2)]
+        result = wall_trim.trim_loop([wall_trim.offset_segment(s, -0.1) for s in _polygon(pts)])
+        self.assertEqual(len(result), 6)
+        result = wall_trim.trim_loop([wall_trim.offset_segment(s, -0.1) for s in _polygon(pts)],
+                                     min_length=0.5)
+        self.assertNotIn(3, [i for i, _ in result])
+
+
+class CornerPointTest(unittest.TestCase):
+
+    def test_line_arc_matches_sampling(self):
+        rng = random.Random(2)
+        for _ in range(10):
+            center = (rng.uniform(-2, 2), rng.uniform(-2, 2))
+            radius = rng.uniform(2, 6)
+            y = center[1] + rng.uniform(-0.9, 0.9) * radius
+            line = wall_trim.line_segment((center[0] - 20, y), (center[0], y))
+            hit_x = center[0] + math.sqrt(radius ** 2 - (y - center[1]) ** 2)
+            start = (hit_x, y)
+            arc = wall_trim.arc_segment(start, (center[0], center[1] + radius), center, radius, True)
+
+            got = wall_trim.corner_point(line, arc)
+            near = geometry2d.scale(geometry2d.add(line["p1"], arc["p0"]), 0.5)
+            ref = _sampled_circle_hits(center, radius, lambda p: p[1] - y, near)
+            self.assertLess(geometry2d.distance(got, ref), 1e-3)
+
+    def test_arc_arc_matches_sampling(self):
+        rng = random.Random(3)
+        for _ in range(10):
+            c1, r1 = (0.0, 0.0), rng.uniform(2, 5)
+            c2, r2 = (rng.uniform(1, 4), rng.uniform(-1, 1)), rng.uniform(2, 5)
+            hits = geometry2d.circle_intersections(c1, r1, c2, r2)
+            if not hits: continue
+            a = wall_trim.arc_segment((r1, 0.0), hits[0], c1, r1, True)
+            b = wall_trim.arc_segment(hits[0], hits[-1], c2, r2, True)
+
+            got = wall_trim.corner_point(a, b)
+            ref = _sampled_circle_hits(c1, r1, lambda p: geometry2d.distance(p, c2) - r2, hits[0])
+            self.assertLess(geometry2d.distance(got, ref), 1e-3)
+
+    def test_parallel_lines(self):
+        a = wall_trim.line_segment((0, 0), (10, 0))
+        b = wall_trim.line_segment((10, 1), (20, 1))
+        self.assertIsNone(wall_trim.corner_point(a, b))
+
+    def test_max_reach(self):
+        a = wall_trim.line_segment((0, 0), (10, 0))
+        b = wall_trim.line_segment((10, 1), (20, 1.001))
+        self.assertIsNone(wall_trim.corner_point(a, b, max_reach=50))
+
+
+class TrimArcTest(unittest.TestCase):
+
+    def test_stadium(self):
+        # Dois arcos não tangentes fechando um "estádio", revestimento para dentro
+        r = math.sqrt(8)
+        loop = [
+            wall_trim.line_segment((0, 0), (10, 0)),
+            wall_trim.arc_segment((10, 0), (10, 4), (8, 2), r, True),
+            wall_trim.line_segment((10, 4), (0, 4)),
+            wall_trim.arc_segment((0, 4), (0, 0), (2, 2), r, True),
+        ]
+        dist = 0.1
+        result = wall_trim.trim_loop([wall_trim.offset_segment(s, -dist) for s in loop])
+        self.assertEqual([f[0] for _, f in result], [LINE, ARC, LINE, ARC])
+        for k in range(4):
+            self.assertAlmostEqual(geometry2d.distance(result[k][1][2], result[(k + 1) % 4][1][1]), 0.0)
+        for i, final in result:
+            if final[0] != ARC: continue
+            center = loop[i]["center"]
+            # Extremidades e ponto médio sobre o círculo deslocado
+            for p in final[1:]:
+                self.assertAlmostEqual(geometry2d.distance(p, center), r - dist)
+            self.assertGreater(final[3][0] - center[0] if i == 1 else center[0] - final[3][0], 0)
+
+    def test_other_keeps_marker(self):
+        loop = [wall_trim.line_segment((0, 0), (10, 0)), wall_trim.other_segment((10, 0), (0, 0))]
+        result = wall_trim.trim_loop(loop)
+        self.assertEqual(result[1], (1, (OTHER,)))
+
+
+class RoomLeftSidesTest(unittest.TestCase):
+    """Lado do ambiente pela área com sinal, contra o teste pontual (força bruta)."""
+
+    OUTER = [(0, 0), (10, 0), (10, 8), (0, 8)]
+    PILLAR = [(4, 4), (4, 5), (5, 5), (5, 4)]
+
+    def _brute_left(self, loops, i):
+        # Ponto logo à esquerda do meio da primeira aresta: está no ambiente?
+        a, b = loops[i][0], loops[i][1]
+        mid = geometry2d.scale(geometry2d.add(a, b), 0.5)
+        left = geometry2d.perpendicular(geometry2d.normalize(geometry2d.sub(b, a)))
+        return geometry2d.point_in_loops(geometry2d.add(mid, geometry2d.scale(left, 1e-3)), loops)
+
+    def _check(self, loops):
+        sides = wall_trim.room_left_sides(loops)
+        self.assertEqual(sides, [self._brute_left(loops, i) for i in range(len(loops))])
+
+    def test_revit_orientation(self):
+        self.assertEqual(wall_trim.room_left_sides([self.OUTER, self.PILLAR]), [True, True])
+        self._check([self.OUTER, self.PILLAR])
+
+    def test_all_reversed(self):
+        loops = [self.OUTER[::-1], self.PILLAR[::-1]]
+        self.assertEqual(wall_trim.room_left_sides(loops), [False, False])
+        self._check(loops)
+
+    def test_random_rectangles_with_holes(self):
+        rng = random.Random(4)
+        for _ in range(30):
+            w, h = rng.uniform(5, 30), rng.uniform(5, 30)
+            outer = [(0, 0), (w, 0), (w, h), (0, h)]
+            if rng.random() < 0.5: outer = outer[::-1]
+            loops = [outer]
+            for k in range(rng.randint(0, 3)):
+                # Pilares em faixas separadas, sem se tocar
+                x0 = w * (k + 0.2) / 4.0
+                y0 = rng.uniform(0.5, h - 1.5)
+                hole = [(x0, y0), (x0, y0 + 1), (x0 + w / 10.0, y0 + 1), (x0 + w / 10.0, y0)]
+                if rng.random() < 0.5: hole = hole[::-1]
+                loops.append(hole)
+            self._check(loops)
+
+    def test_degenerate(self):
+        sliver = [(1, 1), (3, 1), (3, 1.00001)]
+        self.assertEqual(wall_trim.room_left_sides([self.OUTER, sliver, [(0, 0), (1, 1)]]),
+                         [True, None, None])
+        self.assertEqual(wall_trim.room_left_sides([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()